@@ -0,0 +1,132 @@
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '012c2f028980'
+down_revision = 'f5160358c14f'
+branch_labels = None
+depends_on = None
+
+# 差分同期の対象テーブルと主キー（src/utils/change_feed.py の SYNC_TABLES と同一）
+SYNC_TABLES = {
+    'mst_user': ['user_id'],
+    'mst_medical_facility': ['medical_id'],
+    'user_entity_link': ['entity_type', 'entity_relation_id'],
+    'mst_equipment_classification': ['classification_id'],
+    'medical_equipment_ledger': ['ledger_id'],
+    'medical_equipment_analysis_setting': ['ledger_id'],
+    'equipment_classification_report_selection': ['medical_id', 'rank'],
+}
+
+# SQLite: SQLAlchemy が書き込む日時と同じ形式（マイクロ秒6桁）。文字列比較で範囲検索するため形式を揃える
+SQLITE_NOW = "strftime('%Y-%m-%d %H:%M:%f000', 'now', 'localtime')"
+
+
+def _sqlite_row_key(table_name, row):
+    columns = ", ".join(f"'{column}', {row}.{column}" for column in SYNC_TABLES[table_name])
+    return f"json_object({columns})"
+
+
+def _sqlite_triggers(table_name):
+    return [
+        f"""
+        CREATE TRIGGER {table_name}_sync_ad AFTER DELETE ON {table_name} BEGIN
+            DELETE FROM sync_tombstone WHERE table_name = '{table_name}' AND row_key = {_sqlite_row_key(table_name, 'old')};
+            INSERT INTO sync_tombstone (table_name, row_key, deleted_at)
+            VALUES ('{table_name}', {_sqlite_row_key(table_name, 'old')}, {SQLITE_NOW});
+        END
+        """,
+        f"""
+        CREATE TRIGGER {table_name}_sync_ai AFTER INSERT ON {table_name} BEGIN
+            DELETE FROM sync_tombstone WHERE table_name = '{table_name}' AND row_key = {_sqlite_row_key(table_name, 'new')};
+        END
+        """,
+    ]
+
+
+# PostgreSQL: 主キーの列名をトリガーの引数で受け取る共通関数
+POSTGRESQL_TOMBSTONE_FUNCTION = """
+    CREATE OR REPLACE FUNCTION sync_tombstone_record() RETURNS trigger AS $$
+    DECLARE
+        key_column text;
+        key_value jsonb := '{}'::jsonb;
+    BEGIN
+        FOREACH key_column IN ARRAY TG_ARGV LOOP
+            IF TG_OP = 'DELETE' THEN
+                key_value := key_value || jsonb_build_object(key_column, to_jsonb(old) -> key_column);
+            ELSE
+                key_value := key_value || jsonb_build_object(key_column, to_jsonb(new) -> key_column);
+            END IF;
+        END LOOP;
+
+        DELETE FROM sync_tombstone WHERE table_name = TG_TABLE_NAME AND row_key = key_value::text;
+        IF TG_OP = 'DELETE' THEN
+            INSERT INTO sync_tombstone (table_name, row_key, deleted_at)
+            VALUES (TG_TABLE_NAME, key_value::text, localtimestamp);
+            RETURN old;
+        END IF;
+        RETURN new;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+
+def upgrade():
+    op.create_table(
+        'sync_tombstone',
+        sa.Column('tombstone_id', sa.Integer,
+            primary_key=True,
+            autoincrement=True,
+            nullable=False,
+        ),
+        sa.Column('table_name', sa.Text,
+            nullable=False,
+        ),
+        sa.Column('row_key', sa.Text,
+            nullable=False,
+        ),
+        sa.Column('deleted_at', sa.DateTime,
+            nullable=False,
+        ),
+    )
+    op.create_index('idx_sync_tombstone_table_name_row_key', 'sync_tombstone', ['table_name', 'row_key'], unique=True)
+    op.create_index('idx_sync_tombstone_table_name_deleted_at', 'sync_tombstone', ['table_name', 'deleted_at'])
+
+    dialect = op.get_bind().dialect.name
+    for table_name, key_columns in SYNC_TABLES.items():
+        if dialect == 'sqlite':
+            # 初期データの秒までの日時（'YYYY-MM-DD HH:MM:SS'）は、SQLAlchemy の形式（マイクロ秒付き）と
+            # 文字列比較の結果が食い違うため揃える
+            op.execute(
+                f"UPDATE {table_name} SET lastupdate = strftime('%Y-%m-%d %H:%M:%f000', lastupdate) "
+                f"WHERE length(lastupdate) = 19"
+            )
+        op.create_index(f'idx_{table_name}_lastupdate', table_name, ['lastupdate', *key_columns])
+
+    if dialect == 'postgresql':
+        op.execute(POSTGRESQL_TOMBSTONE_FUNCTION)
+        for table_name, key_columns in SYNC_TABLES.items():
+            arguments = ", ".join(f"'{column}'" for column in key_columns)
+            op.execute(
+                f"CREATE TRIGGER {table_name}_sync_aid AFTER INSERT OR DELETE ON {table_name} "
+                f"FOR EACH ROW EXECUTE FUNCTION sync_tombstone_record({arguments})"
+            )
+    elif dialect == 'sqlite':
+        for table_name in SYNC_TABLES:
+            for trigger in _sqlite_triggers(table_name):
+                op.execute(trigger)
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    for table_name in SYNC_TABLES:
+        if dialect == 'postgresql':
+            op.execute(f"DROP TRIGGER IF EXISTS {table_name}_sync_aid ON {table_name}")
+        elif dialect == 'sqlite':
+            op.execute(f"DROP TRIGGER IF EXISTS {table_name}_sync_ad")
+            op.execute(f"DROP TRIGGER IF EXISTS {table_name}_sync_ai")
+        op.drop_index(f'idx_{table_name}_lastupdate', table_name=table_name)
+    if dialect == 'postgresql':
+        op.execute("DROP FUNCTION IF EXISTS sync_tombstone_record()")
+
+    op.drop_index('idx_sync_tombstone_table_name_deleted_at', table_name='sync_tombstone')
+    op.drop_index('idx_sync_tombstone_table_name_row_key', table_name='sync_tombstone')
+    op.drop_table('sync_tombstone')
@@ -0,0 +1,63 @@
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '06856510ab43'
+down_revision = 'e71ca24a61f2'
+branch_labels = None
+depends_on = None
+
+# SQLite: mst_user_fts（FTS5 trigram）を mst_user と同期させるトリガー
+SQLITE_FTS_TRIGGERS = [
+    """
+    CREATE TRIGGER mst_user_fts_ai AFTER INSERT ON mst_user BEGIN
+        INSERT INTO mst_user_fts(rowid, user_name, e_mail) VALUES (new.rowid, new.user_name, new.e_mail);
+    END
+    """,
+    """
+    CREATE TRIGGER mst_user_fts_ad AFTER DELETE ON mst_user BEGIN
+        INSERT INTO mst_user_fts(mst_user_fts, rowid, user_name, e_mail) VALUES ('delete', old.rowid, old.user_name, old.e_mail);
+    END
+    """,
+    """
+    CREATE TRIGGER mst_user_fts_au AFTER UPDATE OF user_name, e_mail ON mst_user BEGIN
+        INSERT INTO mst_user_fts(mst_user_fts, rowid, user_name, e_mail) VALUES ('delete', old.rowid, old.user_name, old.e_mail);
+        INSERT INTO mst_user_fts(rowid, user_name, e_mail) VALUES (new.rowid, new.user_name, new.e_mail);
+    END
+    """,
+]
+
+def upgrade():
+    # テーブル定義書（mst_user.yaml）のインデックス
+    op.create_index('idx_user_entity', 'mst_user', ['entity_type', 'entity_relation_id'])
+    op.create_index('idx_user_email', 'mst_user', ['e_mail'])
+    op.create_index('idx_user_name', 'mst_user', ['user_name'])
+
+    # 部分一致・前方一致検索用のインデックス
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute("CREATE INDEX idx_user_name_trgm ON mst_user USING gin (user_name gin_trgm_ops)")
+        op.execute("CREATE INDEX idx_user_email_trgm ON mst_user USING gin (e_mail gin_trgm_ops)")
+    elif dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE mst_user_fts USING fts5("
+            "user_name, e_mail, content='mst_user', content_rowid='rowid', tokenize='trigram')"
+        )
+        for trigger in SQLITE_FTS_TRIGGERS:
+            op.execute(trigger)
+        op.execute("INSERT INTO mst_user_fts(mst_user_fts) VALUES ('rebuild')")
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS idx_user_email_trgm")
+        op.execute("DROP INDEX IF EXISTS idx_user_name_trgm")
+    elif dialect == 'sqlite':
+        for trigger in ('mst_user_fts_ai', 'mst_user_fts_ad', 'mst_user_fts_au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS mst_user_fts")
+
+    op.drop_index('idx_user_name', table_name='mst_user')
+    op.drop_index('idx_user_email', table_name='mst_user')
+    op.drop_index('idx_user_entity', table_name='mst_user')
@@ -0,0 +1,162 @@
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '10c7515fad3a'
+down_revision = '06856510ab43'
+branch_labels = None
+depends_on = None
+
+# 既存の機器分類から閉包テーブルを構築（親分類の隣接リストを再帰でたどる。移行時の1回のみ）
+BACKFILL_CLOSURE = """
+    INSERT INTO mst_equipment_classification_closure (ancestor_id, descendant_id, depth)
+    WITH RECURSIVE tree(ancestor_id, descendant_id, depth) AS (
+        SELECT classification_id, classification_id, 0 FROM mst_equipment_classification
+        UNION ALL
+        SELECT tree.ancestor_id, child.classification_id, tree.depth + 1
+        FROM tree
+        JOIN mst_equipment_classification child ON child.parent_classification_id = tree.descendant_id
+        WHERE tree.depth < 10
+    )
+    SELECT ancestor_id, descendant_id, MIN(depth) FROM tree GROUP BY ancestor_id, descendant_id
+"""
+
+# 閉包テーブルの更新処理（SQLite / PostgreSQL 共通のSQL。new/old は各トリガーで置き換える）
+# 付け替え・削除: 対象分類の祖先（自身を除く）と、対象分類の子孫（自身を含む）の組み合わせを削除
+DETACH_SUBTREE = """
+    DELETE FROM mst_equipment_classification_closure
+    WHERE descendant_id IN (
+        SELECT descendant_id FROM mst_equipment_classification_closure WHERE ancestor_id = {node}.classification_id
+    )
+    AND ancestor_id IN (
+        SELECT ancestor_id FROM mst_equipment_classification_closure
+        WHERE descendant_id = {node}.classification_id AND ancestor_id <> {node}.classification_id
+    );
+"""
+# 付け替え: 新しい親分類の祖先（親自身を含む）と、対象分類の子孫（自身を含む）の組み合わせを登録
+ATTACH_SUBTREE = """
+    INSERT INTO mst_equipment_classification_closure (ancestor_id, descendant_id, depth)
+    SELECT parent.ancestor_id, sub.descendant_id, parent.depth + sub.depth + 1
+    FROM mst_equipment_classification_closure parent
+    CROSS JOIN mst_equipment_classification_closure sub
+    WHERE parent.descendant_id = new.parent_classification_id AND sub.ancestor_id = new.classification_id;
+"""
+INSERT_NODE = """
+    INSERT INTO mst_equipment_classification_closure (ancestor_id, descendant_id, depth)
+    VALUES (new.classification_id, new.classification_id, 0);
+    INSERT INTO mst_equipment_classification_closure (ancestor_id, descendant_id, depth)
+    SELECT ancestor_id, new.classification_id, depth + 1
+    FROM mst_equipment_classification_closure
+    WHERE descendant_id = new.parent_classification_id;
+"""
+DELETE_NODE = DETACH_SUBTREE.format(node="old") + """
+    DELETE FROM mst_equipment_classification_closure
+    WHERE ancestor_id = old.classification_id OR descendant_id = old.classification_id;
+"""
+REPARENT_NODE = DETACH_SUBTREE.format(node="new") + ATTACH_SUBTREE
+
+SQLITE_CLOSURE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER mst_equipment_classification_closure_ai AFTER INSERT ON mst_equipment_classification BEGIN
+        {INSERT_NODE}
+    END
+    """,
+    # 自分の子孫を親分類に指定すると循環するため拒否する
+    """
+    CREATE TRIGGER mst_equipment_classification_closure_bu BEFORE UPDATE OF parent_classification_id ON mst_equipment_classification
+    WHEN new.parent_classification_id IS NOT NULL AND EXISTS (
+        SELECT 1 FROM mst_equipment_classification_closure
+        WHERE ancestor_id = new.classification_id AND descendant_id = new.parent_classification_id
+    )
+    BEGIN
+        SELECT RAISE(ABORT, 'parent_classification_id must not be a descendant of the classification');
+    END
+    """,
+    f"""
+    CREATE TRIGGER mst_equipment_classification_closure_au AFTER UPDATE OF parent_classification_id ON mst_equipment_classification
+    WHEN old.parent_classification_id IS NOT new.parent_classification_id
+    BEGIN
+        {REPARENT_NODE}
+    END
+    """,
+    f"""
+    CREATE TRIGGER mst_equipment_classification_closure_ad AFTER DELETE ON mst_equipment_classification BEGIN
+        {DELETE_NODE}
+    END
+    """,
+]
+
+POSTGRESQL_CLOSURE_FUNCTION = f"""
+    CREATE OR REPLACE FUNCTION mst_equipment_classification_closure_sync() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            {INSERT_NODE}
+            RETURN new;
+        ELSIF TG_OP = 'UPDATE' THEN
+            IF new.parent_classification_id IS NOT NULL AND EXISTS (
+                SELECT 1 FROM mst_equipment_classification_closure
+                WHERE ancestor_id = new.classification_id AND descendant_id = new.parent_classification_id
+            ) THEN
+                RAISE EXCEPTION 'parent_classification_id must not be a descendant of the classification';
+            END IF;
+            {REPARENT_NODE}
+            RETURN new;
+        ELSE
+            {DELETE_NODE}
+            RETURN old;
+        END IF;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+
+def upgrade():
+    op.create_table(
+        'mst_equipment_classification_closure',
+        sa.Column('ancestor_id', sa.Integer,
+            primary_key=True,
+            nullable=False,
+        ),
+        sa.Column('descendant_id', sa.Integer,
+            primary_key=True,
+            nullable=False,
+        ),
+        sa.Column('depth', sa.Integer,
+            nullable=False,
+        ),
+    )
+    op.create_index('idx_mst_equipment_classification_closure_descendant',
+                    'mst_equipment_classification_closure', ['descendant_id', 'depth'])
+
+    op.execute(BACKFILL_CLOSURE)
+
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute(POSTGRESQL_CLOSURE_FUNCTION)
+        op.execute(
+            "CREATE TRIGGER mst_equipment_classification_closure_aiud "
+            "AFTER INSERT OR DELETE ON mst_equipment_classification "
+            "FOR EACH ROW EXECUTE FUNCTION mst_equipment_classification_closure_sync()"
+        )
+        op.execute(
+            "CREATE TRIGGER mst_equipment_classification_closure_au "
+            "AFTER UPDATE OF parent_classification_id ON mst_equipment_classification "
+            "FOR EACH ROW WHEN (old.parent_classification_id IS DISTINCT FROM new.parent_classification_id) "
+            "EXECUTE FUNCTION mst_equipment_classification_closure_sync()"
+        )
+    elif dialect == 'sqlite':
+        for trigger in SQLITE_CLOSURE_TRIGGERS:
+            op.execute(trigger)
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("DROP TRIGGER IF EXISTS mst_equipment_classification_closure_au ON mst_equipment_classification")
+        op.execute("DROP TRIGGER IF EXISTS mst_equipment_classification_closure_aiud ON mst_equipment_classification")
+        op.execute("DROP FUNCTION IF EXISTS mst_equipment_classification_closure_sync()")
+    elif dialect == 'sqlite':
+        for trigger in ('ai', 'bu', 'au', 'ad'):
+            op.execute(f"DROP TRIGGER IF EXISTS mst_equipment_classification_closure_{trigger}")
+
+    op.drop_index('idx_mst_equipment_classification_closure_descendant',
+                  table_name='mst_equipment_classification_closure')
+    op.drop_table('mst_equipment_classification_closure')
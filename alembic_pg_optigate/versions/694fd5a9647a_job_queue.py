@@ -0,0 +1,71 @@
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '694fd5a9647a'
+down_revision = '012c2f028980'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'job_queue',
+        sa.Column('job_id', sa.Integer,
+            primary_key=True,
+            autoincrement=True,
+            nullable=False,
+        ),
+        sa.Column('job_type', sa.Text,
+            nullable=False,
+        ),
+        sa.Column('payload', sa.Text,
+            nullable=False,
+        ),
+        sa.Column('medical_id', sa.Integer,
+            nullable=True,
+        ),
+        sa.Column('priority', sa.Integer,
+            nullable=False,
+        ),
+        sa.Column('status', sa.Text,
+            nullable=False,
+        ),
+        sa.Column('attempts', sa.Integer,
+            nullable=False,
+        ),
+        sa.Column('max_attempts', sa.Integer,
+            nullable=False,
+        ),
+        sa.Column('run_after', sa.DateTime,
+            nullable=False,
+        ),
+        sa.Column('locked_by', sa.Text,
+            nullable=True,
+        ),
+        sa.Column('locked_until', sa.DateTime,
+            nullable=True,
+        ),
+        sa.Column('result', sa.Text,
+            nullable=True,
+        ),
+        sa.Column('last_error', sa.Text,
+            nullable=True,
+        ),
+        sa.Column('reg_user_id', sa.Text,
+            nullable=False,
+        ),
+        sa.Column('regdate', sa.DateTime,
+            nullable=False,
+        ),
+        sa.Column('update_user_id', sa.Text,
+            nullable=False,
+        ),
+        sa.Column('lastupdate', sa.DateTime,
+            nullable=False,
+        ),
+    )
+    op.create_index('idx_job_queue_status_priority', 'job_queue', ['status', 'priority', 'job_id'])
+
+def downgrade():
+    op.drop_index('idx_job_queue_status_priority', table_name='job_queue')
+    op.drop_table('job_queue')
@@ -0,0 +1,75 @@
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '7cc8e24c444d'
+down_revision = '694fd5a9647a'
+branch_labels = None
+depends_on = None
+
+# 既存の機器台帳・分析設定から集計値を作成（移行時の1回のみ。以降は取込・分析設定の更新時に増減分を加算）
+BACKFILL_STATS = """
+    INSERT INTO medical_equipment_classification_stat (
+        medical_id, classification_id, ledger_count, included_count, override_count,
+        stock_quantity, included_stock_quantity, reg_user_id, regdate, update_user_id, lastupdate
+    )
+    SELECT
+        medical_id, classification_id, COUNT(*), SUM(included), SUM(has_override),
+        SUM(stock_quantity), SUM(included * stock_quantity), '0', CURRENT_TIMESTAMP, '0', CURRENT_TIMESTAMP
+    FROM (
+        SELECT
+            l.medical_id,
+            COALESCE(s.override_classification_id, l.classification_id, 0) AS classification_id,
+            CASE WHEN COALESCE(s.override_is_included, l.is_included) THEN 1 ELSE 0 END AS included,
+            CASE WHEN s.ledger_id IS NULL THEN 0 ELSE 1 END AS has_override,
+            l.stock_quantity
+        FROM medical_equipment_ledger l
+        LEFT JOIN medical_equipment_analysis_setting s ON s.ledger_id = l.ledger_id
+    ) effective
+    GROUP BY medical_id, classification_id
+"""
+
+def upgrade():
+    op.create_table(
+        'medical_equipment_classification_stat',
+        sa.Column('medical_id', sa.Integer,
+            primary_key=True,
+            nullable=False,
+        ),
+        sa.Column('classification_id', sa.Integer,
+            primary_key=True,
+            nullable=False,
+        ),
+        sa.Column('ledger_count', sa.Integer,
+            nullable=False,
+        ),
+        sa.Column('included_count', sa.Integer,
+            nullable=False,
+        ),
+        sa.Column('override_count', sa.Integer,
+            nullable=False,
+        ),
+        sa.Column('stock_quantity', sa.Integer,
+            nullable=False,
+        ),
+        sa.Column('included_stock_quantity', sa.Integer,
+            nullable=False,
+        ),
+        sa.Column('reg_user_id', sa.Text,
+            nullable=False,
+        ),
+        sa.Column('regdate', sa.DateTime,
+            nullable=False,
+        ),
+        sa.Column('update_user_id', sa.Text,
+            nullable=False,
+        ),
+        sa.Column('lastupdate', sa.DateTime,
+            nullable=False,
+        ),
+    )
+
+    op.execute(BACKFILL_STATS)
+
+def downgrade():
+    op.drop_table('medical_equipment_classification_stat')
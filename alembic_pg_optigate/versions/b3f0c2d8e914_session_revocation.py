@@ -0,0 +1,31 @@
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'b3f0c2d8e914'
+down_revision = '7cc8e24c444d'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'session_revocation',
+        sa.Column('user_id', sa.Text,
+            primary_key=True,
+            nullable=False,
+        ),
+        sa.Column('revoked_at', sa.Integer,
+            nullable=False,
+        ),
+        sa.Column('update_user_id', sa.Text,
+            nullable=False,
+        ),
+        sa.Column('lastupdate', sa.DateTime,
+            nullable=False,
+        ),
+    )
+    op.create_index('idx_session_revocation_revoked_at', 'session_revocation', ['revoked_at'])
+
+def downgrade():
+    op.drop_index('idx_session_revocation_revoked_at', table_name='session_revocation')
+    op.drop_table('session_revocation')
@@ -0,0 +1,76 @@
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e71ca24a61f2'
+down_revision = '1767a534a2e0'
+branch_labels = None
+depends_on = None
+
+# 組織種別ごとの採番範囲（src/utils/user_id_allocator.py の USER_ID_RANGES と同一）
+USER_ID_RANGES = {
+    1: (100001, 199999),  # 医療機関
+    2: (200001, 299999),  # ディーラー
+    3: (300001, 399999),  # メーカー
+    9: (900001, 999999),  # システム
+}
+
+def upgrade():
+    user_id_sequence = op.create_table(
+        'user_id_sequence',
+        sa.Column('entity_type', sa.Integer,
+            primary_key=True,
+            nullable=False,
+        ),
+        sa.Column('range_start', sa.Integer,
+            nullable=False,
+        ),
+        sa.Column('range_end', sa.Integer,
+            nullable=False,
+        ),
+        sa.Column('last_value', sa.Integer,
+            nullable=False,
+        ),
+        sa.Column('reg_user_id', sa.Text,
+            nullable=False,
+        ),
+        sa.Column('regdate', sa.DateTime,
+            nullable=False,
+        ),
+        sa.Column('update_user_id', sa.Text,
+            nullable=False,
+        ),
+        sa.Column('lastupdate', sa.DateTime,
+            nullable=False,
+        ),
+    )
+
+    # 既存ユーザーの最大IDからカウンタを初期化（範囲検索はこの移行時の1回のみ）
+    conn = op.get_bind()
+    now = datetime.now()
+    rows = []
+    for entity_type, (range_start, range_end) in USER_ID_RANGES.items():
+        max_user_id = conn.execute(
+            sa.text(
+                "SELECT MAX(CAST(user_id AS INTEGER)) FROM mst_user "
+                "WHERE CAST(user_id AS INTEGER) BETWEEN :range_start AND :range_end"
+            ),
+            {"range_start": range_start, "range_end": range_end},
+        ).scalar()
+        rows.append({
+            "entity_type": entity_type,
+            "range_start": range_start,
+            "range_end": range_end,
+            "last_value": max_user_id if max_user_id is not None else range_start - 1,
+            "reg_user_id": "0",
+            "update_user_id": "0",
+        })
+    for row in rows:
+        conn.execute(
+            user_id_sequence.insert().values(regdate=now, lastupdate=now, **row)
+        )
+
+def downgrade():
+    op.drop_table('user_id_sequence')
@@ -0,0 +1,35 @@
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'f5160358c14f'
+down_revision = '10c7515fad3a'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        'equipment_classification_report_selection_version',
+        sa.Column('medical_id', sa.Integer,
+            primary_key=True,
+            nullable=False,
+        ),
+        sa.Column('version', sa.Integer,
+            nullable=False,
+        ),
+        sa.Column('reg_user_id', sa.Text,
+            nullable=False,
+        ),
+        sa.Column('regdate', sa.DateTime,
+            nullable=False,
+        ),
+        sa.Column('update_user_id', sa.Text,
+            nullable=False,
+        ),
+        sa.Column('lastupdate', sa.DateTime,
+            nullable=False,
+        ),
+    )
+
+def downgrade():
+    op.drop_table('equipment_classification_report_selection_version')
@@ -0,0 +1,394 @@
+"""bench_api_load.py
+
+APIの負荷試験（ベンチマーク）
+
+一時ディレクトリにDBをコピーして試験データ（医療機関N件・医療機関ごとの機器分類K件・機器台帳M件・公開レポート）を
+src/cli/generate_synthetic_data.py で登録し、
+uvicorn でAPIサーバーを起動して、以下のシナリオごとにレイテンシ（p50/p95/p99）とスループットを計測します。
+
+- login: ログイン（POST /api/v1/auth/login。パスワード照合のscryptを含む）
+- settings_list: 分析設定一覧の取得（GET /api/v1/medical-equipment-analysis-settings。100件/ページ）
+- override_update: 分類上書きの更新（PUT /api/v1/medical-equipment-analysis-settings/{ledger_id}/classification）
+- report_download: レポートのダウンロード（GET /api/v1/files/reports/download/{publication_id}）
+- upload: 3ファイルの一括アップロード（POST /api/v1/files/upload-files/{medical_id}。内容の検証を含む）
+
+実行方法:
+- python benchmarks/bench_api_load.py
+- python benchmarks/bench_api_load.py --facilities 10 --ledger 20000 --classifications 500 --concurrency 16
+- python benchmarks/bench_api_load.py --save-baseline   # 計測結果を基準値として保存
+- python benchmarks/bench_api_load.py --check           # 基準値と比較し、性能が劣化した場合は終了コード1
+
+Note:
+    - 元のDB・ファイルは変更しません（OPTISERVE_BASE_PATH に一時ディレクトリを指定してAPIサーバーを起動します）。
+    - 試験データは --seed で指定した乱数の種から生成するため、同じ引数であれば同じデータになります。
+    - 基準値（benchmarks/baselines/bench_api_load.json）は計測したマシンに依存します。
+      同じマシン・同じ引数で比較し、マシンを変えた場合は --save-baseline で保存し直してください。
+    - --check は各シナリオの p95 が基準値の (1 + tolerance) 倍を超えた場合、
+      またはスループットが基準値の 1 / (1 + tolerance) 倍を下回った場合を劣化とします。
+    - upload はアップロード後の台帳取込ジョブがAPIサーバー内で並行して実行されるため、他のシナリオよりばらつきが大きくなります。
+    - 各シナリオはワーカースレッドごとに医療機関を割り当てます。upload は同じ医療機関のファイルを同時に
+      上書きしないよう、同時実行数を医療機関数までに制限します。
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, List, NamedTuple
+
+import requests
+
+# プロジェクトルートをsys.pathに追加
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+if TYPE_CHECKING:
+    from src.cli.generate_synthetic_data import GeneratedFacility
+
+DEFAULT_BASELINE = os.path.join(project_root, "benchmarks", "baselines", "bench_api_load.json")
+PASSWORD = "Bench-Passw0rd!"
+AS_OF = date(2026, 10, 1)
+SCENARIOS = ("login", "settings_list", "override_update", "report_download", "upload")
+
+
+# ---------------------------------------------------------------------------
+# 試験データの生成
+# ---------------------------------------------------------------------------
+
+def seed_data(facilities: int, ledger: int, classifications: int, report_bytes: int, seed: int) -> List["GeneratedFacility"]:
+    """
+    一時ディレクトリのDB・ファイルに試験データを登録する（src/cli/generate_synthetic_data.py）
+
+    Args:
+        facilities (int): 医療機関の件数
+        ledger (int): 医療機関ごとの機器台帳の件数
+        classifications (int): 医療機関ごとの機器分類の件数（3階層。端数は切り捨て）
+        report_bytes (int): 公開レポート1ファイルのサイズ
+        seed (int): 乱数の種
+
+    Returns:
+        List[GeneratedFacility]: 登録した医療機関
+    """
+    from src.cli.generate_synthetic_data import GenerationSettings, generate
+    from src.database import SessionLocal
+
+    settings = GenerationSettings(
+        facilities=facilities, ledger=ledger, classifications=classifications, months=1,
+        report_bytes=report_bytes, password=PASSWORD, seed=seed, as_of=AS_OF
+    )
+    db = SessionLocal()
+    try:
+        return generate(settings, db)
+    finally:
+        db.close()
+
+
+def build_upload_files(rows: int) -> Dict[str, tuple]:
+    """アップロードする3ファイル（医療機器台帳・貸出履歴・故障履歴）を生成する"""
+    equipment = ["型番,製品名,メーカー名,分類,台数,設置日"]
+    equipment += [f"UP-{i:06d},機器{i % 500},メーカー{i % 40},分類{i % 50},{i % 3 + 1},2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}"
+                  for i in range(rows)]
+    rental = ["貸出ID,型番,貸出日,返却日"]
+    rental += [f"{i + 1},UP-{i % rows:06d},2025/{i % 12 + 1}/{i % 28 + 1},2025-12-31" for i in range(rows)]
+    failure = ["故障ID,型番,故障日,修理完了日"]
+    failure += [f"{i + 1},UP-{i % rows:06d},2025-{i % 12 + 1:02d}-01," for i in range(rows // 10)]
+    return {
+        "equipment_file": ("equipment.csv", ("\n".join(equipment) + "\n").encode("utf-8"), "text/csv"),
+        "rental_file": ("rental.csv", ("\n".join(rental) + "\n").encode("utf-8"), "text/csv"),
+        "failure_file": ("failure.csv", ("\n".join(failure) + "\n").encode("utf-8"), "text/csv"),
+    }
+
+
+# ---------------------------------------------------------------------------
+# APIサーバーの起動
+# ---------------------------------------------------------------------------
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(base_path: Path, port: int) -> subprocess.Popen:
+    """一時ディレクトリを OPTISERVE_BASE_PATH として uvicorn を起動し、応答するまで待つ"""
+    env = dict(os.environ, OPTISERVE_BASE_PATH=str(base_path), PYTHONPATH=project_root)
+    env.pop("DATABASE_URL", None)
+    log = open(base_path / "server.log", "wb")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--no-access-log"],
+        cwd=base_path, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"APIサーバーの起動に失敗しました（{base_path / 'server.log'}）")
+        try:
+            requests.get(f"http://127.0.0.1:{port}/openapi.json", timeout=1)
+            return process
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("APIサーバーが応答しません")
+
+
+# ---------------------------------------------------------------------------
+# シナリオ
+# ---------------------------------------------------------------------------
+
+class Context(NamedTuple):
+    """ワーカースレッドごとの実行内容"""
+    base_url: str
+    session: requests.Session
+    facility: "GeneratedFacility"
+    rng: random.Random
+    upload_files: Dict[str, tuple]
+
+
+def authorize_session(session: requests.Session, base_url: str, facility: "GeneratedFacility") -> None:
+    """医療機関のユーザーでログインし、セッショントークンをセッションの認証ヘッダーに設定する"""
+    data = session.post(f"{base_url}/api/v1/auth/login",
+                        json={"e_mail": facility.e_mails[0], "password": PASSWORD}).json()
+    if not data.get("success"):
+        raise RuntimeError(f"ログインに失敗しました: {facility.e_mails[0]}, {data.get('message')}")
+    session.headers["Authorization"] = f"{data['token_type']} {data['access_token']}"
+
+
+def scenario_login(ctx: Context) -> requests.Response:
+    return ctx.session.post(f"{ctx.base_url}/api/v1/auth/login",
+                            json={"e_mail": ctx.facility.e_mails[0], "password": PASSWORD})
+
+
+def scenario_settings_list(ctx: Context) -> requests.Response:
+    pages = max(1, math.ceil(len(ctx.facility.ledger_ids) / 100))
+    return ctx.session.get(
+        f"{ctx.base_url}/api/v1/medical-equipment-analysis-settings",
+        params={"medical_id": ctx.facility.medical_id, "skip": ctx.rng.randrange(pages) * 100, "limit": 100}
+    )
+
+
+def scenario_override_update(ctx: Context) -> requests.Response:
+    ledger_id = ctx.rng.choice(ctx.facility.ledger_ids)
+    return ctx.session.put(
+        f"{ctx.base_url}/api/v1/medical-equipment-analysis-settings/{ledger_id}/classification",
+        json={"override_classification_id": ctx.rng.choice(ctx.facility.classification_ids), "note": "負荷試験"}
+    )
+
+
+def scenario_report_download(ctx: Context) -> requests.Response:
+    publication_id = ctx.rng.choice(ctx.facility.publication_ids)
+    return ctx.session.get(
+        f"{ctx.base_url}/api/v1/files/reports/download/{publication_id}",
+        params={"user_id": ctx.facility.user_ids[0]}
+    )
+
+
+def scenario_upload(ctx: Context) -> requests.Response:
+    return ctx.session.post(
+        f"{ctx.base_url}/api/v1/files/upload-files/{ctx.facility.medical_id}",
+        data={"upload_user_id": ctx.facility.user_ids[0]},
+        files=ctx.upload_files
+    )
+
+
+SCENARIO_FUNCTIONS: Dict[str, Callable[[Context], requests.Response]] = {
+    "login": scenario_login,
+    "settings_list": scenario_settings_list,
+    "override_update": scenario_override_update,
+    "report_download": scenario_report_download,
+    "upload": scenario_upload,
+}
+
+
+# ---------------------------------------------------------------------------
+# 計測
+# ---------------------------------------------------------------------------
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """最近順位法によるパーセンタイル"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def run_scenario(name: str, base_url: str, facilities: List["GeneratedFacility"], requests_count: int, concurrency: int,
+                 warmup: int, seed: int, upload_files: Dict[str, tuple]) -> dict:
+    """
+    シナリオを requests_count 回実行し、レイテンシとスループットを集計する
+
+    ワーカースレッド t は医療機関 facilities[t % 医療機関数] を使用し、t, t + concurrency, ... 番目の要求を実行します。
+    """
+    if name == "upload":
+        concurrency = min(concurrency, len(facilities))
+    function = SCENARIO_FUNCTIONS[name]
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(concurrency + 1)
+
+    def worker(index: int) -> None:
+        ctx = Context(base_url, requests.Session(), facilities[index % len(facilities)],
+                      random.Random(seed * 1000 + index), upload_files)
+        if name != "login":
+            authorize_session(ctx.session, base_url, ctx.facility)
+        for _ in range(warmup):
+            function(ctx)
+        start_barrier.wait()
+        local_latencies = []
+        local_errors: Dict[str, int] = {}
+        for _ in range(index, requests_count, concurrency):
+            started = time.perf_counter()
+            try:
+                response = function(ctx)
+                _ = response.content
+                status = str(response.status_code) if response.status_code >= 400 else None
+            except requests.RequestException as e:
+                status = type(e).__name__
+            local_latencies.append(time.perf_counter() - started)
+            if status:
+                local_errors[status] = local_errors.get(status, 0) + 1
+        with lock:
+            latencies.extend(local_latencies)
+            for key, count in local_errors.items():
+                errors[key] = errors.get(key, 0) + count
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    start_barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed > 0 else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+    }
+
+
+def compare_with_baseline(results: Dict[str, dict], baseline: dict, tolerance: float) -> List[str]:
+    """基準値と比較し、劣化したシナリオの説明を返す"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        if result["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {base['p95_ms']:.1f}ms → {result['p95_ms']:.1f}ms")
+        if result["throughput_rps"] < base["throughput_rps"] / (1 + tolerance):
+            regressions.append(f"{name}: スループット {base['throughput_rps']:.1f} → {result['throughput_rps']:.1f} req/s")
+        if result["errors"] and not base.get("errors"):
+            regressions.append(f"{name}: エラー {result['errors']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="APIの負荷試験（ベンチマーク）")
+    parser.add_argument("--facilities", type=int, default=4, help="医療機関の件数（N）")
+    parser.add_argument("--ledger", type=int, default=5000, help="医療機関ごとの機器台帳の件数（M）")
+    parser.add_argument("--classifications", type=int, default=560, help="医療機関ごとの機器分類の件数（K）")
+    parser.add_argument("--report-bytes", type=int, default=512 * 1024, help="公開レポート1ファイルのサイズ")
+    parser.add_argument("--upload-rows", type=int, default=2000, help="アップロードする医療機器台帳・貸出履歴の行数")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="実行するシナリオ（カンマ区切り）")
+    parser.add_argument("--requests", type=int, default=200, help="シナリオごとの要求数")
+    parser.add_argument("--concurrency", type=int, default=8, help="同時実行数")
+    parser.add_argument("--warmup", type=int, default=2, help="ワーカースレッドごとの計測前の要求数")
+    parser.add_argument("--seed", type=int, default=42, help="乱数の種")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基準値のファイル")
+    parser.add_argument("--save-baseline", action="store_true", help="計測結果を基準値として保存する")
+    parser.add_argument("--check", action="store_true", help="基準値と比較し、劣化した場合は終了コード1")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="劣化とみなす割合（0.5: 50%%）")
+    parser.add_argument("--output", help="計測結果をJSONで出力するファイル")
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(scenarios) - set(SCENARIO_FUNCTIONS)
+    if unknown:
+        parser.error(f"不明なシナリオ: {', '.join(sorted(unknown))}")
+
+    base_path = Path(tempfile.mkdtemp(prefix="bench_api_load_"))
+    process = None
+    try:
+        shutil.copy(os.path.join(project_root, "poc_optigate.db"), base_path / "poc_optigate.db")
+        shutil.copy(os.path.join(project_root, "config.yaml"), base_path / "config.yaml")
+        os.environ["OPTISERVE_BASE_PATH"] = str(base_path)
+        os.environ["DATABASE_URL"] = f"sqlite:///{base_path / 'poc_optigate.db'}"
+
+        started = time.perf_counter()
+        facilities = seed_data(args.facilities, args.ledger, args.classifications, args.report_bytes, args.seed)
+        print(f"試験データ登録: 医療機関={len(facilities)}, 機器台帳={args.ledger}件/医療機関, "
+              f"機器分類={len(facilities[0].classification_ids) if facilities else 0}件（小分類）/医療機関, "
+              f"{time.perf_counter() - started:.1f}秒")
+
+        port = free_port()
+        process = start_server(base_path, port)
+        base_url = f"http://127.0.0.1:{port}"
+        upload_files = build_upload_files(args.upload_rows)
+
+        results = {}
+        print(f"{'scenario':<16} {'requests':>8} {'conc':>4} {'rps':>8} {'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9} errors")
+        for name in scenarios:
+            result = run_scenario(name, base_url, facilities, args.requests, args.concurrency,
+                                  args.warmup, args.seed, upload_files)
+            results[name] = result
+            print(f"{name:<16} {result['requests']:>8} {result['concurrency']:>4} {result['throughput_rps']:>8.1f} "
+                  f"{result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} {result['p99_ms']:>9.1f} {result['errors'] or ''}")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(30)
+        shutil.rmtree(base_path, ignore_errors=True)
+
+    report = {
+        "measured_at": datetime.now().isoformat(timespec="seconds"),
+        "machine": {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()},
+        "parameters": {key: getattr(args, key) for key in
+                       ("facilities", "ledger", "classifications", "report_bytes", "upload_rows",
+                        "requests", "concurrency", "warmup", "seed")},
+        "results": results,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    if args.save_baseline:
+        Path(args.baseline).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.baseline).write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"基準値を保存しました: {args.baseline}")
+
+    if args.check:
+        if not os.path.exists(args.baseline):
+            print(f"基準値のファイルがありません: {args.baseline}")
+            sys.exit(1)
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("parameters") != report["parameters"]:
+            print("⚠️ 基準値と引数が異なるため、比較結果は参考値です")
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print("❌ 基準値から劣化しました:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"✅ 基準値の範囲内です（許容: {args.tolerance:.0%}）")
+
+
+if __name__ == "__main__":
+    main()
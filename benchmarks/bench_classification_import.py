@@ -0,0 +1,81 @@
+"""bench_classification_import.py
+
+機器分類マスタ一括取込のベンチマーク
+
+大分類・中分類・小分類の3階層の機器分類（既定10万行）のCSVを生成し、
+src/utils/classification_import.py で取り込む時間を計測します。
+2回目は同じファイルを再取込し、既存分類との照合（全件変更なし）の時間を計測します。
+
+実行方法:
+- python benchmarks/bench_classification_import.py
+- python benchmarks/bench_classification_import.py --level1 100 --level2 10 --level3 10
+
+Note:
+    - poc_optigate.db を一時ディレクトリにコピーして計測します（元のDBは変更しません）。
+"""
+import argparse
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# プロジェクトルートをsys.pathに追加
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+
+def build_csv(medical_id: int, level1: int, level2: int, level3: int) -> bytes:
+    """3階層の機器分類CSVを生成する"""
+    lines = ["classification_id,medical_id,classification_level,classification_name,parent_id,publication_classification_id"]
+    file_id = 0
+    for i in range(level1):
+        file_id += 1
+        id1 = file_id
+        lines.append(f"{id1},{medical_id},1,大分類{i},,")
+        for j in range(level2):
+            file_id += 1
+            id2 = file_id
+            lines.append(f"{id2},{medical_id},2,中分類{i}-{j},{id1},")
+            for k in range(level3):
+                file_id += 1
+                lines.append(f"{file_id},{medical_id},3,小分類{i}-{j}-{k},{id2},{k + 1}")
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="機器分類マスタ一括取込のベンチマーク")
+    parser.add_argument("--medical-id", type=int, default=5, help="取込先の医療機関ID")
+    parser.add_argument("--level1", type=int, default=1000, help="大分類の件数")
+    parser.add_argument("--level2", type=int, default=9, help="大分類あたりの中分類の件数")
+    parser.add_argument("--level3", type=int, default=10, help="中分類あたりの小分類の件数")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_classification_import_")
+    db_path = os.path.join(workdir, "poc_optigate.db")
+    shutil.copy(os.path.join(project_root, "poc_optigate.db"), db_path)
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+
+    from src.database import SessionLocal
+    from src.utils.classification_import import import_classifications, iter_csv_rows
+
+    data = build_csv(args.medical_id, args.level1, args.level2, args.level3)
+    try:
+        for label in ("新規登録", "再取込（変更なし）"):
+            db = SessionLocal()
+            try:
+                started = time.perf_counter()
+                result = import_classifications(iter_csv_rows(io.BytesIO(data)), db, user_id="900001")
+                elapsed = time.perf_counter() - started
+            finally:
+                db.close()
+            print(f"{label}: 行数={result.total_rows}, 登録={result.inserted_count}, "
+                  f"変更なし={result.unchanged_count}, エラー={result.error_count}, "
+                  f"処理時間={elapsed:.2f}秒 ({result.total_rows / elapsed:,.0f} rows/sec)")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""bench_compression.py
+
+レスポンスの圧縮（src/utils/compression.py）のベンチマーク
+
+一覧のレスポンス（JSON）について、圧縮方式・レベルごとに以下を計測します。
+
+- 送信バイト数と圧縮率
+- 圧縮のCPU時間（1レスポンスあたりの中央値）
+- 低速回線での転送時間の目安（送信バイト数 / 回線速度。往復遅延は含まない）
+
+対象のレスポンス:
+- settings_list: 分析設定一覧（GET /api/v1/medical-equipment-analysis-settings）1000件。変更履歴あり
+- classification_list: 機器分類一覧（GET /api/v1/equipment-classifications/{medical_id}）1000件
+
+実行方法:
+- python benchmarks/bench_compression.py
+- python benchmarks/bench_compression.py --items 1000 --repeat 30 --mbps 1 10
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List
+
+# プロジェクトルートをsys.pathに追加
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from benchmarks.bench_json_serialization import generate_rows
+from src.routers.medical_equipment_analysis import build_analysis_item
+from src.utils.compression import BROTLI_AVAILABLE, CompressionSettings, _Compressor
+from src.utils.json_response import dumps_json
+
+
+def settings_list_body(items: int) -> bytes:
+    rows = generate_rows(items, override_ratio=0.3)
+    return dumps_json({"items": [build_analysis_item(row) for row in rows], "total_count": items, "has_next": False})
+
+
+def classification_list_body(items: int) -> bytes:
+    timestamp = datetime(2026, 10, 1, 9, 0, 0).isoformat()
+    classifications = []
+    for i in range(items):
+        level = 1 if i < 10 else 2 if i < 100 else 3
+        classifications.append({
+            "medical_id": 1,
+            "classification_level": level,
+            "classification_name": f"{['大', '中', '小'][level - 1]}分類（輸液・栄養関連機器）{i}",
+            "parent_classification_id": None if level == 1 else (i % 10 + 1 if level == 2 else i % 90 + 11),
+            "publication_classification_id": 1000 + i % 300,
+            "classification_id": i + 1,
+            "regdate": timestamp,
+            "lastupdate": timestamp,
+        })
+    return dumps_json({"total": items, "skip": 0, "limit": items, "items": classifications})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="レスポンスの圧縮のベンチマーク")
+    parser.add_argument("--items", type=int, default=1000, help="一覧の件数")
+    parser.add_argument("--repeat", type=int, default=30, help="計測回数")
+    parser.add_argument("--mbps", type=float, nargs="+", default=[1.0, 10.0], help="転送時間の目安を計算する回線速度（Mbps）")
+    args = parser.parse_args()
+
+    bodies: Dict[str, bytes] = {
+        "settings_list": settings_list_body(args.items),
+        "classification_list": classification_list_body(args.items),
+    }
+    methods = [("identity", None, CompressionSettings())]
+    methods += [(f"gzip-{level}", "gzip", CompressionSettings(gzip_level=level)) for level in (1, 6, 9)]
+    if BROTLI_AVAILABLE:
+        methods += [(f"br-{quality}", "br", CompressionSettings(brotli_quality=quality)) for quality in (1, 4, 6, 11)]
+
+    print(f"件数={args.items}, 計測回数={args.repeat}, brotli={BROTLI_AVAILABLE}")
+    for name, body in bodies.items():
+        print(f"\n[{name}] 圧縮前={len(body):,}バイト")
+        for label, encoding, settings in methods:
+            if encoding is None:
+                size, timings = len(body), [0.0]
+            else:
+                timings: List[float] = []
+                for _ in range(args.repeat if settings.brotli_quality < 10 else max(args.repeat // 10, 1)):
+                    started = time.perf_counter()
+                    compressed = _Compressor(encoding, settings).compress(body, finish=True)
+                    timings.append((time.perf_counter() - started) * 1000)
+                size = len(compressed)
+            transfer = ", ".join(f"{mbps:g}Mbps={size * 8 / (mbps * 1_000_000) * 1000:7.0f}ms" for mbps in args.mbps)
+            print(
+                f"  {label:>9}: {size:>9,}バイト（{size / len(body):6.1%}）, "
+                f"CPU={statistics.median(timings):6.2f}ms, 転送={transfer}"
+            )
+
+
+if __name__ == "__main__":
+    main()
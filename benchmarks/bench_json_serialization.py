@@ -0,0 +1,157 @@
+"""bench_json_serialization.py
+
+一覧のレスポンスのシリアライズ（src/utils/json_response.py）のベンチマーク
+
+分析設定一覧（GET /api/v1/medical-equipment-analysis-settings）の1ページ（既定1000件。変更履歴あり）について、
+クエリの行を取得した後、レスポンスのJSON（バイト列）を作成するまでの処理時間を以下の方式ごとに計測します。
+
+- model+json: 項目ごとに MedicalEquipmentAnalysisResponse を生成し、FastAPI の response_model による
+  検証・変換（serialize_response）の後、Starlette の JSONResponse（標準の json モジュール）でシリアライズ（変更前）
+- model+orjson: 上記のシリアライズのみ FastJSONResponse（orjson）に変更（デフォルトのレスポンスクラスの変更のみの効果）
+- rows+orjson: 行のタプルから辞書を組み立て（build_analysis_item）、FastJSONResponse で直接シリアライズ（変更後）
+
+実行方法:
+- python benchmarks/bench_json_serialization.py
+- python benchmarks/bench_json_serialization.py --items 1000 --repeat 50 --override-ratio 0.3
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List, NamedTuple, Optional
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+# プロジェクトルートをsys.pathに追加
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.routers.medical_equipment_analysis import build_analysis_item, parse_note_history
+from src.schemas.medical_equipment_analysis import (
+    MedicalEquipmentAnalysisListResponse,
+    MedicalEquipmentAnalysisResponse,
+)
+from src.utils.json_response import ORJSON_AVAILABLE, FastJSONResponse
+
+
+class AnalysisRow(NamedTuple):
+    """一覧のクエリの行（src/routers/medical_equipment_analysis.py の列と同じ）"""
+    ledger_id: int
+    medical_id: int
+    model_number: str
+    product_name: Optional[str]
+    maker_name: Optional[str]
+    stock_quantity: int
+    is_included: bool
+    classification_id: Optional[int]
+    setting_ledger_id: Optional[int]
+    override_is_included: Optional[bool]
+    override_classification_id: Optional[int]
+    note: Optional[str]
+    lastupdate: Optional[datetime]
+    update_user_id: Optional[str]
+    classification_name: Optional[str]
+    classification_level: Optional[int]
+    override_classification_exists: Optional[int]
+    override_classification_name: Optional[str]
+    override_classification_level: Optional[int]
+
+
+def generate_rows(count: int, override_ratio: float, seed: int = 1) -> List[AnalysisRow]:
+    """一覧の1ページ分の行を生成する（上書き設定のある行には1〜3件の変更履歴を付ける）"""
+    rng = random.Random(seed)
+    base_time = datetime(2026, 10, 1, 9, 0, 0)
+    rows = []
+    for i in range(count):
+        has_override = rng.random() < override_ratio
+        note = None
+        if has_override:
+            note = json.dumps([
+                {"user_id": "100001", "timestamp": (base_time - timedelta(days=n)).strftime("%Y-%m-%d %H:%M:%S"),
+                 "note": f"分類を見直し（{n + 1}回目）"}
+                for n in range(rng.randint(1, 3))
+            ], ensure_ascii=False)
+        rows.append(AnalysisRow(
+            ledger_id=i + 1, medical_id=1, model_number=f"MODEL-{i:05d}", product_name=f"輸液ポンプ{i % 100}",
+            maker_name=f"メーカー{i % 20}", stock_quantity=i % 5 + 1, is_included=i % 7 != 0,
+            classification_id=100 + i % 50,
+            setting_ledger_id=i + 1 if has_override else None,
+            override_is_included=(i % 2 == 0) if has_override else None,
+            override_classification_id=200 + i % 10 if has_override else None,
+            note=note, lastupdate=base_time if has_override else None,
+            update_user_id="100001" if has_override else None,
+            classification_name=f"小分類{i % 50}", classification_level=3,
+            override_classification_exists=200 + i % 10 if has_override else None,
+            override_classification_name=f"上書き分類{i % 10}" if has_override else None,
+            override_classification_level=3 if has_override else None,
+        ))
+    return rows
+
+
+def build_models(rows: List[AnalysisRow]) -> MedicalEquipmentAnalysisListResponse:
+    """変更前の一覧の組み立て（項目ごとにモデルを生成）"""
+    items = []
+    for row in rows:
+        item = build_analysis_item(row)
+        item["note_history"] = parse_note_history(row.note if row.setting_ledger_id is not None else "")
+        item["last_modified"] = row.lastupdate
+        items.append(MedicalEquipmentAnalysisResponse(**item))
+    return MedicalEquipmentAnalysisListResponse(items=items, total_count=len(rows), has_next=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="一覧のレスポンスのシリアライズのベンチマーク")
+    parser.add_argument("--items", type=int, default=1000, help="1ページの件数")
+    parser.add_argument("--repeat", type=int, default=30, help="計測回数")
+    parser.add_argument("--override-ratio", type=float, default=0.3, help="上書き設定（変更履歴）のある行の割合")
+    args = parser.parse_args()
+
+    rows = generate_rows(args.items, args.override_ratio)
+    field = create_model_field(name="Response", type_=MedicalEquipmentAnalysisListResponse, mode="serialization")
+
+    def via_response_model(response_class) -> Callable[[], bytes]:
+        def run() -> bytes:
+            content = asyncio.run(serialize_response(field=field, response_content=build_models(rows)))
+            return response_class(content).body
+        return run
+
+    def via_rows() -> bytes:
+        return FastJSONResponse({
+            "items": [build_analysis_item(row) for row in rows],
+            "total_count": len(rows),
+            "has_next": False,
+        }).body
+
+    methods = [("model+json", via_response_model(JSONResponse))]
+    if ORJSON_AVAILABLE:
+        methods.append(("model+orjson", via_response_model(FastJSONResponse)))
+    methods.append(("rows+orjson" if ORJSON_AVAILABLE else "rows+json", via_rows))
+
+    print(f"件数={args.items}, 変更履歴ありの割合={args.override_ratio}, 計測回数={args.repeat}, orjson={ORJSON_AVAILABLE}")
+    expected = json.loads(methods[0][1]())
+    baseline_ms = None
+    for label, run in methods:
+        body = run()
+        assert json.loads(body) == expected, f"{label} の出力が変更前と異なります"
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - started) * 1000)
+        median_ms = statistics.median(timings)
+        baseline_ms = baseline_ms or median_ms
+        print(
+            f"{label:>13}: 中央値={median_ms:7.2f}ms, 最小={min(timings):7.2f}ms, "
+            f"{len(body):,}バイト, 変更前比={baseline_ms / median_ms:5.1f}倍"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""bench_password_hash.py
+
+パスワード照合（scrypt）のベンチマーク
+
+ログイン1回あたりのKDF計算時間から、1コアあたりのログイン処理数（logins/sec/core）を計測します。
+あわせて、ハッシュ計算用スレッドプール経由で並列に照合した場合のスループットを計測します。
+
+実行方法:
+- python benchmarks/bench_password_hash.py
+- python benchmarks/bench_password_hash.py --iterations 50 --concurrency 8
+
+Note:
+    - コストは config.yaml の security.password_hash の設定値を使用します。
+    - --n を指定すると scrypt_n を上書きして計測します（コスト調整の目安に使用）。
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# プロジェクトルートをsys.pathに追加
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.utils import password as password_utils
+
+
+def main():
+    parser = argparse.ArgumentParser(description="パスワード照合（scrypt）のベンチマーク")
+    parser.add_argument("--iterations", type=int, default=30, help="計測回数")
+    parser.add_argument("--concurrency", type=int, default=os.cpu_count() or 1, help="同時ログイン数")
+    parser.add_argument("--n", type=int, default=None, help="scrypt_n の上書き")
+    args = parser.parse_args()
+
+    settings = password_utils.get_password_hash_settings()
+    if args.n:
+        settings = settings._replace(scrypt_n=args.n)
+        password_utils.get_password_hash_settings.cache_clear()
+        password_utils.get_password_hash_settings = lambda: settings
+
+    stored = password_utils.hash_password("Bench-Passw0rd!")
+
+    # 1スレッド（1コア相当）での照合
+    started = time.perf_counter()
+    for _ in range(args.iterations):
+        assert password_utils.verify_password("Bench-Passw0rd!", stored)
+    single_elapsed = time.perf_counter() - started
+    per_login_ms = single_elapsed / args.iterations * 1000
+
+    # リクエストスレッド（concurrency）からプール経由で照合
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as request_threads:
+        results = list(request_threads.map(
+            lambda _: password_utils.verify_password_in_pool("Bench-Passw0rd!", stored),
+            range(args.iterations * args.concurrency)
+        ))
+    pool_elapsed = time.perf_counter() - started
+    assert all(results)
+
+    print(f"scrypt: n={settings.scrypt_n}, r={settings.scrypt_r}, p={settings.scrypt_p}")
+    print(f"KDFプール: max_workers={settings.max_workers}, CPU数={os.cpu_count()}")
+    print(f"照合1回あたり: {per_login_ms:.1f} ms")
+    print(f"logins/sec/core: {args.iterations / single_elapsed:.1f}")
+    print(f"プール経由（同時{args.concurrency}）: {len(results) / pool_elapsed:.1f} logins/sec")
+
+
+if __name__ == "__main__":
+    main()
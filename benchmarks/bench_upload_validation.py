@@ -0,0 +1,78 @@
+"""bench_upload_validation.py
+
+アップロードファイルの内容の検証（src/utils/upload_validation.py）のベンチマーク
+
+医療機器台帳・貸出履歴のCSV（既定100万行）を生成し、検証の処理時間と1秒あたりの行数を計測します。
+ダブルクォートを含むファイル（チャンク単位の照合を使わず、csv モジュールで1行ずつ検証）も計測します。
+
+実行方法:
+- python benchmarks/bench_upload_validation.py
+- python benchmarks/bench_upload_validation.py --rows 200000
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# プロジェクトルートをsys.pathに追加
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.utils.upload_validation import validate_upload_file
+
+
+def write_equipment_csv(path: Path, rows: int, quoted: bool = False) -> None:
+    """医療機器台帳CSV（型番・製品名・メーカー名・分類・台数・設置日）を生成する"""
+    with open(path, "w", encoding="cp932", newline="") as f:
+        f.write("型番,製品名,メーカー名,分類,台数,設置日\r\n")
+        product = '"輸液ポンプ, 汎用"' if quoted else "輸液ポンプ"
+        for i in range(rows):
+            f.write(f"MODEL-{i % 5000:05d},{product}{i % 100},メーカー{i % 20},分類{i % 50},{i % 3 + 1},2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}\r\n")
+
+
+def write_rental_csv(path: Path, rows: int) -> None:
+    """貸出履歴CSV（貸出ID・型番・貸出日・返却日）を生成する"""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("貸出ID,型番,貸出日,返却日\n")
+        for i in range(rows):
+            f.write(f"{i + 1},MODEL-{i % 5000:05d},2024/{i % 12 + 1}/{i % 28 + 1},{'' if i % 7 else '2024-12-31'}\n")
+
+
+def measure(label: str, path: Path, file_type: int) -> None:
+    started = time.perf_counter()
+    result = validate_upload_file(path, file_type)
+    elapsed = time.perf_counter() - started
+    size_mb = path.stat().st_size / 1024 / 1024
+    print(
+        f"{label}: 行数={result.total_rows:,}, エラー={len(result.errors)}, 文字コード={result.encoding}, "
+        f"{size_mb:.1f}MB, 処理時間={elapsed:.2f}秒, {result.total_rows / elapsed:,.0f}行/秒"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="アップロードファイルの内容の検証のベンチマーク")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="生成する行数")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="bench_upload_validation_"))
+    try:
+        equipment = workdir / "equipment.csv"
+        write_equipment_csv(equipment, args.rows)
+        measure("医療機器台帳（cp932・CRLF）", equipment, 1)
+
+        rental = workdir / "rental.csv"
+        write_rental_csv(rental, args.rows)
+        measure("貸出履歴（UTF-8・LF）", rental, 2)
+
+        quoted = workdir / "equipment_quoted.csv"
+        write_equipment_csv(quoted, args.rows, quoted=True)
+        measure("医療機器台帳（ダブルクォートあり・1行ずつ検証）", quoted, 1)
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,417 @@
+"""generate_synthetic_data.py
+
+大規模な試験データ（合成データ）を生成してDBに登録するコマンドラインツール
+
+実運用に近い件数・分布の医療機関・ユーザー・機器分類・機器台帳・分析設定の上書き・
+アップロード履歴・レポート公開履歴を、一括INSERTで登録します（SQLite / PostgreSQL）。
+
+実行方法:
+- python -m src.cli.generate_synthetic_data --facilities 20
+- python -m src.cli.generate_synthetic_data --facilities 5 --ledger 50000 --months 24 --seed 7
+- DATABASE_URL=postgresql://usr_optigate@localhost/pg_optigate python -m src.cli.generate_synthetic_data --facilities 100
+
+Note:
+    - 同じ --seed・引数であれば同じデータを生成します（医療機関ごとに乱数の種を分けるため、医療機関数を変えても
+      先頭の医療機関のデータは変わりません）。日時は --as-of（既定: 実行日）からの相対値です。
+    - 分布
+        - 機器台帳の件数: 医療機関ごとに対数正規分布（中央値 --ledger-median）。--ledger で固定値を指定
+        - 機器分類: data/mst_equipment_classification.csv の医療機関ごとの分類の木（階層・子の数・名称）から1つを選んで複製
+          （機器分類の取込と同じ処理で登録するため、閉包テーブルも作成されます）。
+          --classifications を指定した場合は、その件数の3階層の木を作成します
+        - 機器の分類: 最下位の分類にZipf分布で偏らせ、5%は分類無し / 台数: 7割が1台、まれに数十台 / 分析対象: 92%
+        - ユーザー: 医療機関ごとに1〜6人（本登録85%・仮登録10%・利用停止5%）
+        - 分析設定の上書き: 機器台帳の --override-ratio（分析対象フラグのみ6割・分類の上書き4割）
+        - アップロード履歴・レポート公開履歴: 過去 --months か月分（ファイル種別ごとに7〜9割の月でアップロード）
+    - ID（医療機関ID・機器台帳ID・user_id）はDBの採番（自動採番・user_id_sequence）を使用します。
+    - 機器分類ごとの集計値（medical_equipment_classification_stat）も作成します。
+    - --report-bytes を指定すると、公開レポートのファイル（内容はダミー）を files/reports に作成します。
+    - 全ユーザーのパスワードは --password です（ハッシュは1回だけ計算して共有します。ソルトは実行ごとに異なります）。
+
+ChangeLog:
+    v1.0.0 (2026-10-19)
+    - 新規作成
+"""
+import argparse
+import csv
+import json
+import math
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from ..models.pg_optigate.facility_upload_log import FacilityUploadLog
+from ..models.pg_optigate.medical_equipment_analysis_setting import MedicalEquipmentAnalysisSetting
+from ..models.pg_optigate.medical_equipment_ledger import MedicalEquipmentLedger
+from ..models.pg_optigate.mst_equipment_classification import MstEquipmentClassification
+from ..models.pg_optigate.mst_medical_facility import MstMedicalFacility
+from ..models.pg_optigate.mst_user import MstUser
+from ..models.pg_optigate.report_publication_log import ReportPublicationLog
+from ..models.pg_optigate.user_entity_link import UserEntityLink
+from ..utils.classification_import import import_classifications
+from ..utils.equipment_stats import rebuild_equipment_stats
+from ..utils.password import hash_password
+from ..utils.path_config import path_config
+from ..utils.user_id_allocator import allocate_user_ids
+
+DEFAULT_TEMPLATE = Path(__file__).resolve().parents[2] / "data" / "mst_equipment_classification.csv"
+SYSTEM_USER_ID = "900001"
+# 1文で登録する行数
+BATCH_SIZE = 5000
+
+PREFECTURES = (("東京都", 14), ("神奈川県", 9), ("大阪府", 9), ("愛知県", 7), ("埼玉県", 7), ("千葉県", 6),
+               ("兵庫県", 5), ("北海道", 5), ("福岡県", 5), ("静岡県", 4), ("宮城県", 2), ("広島県", 3))
+FACILITY_SUFFIXES = ("総合病院", "大学病院", "医療センター", "市民病院", "記念病院", "中央病院", "赤十字病院")
+PLACE_NAMES = ("青葉", "桜台", "港南", "北山", "東和", "緑ヶ丘", "若葉", "富士見", "朝日", "中原", "西条", "南陽")
+MAKERS = ("テルモ", "日本光電", "フクダ電子", "オリンパス", "ニプロ", "キヤノンメディカル", "富士フイルム", "島津製作所",
+          "シスメックス", "アトムメディカル", "パラマウントベッド", "メドトロニック", "GEヘルスケア", "フィリップス",
+          "シーメンスヘルスケア", "ドレーゲル", "泉工医科工業", "大研医器", "トップ", "JMS")
+# アップロードファイルの種別（1: 医療機器台帳, 2: 貸出履歴, 3: 故障履歴）ごとのファイル名とアップロードされる割合
+UPLOAD_FILES = {1: ("equipment.csv", 0.9), 2: ("rental.csv", 0.8), 3: ("failure.csv", 0.7)}
+# 公開レポートの種別（1: 分析レポート, 2: 故障リスト, 3: 未実績リスト）ごとのファイル名
+REPORT_FILES = {1: "analysis_report.pdf", 2: "failure_list.xlsx", 3: "unachieved_list.xlsx"}
+
+
+class GenerationSettings(NamedTuple):
+    """生成する件数・分布"""
+    facilities: int = 10
+    ledger: Optional[int] = None  # 医療機関ごとの機器台帳の件数（None の場合は対数正規分布）
+    ledger_median: int = 20000
+    ledger_sigma: float = 0.6
+    ledger_min: int = 500
+    ledger_max: int = 80000
+    classifications: Optional[int] = None  # 医療機関ごとの機器分類の件数（None の場合は雛形の木を複製）
+    override_ratio: float = 0.03
+    months: int = 12
+    report_bytes: int = 0
+    password: str = "Passw0rd!"
+    seed: int = 42
+    as_of: date = date.today()
+    template: Path = DEFAULT_TEMPLATE
+
+
+class GeneratedFacility(NamedTuple):
+    """生成した医療機関（ベンチマーク等で使用する値）"""
+    medical_id: int
+    user_ids: List[str]  # 本登録のユーザー
+    e_mails: List[str]
+    classification_ids: List[int]  # 最下位の機器分類
+    ledger_ids: List[int]
+    publication_ids: List[int]
+
+
+class _TemplateNode(NamedTuple):
+    file_id: int
+    level: int
+    name: str
+    parent_file_id: Optional[int]
+
+
+def load_classification_templates(path: Path) -> List[List[_TemplateNode]]:
+    """機器分類CSV（classification_id, medical_id, classification_level, classification_name, parent_id）を医療機関ごとの木に分ける"""
+    trees: Dict[str, List[_TemplateNode]] = defaultdict(list)
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        for row in csv.DictReader(f):
+            trees[row["medical_id"]].append(_TemplateNode(
+                int(row["classification_id"]), int(row["classification_level"]), row["classification_name"],
+                int(row["parent_id"]) if row.get("parent_id") else None
+            ))
+    return [sorted(nodes, key=lambda node: (node.level, node.file_id)) for _, nodes in sorted(trees.items())]
+
+
+def build_classification_tree(count: int, children: int = 5, grandchildren: int = 10) -> List[_TemplateNode]:
+    """大分類・中分類・小分類の3階層で、合計 count 件程度（端数は切り捨て）の機器分類の木を作成する"""
+    nodes = []
+    for i in range(max(1, count // (1 + children + children * grandchildren))):
+        id1 = len(nodes) + 1
+        nodes.append(_TemplateNode(id1, 1, f"大分類{i}", None))
+        for j in range(children):
+            id2 = len(nodes) + 1
+            nodes.append(_TemplateNode(id2, 2, f"中分類{i}-{j}", id1))
+            for k in range(grandchildren):
+                nodes.append(_TemplateNode(len(nodes) + 1, 3, f"小分類{i}-{j}-{k}", id2))
+    return sorted(nodes, key=lambda node: (node.level, node.file_id))
+
+
+def _batched(rows: Sequence[dict]) -> Iterator[Sequence[dict]]:
+    for start in range(0, len(rows), BATCH_SIZE):
+        yield rows[start:start + BATCH_SIZE]
+
+
+def _insert_returning_ids(db: Session, model, id_column, rows: Sequence[dict]) -> List[int]:
+    """一括INSERTし、採番されたIDを行の順に返す"""
+    ids: List[int] = []
+    for batch in _batched(rows):
+        ids.extend(db.scalars(insert(model).returning(id_column, sort_by_parameter_order=True), batch))
+    return ids
+
+
+def _zipf_weights(count: int, exponent: float = 1.1) -> List[float]:
+    return [1 / (rank + 1) ** exponent for rank in range(count)]
+
+
+def _random_datetime(rng: random.Random, day: date, start_hour: int = 8, end_hour: int = 19) -> datetime:
+    return datetime.combine(day, datetime.min.time()) + timedelta(
+        seconds=rng.randrange(start_hour * 3600, end_hour * 3600)
+    )
+
+
+def _month_starts(as_of: date, months: int) -> List[date]:
+    """as_of の前月から遡って months か月分の月初（古い順）"""
+    result = []
+    year, month = as_of.year, as_of.month
+    for _ in range(months):
+        year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+        result.append(date(year, month, 1))
+    return result[::-1]
+
+
+def generate_facility(index: int, settings: GenerationSettings, templates: List[List[_TemplateNode]],
+                      password_hash: str, db: Session) -> GeneratedFacility:
+    """
+    医療機関1件分の試験データを登録してコミットする
+
+    Args:
+        index (int): 医療機関の通し番号（乱数の種に使用）
+        settings (GenerationSettings): 生成する件数・分布
+        templates (List[List[_TemplateNode]]): 機器分類の木の雛形
+        password_hash (str): 全ユーザー共通のパスワードハッシュ
+        db (Session): データベースセッション
+
+    Returns:
+        GeneratedFacility: 登録した医療機関
+    """
+    rng = random.Random(f"{settings.seed}:{index}")
+    now = datetime.combine(settings.as_of, datetime.min.time())
+    audit = {"reg_user_id": SYSTEM_USER_ID, "regdate": now, "update_user_id": SYSTEM_USER_ID, "lastupdate": now}
+
+    # 医療機関・ユーザーとエンティティの紐付け
+    prefecture = rng.choices([p for p, _ in PREFECTURES], [w for _, w in PREFECTURES])[0]
+    name = f"{rng.choice(PLACE_NAMES)}{rng.choice(FACILITY_SUFFIXES)}"
+    address = {
+        "address_postal_code": f"{rng.randrange(100, 999)}-{rng.randrange(10000):04d}",
+        "address_prefecture": prefecture,
+        "address_city": f"{rng.choice(PLACE_NAMES)}市",
+        "address_line1": f"{rng.randint(1, 9)}-{rng.randint(1, 30)}-{rng.randint(1, 20)}",
+        "phone_number": f"0{rng.randint(3, 99)}-{rng.randrange(1000):03d}-{rng.randrange(10000):04d}",
+    }
+    medical_id = _insert_returning_ids(db, MstMedicalFacility, MstMedicalFacility.medical_id,
+                                       [{"medical_name": name, **address, **audit}])[0]
+    db.execute(insert(UserEntityLink), [{
+        "entity_type": 1, "entity_relation_id": medical_id, "entity_name": name,
+        **{f"entity_{key}": value for key, value in address.items() if key != "phone_number"},
+        "entity_phone_number": address["phone_number"],
+        "notification_email_list": [f"notify{medical_id}@hospital.example.jp"],
+        "count_reportout_classification": rng.choice((10, 20, 20, 30)),
+        "analiris_classification_level": rng.choice((2, 3, 3)), **audit,
+    }])
+
+    # ユーザー（1〜6人）
+    user_count = min(6, 1 + int(rng.expovariate(0.5)))
+    user_ids = allocate_user_ids(1, user_count, db, SYSTEM_USER_ID)
+    statuses = rng.choices((1, 0, 9), (85, 10, 5), k=user_count)
+    statuses[0] = 1
+    users = [
+        {"user_id": user_id, "user_name": f"{name} 担当者{number + 1}", "entity_type": 1,
+         "entity_relation_id": medical_id, "password": password_hash,
+         "e_mail": f"user{user_id}@hospital{medical_id}.example.jp",
+         "mobile_number": f"090-{rng.randrange(10000):04d}-{rng.randrange(10000):04d}",
+         "user_status": status, "inactive_reason_code": 1 if status == 9 else None, **audit}
+        for number, (user_id, status) in enumerate(zip(user_ids, statuses))
+    ]
+    db.execute(insert(MstUser), users)
+    active_users = [user for user in users if user["user_status"] == 1]
+    db.commit()
+
+    # 機器分類（雛形の木を複製。取込処理が閉包テーブルの作成とコミットを行う）
+    if settings.classifications is None:
+        template = rng.choice(templates)
+    else:
+        template = build_classification_tree(settings.classifications)
+    rows: List[List] = [["classification_id", "medical_id", "classification_level", "classification_name", "parent_id"]]
+    rows += [[node.file_id, medical_id, node.level, node.name, node.parent_file_id or ""] for node in template]
+    import_classifications(iter(rows), db, user_id=SYSTEM_USER_ID)
+    classifications = db.execute(
+        select(MstEquipmentClassification.classification_id, MstEquipmentClassification.parent_classification_id)
+        .where(MstEquipmentClassification.medical_id == medical_id)
+    ).all()
+    parents = {parent_id for _, parent_id in classifications}
+    leaves = [classification_id for classification_id, _ in classifications if classification_id not in parents]
+    leaves.sort()
+    rng.shuffle(leaves)  # Zipf分布で多くの機器が属する分類を医療機関ごとに変える
+
+    # 機器台帳
+    if settings.ledger is not None:
+        ledger_count = settings.ledger
+    else:
+        ledger_count = int(rng.lognormvariate(math.log(settings.ledger_median), settings.ledger_sigma))
+        ledger_count = max(settings.ledger_min, min(settings.ledger_max, ledger_count))
+    chosen = rng.choices(leaves, _zipf_weights(len(leaves)), k=ledger_count) if leaves else [None] * ledger_count
+    maker_weights = _zipf_weights(len(MAKERS), 0.8)
+    ledger_rows = []
+    for number in range(ledger_count):
+        maker_index = rng.choices(range(len(MAKERS)), maker_weights)[0]
+        stock_quantity = 1 if rng.random() < 0.7 else min(200, 2 + int(rng.paretovariate(1.5)))
+        ledger_rows.append({
+            "medical_id": medical_id,
+            "model_number": f"{chr(65 + maker_index)}{maker_index:02d}-{number:06d}",
+            "product_name": f"機器{rng.randrange(5000):04d}",
+            "maker_name": MAKERS[maker_index],
+            "classification_id": None if rng.random() < 0.05 else chosen[number],
+            "stock_quantity": stock_quantity,
+            "is_included": rng.random() < 0.92,
+            **audit,
+        })
+    ledger_ids = _insert_returning_ids(db, MedicalEquipmentLedger, MedicalEquipmentLedger.ledger_id, ledger_rows)
+
+    # 分析設定の上書き（分析対象フラグのみ6割・分類の上書き4割）
+    override_count = min(ledger_count, int(round(ledger_count * settings.override_ratio)))
+    settings_rows = []
+    for position in sorted(rng.sample(range(ledger_count), override_count)):
+        ledger = ledger_rows[position]
+        editor = rng.choice(active_users)["user_id"]
+        reclassify = leaves and rng.random() < 0.4
+        note = [{"user_id": editor, "timestamp": _random_datetime(rng, settings.as_of - timedelta(days=rng.randrange(1, 180)))
+                 .strftime("%Y-%m-%d %H:%M:%S"),
+                 "note": "院内の管理区分に合わせて分類を変更" if reclassify else "分析対象を見直し"}]
+        settings_rows.append({
+            "ledger_id": ledger_ids[position],
+            "override_is_included": ledger["is_included"] if reclassify else not ledger["is_included"],
+            "override_classification_id": rng.choice(leaves) if reclassify else None,
+            "note": json.dumps(note, ensure_ascii=False),
+            "reg_user_id": editor, "regdate": now, "update_user_id": editor, "lastupdate": now,
+        })
+    for batch in _batched(settings_rows):
+        db.execute(insert(MedicalEquipmentAnalysisSetting), batch)
+    rebuild_equipment_stats(medical_id, db, SYSTEM_USER_ID)
+
+    # アップロード履歴・レポート公開履歴
+    upload_rows = []
+    publication_rows = []
+    for month_start in _month_starts(settings.as_of, settings.months):
+        uploaded = False
+        for file_type, (file_name, ratio) in UPLOAD_FILES.items():
+            if rng.random() >= ratio:
+                continue
+            uploaded = uploaded or file_type == 1
+            uploader = rng.choice(active_users)["user_id"]
+            uploaded_at = _random_datetime(rng, month_start + timedelta(days=rng.randrange(14)))
+            upload_rows.append({
+                "medical_id": medical_id, "file_type": file_type, "file_name": file_name,
+                "upload_datetime": uploaded_at, "upload_user_id": uploader,
+                "download_datetime": uploaded_at + timedelta(hours=rng.randint(1, 48)) if rng.random() < 0.8 else None,
+                "reg_user_id": uploader, "regdate": uploaded_at, "update_user_id": uploader, "lastupdate": uploaded_at,
+            })
+        if not uploaded:
+            continue
+        published_at = _random_datetime(rng, month_start + timedelta(days=rng.randint(20, 27)))
+        for file_type, file_name in REPORT_FILES.items():
+            downloaded = rng.random() < 0.6
+            downloaded_at = published_at + timedelta(days=rng.randint(0, 10)) if downloaded else None
+            publication_rows.append({
+                "medical_id": medical_id, "publication_ym": f"{month_start:%Y-%m}", "file_type": file_type,
+                "file_name": file_name, "upload_datetime": published_at,
+                "download_user_id": rng.choice(active_users)["user_id"] if downloaded else "0",
+                "download_datetime": downloaded_at,
+                "reg_user_id": "0", "regdate": published_at, "update_user_id": "0",
+                "lastupdate": downloaded_at or published_at,
+            })
+    for batch in _batched(upload_rows):
+        db.execute(insert(FacilityUploadLog), batch)
+    publication_ids = _insert_returning_ids(db, ReportPublicationLog, ReportPublicationLog.publication_id,
+                                            publication_rows)
+    db.commit()
+
+    if settings.report_bytes > 0:
+        content = random.Random(settings.seed).randbytes(min(settings.report_bytes, 65536))
+        content = (content * (settings.report_bytes // len(content) + 1))[:settings.report_bytes]
+        for row in publication_rows:
+            year, month = row["publication_ym"].split("-")
+            report_dir = path_config.reports_path / str(medical_id) / year / month
+            report_dir.mkdir(parents=True, exist_ok=True)
+            (report_dir / row["file_name"]).write_bytes(content)
+
+    return GeneratedFacility(
+        medical_id=medical_id,
+        user_ids=[user["user_id"] for user in active_users],
+        e_mails=[user["e_mail"] for user in active_users],
+        classification_ids=sorted(leaves),
+        ledger_ids=ledger_ids,
+        publication_ids=publication_ids,
+    )
+
+
+def generate(settings: GenerationSettings, db: Session, progress=None) -> List[GeneratedFacility]:
+    """
+    試験データを登録する（医療機関ごとにコミット）
+
+    Args:
+        settings (GenerationSettings): 生成する件数・分布
+        db (Session): データベースセッション
+        progress (Callable[[GeneratedFacility], None], optional): 医療機関ごとに呼び出す関数
+
+    Returns:
+        List[GeneratedFacility]: 登録した医療機関
+    """
+    templates = load_classification_templates(settings.template)
+    password_hash = hash_password(settings.password)
+    result = []
+    for index in range(settings.facilities):
+        facility = generate_facility(index, settings, templates, password_hash, db)
+        result.append(facility)
+        if progress is not None:
+            progress(facility)
+    return result
+
+
+def main(argv=None) -> int:
+    defaults = GenerationSettings()
+    parser = argparse.ArgumentParser(description="大規模な試験データ（合成データ）の生成")
+    parser.add_argument("--facilities", type=int, default=defaults.facilities, help="医療機関の件数")
+    parser.add_argument("--ledger", type=int, help="医療機関ごとの機器台帳の件数（省略時は対数正規分布）")
+    parser.add_argument("--ledger-median", type=int, default=defaults.ledger_median, help="機器台帳の件数の中央値")
+    parser.add_argument("--classifications", type=int, help="医療機関ごとの機器分類の件数（省略時は雛形の木を複製）")
+    parser.add_argument("--override-ratio", type=float, default=defaults.override_ratio, help="分析設定を上書きする機器の割合")
+    parser.add_argument("--months", type=int, default=defaults.months, help="アップロード・レポート公開履歴の月数")
+    parser.add_argument("--report-bytes", type=int, default=0, help="公開レポートのファイルを作成する場合のサイズ")
+    parser.add_argument("--password", default=defaults.password, help="全ユーザー共通のパスワード")
+    parser.add_argument("--seed", type=int, default=defaults.seed, help="乱数の種")
+    parser.add_argument("--as-of", type=date.fromisoformat, default=defaults.as_of, help="基準日（YYYY-MM-DD）")
+    parser.add_argument("--template", type=Path, default=DEFAULT_TEMPLATE, help="機器分類の雛形のCSV")
+    args = parser.parse_args(argv)
+
+    from ..database import SessionLocal
+
+    settings = GenerationSettings(
+        facilities=args.facilities, ledger=args.ledger, ledger_median=args.ledger_median,
+        classifications=args.classifications, override_ratio=args.override_ratio, months=args.months,
+        report_bytes=args.report_bytes,
+        password=args.password, seed=args.seed, as_of=args.as_of, template=args.template,
+    )
+    started = time.perf_counter()
+
+    def progress(facility: GeneratedFacility) -> None:
+        print(f"  医療機関ID={facility.medical_id}: ユーザー={len(facility.user_ids)}, "
+              f"機器分類（最下位）={len(facility.classification_ids)}, 機器台帳={len(facility.ledger_ids)}, "
+              f"公開レポート={len(facility.publication_ids)}")
+
+    db = SessionLocal()
+    try:
+        facilities = generate(settings, db, progress)
+    finally:
+        db.close()
+    elapsed = time.perf_counter() - started
+    ledger_total = sum(len(facility.ledger_ids) for facility in facilities)
+    print(f"✅ 生成完了: 医療機関={len(facilities)}, 機器台帳={ledger_total:,}件, 処理時間={elapsed:.1f}秒 "
+          f"({ledger_total / elapsed:,.0f} 行/秒)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""import_equipment_classifications.py
+
+機器分類マスタ一括取込のコマンドラインツール
+
+POST /api/v1/equipment-classifications/import と同じ処理（src/utils/classification_import.py）で、
+CSV/XLSXファイルの機器分類をDBに直接取り込みます。
+
+実行方法:
+- python -m src.cli.import_equipment_classifications data/mst_equipment_classification.csv
+- python -m src.cli.import_equipment_classifications data/機器分類マスタ.csv --dry-run
+- python -m src.cli.import_equipment_classifications data/医療機関別機器分類情報.csv --partial
+
+ChangeLog:
+    v1.0.0 (2026-10-19)
+    - 新規作成
+"""
+import argparse
+import sys
+import time
+
+from ..database import SessionLocal
+from ..utils.classification_import import ClassificationImportFormatError, import_classifications, iter_file_rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="機器分類マスタ（CSV/XLSX）の一括取込")
+    parser.add_argument("file", help="取込ファイル（.csv / .xlsx）")
+    parser.add_argument("--user-id", default="900001", help="登録・更新ユーザーID（デフォルト: 900001）")
+    parser.add_argument("--partial", action="store_true", help="エラー行を除いて取り込む（デフォルトは1件でもエラーがあれば取り込まない）")
+    parser.add_argument("--dry-run", action="store_true", help="検証のみ行い登録しない")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        with open(args.file, "rb") as stream:
+            result = import_classifications(
+                iter_file_rows(stream, args.file),
+                db,
+                user_id=args.user_id,
+                all_or_nothing=not args.partial,
+                dry_run=args.dry_run
+            )
+    except (ClassificationImportFormatError, UnicodeDecodeError, OSError) as e:
+        print(f"❌ 取込エラー: {e}", file=sys.stderr)
+        return 2
+    finally:
+        db.close()
+    elapsed = time.perf_counter() - started
+
+    for error in result.errors:
+        print(f"  {error.row}行目 {error.classification_name or ''}: {error.message}", file=sys.stderr)
+    status = "✅ 取込完了" if result.committed else "⚠️  登録なし"
+    print(
+        f"{status}: 行数={result.total_rows}, 登録={result.inserted_count}, 更新={result.updated_count}, "
+        f"変更なし={result.unchanged_count}, エラー={result.error_count}, 処理時間={elapsed:.2f}秒"
+    )
+    return 1 if result.error_count else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""job_worker.py
+
+ジョブキュー（job_queue）のワーカーを起動するコマンドラインツール
+
+APIサーバーとは別のプロセスで、アップロード後の処理やレポート公開のジョブを実行します。
+設定は config.yaml の job_queue を使用します（APIサーバー内のワーカーと同時に起動しても重複して実行しません）。
+
+実行方法:
+- python -m src.cli.job_worker                # ワーカー1プロセス（Ctrl+C で停止）
+- python -m src.cli.job_worker --workers 4    # ワーカー4プロセス
+- python -m src.cli.job_worker --once         # 実行待ちのジョブを全て実行して終了（cron・動作確認用）
+
+ChangeLog:
+    v1.0.0 (2026-10-19)
+    - 新規作成
+"""
+import argparse
+import logging
+import multiprocessing
+import signal
+import sys
+
+from ..utils.job_queue import JobWorker, get_job_queue_settings, load_job_handlers, run_pending_jobs
+
+
+def _run_worker(name: str) -> None:
+    """ワーカープロセス: SIGTERM / Ctrl+C で実行中のジョブの完了を待って停止する"""
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s][%(levelname)s] %(message)s')
+    load_job_handlers()
+    worker = JobWorker(name, get_job_queue_settings())
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop_event.set())
+    signal.signal(signal.SIGINT, lambda *_: worker.stop_event.set())
+    # シグナルはメインスレッドで受け取るため、ワーカーのループはメインスレッドで実行する
+    worker.run()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="ジョブキューのワーカー")
+    parser.add_argument("--workers", type=int, default=1, help="ワーカーのプロセス数（デフォルト: 1）")
+    parser.add_argument("--once", action="store_true", help="実行待ちのジョブを全て実行して終了する")
+    args = parser.parse_args(argv)
+
+    if args.once:
+        logging.basicConfig(level=logging.INFO, format='[%(asctime)s][%(levelname)s] %(message)s')
+        load_job_handlers()
+        executed = run_pending_jobs()
+        print(f"✅ ジョブ実行完了: {len(executed)}件")
+        return 0
+
+    if args.workers == 1:
+        _run_worker("job-worker-1")
+        return 0
+
+    processes = [
+        multiprocessing.Process(target=_run_worker, args=(f"job-worker-{index}",), name=f"job-worker-{index}")
+        for index in range(1, args.workers + 1)
+    ]
+    for process in processes:
+        process.start()
+
+    def stop(*_):
+        for process in processes:
+            if process.is_alive():
+                process.terminate()  # 子プロセスには SIGTERM を送り、実行中のジョブの完了を待たせる
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for process in processes:
+        process.join()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""serve.py
+
+本番環境向けのAPIサーバー（gunicorn + uvicorn ワーカーの複数プロセス構成）を起動するコマンドラインツール
+
+実行方法:
+- python -m src.cli.serve                     # config.yaml の server の設定で起動（SIGTERM で停止）
+- python -m src.cli.serve --workers 4         # ワーカー数を指定
+- python -m src.cli.serve --print-config      # 適用される設定を表示して終了
+
+Note:
+    - 設定は config.yaml の server を使用し、環境変数 OPTISERVE_SERVER_<項目名（大文字）> で上書きできます
+      （例: OPTISERVE_SERVER_WORKERS=4, OPTISERVE_SERVER_BIND=0.0.0.0:8080）。コマンドラインの引数が最優先です。
+    - workers が 0 の場合はCPU数（プロセスが使用できるCPU数）のワーカーを起動します。
+    - preload_app が true の場合、マスタープロセスで src.main を読み込んでからワーカーを fork します
+      （起動が速く、メモリを共有できます）。fork 後のワーカーでは次の処理を行います。
+        - DBの接続プール（src.database.engine）を破棄する（マスターの接続をワーカー間で共有しない）
+        - ログの出力スレッドを作り直す（スレッドは fork で引き継がれないため）
+    - SIGTERM を受けた場合、新しい接続の受け付けを止め、処理中のリクエストの完了を graceful_timeout 秒まで待って停止します。
+      SIGHUP の場合はワーカーを順に入れ替えます（preload_app が true の場合、ソースの変更は反映されないため再起動してください）。
+    - max_requests 件のリクエストを処理したワーカーは入れ替えます（max_requests_jitter でワーカーごとにずらす）。
+    - 複数ワーカー構成では次の点に注意してください。
+        - セッショントークンの署名鍵（OPTISERVE_SESSION_SECRET）が未設定の場合は起動しません
+        - メトリクス（/metrics）・キャッシュ・トークンの失効リストはワーカーごとの値です
+        - ログは同じファイルに出力するため、サイズによる退避（logging.max_bytes）は行わず日付ごとのファイルのみとします
+        - ジョブキューのワーカースレッド（job_queue.embedded_workers）はワーカーごとに起動します
+
+ChangeLog:
+    v1.0.0 (2026-10-19)
+    - 新規作成（startup_optiserve.sh・Dockerfile.prod の uvicorn 1プロセス構成を置き換え）
+"""
+import argparse
+import logging
+import os
+import sys
+from typing import Any, Dict, NamedTuple, Optional
+
+from ..utils.config_loader import load_config, load_section_settings
+from ..utils.logging_config import discard_logging_after_fork, get_logging_settings, setup_logging, stop_logging
+
+logger = logging.getLogger(__name__)
+
+WORKER_CLASS = "uvicorn_worker.UvicornWorker"
+ENV_PREFIX = "OPTISERVE_SERVER_"
+
+
+class ServerSettings(NamedTuple):
+    """config.yaml の server"""
+    bind: str = "0.0.0.0:8000"
+    workers: int = 0  # 0 の場合はCPU数
+    preload_app: bool = True
+    max_requests: int = 10000  # 0 の場合はワーカーを入れ替えない
+    max_requests_jitter: int = 1000
+    graceful_timeout: int = 30
+    timeout: int = 60
+    keepalive: int = 5
+    backlog: int = 2048
+
+
+def get_server_settings(environ: Optional[Dict[str, str]] = None) -> ServerSettings:
+    """config.yaml の server と環境変数 OPTISERVE_SERVER_* を取得する（未設定の項目は既定値）"""
+    return load_section_settings("server", ServerSettings, env_prefix=ENV_PREFIX, environ=environ)
+
+
+def available_cpu_count() -> int:
+    """プロセスが使用できるCPU数（コンテナのCPU割り当てを考慮）"""
+    if hasattr(os, "sched_getaffinity"):
+        return max(len(os.sched_getaffinity(0)), 1)
+    return os.cpu_count() or 1
+
+
+def resolve_worker_count(settings: ServerSettings) -> int:
+    """ワーカー数（workers が 0 以下の場合はCPU数）"""
+    return settings.workers if settings.workers > 0 else available_cpu_count()
+
+
+def session_secret_configured() -> bool:
+    """セッショントークンの署名鍵が環境変数または config.yaml で指定されているか"""
+    if os.environ.get("OPTISERVE_SESSION_SECRET"):
+        return True
+    try:
+        config = load_config().get("security", {}).get("session_token", {}) or {}
+    except FileNotFoundError:
+        return False
+    return bool(config.get("secret"))
+
+
+def build_gunicorn_options(settings: ServerSettings) -> Dict[str, Any]:
+    """gunicorn の設定（フックを含む）"""
+    workers = resolve_worker_count(settings)
+
+    def post_fork(server, worker):
+        # マスターで作成した接続はワーカーで使用しない（close=False: マスター側の接続は閉じない）
+        from ..database import engine
+        engine.dispose(close=False)
+        discard_logging_after_fork()
+        _setup_logging(workers)
+
+    def worker_exit(server, worker):
+        # キューに残ったログを出力してから終了する
+        stop_logging()
+
+    return {
+        "bind": settings.bind,
+        "workers": workers,
+        "worker_class": WORKER_CLASS,
+        "preload_app": settings.preload_app,
+        "max_requests": settings.max_requests,
+        "max_requests_jitter": settings.max_requests_jitter if settings.max_requests > 0 else 0,
+        "graceful_timeout": settings.graceful_timeout,
+        "timeout": settings.timeout,
+        "keepalive": settings.keepalive,
+        "backlog": settings.backlog,
+        "post_fork": post_fork,
+        "worker_exit": worker_exit,
+    }
+
+
+def _setup_logging(workers: int) -> None:
+    """ログ設定（複数プロセスで同じファイルに出力するため、複数ワーカーではサイズによる退避は行わない）"""
+    settings = get_logging_settings()
+    if workers > 1:
+        settings = settings._replace(max_bytes=0)
+    setup_logging(settings)
+
+
+def run(settings: ServerSettings) -> None:
+    """gunicorn のマスタープロセスを起動する（停止するまで戻らない）"""
+    from gunicorn.app.base import BaseApplication
+
+    options = build_gunicorn_options(settings)
+
+    class OptiServeApplication(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from ..main import app
+            return app
+
+    _setup_logging(options["workers"])
+    logger.info(
+        f"OptiServe APIサーバー起動: bind={settings.bind}, workers={options['workers']}, "
+        f"preload_app={settings.preload_app}, max_requests={settings.max_requests}"
+    )
+    OptiServeApplication().run()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="本番環境向けのAPIサーバー（gunicorn + uvicorn ワーカー）")
+    parser.add_argument("--bind", help="待ち受けるアドレス:ポート（デフォルト: config.yaml の server.bind）")
+    parser.add_argument("--workers", type=int, help="ワーカー数（0 の場合はCPU数）")
+    parser.add_argument("--print-config", action="store_true", help="適用される設定を表示して終了する")
+    args = parser.parse_args(argv)
+
+    settings = get_server_settings()
+    if args.bind:
+        settings = settings._replace(bind=args.bind)
+    if args.workers is not None:
+        settings = settings._replace(workers=args.workers)
+
+    if args.print_config:
+        for key, value in settings._asdict().items():
+            print(f"{key}: {value}")
+        print(f"resolved_workers: {resolve_worker_count(settings)}")
+        return 0
+
+    if resolve_worker_count(settings) > 1 and not session_secret_configured():
+        # ワーカーごとに異なる鍵になり、他のワーカーで発行したトークンを検証できないため
+        print("❌ 複数ワーカー構成では環境変数 OPTISERVE_SESSION_SECRET（署名鍵）を指定してください", file=sys.stderr)
+        return 1
+
+    run(settings)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,15 +3,34 @@
 PoC版 OptiGateなので、DBはSQLiteを使用しています。
 ちなみにProduction版ではPostgreSQLを使用します。
 
+開発・検証環境向けに、遅いクエリのログとN+1クエリの検出を有効にできます（config.yaml の query_debug）。
+    - 遅いクエリ: slow_query_ms 以上かかったSELECTを、実行計画（SQLite: EXPLAIN QUERY PLAN / PostgreSQL: EXPLAIN）付きでWARNINGログに出力
+    - N+1クエリ: 1リクエスト内で同じ形のSQL（パラメータ・IN句の要素数を除いて同じ文）が
+      n_plus_one_threshold 回を超えて実行された場合にWARNINGログに出力
+      （raise_on_n_plus_one が true の場合は NPlusOneQueryError を送出し、リクエストは500で失敗します）
+    - 環境変数 OPTISERVE_QUERY_DEBUG=1 で有効、OPTISERVE_QUERY_DEBUG=strict で有効かつN+1検出時に例外とします
+      （例: OPTISERVE_QUERY_DEBUG=strict で起動したAPIサーバーに対して pytest を実行すると、N+1のあるAPIのテストが失敗します）
+    - リクエストの範囲は QueryDebugMiddleware、バッチ処理やテストでは track_queries() で指定します
+      （設定で無効の場合は enable_query_debug() でイベントを登録します）。
+
 ChangeLog:
     v1.0.0 (2025-07-11)
         - 新規作成
     v1.1.0 (2025-08-26)
         - OS環境に応じた動的パス設定対応
+    v1.2.0 (2026-10-19)
+        - 遅いクエリのログとN+1クエリの検出（query_debug）を追加
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, NamedTuple, Optional
+import logging
 import os
+import re
+import time
+from .utils.config_loader import load_section_settings
 from .utils.path_config import path_config
 
 # 環境変数による明示的なDATABASE_URL指定があれば優先、なければOS判定によるパス設定を使用
@@ -21,6 +40,8 @@ engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 Base = declarative_base()
 
+logger = logging.getLogger(__name__)
+
 
 def get_db():
     """データベースセッションを取得するための依存性注入関数"""
@@ -29,3 +50,156 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+class QueryDebugSettings(NamedTuple):
+    """config.yaml の query_debug"""
+    enabled: bool = False
+    slow_query_ms: float = 200.0  # 0 の場合は遅いクエリのログを出力しない
+    explain_slow_queries: bool = True
+    n_plus_one_threshold: int = 10  # 0 の場合はN+1クエリを検出しない
+    raise_on_n_plus_one: bool = False
+
+
+class NPlusOneQueryError(RuntimeError):
+    """1リクエスト内で同じ形のSQLがしきい値を超えて実行された（raise_on_n_plus_one が有効な場合）"""
+
+
+def get_query_debug_settings() -> QueryDebugSettings:
+    """config.yaml の query_debug と環境変数 OPTISERVE_QUERY_DEBUG から設定を取得する"""
+    settings = load_section_settings("query_debug", QueryDebugSettings)
+    mode = os.environ.get("OPTISERVE_QUERY_DEBUG", "").lower()
+    if mode in ("1", "true", "on"):
+        settings = settings._replace(enabled=True)
+    elif mode == "strict":
+        settings = settings._replace(enabled=True, raise_on_n_plus_one=True)
+    elif mode in ("0", "false", "off"):
+        settings = settings._replace(enabled=False)
+    return settings
+
+
+# SQLの形の正規化（IN句の要素数・空白の違いを無視）
+_IN_LIST = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|:\w+|\$\d+)\s*,)+\s*(?:\?|%\(\w+\)s|:\w+|\$\d+)\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """パラメータの値・IN句の要素数を除いたSQLの形"""
+    return _IN_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+class QueryTracker:
+    """1リクエスト（または track_queries の範囲）内のSQLの形ごとの実行回数"""
+
+    def __init__(self, label: str, settings: QueryDebugSettings):
+        self.label = label
+        self.settings = settings
+        self.counts: Dict[str, int] = {}
+        self.n_plus_one: Dict[str, int] = {}
+
+    def record(self, statement: str) -> None:
+        threshold = self.settings.n_plus_one_threshold
+        if threshold <= 0:
+            return
+        shape = statement_shape(statement)
+        count = self.counts[shape] = self.counts.get(shape, 0) + 1
+        if count <= threshold:
+            return
+        self.n_plus_one[shape] = count
+        if count == threshold + 1:
+            message = f"N+1クエリの可能性: {self.label} で同じ形のSQLが{threshold}回を超えて実行されました: {shape[:500]}"
+            logger.warning(message)
+            if self.settings.raise_on_n_plus_one:
+                raise NPlusOneQueryError(message)
+
+
+current_query_tracker: ContextVar[Optional[QueryTracker]] = ContextVar("current_query_tracker", default=None)
+
+
+@contextmanager
+def track_queries(label: str, settings: Optional[QueryDebugSettings] = None):
+    """
+    範囲内のSQLの形ごとの実行回数を数え、N+1クエリを検出する
+
+    Args:
+        label (str): ログに出力する処理名（例: "GET /api/v1/facilities/"）
+        settings (QueryDebugSettings, optional): 設定（省略時は config.yaml の query_debug）
+
+    Yields:
+        QueryTracker: 実行回数と検出したSQLの形
+    """
+    tracker = QueryTracker(label, settings or get_query_debug_settings())
+    token = current_query_tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        current_query_tracker.reset(token)
+
+
+def _explain(conn, statement: str, parameters) -> str:
+    """実行計画を取得する（イベントを発生させないようDBAPIのカーソルで実行）"""
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        return "\n".join(" ".join(str(value) for value in row) for row in cursor.fetchall())
+    except Exception as e:
+        return f"（実行計画を取得できません: {e}）"
+    finally:
+        cursor.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    tracker = current_query_tracker.get()
+    if tracker is not None:
+        tracker.record(statement)
+    conn.info.setdefault("query_debug_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_times = conn.info.get("query_debug_start_time")
+    if not start_times:
+        return
+    elapsed_ms = (time.perf_counter() - start_times.pop()) * 1000
+    tracker = current_query_tracker.get()
+    settings = tracker.settings if tracker is not None else _query_debug_settings
+    if settings.slow_query_ms <= 0 or elapsed_ms < settings.slow_query_ms:
+        return
+    plan = ""
+    if settings.explain_slow_queries and not executemany and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        plan = "\n" + _explain(conn, statement, parameters)
+    logger.warning(f"遅いクエリ（{elapsed_ms:.1f}ms）: {_WHITESPACE.sub(' ', statement)[:2000]}{plan}")
+
+
+def _handle_error(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_debug_start_time"):
+        connection.info["query_debug_start_time"].pop()
+
+
+def enable_query_debug() -> None:
+    """遅いクエリのログとN+1クエリの検出のイベントを登録する（複数回呼び出しても1回のみ登録）"""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+_query_debug_settings = get_query_debug_settings()
+if _query_debug_settings.enabled:
+    enable_query_debug()
+
+
+class QueryDebugMiddleware:
+    """リクエストごとにSQLの実行回数を数えるASGIミドルウェア（query_debug が有効な場合のみ追加）"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with track_queries(f"{scope['method']} {scope['path']}", _query_debug_settings):
+            await self.app(scope, receive, send)
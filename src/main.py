@@ -10,45 +10,87 @@ Changelog:
     - smds_core.loggerを追加
     v0.3.0 (2025-08-18)
     - CORSミドルウェアを追加
+    v0.4.0 (2026-10-19)
+    - 署名付きセッショントークンの検証ミドルウェアを追加
+    - 差分同期API（/api/v1/sync）を追加
+    - ジョブキューのワーカースレッドの起動・停止とジョブ状態取得API（/api/v1/jobs）を追加
+    - リクエストの処理時間・DBクエリ数の計測ミドルウェアとメトリクス出力（/metrics）を追加
+    - 遅いクエリのログとN+1クエリの検出ミドルウェア（config.yaml の query_debug）を追加
+    - ログの出力をキュー経由（src/utils/logging_config.py。JSON形式・ローテーション・config.yaml の logging）に変更
+    - 必要なディレクトリの作成を起動時（lifespan）に移動し、起動にかかった時間をログに出力
+    - メトリクスが無効の場合は /metrics のルーターを読み込まないよう変更
+    - デフォルトのレスポンスクラスを orjson によるシリアライズ（src/utils/json_response.py）に変更
+    - レスポンスの圧縮（Brotli / gzip。config.yaml の compression）を追加
+    - セッショントークンの失効記録を読み込むスレッドの起動・停止を追加
 """
+import time
+
+# 起動時間の計測の開始（モジュールの読み込みを含む）
+_started = time.perf_counter()
+
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from src.routers import auth, users, facilities, user_entity_links, file_management, equipment_classifications, medical_equipment_analysis
+from fastapi.concurrency import run_in_threadpool
+from src.routers import auth, users, facilities, user_entity_links, file_management, equipment_classifications, medical_equipment_analysis, sync, jobs
 from fastapi.middleware.cors import CORSMiddleware
+from src.utils.session_token import SessionTokenMiddleware, start_revocation_refresher
+from src.utils.job_queue import get_job_queue_settings, start_job_workers
+from src.utils.metrics import MetricsMiddleware, get_metrics_settings, instrument_engine
+from src.database import QueryDebugMiddleware, engine, get_query_debug_settings
+from src.utils.logging_config import setup_logging
+from src.utils.json_response import FastJSONResponse
+from src.utils.compression import CompressionMiddleware, get_compression_settings
+from src.utils.path_config import path_config
 import logging
-import os
-from pathlib import Path
 
-# ログ設定
-def setup_logging():
-    """標準loggingでログ設定を初期化"""
-    log_dir = Path("./log")
-    log_dir.mkdir(exist_ok=True)
-    
-    # ログファイル名は日付付きで生成
-    from datetime import datetime
-    log_file = log_dir / f"OptiServe_{datetime.now().strftime('%Y%m%d')}.log"
-    
-    # ロギング設定
-    logging.basicConfig(
-        level=logging.INFO,
-        format='[%(asctime)s][%(levelname)s] %(message)s',
-        handlers=[
-            logging.FileHandler(log_file, encoding='utf-8'),
-            logging.StreamHandler()
-        ]
-    )
-    return logging.getLogger(__name__)
-
-# ロガー初期化
-logger = setup_logging()
+# ロガー初期化（ファイル・コンソールへの出力は専用スレッドで実行）
+setup_logging()
+logger = logging.getLogger(__name__)
 logger.info("OptiServe APIサーバー起動")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    必要なディレクトリの作成と、以下のスレッドの起動・停止
+    - セッショントークンの失効記録の読み込み（src/utils/session_token.py）
+    - ジョブキューのワーカー（config.yaml の job_queue.embedded_workers）
+    """
+    path_config.ensure_directories()
+    revocation_refresher = await run_in_threadpool(start_revocation_refresher)
+    settings = get_job_queue_settings()
+    workers = start_job_workers(settings.embedded_workers, settings) if settings.embedded_workers > 0 else []
+    logger.info(f"OptiServe APIサーバー起動完了: {(time.perf_counter() - _started) * 1000:.0f}ms")
+    yield
+    revocation_refresher.stop_event.set()
+    for worker in workers:
+        worker.stop_event.set()
+    for worker in workers:
+        worker.join(settings.visibility_timeout_seconds)
+
 app = FastAPI(
     title="OptiServe PoC API",
     description="OptiServe PoC用FastAPIサーバ",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
+# 遅いクエリのログとN+1クエリの検出（開発・検証環境向け）
+if get_query_debug_settings().enabled:
+    app.add_middleware(QueryDebugMiddleware)
+
+# 処理時間・DBクエリ数の計測（ルーティング後のパスのテンプレートを取得するため最も内側で実行）
+if get_metrics_settings().enabled:
+    instrument_engine(engine)
+    app.add_middleware(MetricsMiddleware)
+
+# レスポンスの圧縮（計測のミドルウェアより外側で実行するため、メトリクスのレスポンスサイズは圧縮前の値）
+if get_compression_settings().enabled:
+    app.add_middleware(CompressionMiddleware)
+
+# Authorization: Bearer のセッショントークンを検証（CORSより内側で実行）
+app.add_middleware(SessionTokenMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # 開発のために全てのオリジンを許可
@@ -64,3 +106,8 @@ app.include_router(user_entity_links.router)
 app.include_router(file_management.router)
 app.include_router(equipment_classifications.router)
 app.include_router(medical_equipment_analysis.router)
+app.include_router(sync.router)
+app.include_router(jobs.router)
+if get_metrics_settings().enabled:
+    from src.routers import metrics
+    app.include_router(metrics.router)
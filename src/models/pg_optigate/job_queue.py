@@ -0,0 +1,42 @@
+"""
+job_queue.py
+
+job_queue モデル定義ファイル
+
+Note:
+    - テーブル定義書 (YAML) をもとに、generate_dbdesign_artifacts.py により自動生成されます
+    - Alembic のマイグレーションはこの ORM モデルを基に差分比較されます
+    - 本ファイルは手動での編集は推奨されません（テンプレート修正で対応）
+
+Changelog:
+    v1.0.0 (2026-10-19):
+    - 初版作成
+"""
+
+from sqlalchemy import Column, Integer, String, Float, DateTime, Date, Boolean, Numeric, Text, JSON
+#from dataaccess.CommonDatabaseConnect import Base
+from ...database import Base  # macOS 開発環境
+
+
+class JobQueue(Base):
+    """
+    テーブル [job_queue] に対応する ORM クラス
+    """
+    __tablename__ = "job_queue"
+    job_id = Column(Integer, primary_key=True, autoincrement=True, nullable=False)
+    job_type = Column(Text, nullable=False)
+    payload = Column(Text, nullable=False)
+    medical_id = Column(Integer, nullable=True)
+    priority = Column(Integer, nullable=False)
+    status = Column(Text, nullable=False)
+    attempts = Column(Integer, nullable=False)
+    max_attempts = Column(Integer, nullable=False)
+    run_after = Column(DateTime, nullable=False)
+    locked_by = Column(Text, nullable=True)
+    locked_until = Column(DateTime, nullable=True)
+    result = Column(Text, nullable=True)
+    last_error = Column(Text, nullable=True)
+    reg_user_id = Column(Text, nullable=False)
+    regdate = Column(DateTime, nullable=False)
+    update_user_id = Column(Text, nullable=False)
+    lastupdate = Column(DateTime, nullable=False)
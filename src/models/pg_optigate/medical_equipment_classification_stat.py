@@ -0,0 +1,36 @@
+"""
+medical_equipment_classification_stat.py
+
+medical_equipment_classification_stat モデル定義ファイル
+
+Note:
+    - テーブル定義書 (YAML) をもとに、generate_dbdesign_artifacts.py により自動生成されます
+    - Alembic のマイグレーションはこの ORM モデルを基に差分比較されます
+    - 本ファイルは手動での編集は推奨されません（テンプレート修正で対応）
+
+Changelog:
+    v1.0.0 (2026-10-19):
+    - 初版作成
+"""
+
+from sqlalchemy import Column, Integer, String, Float, DateTime, Date, Boolean, Numeric, Text, JSON
+#from dataaccess.CommonDatabaseConnect import Base
+from ...database import Base  # macOS 開発環境
+
+
+class MedicalEquipmentClassificationStat(Base):
+    """
+    テーブル [medical_equipment_classification_stat] に対応する ORM クラス
+    """
+    __tablename__ = "medical_equipment_classification_stat"
+    medical_id = Column(Integer, primary_key=True, nullable=False)
+    classification_id = Column(Integer, primary_key=True, nullable=False)
+    ledger_count = Column(Integer, nullable=False)
+    included_count = Column(Integer, nullable=False)
+    override_count = Column(Integer, nullable=False)
+    stock_quantity = Column(Integer, nullable=False)
+    included_stock_quantity = Column(Integer, nullable=False)
+    reg_user_id = Column(Text, nullable=False)
+    regdate = Column(DateTime, nullable=False)
+    update_user_id = Column(Text, nullable=False)
+    lastupdate = Column(DateTime, nullable=False)
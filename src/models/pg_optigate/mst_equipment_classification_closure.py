@@ -0,0 +1,28 @@
+"""
+mst_equipment_classification_closure.py
+
+mst_equipment_classification_closure モデル定義ファイル
+
+Note:
+    - テーブル定義書 (YAML) をもとに、generate_dbdesign_artifacts.py により自動生成されます
+    - Alembic のマイグレーションはこの ORM モデルを基に差分比較されます
+    - 本ファイルは手動での編集は推奨されません（テンプレート修正で対応）
+
+Changelog:
+    v1.0.0 (2026-10-19):
+    - 初版作成
+"""
+
+from sqlalchemy import Column, Integer, String, Float, DateTime, Date, Boolean, Numeric, Text, JSON
+#from dataaccess.CommonDatabaseConnect import Base
+from ...database import Base  # macOS 開発環境
+
+
+class MstEquipmentClassificationClosure(Base):
+    """
+    テーブル [mst_equipment_classification_closure] に対応する ORM クラス
+    """
+    __tablename__ = "mst_equipment_classification_closure"
+    ancestor_id = Column(Integer, primary_key=True, nullable=False)
+    descendant_id = Column(Integer, primary_key=True, nullable=False)
+    depth = Column(Integer, nullable=False)
@@ -0,0 +1,29 @@
+"""
+session_revocation.py
+
+session_revocation モデル定義ファイル
+
+Note:
+    - テーブル定義書 (YAML) をもとに、generate_dbdesign_artifacts.py により自動生成されます
+    - Alembic のマイグレーションはこの ORM モデルを基に差分比較されます
+    - 本ファイルは手動での編集は推奨されません（テンプレート修正で対応）
+
+Changelog:
+    v1.0.0 (2026-10-19):
+    - 初版作成
+"""
+
+from sqlalchemy import Column, Integer, String, Float, DateTime, Date, Boolean, Numeric, Text, JSON
+#from dataaccess.CommonDatabaseConnect import Base
+from ...database import Base  # macOS 開発環境
+
+
+class SessionRevocation(Base):
+    """
+    テーブル [session_revocation] に対応する ORM クラス
+    """
+    __tablename__ = "session_revocation"
+    user_id = Column(Text, primary_key=True, nullable=False)
+    revoked_at = Column(Integer, nullable=False)
+    update_user_id = Column(Text, nullable=False)
+    lastupdate = Column(DateTime, nullable=False)
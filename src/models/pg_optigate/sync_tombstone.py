@@ -0,0 +1,29 @@
+"""
+sync_tombstone.py
+
+sync_tombstone モデル定義ファイル
+
+Note:
+    - テーブル定義書 (YAML) をもとに、generate_dbdesign_artifacts.py により自動生成されます
+    - Alembic のマイグレーションはこの ORM モデルを基に差分比較されます
+    - 本ファイルは手動での編集は推奨されません（テンプレート修正で対応）
+
+Changelog:
+    v1.0.0 (2026-10-19):
+    - 初版作成
+"""
+
+from sqlalchemy import Column, Integer, String, Float, DateTime, Date, Boolean, Numeric, Text, JSON
+#from dataaccess.CommonDatabaseConnect import Base
+from ...database import Base  # macOS 開発環境
+
+
+class SyncTombstone(Base):
+    """
+    テーブル [sync_tombstone] に対応する ORM クラス
+    """
+    __tablename__ = "sync_tombstone"
+    tombstone_id = Column(Integer, primary_key=True, autoincrement=True, nullable=False)
+    table_name = Column(Text, nullable=False)
+    row_key = Column(Text, nullable=False)
+    deleted_at = Column(DateTime, nullable=False)
@@ -0,0 +1,33 @@
+"""
+user_id_sequence.py
+
+user_id_sequence モデル定義ファイル
+
+Note:
+    - テーブル定義書 (YAML) をもとに、generate_dbdesign_artifacts.py により自動生成されます
+    - Alembic のマイグレーションはこの ORM モデルを基に差分比較されます
+    - 本ファイルは手動での編集は推奨されません（テンプレート修正で対応）
+
+Changelog:
+    v1.0.0 (2026-10-19):
+    - 初版作成
+"""
+
+from sqlalchemy import Column, Integer, String, Float, DateTime, Date, Boolean, Numeric, Text, JSON
+#from dataaccess.CommonDatabaseConnect import Base
+from ...database import Base  # macOS 開発環境
+
+
+class UserIdSequence(Base):
+    """
+    テーブル [user_id_sequence] に対応する ORM クラス
+    """
+    __tablename__ = "user_id_sequence"
+    entity_type = Column(Integer, primary_key=True, nullable=False)
+    range_start = Column(Integer, nullable=False)
+    range_end = Column(Integer, nullable=False)
+    last_value = Column(Integer, nullable=False)
+    reg_user_id = Column(Text, nullable=False)
+    regdate = Column(DateTime, nullable=False)
+    update_user_id = Column(Text, nullable=False)
+    lastupdate = Column(DateTime, nullable=False)
@@ -5,16 +5,32 @@ OptiServe Login API Router
 ChangeLog:
     v1.0.0 (2025-07-16)
         - Initial version
+    v1.1.0 (2026-10-19)
+        - パスワード照合をscryptハッシュに変更（ハッシュ計算用スレッドプールで実行）
+        - 平文で保存された既存パスワードはログイン成功時に再ハッシュ
+        - ログイン成功時に署名付きセッショントークン（access_token）を発行
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Body
 from sqlalchemy.orm import Session
 from ..database import SessionLocal
 from src.models.pg_optigate.mst_user import MstUser
 from src.schemas.auth import LoginRequest, LoginResponse
+from src.utils.auth import AuthManager
+from src.utils.password import hash_password, hash_password_in_pool, needs_rehash, verify_password_in_pool
+from src.utils.session_token import TOKEN_TYPE, issue_session_token
 
 # error messages
 ERROR_INVALID_CREDENTIALS = "メールアドレス、またはパスワードが間違っています"
 
+# 存在しないメールアドレスでも照合処理を行い、応答時間からユーザーの存在が推測されないようにするためのダミー
+_DUMMY_PASSWORD_HASH = None
+
+def get_dummy_password_hash() -> str:
+    global _DUMMY_PASSWORD_HASH
+    if _DUMMY_PASSWORD_HASH is None:
+        _DUMMY_PASSWORD_HASH = hash_password("dummy-password")
+    return _DUMMY_PASSWORD_HASH
+
 router = APIRouter(
     prefix="/api/v1/auth",
     tags=["auth"],
@@ -42,6 +58,7 @@ def login(
     - 認証失敗時は success=False, message にエラー理由を返します
     - user_status が 0（仮登録）の場合は next_action="show_user_registration" を返し、本登録を促します
     - 本登録済みなら next_action="show_main_menu" を返します
+    - 認証成功時は署名付きセッショントークン（access_token）を返します。以降のAPIは Authorization: Bearer <access_token> で呼び出せます
 
     Args:
     - request (LoginRequest): ログインリクエスト（メールアドレスとパスワード）
@@ -59,6 +76,7 @@ def login(
     - On authentication failure, returns success=False and an error message in message
     - If user_status is 0 (temporary registration), returns next_action="show_user_registration" to prompt for full registration
     - If fully registered, returns next_action="show_main_menu"
+    - On success, returns a signed session token (access_token). Subsequent APIs can be called with Authorization: Bearer <access_token>
 
     Args:
     - request (LoginRequest): Login request containing email and password
@@ -70,10 +88,11 @@ def login(
     """
     mstuser = db.query(MstUser).filter(MstUser.e_mail == request.e_mail).first()
     if not mstuser:
+        verify_password_in_pool(request.password, get_dummy_password_hash())
         return LoginResponse(success=False, user_id=None,
                             entity_type=None, entity_relation_id=None,
                             user_status=None, next_action="none", message=ERROR_INVALID_CREDENTIALS)
-    if str(mstuser.password) != request.password:  # ORMのカラムはSQL式のインスタンスなので、str()で文字列に変換
+    if not verify_password_in_pool(request.password, mstuser.password):
         return LoginResponse(success=False, user_id=None,
                             entity_type=None, entity_relation_id=None,
                             user_status=None, next_action="none", message=ERROR_INVALID_CREDENTIALS)
@@ -91,6 +110,19 @@ def login(
         next_action = "show_main_menu"  # フロントで通常メニューへ
         message = "ログイン成功"
 
+    # 平文（レガシー）や旧コストのハッシュは、照合済みの入力値で再ハッシュして保存
+    if needs_rehash(mstuser.password):
+        mstuser.password = hash_password_in_pool(request.password)
+        db.commit()
+
+    access_token, expires_in = issue_session_token(
+        user_id=str(mstuser.user_id),
+        user_name=mstuser.user_name,
+        entity_type=int(mstuser.entity_type),
+        entity_relation_id=int(mstuser.entity_relation_id),
+        is_admin=AuthManager.is_admin_user_id(mstuser.user_id),
+    )
+
     return LoginResponse(
         success=True,
         user_id=str(mstuser.user_id),
@@ -99,4 +131,7 @@ def login(
         user_status=int(mstuser.user_status),
         next_action=next_action,
         message=message,
+        access_token=access_token,
+        token_type=TOKEN_TYPE,
+        expires_in=expires_in,
     )
@@ -10,10 +10,22 @@ Note:
 ChangeLog:
     v1.0.0 (2025-08-08)
     - 初版作成
+    v1.1.0 (2026-10-19)
+    - 機器分類一覧を医療機関ごとにキャッシュし、ETag（If-None-Match / 304）に対応
+    - 機器分類ツリー取得API（GET /equipment-classifications/{medical_id}/tree）を追加
+    - 機器分類の子孫・祖先取得API（.../{classification_id}/descendants, ancestors）を追加
+    - 機器分類マスタ一括取込API（POST /equipment-classifications/import）を追加
+    - レポート選択情報の保存を全件削除→再登録から差分更新（INSERT ... ON CONFLICT）に変更
+    - レポート選択情報にバージョン番号を追加し、楽観的排他制御（409 Conflict）に対応
+    - 全医療機関のレポート選択情報の一括取得API（GET /equipment-classifications/system/report-selections）を追加
+    - モジュールでの logging.basicConfig を削除（ログ設定は src/utils/logging_config.py に集約）
+    - 機器分類一覧を、キャッシュ済みのJSONの形式の辞書から直接レスポンスにするよう変更（分類ごとのモデルの検証を省略）
+    - ログインユーザーを X-User-Id ヘッダーではなくセッショントークン（Depends(get_current_user_id)）から取得するよう変更
 """
 from datetime import datetime
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, Header
+from typing import Iterator, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Header, Response, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from ..database import SessionLocal
@@ -24,13 +36,36 @@ from src.models.pg_optigate.user_entity_link import UserEntityLink
 from src.schemas.equipment_classification import (
     EquipmentClassification,
     EquipmentClassificationListResponse,
+    EquipmentClassificationTreeResponse,
+    EquipmentClassificationHierarchyItem,
+    EquipmentClassificationHierarchyResponse,
+    ClassificationImportResponse,
     ReportSelectionResponse,
     ReportSelectionRequest,
     ReportSelectionCreateResponse,
     ReportSelectionDeleteResponse,
     ReportSelectionItem
 )
-from ..utils.auth import AuthManager
+from ..utils.auth import AuthManager, get_current_user_id, verify_system_key
+from ..utils.classification_cache import (
+    ClassificationTree,
+    get_cached_classification_tree,
+    load_classification_tree,
+)
+from ..utils.classification_import import (
+    ClassificationImportFormatError,
+    import_classifications,
+    iter_file_rows,
+)
+from ..utils.classification_hierarchy import ANCESTORS, DESCENDANTS, get_related_classifications
+from ..utils.etag import etag_matches, not_modified_response, set_etag_headers
+from ..utils.json_response import FastJSONResponse
+from ..utils.report_selection import (
+    get_report_selection_version,
+    increment_report_selection_version,
+    iter_report_selection_summaries,
+    upsert_report_selection,
+)
 import logging
 
 router = APIRouter(
@@ -40,7 +75,6 @@ router = APIRouter(
 
 # ロガー設定
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
 
 def get_db():
     db = SessionLocal()
@@ -49,12 +83,31 @@ def get_db():
     finally:
         db.close()
 
+def get_medical_classification_tree(medical_id: int, db: Session) -> ClassificationTree:
+    """
+    医療機関の機器分類をキャッシュから取得する（キャッシュが無い場合のみ医療機関の存在をチェックしてDBから構築）
+    """
+    tree = get_cached_classification_tree(medical_id, db)
+    if tree is not None:
+        return tree
+
+    medical_facility = db.query(MstMedicalFacility).filter(
+        MstMedicalFacility.medical_id == medical_id
+    ).first()
+    if not medical_facility:
+        raise HTTPException(
+            status_code=404,
+            detail=f"医療機関ID {medical_id} は存在しません"
+        )
+    return load_classification_tree(medical_id, db)
+
 @router.get("/{medical_id}", response_model=EquipmentClassificationListResponse)
 async def get_equipment_classifications(
     medical_id: int,
     skip: int = Query(0, ge=0, description="スキップ件数"),
     limit: int = Query(100, ge=1, le=1000, description="取得件数（最大1000件）"),
-    current_user_id: str = Header(..., alias="X-User-Id", description="ログインユーザーのuser_id"),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match", description="前回取得時のETag"),
+    current_user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
     """
@@ -66,6 +119,8 @@ async def get_equipment_classifications(
     - 指定医療機関の機器分類一覧を取得します
     - ページネーション対応（skip/limit）
     - 階層順序（level, parent_id, classification_name）でソートされます
+    - 医療機関ごとの機器分類はキャッシュされ、ETagヘッダーを返します
+    - If-None-Match が現在のETagと一致する場合は 304 Not Modified を返します
 
     Args:
     - medical_id (int): 医療機関ID
@@ -78,6 +133,9 @@ async def get_equipment_classifications(
     [English]
     Get equipment classifications for specified medical facility
 
+    - Classifications are cached per medical facility and returned with an ETag header
+    - Returns 304 Not Modified when If-None-Match matches the current ETag
+
     Args:
     - medical_id (int): Medical facility ID
     - skip (int, optional): Number of records to skip (default 0)
@@ -92,52 +150,343 @@ async def get_equipment_classifications(
         
         logger.info(f"機器分類一覧取得開始: medical_id={medical_id}, skip={skip}, limit={limit}")
         
-        # 医療機関の存在チェック
-        medical_facility = db.query(MstMedicalFacility).filter(
-            MstMedicalFacility.medical_id == medical_id
-        ).first()
-        if not medical_facility:
-            raise HTTPException(
-                status_code=404,
-                detail=f"医療機関ID {medical_id} は存在しません"
-            )
+        tree = get_medical_classification_tree(medical_id, db)
+        if etag_matches(if_none_match, tree.etag):
+            return not_modified_response(tree.etag)
         
-        # 総件数取得
-        total = db.query(MstEquipmentClassification).filter(
-            MstEquipmentClassification.medical_id == medical_id
-        ).count()
+        # 機器分類一覧（キャッシュ済みの階層順一覧から切り出し。JSONの形式に変換済みの辞書をそのまま返す）
+        items = tree.item_dicts[skip:skip + limit]
         
-        # 機器分類一覧取得（階層順序でソート）
-        classifications = db.query(MstEquipmentClassification).filter(
-            MstEquipmentClassification.medical_id == medical_id
-        ).order_by(
-            MstEquipmentClassification.classification_level,
-            MstEquipmentClassification.parent_classification_id,
-            MstEquipmentClassification.classification_name
-        ).offset(skip).limit(limit).all()
+        logger.info(f"機器分類一覧取得完了: total={len(tree.items)}, 取得件数={len(items)}")
         
-        # レスポンス作成
-        items = [EquipmentClassification.model_validate(c) for c in classifications]
+        response = FastJSONResponse(content={
+            "total": len(tree.items),
+            "skip": skip,
+            "limit": limit,
+            "items": items,
+        })
+        set_etag_headers(response, tree.etag)
+        return response
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"機器分類一覧取得エラー: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+@router.get("/{medical_id}/tree", response_model=EquipmentClassificationTreeResponse)
+async def get_equipment_classification_tree(
+    medical_id: int,
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match", description="前回取得時のETag"),
+    current_user_id: str = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """
+    Get Equipment Classification Tree
+
+    [Japanese]
+    機器分類ツリー取得
+
+    - 指定医療機関の機器分類を大分類→中分類→小分類の入れ子形式で一括取得します（ページングなし）
+    - 各階層は classification_name 順に並びます
+    - ETagヘッダーを返し、If-None-Match が一致する場合は 304 Not Modified を返します
+
+    Args:
+    - medical_id (int): 医療機関ID
+
+    Returns:
+    - EquipmentClassificationTreeResponse: 機器分類ツリーレスポンス
+
+    [English]
+    Get the equipment classification tree for specified medical facility
+
+    - Returns all classifications nested as level 1 -> level 2 -> level 3 (no paging)
+    - Returns an ETag header, and 304 Not Modified when If-None-Match matches
+
+    Args:
+    - medical_id (int): Medical facility ID
+
+    Returns:
+    - EquipmentClassificationTreeResponse: Equipment classification tree response
+    """
+    try:
+        # 医療機関アクセス権限チェック
+        AuthManager.require_medical_permission(current_user_id, medical_id, db)
+        
+        tree = get_medical_classification_tree(medical_id, db)
+        if etag_matches(if_none_match, tree.etag):
+            return not_modified_response(tree.etag)
         
-        logger.info(f"機器分類一覧取得完了: total={total}, 取得件数={len(items)}")
+        # シリアライズ済みのツリーをそのまま返却
+        response = Response(content=tree.tree_json, media_type="application/json")
+        set_etag_headers(response, tree.etag)
+        return response
         
-        return EquipmentClassificationListResponse(
-            total=total,
-            skip=skip,
-            limit=limit,
-            items=items
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"機器分類ツリー取得エラー: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+def get_classification_hierarchy(
+    medical_id: int,
+    classification_id: int,
+    direction: str,
+    include_self: bool,
+    db: Session
+) -> EquipmentClassificationHierarchyResponse:
+    """
+    閉包テーブルで機器分類の子孫・祖先を取得する（指定分類が医療機関に存在しない場合は404）
+    """
+    related = get_related_classifications(classification_id, direction, db)
+    target = next((c for c, depth in related if depth == 0), None)
+    if target is None or target.medical_id != medical_id:
+        raise HTTPException(
+            status_code=404,
+            detail=f"医療機関ID {medical_id} に機器分類ID {classification_id} は存在しません"
+        )
+
+    items = [
+        EquipmentClassificationHierarchyItem(
+            **EquipmentClassification.model_validate(c).model_dump(), depth=depth
         )
+        for c, depth in related
+        if include_self or depth > 0
+    ]
+    return EquipmentClassificationHierarchyResponse(
+        medical_id=medical_id,
+        classification_id=classification_id,
+        direction=direction,
+        items=items
+    )
+
+@router.get("/{medical_id}/{classification_id}/descendants", response_model=EquipmentClassificationHierarchyResponse)
+async def get_classification_descendants(
+    medical_id: int,
+    classification_id: int,
+    include_self: bool = Query(False, description="指定分類自身を含める"),
+    current_user_id: str = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """
+    Get Classification Descendants
+
+    [Japanese]
+    機器分類の子孫取得
+
+    - 指定した機器分類配下の全ての分類（大分類なら中分類・小分類）を取得します
+    - 閉包テーブルを使用し、1回のクエリで取得します
+    - 階層の距離（depth）、分類名の順に並びます
+
+    Args:
+    - medical_id (int): 医療機関ID
+    - classification_id (int): 機器分類ID
+    - include_self (bool, optional): 指定分類自身を含める（デフォルトFalse）
+
+    Returns:
+    - EquipmentClassificationHierarchyResponse: 子孫の機器分類一覧
+
+    [English]
+    Get all descendants of the specified classification in a single indexed query
+
+    Args:
+    - medical_id (int): Medical facility ID
+    - classification_id (int): Classification ID
+    - include_self (bool, optional): Include the specified classification itself (default False)
+
+    Returns:
+    - EquipmentClassificationHierarchyResponse: Descendant classifications ordered by depth and name
+    """
+    try:
+        # 医療機関アクセス権限チェック
+        AuthManager.require_medical_permission(current_user_id, medical_id, db)
+        return get_classification_hierarchy(medical_id, classification_id, DESCENDANTS, include_self, db)
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"機器分類一覧取得エラー: {str(e)}")
+        logger.error(f"機器分類子孫取得エラー: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+@router.get("/{medical_id}/{classification_id}/ancestors", response_model=EquipmentClassificationHierarchyResponse)
+async def get_classification_ancestors(
+    medical_id: int,
+    classification_id: int,
+    include_self: bool = Query(False, description="指定分類自身を含める"),
+    current_user_id: str = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """
+    Get Classification Ancestors
+
+    [Japanese]
+    機器分類の祖先取得
+
+    - 指定した機器分類の親分類を最上位（大分類）までたどって取得します
+    - 閉包テーブルを使用し、1回のクエリで取得します
+    - 階層の距離（depth）の順（親、祖父母の順）に並びます
+
+    Args:
+    - medical_id (int): 医療機関ID
+    - classification_id (int): 機器分類ID
+    - include_self (bool, optional): 指定分類自身を含める（デフォルトFalse）
+
+    Returns:
+    - EquipmentClassificationHierarchyResponse: 祖先の機器分類一覧
+
+    [English]
+    Get all ancestors of the specified classification in a single indexed query
+
+    Args:
+    - medical_id (int): Medical facility ID
+    - classification_id (int): Classification ID
+    - include_self (bool, optional): Include the specified classification itself (default False)
+
+    Returns:
+    - EquipmentClassificationHierarchyResponse: Ancestor classifications ordered by depth (parent first)
+    """
+    try:
+        # 医療機関アクセス権限チェック
+        AuthManager.require_medical_permission(current_user_id, medical_id, db)
+        return get_classification_hierarchy(medical_id, classification_id, ANCESTORS, include_self, db)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"機器分類祖先取得エラー: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+@router.post("/import", response_model=ClassificationImportResponse)
+def import_equipment_classifications(
+    file: UploadFile = File(..., description="機器分類マスタファイル（CSVまたはXLSX）"),
+    all_or_nothing: bool = Form(True, description="Trueの場合、1件でもエラーがあれば何も登録しない"),
+    dry_run: bool = Form(False, description="Trueの場合、検証のみ行い登録しない"),
+    current_user_id: str = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """
+    Import Equipment Classifications
+
+    [Japanese]
+    機器分類マスタ一括取込（システム管理者のみ）
+
+    - CSV/XLSXファイルの機器分類を1トランザクションで一括登録・更新します
+    - 列名は mst_equipment_classification.csv 形式（英語）と 機器分類マスタ.csv 形式（日本語）に対応します
+    - 親分類（parent_id）はファイル内の分類ID（classification_id）で指定し、メモリ上で解決します
+    - 既存の分類とは（医療機関ID, 分類レベル, 親分類, 機器分類名）で照合し、一致すれば公開用機器分類IDを更新、なければ新規登録します
+    - 行ごとのエラー（行番号とエラー内容）を返します
+    - all_or_nothing=True（デフォルト）の場合、1件でもエラーがあれば何も登録しません
+    - dry_run=True の場合は検証のみ行います
+
+    Args:
+    - file (UploadFile): 機器分類マスタファイル（.csv / .xlsx）
+    - all_or_nothing (bool, optional): エラーがあれば全件登録しない（デフォルトTrue）
+    - dry_run (bool, optional): 検証のみ（デフォルトFalse）
+
+    Returns:
+    - ClassificationImportResponse: 取込件数と行ごとのエラー
+
+    [English]
+    Import equipment classifications in bulk (system administrators only)
+
+    - Inserts or updates the classifications of a CSV/XLSX file in a single transaction
+    - Parent links (parent_id) refer to classification_id values within the file and are resolved in memory
+    - Existing classifications are matched by (medical_id, level, parent, name); matches update publication_classification_id, others are inserted
+    - Returns per-row errors (row number and message)
+    - With all_or_nothing=True (default), nothing is registered if any row has an error
+    - With dry_run=True, only validation is performed
+
+    Args:
+    - file (UploadFile): Classification master file (.csv / .xlsx)
+    - all_or_nothing (bool, optional): Register nothing if any row has an error (default True)
+    - dry_run (bool, optional): Validate only (default False)
+
+    Returns:
+    - ClassificationImportResponse: Import counts and per-row errors
+    """
+    # 管理者権限チェック
+    AuthManager.require_admin_permission(current_user_id, db)
+
+    logger.info(f"機器分類一括取込開始: file={file.filename}, all_or_nothing={all_or_nothing}, dry_run={dry_run}")
+    try:
+        result = import_classifications(
+            iter_file_rows(file.file, file.filename),
+            db,
+            user_id=current_user_id,
+            all_or_nothing=all_or_nothing,
+            dry_run=dry_run
+        )
+    except (ClassificationImportFormatError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"ファイル形式が不正です: {e}")
+    except Exception as e:
+        logger.error(f"機器分類一括取込エラー: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+    logger.info(
+        f"機器分類一括取込完了: total={result.total_rows}, inserted={result.inserted_count}, "
+        f"updated={result.updated_count}, errors={result.error_count}, committed={result.committed}"
+    )
+    return result
+
+def _stream_report_selection_summaries(updated_since: Optional[datetime]) -> Iterator[bytes]:
+    """全医療機関のレポート選択情報をJSONとして少しずつ出力する（ストリーミング中は専用のセッションを使用）"""
+    generated_at = datetime.now()
+    db = SessionLocal()
+    try:
+        yield f'{{"generated_at":"{generated_at.isoformat()}","items":['.encode("utf-8")
+        total = 0
+        for item in iter_report_selection_summaries(db, updated_since):
+            yield (b"," if total else b"") + item.model_dump_json().encode("utf-8")
+            total += 1
+        yield f'],"total":{total}}}'.encode("utf-8")
+        logger.info(f"全医療機関レポート選択情報取得完了: 件数={total}, updated_since={updated_since}")
+    finally:
+        db.close()
+
+@router.get("/system/report-selections")
+def get_all_report_selections(
+    updated_since: Optional[datetime] = Query(None, description="指定日時以降に更新された医療機関のみ取得（前回取得時の generated_at を指定）"),
+    system_key: str = Depends(verify_system_key)
+):
+    """
+    Get Report Selections of All Facilities (System Only)
+
+    [Japanese]
+    全医療機関のレポート出力用機器分類選択情報取得（オンプレミスシステム用）
+
+    - 月次の分析処理向けに、全医療機関の選択情報と最大選択数（count_reportout_classification）を一括で返します
+    - 組織情報・選択情報・機器分類名を結合した1クエリを医療機関ID順に読み進め、ストリーミングで返します
+    - updated_since を指定すると、組織情報または選択情報がその日時以降に更新された医療機関のみ返します
+      （選択情報の削除も含みます。前回取得時の generated_at を指定してください）
+    - システム認証キーが必要（一般ユーザーからのアクセス制限）
+
+    Args:
+    - updated_since (datetime, optional): 差分取得の基準日時
+    - X-System-Key (header): システム認証キー
+
+    Returns:
+    - JSON: {"generated_at": 取得開始日時, "items": [ReportSelectionSummaryItem, ...], "total": 件数}
+
+    [English]
+    Stream report selections and max counts of all medical facilities for the on-premise report generator
+
+    Args:
+    - updated_since (datetime, optional): Return only facilities changed since this time (use the previous generated_at)
+    - X-System-Key (header): System authentication key
+
+    Returns:
+    - JSON: {"generated_at": start time, "items": [ReportSelectionSummaryItem, ...], "total": count}
+    """
+    logger.info(f"全医療機関レポート選択情報取得開始: updated_since={updated_since}")
+    return StreamingResponse(
+        _stream_report_selection_summaries(updated_since),
+        media_type="application/json"
+    )
+
 @router.get("/report-selection/{medical_id}", response_model=ReportSelectionResponse)
 async def get_report_selection(
     medical_id: int,
-    current_user_id: str = Header(..., alias="X-User-Id", description="ログインユーザーのuser_id"),
+    current_user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
     """
@@ -149,6 +498,7 @@ async def get_report_selection(
     - 指定医療機関のレポート出力用機器分類選択情報を取得します
     - user_entity_link.count_reportout_classificationに基づく最大選択数を含みます
     - rank順でソートされます
+    - version は登録・削除時の楽観的排他制御に使用します
 
     Args:
     - medical_id (int): 医療機関ID
@@ -189,6 +539,8 @@ async def get_report_selection(
         
         max_count = user_entity_link.count_reportout_classification if user_entity_link else 5  # デフォルト5
         
+        version = get_report_selection_version(medical_id, db)
+        
         # レポート選択情報取得（rank順、最大数まで）
         selections_query = db.query(
             EquipmentClassificationReportSelection,
@@ -214,11 +566,12 @@ async def get_report_selection(
             for result in selection_results
         ]
         
-        logger.info(f"レポート選択情報取得完了: medical_id={medical_id}, 選択数={len(selections)}, 最大数={max_count}, 選択内容={[s.classification_name for s in selections]}")
+        logger.info(f"レポート選択情報取得完了: medical_id={medical_id}, 選択数={len(selections)}, 最大数={max_count}, バージョン={version}, 選択内容={[s.classification_name for s in selections]}")
         
         return ReportSelectionResponse(
             medical_id=medical_id,
             max_count=max_count,
+            version=version,
             selections=selections
         )
         
@@ -232,7 +585,7 @@ async def get_report_selection(
 async def create_report_selection(
     medical_id: int,
     request: ReportSelectionRequest,
-    current_user_id: str = Header(..., alias="X-User-Id", description="ログインユーザーのuser_id"),
+    current_user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
     """
@@ -242,8 +595,9 @@ async def create_report_selection(
     レポート出力用機器分類選択情報登録
 
     - 指定医療機関のレポート出力用機器分類選択情報を登録します
-    - 既存の選択情報は削除され、新しい情報で置き換えられます
+    - 既存の選択情報は新しい情報で置き換えられます（変更のあったrankのみ更新し、超過分のrankは削除）
     - classification_ids の順序がrank順になります
+    - version に取得時のバージョンを指定すると、他のユーザーが先に更新していた場合は409を返します
 
     Args:
     - medical_id (int): 医療機関ID
@@ -253,7 +607,9 @@ async def create_report_selection(
     - ReportSelectionCreateResponse: 登録結果レスポンス
 
     [English]
-    Create report selection configuration for specified medical facility
+    Create report selection configuration for specified medical facility.
+    Only changed ranks are written. When version is given and the selection has been
+    updated by another user since it was read, 409 Conflict is returned.
 
     Args:
     - medical_id (int): Medical facility ID
@@ -278,14 +634,17 @@ async def create_report_selection(
                 detail=f"医療機関ID {medical_id} は存在しません"
             )
         
-        # 機器分類IDの存在チェック
-        existing_classifications = db.query(MstEquipmentClassification.classification_id).filter(
+        # 機器分類IDの存在チェック（レスポンス用の機器分類名も同時に取得）
+        existing_classifications = db.query(
+            MstEquipmentClassification.classification_id,
+            MstEquipmentClassification.classification_name
+        ).filter(
             MstEquipmentClassification.classification_id.in_(request.classification_ids),
             MstEquipmentClassification.medical_id == medical_id
         ).all()
         
-        existing_ids = set(row[0] for row in existing_classifications)
-        missing_ids = set(request.classification_ids) - existing_ids
+        name_map = {row[0]: row[1] for row in existing_classifications}
+        missing_ids = set(request.classification_ids) - set(name_map)
         
         if missing_ids:
             raise HTTPException(
@@ -293,54 +652,31 @@ async def create_report_selection(
                 detail=f"指定された機器分類IDが存在しません: {list(missing_ids)}"
             )
         
-        # 既存の選択情報を削除
-        deleted_count = db.query(EquipmentClassificationReportSelection).filter(
-            EquipmentClassificationReportSelection.medical_id == medical_id
-        ).delete(synchronize_session=False)
-        
-        # 新しい選択情報を登録
-        current_time = datetime.now()
-        created_records = []
-        
-        for rank, classification_id in enumerate(request.classification_ids, 1):
-            record = EquipmentClassificationReportSelection(
-                medical_id=medical_id,
-                rank=rank,
-                classification_id=classification_id,
-                reg_user_id=current_user_id,
-                regdate=current_time,
-                update_user_id=current_user_id,
-                lastupdate=current_time
-            )
-            db.add(record)
-            created_records.append(record)
+        # バージョンを先に加算して同一医療機関の同時保存を直列化し、変更のあったrankのみ更新
+        version = increment_report_selection_version(medical_id, request.version, current_user_id, db)
+        updated_count, deleted_count = upsert_report_selection(
+            medical_id, request.classification_ids, current_user_id, db
+        )
         
         db.commit()
         
-        # レスポンス用に機器分類名を取得
-        classification_names = db.query(
-            MstEquipmentClassification.classification_id,
-            MstEquipmentClassification.classification_name
-        ).filter(
-            MstEquipmentClassification.classification_id.in_(request.classification_ids)
-        ).all()
-        
-        name_map = {row[0]: row[1] for row in classification_names}
-        
         selections = [
             ReportSelectionItem(
-                rank=record.rank,
-                classification_id=record.classification_id,
-                classification_name=name_map[record.classification_id]
+                rank=rank,
+                classification_id=classification_id,
+                classification_name=name_map[classification_id]
             )
-            for record in created_records
+            for rank, classification_id in enumerate(request.classification_ids, 1)
         ]
         
-        logger.info(f"レポート選択情報登録完了: medical_id={medical_id}, 削除数={deleted_count}, 作成数={len(created_records)}")
+        logger.info(f"レポート選択情報登録完了: medical_id={medical_id}, バージョン={version}, 更新数={updated_count}, 削除数={deleted_count}, 選択数={len(selections)}")
         
         return ReportSelectionCreateResponse(
             medical_id=medical_id,
-            created_count=len(created_records),
+            created_count=len(selections),
+            updated_count=updated_count,
+            deleted_count=deleted_count,
+            version=version,
             selections=selections
         )
         
@@ -354,7 +690,8 @@ async def create_report_selection(
 @router.delete("/report-selection/{medical_id}", response_model=ReportSelectionDeleteResponse)
 async def delete_report_selection(
     medical_id: int,
-    current_user_id: str = Header(..., alias="X-User-Id", description="ログインユーザーのuser_id"),
+    version: Optional[int] = Query(None, description="取得時のバージョン（指定時は楽観的排他制御を行う）"),
+    current_user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
     """
@@ -365,9 +702,11 @@ async def delete_report_selection(
 
     - 指定医療機関のレポート出力用機器分類選択情報を全て削除します
     - テーブルから実際にレコードを削除します
+    - version に取得時のバージョンを指定すると、他のユーザーが先に更新していた場合は409を返します
 
     Args:
     - medical_id (int): 医療機関ID
+    - version (int, optional): 取得時のバージョン
 
     Returns:
     - ReportSelectionDeleteResponse: 削除結果レスポンス
@@ -377,6 +716,7 @@ async def delete_report_selection(
 
     Args:
     - medical_id (int): Medical facility ID
+    - version (int, optional): Version read by the client (409 Conflict when outdated)
 
     Returns:
     - ReportSelectionDeleteResponse: Deletion result response
@@ -398,17 +738,17 @@ async def delete_report_selection(
             )
         
         # 選択情報を削除
-        deleted_count = db.query(EquipmentClassificationReportSelection).filter(
-            EquipmentClassificationReportSelection.medical_id == medical_id
-        ).delete(synchronize_session=False)
+        new_version = increment_report_selection_version(medical_id, version, current_user_id, db)
+        _, deleted_count = upsert_report_selection(medical_id, [], current_user_id, db)
         
         db.commit()
         
-        logger.info(f"レポート選択情報削除完了: medical_id={medical_id}, 削除数={deleted_count}")
+        logger.info(f"レポート選択情報削除完了: medical_id={medical_id}, バージョン={new_version}, 削除数={deleted_count}")
         
         return ReportSelectionDeleteResponse(
             medical_id=medical_id,
-            deleted_count=deleted_count
+            deleted_count=deleted_count,
+            version=new_version
         )
         
     except HTTPException:
@@ -8,18 +8,25 @@ Note:
     - FastAPIを使用しており、SQLAlchemy ORMを介してPostgreSQLデータベースと連携します。
     - 各エンドポイントは、Pydanticモデルを使用してリクエストとレスポンスのバリデーションを行います。
 
+    - 取得APIは件数と最終更新日時によるETagを返し、If-None-Match が一致する場合は 304 Not Modified を返します。
+
 ChangeLog:
     v1.0.0 (2025-08-07)
     - 初版作成
+    v1.1.0 (2026-10-19)
+    - 一覧・個別取得にETag（If-None-Match / 304）と Cache-Control を追加
+    - ログインユーザーを X-User-Id ヘッダーではなくセッショントークン（Depends(get_current_user_id)）から取得するよう変更
 """
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Header
+from fastapi import APIRouter, Depends, HTTPException, Header, Response
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from ..database import SessionLocal
 from ..models.pg_optigate.mst_medical_facility import MstMedicalFacility
 from ..schemas.mst_medical_facility import MedicalFacility, MedicalFacilityCreate
-from ..utils.auth import AuthManager
+from ..utils.auth import AuthManager, get_current_user_id
+from ..utils.etag import build_etag, etag_matches, get_cache_control, not_modified_response, set_etag_headers
 import logging
 
 router = APIRouter(
@@ -39,9 +46,11 @@ def get_db():
 
 @router.get("/", response_model=List[MedicalFacility])
 def read_facilities(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    current_user_id: str = Header(..., alias="X-User-Id", description="ログインユーザーのuser_id"),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match", description="前回取得時のETag"),
+    current_user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)):
     """
     Read Medical Facilities
@@ -52,6 +61,7 @@ def read_facilities(
     - 全ての医療機関情報を取得します
     - skipとlimitパラメータでページネーション可能です
     - 1〜100件までの範囲で取得件数を指定できます
+    - アクセス可能な医療機関の件数と最終更新日時からETagを返し、If-None-Match が一致する場合は 304 Not Modified を返します
 
     例:
     - /facilities ← 全件取得（最大100件）
@@ -72,6 +82,7 @@ def read_facilities(
     - Retrieves all medical facility information
     - Supports pagination with skip and limit parameters
     - Can specify the number of records to retrieve within the range of 1-100
+    - Returns an ETag built from the count and latest lastupdate of accessible facilities, and 304 Not Modified when If-None-Match matches
 
     Examples:
     - /facilities ← Retrieve all records (maximum 100 records)
@@ -91,12 +102,26 @@ def read_facilities(
     filtered_query = AuthManager.filter_by_medical_permission(
         query, current_user_id, db, MstMedicalFacility.medical_id
     )
-    return filtered_query.offset(skip).limit(limit).all()
+
+    # 行を取得する前に件数と最終更新日時のみを集計し、変更が無ければ 304 を返す
+    count, last_modified = filtered_query.with_entities(
+        func.count(MstMedicalFacility.medical_id), func.max(MstMedicalFacility.lastupdate)
+    ).one()
+    etag = build_etag("facilities", current_user_id, skip, limit, count, last_modified)
+    cache_control = get_cache_control("facilities")
+    if etag_matches(if_none_match, etag):
+        return not_modified_response(etag, cache_control)
+
+    set_etag_headers(response, etag, cache_control)
+    # ページの内容がETagと対応するよう、医療機関ID順に並べる
+    return filtered_query.order_by(MstMedicalFacility.medical_id).offset(skip).limit(limit).all()
 
 @router.get("/{facility_id}", response_model=MedicalFacility)
 def read_facility(
     facility_id: int,
-    current_user_id: str = Header(..., alias="X-User-Id", description="ログインユーザーのuser_id"),
+    response: Response,
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match", description="前回取得時のETag"),
+    current_user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)):
     """
     Read Medical Facility by ID
@@ -106,6 +131,7 @@ def read_facility(
 
     - 医療機関IDで指定された医療機関情報を取得します
     - 医療機関が存在しない場合は404エラーを返します
+    - 最終更新日時からETagを返し、If-None-Match が一致する場合は 304 Not Modified を返します
 
     Args:
     - facility_id (int): 医療機関ID
@@ -119,6 +145,7 @@ def read_facility(
 
     - Retrieves medical facility information specified by facility ID
     - Returns 404 error if the medical facility does not exist
+    - Returns an ETag built from lastupdate, and 304 Not Modified when If-None-Match matches
 
     Args:
     - facility_id (int): Medical facility ID
@@ -133,12 +160,18 @@ def read_facility(
     facility = db.query(MstMedicalFacility).filter(MstMedicalFacility.medical_id == facility_id).first()
     if not facility:
         raise HTTPException(status_code=404, detail="Medical facility not found")
+
+    etag = build_etag("facility", facility.medical_id, facility.lastupdate)
+    cache_control = get_cache_control("facilities")
+    if etag_matches(if_none_match, etag):
+        return not_modified_response(etag, cache_control)
+    set_etag_headers(response, etag, cache_control)
     return facility
 
 @router.post("/", response_model=MedicalFacility)
 def create_facility(
     facility: MedicalFacilityCreate,
-    current_user_id: str = Header(..., alias="X-User-Id", description="ログインユーザーのuser_id"),
+    current_user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)):
     """
     Create a new medical facility
@@ -219,7 +252,7 @@ def create_facility(
 def update_facility(
     facility_id: int,
     facility: MedicalFacilityCreate,
-    current_user_id: str = Header(..., alias="X-User-Id", description="ログインユーザーのuser_id"),
+    current_user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)):
     """
     Update an existing medical facility
@@ -15,13 +15,31 @@ ChangeLog:
     - 初版作成
     v1.1.0 (2025-08-26)
     - OS環境に応じた動的パス設定対応
+    v1.2.0 (2026-10-19)
+    - システム用APIキーの認証（verify_system_key）を utils/auth.py に移動
+    - アップロード後に医療機器台帳CSVを medical_equipment_ledger へ取り込む処理（バックグラウンド）を追加
+    - 医療機器台帳の再取込API（POST /files/system/ingest-equipment/{medical_id}）を追加
+      （取込処理はイベントループを止めないよう、同期関数のエンドポイントとしてスレッドプールで実行）
+    - アップロード後の処理（台帳取込・通知）とレポート公開をジョブキュー（src/utils/job_queue.py）で実行するよう変更
+      （アップロードAPIはジョブIDを返し、レポート公開APIはジョブを登録して202を返す）
+    - アップロードファイルの内容（ヘッダー・列数・必須項目・型・日付形式）を保存前に検証するよう変更
+      （一時ファイルへの書き込みと検証はイベントループを止めないようスレッドプールで実行。
+        一時ファイルはアップロードごとに一意の名前とし、同じ医療機関の同時アップロードで競合しない）
+    - オンプレミスレポート検索のデバッグ出力（print）を logger.debug に変更
+    - 必要なディレクトリの作成をモジュールのインポート時からAPIサーバーの起動時（src/main.py の lifespan）に変更
+    - ログインユーザーを X-User-Id ヘッダーではなくセッショントークン（Depends(get_current_user_id)）から取得するよう変更
+    - 医療機器台帳の取込結果のコミットを呼び出し元（ジョブの実行・再取込API）で行うよう変更
+      （通知メールの送信先はジョブのセッションで取得し、未コミットの書き込みと別の接続で競合しない）
 """
+import os
 import shutil
+import tempfile
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from pathlib import Path
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Header
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 
@@ -39,12 +57,18 @@ from src.schemas.report_publication import (
     AvailableReport,
     ReportPublication
 )
+from src.schemas.job_queue import JobStatus
 from src.schemas.file_management import (
+    LedgerIngestionResult,
     MonthlyFileStatus,
+    UploadValidationResult,
     validate_file_extension
 )
-from ..utils.auth import AuthManager
+from ..utils.auth import AuthManager, get_current_user_id, verify_system_key
+from ..utils.job_queue import PermanentJobError, enqueue_job, job_handler, to_job_status
+from ..utils.ledger_ingestion import LedgerIngestionFormatError, ingest_equipment_ledger
 from ..utils.path_config import path_config
+from ..utils.upload_validation import validate_upload_file
 # from smds_core.logger import Logger  # 一時的にコメントアウト
 import logging
 
@@ -55,7 +79,6 @@ router = APIRouter(
 
 # シングルトンロガーの取得（一時的にPython標準ライブラリ使用）
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
 
 # ファイル保存パス設定（OS環境に応じて動的設定）
 FILES_BASE_PATH = path_config.files_base_path
@@ -65,11 +88,14 @@ REPORTS_PATH = path_config.reports_path
 # オンプレミスレポート保存パス
 ONPRE_REPORTS_PATH = path_config.onpre_reports_path
 
-# 必要なディレクトリを作成
-path_config.ensure_directories()
+# アップロードファイルを一時ファイルへ書き込む単位（ファイル全体をメモリに読み込まない）
+UPLOAD_COPY_BYTES = 1024 * 1024
 
-# システム用APIキー（本番環境では環境変数から取得推奨）
-SYSTEM_API_KEY = "optiserve-internal-system-key-2025"
+# ジョブ種別と優先度（src/utils/job_queue.py）
+UPLOAD_POST_PROCESS_JOB = "upload_post_process"
+PUBLISH_REPORTS_JOB = "publish_reports"
+UPLOAD_POST_PROCESS_PRIORITY = 0
+PUBLISH_REPORTS_PRIORITY = 10  # 医療機関への公開を台帳取込より優先
 
 def get_db():
     db = SessionLocal()
@@ -82,15 +108,6 @@ def ensure_directory_exists(path: Path):
     """ディレクトリが存在しない場合は作成"""
     path.mkdir(parents=True, exist_ok=True)
 
-def verify_system_key(x_system_key: str = Header(None, alias="X-System-Key")):
-    """システム用APIキーの認証"""
-    if not x_system_key or x_system_key != SYSTEM_API_KEY:
-        raise HTTPException(
-            status_code=401,
-            detail="System API key is required for this endpoint"
-        )
-    return x_system_key
-
 def get_upload_file_path(medical_id: int, file_type: int) -> Path:
     """アップロードファイルのパスを生成（医療機関単位・1世代保管）"""
     file_extensions = {1: ".csv", 2: ".csv", 3: ".csv"}  # 医療機器台帳、貸出履歴、故障履歴
@@ -99,6 +116,24 @@ def get_upload_file_path(medical_id: int, file_type: int) -> Path:
     filename = f"{file_names[file_type]}{file_extensions[file_type]}"
     return UPLOADS_PATH / str(medical_id) / filename
 
+def save_and_validate_upload(upload_file: UploadFile, file_path: Path, file_type: int) -> Tuple[Path, UploadValidationResult]:
+    """
+    アップロードファイルを一時ファイルに書き込み、内容を検証する（ブロッキング処理のためスレッドプールで実行）
+
+    一時ファイルは保存先と同じディレクトリに一意の名前で作成します（同じ医療機関の同時アップロードで共有しない）。
+    一時ファイルのパスと検証結果を返し、例外の場合は一時ファイルを削除します。
+    """
+    fd, temp_name = tempfile.mkstemp(dir=file_path.parent, prefix=file_path.name + ".", suffix=".uploading")
+    temp_path = Path(temp_name)
+    try:
+        os.chmod(temp_path, 0o644)  # mkstemp は 0600 で作成するため、従来の保存ファイルと同じ権限にする
+        with os.fdopen(fd, "wb") as buffer:
+            shutil.copyfileobj(upload_file.file, buffer, UPLOAD_COPY_BYTES)
+        return temp_path, validate_upload_file(temp_path, file_type)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
 def get_report_file_path(medical_id: int, publication_ym: str, file_type: int) -> Path:
     """レポートファイルのパスを生成（年/月階層構造）"""
     file_extensions = {1: ".pdf", 2: ".xlsx", 3: ".xlsx"}  # 分析レポート、故障リスト、未実績リスト
@@ -117,19 +152,7 @@ def get_onpremise_report_files(hpcode: int, year: int, month: int) -> List[Path]
     month_padded = f"{month:02d}"
     onpre_path = ONPRE_REPORTS_PATH / str(hpcode) / str(year) / month_padded
     
-    # デバッグ情報出力（強制出力）
-    print(f"DEBUG: オンプレミスレポート検索: {onpre_path}")
-    print(f"DEBUG: パス存在チェック: {onpre_path.exists()}")
-    print(f"DEBUG: 絶対パス: {onpre_path.absolute()}")
-    logger.info(f"オンプレミスレポート検索: {onpre_path}")
-    logger.info(f"パス存在チェック: {onpre_path.exists()}")
-    
-    if onpre_path.exists():
-        contents = list(onpre_path.iterdir())
-        print(f"DEBUG: ディレクトリ内容: {contents}")
-        logger.info(f"ディレクトリ内容: {contents}")
-    else:
-        print(f"DEBUG: ディレクトリが存在しません")
+    logger.debug(f"オンプレミスレポート検索: {onpre_path}（存在: {onpre_path.exists()}）")
     
     if not onpre_path.exists():
         return []
@@ -166,36 +189,126 @@ def copy_onpremise_reports_to_publication(hpcode: int, publication_ym: str) -> L
     
     return copied_files
 
-async def send_notification_email(medical_id: int, notification_type: str, target_month: str):
-    """通知メール送信（将来実装）"""
+def send_notification_email(medical_id: int, notification_type: str, target_month: str, db: Session):
+    """通知メール送信（将来実装）
+
+    送信先はジョブのセッション（db）で取得します（未コミットの変更を持つセッションと別の接続で読むと、
+    SQLiteではジョブ自身の書き込みロックを待って失敗するため）。
+    """
     try:
         # user_entity_linkからnotification_email_listを取得
-        db = SessionLocal()
-        try:
-            link = db.query(UserEntityLink).filter(
-                UserEntityLink.entity_type == 1,
-                UserEntityLink.entity_relation_id == medical_id
-            ).first()
-            
-            if link is not None and hasattr(link, 'notification_email_list') and link.notification_email_list:
-                # TODO: 実際のメール送信実装
-                logger.info(f"通知メール送信予定: {notification_type}, 医療機関ID={medical_id}, 対象月={target_month}")
-                logger.debug(f"送信先: {link.notification_email_list}")
-                return True
-            else:
-                logger.warning(f"通知先メールアドレスが設定されていません: 医療機関ID={medical_id}")
-                return False
-        finally:
-            db.close()
+        link = db.query(UserEntityLink).filter(
+            UserEntityLink.entity_type == 1,
+            UserEntityLink.entity_relation_id == medical_id
+        ).first()
+
+        if link is not None and hasattr(link, 'notification_email_list') and link.notification_email_list:
+            # TODO: 実際のメール送信実装
+            logger.info(f"通知メール送信予定: {notification_type}, 医療機関ID={medical_id}, 対象月={target_month}")
+            logger.debug(f"送信先: {link.notification_email_list}")
+            return True
+        else:
+            logger.warning(f"通知先メールアドレスが設定されていません: 医療機関ID={medical_id}")
+            return False
     except Exception as e:
         logger.error(f"通知メール送信エラー: {e}")
         return False
 
+@job_handler(UPLOAD_POST_PROCESS_JOB)
+def process_uploaded_files(payload: dict, db: Session) -> dict:
+    """アップロード後の処理（医療機器台帳の取込・通知メール送信）"""
+    medical_id = payload["medical_id"]
+    result = {"medical_id": medical_id, "ledger": None, "ledger_error": None}
+    try:
+        ledger = ingest_equipment_ledger(
+            medical_id,
+            get_upload_file_path(medical_id, 1),
+            db,
+            payload["user_id"],
+            history_paths=[get_upload_file_path(medical_id, 2), get_upload_file_path(medical_id, 3)]
+        )
+        result["ledger"] = ledger.model_dump()
+        logger.info(
+            f"医療機器台帳取込完了: 医療機関ID={medical_id}, 登録={ledger.inserted_count}件, "
+            f"更新={ledger.updated_count}件, 削除={ledger.deleted_count}件, 変更なし={ledger.unchanged_count}件"
+        )
+    except LedgerIngestionFormatError as e:
+        # ファイルの不備は再試行しても成功しないため、結果に記録して通知は行う
+        result["ledger_error"] = str(e)
+        logger.warning(f"医療機器台帳取込中止: 医療機関ID={medical_id}, {str(e)}")
+
+    result["notification_sent"] = send_notification_email(medical_id, "upload", payload["target_month"], db)
+    return result
+
+@job_handler(PUBLISH_REPORTS_JOB)
+def publish_reports(payload: dict, db: Session) -> dict:
+    """レポート公開（オンプレミスレポートのコピー・公開記録の登録・通知メール送信）"""
+    medical_id = payload["medical_id"]
+    publication_ym = payload["publication_ym"]
+
+    # オンプレミスレポートをコピー（上書きのため再実行しても同じ結果）
+    copied_files = copy_onpremise_reports_to_publication(medical_id, publication_ym)
+    if not copied_files:
+        raise PermanentJobError(f"オンプレミスレポートが見つかりません: 医療機関ID={medical_id}, 年月={publication_ym}")
+
+    # DB履歴記録（コミットはジョブの完了の記録と同じトランザクションで行い、再実行時に重複して登録しない）
+    published_records = []
+    publication_datetime = datetime.now()
+    for filename in copied_files:
+        # ファイル種別を推定（簡易実装）
+        if filename.lower().endswith('.pptx') or filename.lower().endswith('.pdf'):
+            file_type = 1  # 分析レポート
+        elif 'failure' in filename.lower() or '故障' in filename:
+            file_type = 2  # 故障リスト
+        else:
+            file_type = 3  # 未実績リスト（その他）
+
+        db_record = ReportPublicationLog(
+            medical_id=medical_id,
+            file_type=file_type,
+            file_name=filename,
+            publication_ym=publication_ym,
+            upload_datetime=publication_datetime,  # publication_datetimeではなくupload_datetime
+            download_user_id="0",  # システム公開のため0
+            reg_user_id="0",  # システム公開のため0
+            regdate=publication_datetime,
+            update_user_id="0",  # システム公開のため0
+            lastupdate=publication_datetime
+        )
+        db.add(db_record)
+        published_records.append(db_record)
+        logger.info(f"レポート公開記録作成: {filename} (ファイル種別={file_type})")
+    db.flush()
+
+    # 通知メール送信
+    notification_sent = send_notification_email(medical_id, "report_published", publication_ym, db)
+
+    logger.info(f"月次レポート公開完了: 医療機関ID={medical_id}, {len(published_records)}件公開")
+
+    return MonthlyReportPublishResponse(
+        medical_id=medical_id,
+        publication_ym=publication_ym,
+        publish_datetime=publication_datetime.isoformat(),
+        published_reports=[ReportPublication(
+            medical_id=record.medical_id,
+            publication_ym=record.publication_ym,
+            file_type=record.file_type,
+            file_name=record.file_name,
+            download_user_id=record.download_user_id,
+            publication_id=record.publication_id,
+            upload_datetime=record.upload_datetime,
+            download_datetime=record.download_datetime,
+            regdate=record.regdate,
+            lastupdate=record.lastupdate
+        ) for record in published_records],
+        notification_sent=notification_sent
+    ).model_dump(mode="json")
+
 @router.post("/upload-files/{medical_id}", response_model=FileUploadResponse)
 async def upload_files(
     medical_id: int,
     upload_user_id: str = Form(..., description="アップロードを行うユーザーID"),
-    current_user_id: str = Header(..., alias="X-User-Id", description="ログインユーザーのuser_id"),
+    current_user_id: str = Depends(get_current_user_id),
     equipment_file: UploadFile = File(..., description="医療機器台帳ファイル"),
     rental_file: UploadFile = File(..., description="貸出履歴ファイル"),
     failure_file: UploadFile = File(..., description="故障履歴ファイル"),
@@ -209,8 +322,12 @@ async def upload_files(
 
     - 医療機関から提供される3種類のファイルを同時にアップロードします
     - 再アップロードは既存ファイルを上書きします（最新1世代のみ保持）
-    - アップロード完了時に通知メールを送信します
+    - 保存前に3ファイルの内容（ヘッダー・列数・必須項目・型・日付形式）を検証し、
+      誤りがある場合は400（ファイルごとの行番号付きエラー）を返します（前回のファイルは上書きしません）
     - 全てのアップロード実行履歴をDBに記録します（ファイル名変更なし）
+    - 医療機器台帳ファイルの medical_equipment_ledger への取込（差分のみ反映）と通知メールの送信は
+      ジョブとして登録し、ワーカーが実行します（状態は GET /api/v1/jobs/{job_id} で取得）
+    - レスポンスの notification_sent は非推奨です（常にFalse）。通知メールの送信結果はジョブの結果の notification_sent を参照してください
 
     Args:
     - medical_id (int): 医療機関ID
@@ -220,15 +337,19 @@ async def upload_files(
     - failure_file (UploadFile): 故障履歴ファイル（CSV）
 
     Returns:
-    - MonthlyUploadResponse: アップロード結果とファイル一覧
+    - FileUploadResponse: アップロード結果とファイル一覧、アップロード後の処理のジョブID
 
     [English]
     Upload files from medical facilities
 
     - Uploads 3 types of files provided by medical facilities
     - Re-uploads will overwrite existing files (keeps only latest generation)
-    - Sends notification email upon upload completion
+    - Validates the contents of the 3 files (header, column count, required fields, types, date formats)
+      before saving, and returns 400 with per-file errors and row numbers (previous files are kept)
     - Records all upload history in database (no filename modification)
+    - Ingesting the equipment file into medical_equipment_ledger (applies only the differences) and
+      sending the notification email are enqueued as a job (poll GET /api/v1/jobs/{job_id})
+    - notification_sent in the response is deprecated (always false). Use notification_sent in the job result instead
 
     Args:
     - medical_id (int): Medical facility ID
@@ -238,7 +359,7 @@ async def upload_files(
     - failure_file (UploadFile): Failure history file (CSV)
 
     Returns:
-    - MonthlyUploadResponse: Upload result and file list
+    - FileUploadResponse: Upload result, file list and the job ID of the post-processing
     """
     try:
         # 医療機関アクセス権限チェック
@@ -263,9 +384,6 @@ async def upload_files(
             (3, failure_file, "故障履歴")
         ]
         
-        uploaded_records = []
-        upload_datetime = datetime.now()
-        
         for file_type, upload_file, file_description in upload_files:
             if not upload_file or not upload_file.filename:
                 raise HTTPException(
@@ -279,17 +397,46 @@ async def upload_files(
                     status_code=400,
                     detail=f"{file_description}ファイルはCSV形式である必要があります"
                 )
+        
+        # 一時ファイルに保存して内容を検証（1ファイルでも誤りがある場合は前回のファイルを上書きしない）
+        temp_paths = {}
+        try:
+            validation_results = []
+            for file_type, upload_file, file_description in upload_files:
+                file_path = get_upload_file_path(medical_id, file_type)
+                ensure_directory_exists(file_path.parent)
+                temp_paths[file_type], result = await run_in_threadpool(
+                    save_and_validate_upload, upload_file, file_path, file_type
+                )
+                validation_results.append(result)
             
-            # ファイル保存パス（医療機関単位・1世代保管）
-            file_path = get_upload_file_path(medical_id, file_type)
-            ensure_directory_exists(file_path.parent)
+            invalid_results = [result for result in validation_results if result.errors]
+            if invalid_results:
+                logger.warning(
+                    f"アップロードファイル検証エラー: 医療機関ID={medical_id}, "
+                    + ", ".join(f"{result.file_label}={len(result.errors)}件" for result in invalid_results)
+                )
+                raise HTTPException(
+                    status_code=400,
+                    detail={
+                        "message": "アップロードファイルの内容に誤りがあります",
+                        "files": [result.model_dump() for result in invalid_results]
+                    }
+                )
             
             # ファイル保存（上書き）
-            with open(file_path, "wb") as buffer:
-                content = await upload_file.read()
-                buffer.write(content)
-            
-            # DB履歴記録（全てのアップロード履歴を追加・ファイル名変更なし）
+            for file_type, upload_file, file_description in upload_files:
+                file_path = get_upload_file_path(medical_id, file_type)
+                os.replace(temp_paths.pop(file_type), file_path)
+                logger.info(f"ファイル保存完了: {file_description} ({upload_file.filename}) -> {file_path}")
+        finally:
+            for temp_path in temp_paths.values():
+                temp_path.unlink(missing_ok=True)
+        
+        # DB履歴記録（全てのアップロード履歴を追加・ファイル名変更なし）
+        uploaded_records = []
+        upload_datetime = datetime.now()
+        for file_type, upload_file, file_description in upload_files:
             db_record = FacilityUploadLog(
                 medical_id=medical_id,
                 file_type=file_type,
@@ -302,25 +449,29 @@ async def upload_files(
                 lastupdate=upload_datetime
             )
             db.add(db_record)
-            db.commit()
-            db.refresh(db_record)
             uploaded_records.append(db_record)
-            
-            logger.info(f"ファイル保存完了: {file_description} ({upload_file.filename}) -> {file_path}")
         
-        # 通知メール送信
-        notification_sent = await send_notification_email(
-            medical_id, "upload", datetime.now().strftime("%Y-%m")
+        # 医療機器台帳の取込・通知メール送信はジョブで実行
+        job = enqueue_job(
+            db,
+            UPLOAD_POST_PROCESS_JOB,
+            {"medical_id": medical_id, "user_id": current_user_id, "target_month": datetime.now().strftime("%Y-%m")},
+            current_user_id,
+            medical_id=medical_id,
+            priority=UPLOAD_POST_PROCESS_PRIORITY
         )
+        db.commit()
+        for db_record in uploaded_records:
+            db.refresh(db_record)
         
-        logger.info(f"ファイルアップロード完了: 医療機関ID={medical_id}, {len(uploaded_records)}件")
+        logger.info(f"ファイルアップロード完了: 医療機関ID={medical_id}, {len(uploaded_records)}件, job_id={job.job_id}")
         
         return FileUploadResponse(
             medical_id=medical_id,
             target_month=datetime.now().strftime("%Y-%m"),  # 実行月を記録
             upload_datetime=upload_datetime.isoformat(),
             uploaded_files=[FacilityUpload.model_validate(record) for record in uploaded_records],
-            notification_sent=notification_sent
+            job_id=job.job_id
         )
         
     except HTTPException:
@@ -334,7 +485,7 @@ async def upload_files(
 async def get_upload_status(
     medical_id: int,
     months: Optional[int] = 6,  # デフォルト6ヶ月分
-    current_user_id: str = Header(..., alias="X-User-Id", description="ログインユーザーのuser_id"),
+    current_user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
     """
@@ -371,7 +522,7 @@ async def get_upload_status(
 async def get_available_reports(
     medical_id: int,
     months: Optional[int] = 12,  # デフォルト12ヶ月分
-    current_user_id: str = Header(..., alias="X-User-Id", description="ログインユーザーのuser_id"),
+    current_user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
     """
@@ -408,7 +559,7 @@ async def get_available_reports(
 async def download_report(
     publication_id: int,
     user_id: str,
-    current_user_id: str = Header(..., alias="X-User-Id", description="ログインユーザーのuser_id"),
+    current_user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
     """
@@ -604,8 +755,92 @@ async def fetch_uploaded_file(
         logger.error(f"システムファイル取得エラー: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+# 数万行のCSVの解析・差分比較・DB更新を同期的に行うため、async にせずスレッドプールで実行させる
+@router.post("/system/ingest-equipment/{medical_id}", response_model=LedgerIngestionResult)
+def ingest_equipment_file(
+    medical_id: int,
+    system_key: str = Depends(verify_system_key),
+    db: Session = Depends(get_db)
+):
+    """
+    Ingest Uploaded Equipment File for Internal System
+
+    [Japanese]
+    医療機器台帳ファイルの再取込（システム用）
+
+    - アップロード済みの医療機器台帳ファイルを medical_equipment_ledger に取り込みます
+    - アップロード時のバックグラウンド取込と同じ処理を同期的に実行し、結果を返します
+    - 既存の台帳と型番で照合し、登録・更新・削除のみを反映します
+    - システム認証キーが必要（一般ユーザーからのアクセス制限）
+
+    Args:
+    - medical_id (int): 医療機関ID
+    - X-System-Key (header): システム認証キー
+
+    Returns:
+    - LedgerIngestionResult: 取込結果（登録・更新・削除件数など）
+
+    [English]
+    Re-ingest the uploaded equipment file for internal system
+
+    - Ingests the uploaded equipment file into medical_equipment_ledger
+    - Runs the same process as the background ingestion after upload, synchronously
+    - Matches the existing ledger by model number and applies only inserts, updates and deletes
+    - Requires the system authentication key
+
+    Args:
+    - medical_id (int): Medical facility ID
+    - X-System-Key (header): System authentication key
+
+    Returns:
+    - LedgerIngestionResult: Ingestion result (inserted / updated / deleted counts, etc.)
+    """
+    try:
+        logger.info(f"医療機器台帳取込開始: 医療機関ID={medical_id}")
+
+        # 医療機関の存在チェック
+        medical_facility = db.query(MstMedicalFacility).filter(
+            MstMedicalFacility.medical_id == medical_id
+        ).first()
+        if not medical_facility:
+            raise HTTPException(
+                status_code=404,
+                detail=f"医療機関ID {medical_id} は存在しません"
+            )
+
+        file_path = get_upload_file_path(medical_id, 1)
+        if not file_path.exists():
+            raise HTTPException(
+                status_code=404,
+                detail=f"医療機器台帳ファイルが存在しません: 医療機関ID={medical_id}"
+            )
+
+        result = ingest_equipment_ledger(
+            medical_id,
+            file_path,
+            db,
+            "0",  # システム用アクセスのため
+            history_paths=[get_upload_file_path(medical_id, 2), get_upload_file_path(medical_id, 3)]
+        )
+        db.commit()
+
+        logger.info(
+            f"医療機器台帳取込完了: 医療機関ID={medical_id}, 登録={result.inserted_count}件, "
+            f"更新={result.updated_count}件, 削除={result.deleted_count}件"
+        )
+        return result
+
+    except HTTPException:
+        raise
+    except LedgerIngestionFormatError as e:
+        raise HTTPException(status_code=400, detail=f"医療機器台帳ファイルの形式が不正です: {str(e)}")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"医療機器台帳取込エラー: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
 # システム管理者用エンドポイント
-@router.post("/reports/publish/{medical_id}", response_model=MonthlyReportPublishResponse)
+@router.post("/reports/publish/{medical_id}", response_model=JobStatus, status_code=202)
 async def publish_monthly_reports(
     medical_id: int,
     publication_ym: str = Form(..., description="公開年月（YYYY-MM形式）"),
@@ -619,7 +854,8 @@ async def publish_monthly_reports(
     月次レポート一括公開（システム管理者用）
 
     - システム側で生成されたレポートを一括公開します
-    - 公開完了時に通知メールを送信します
+    - レポートのコピー・公開記録の登録・通知メールの送信はジョブとして登録し、ワーカーが実行します
+      （202を返す。公開結果は GET /api/v1/jobs/{job_id} の result で取得）
     - システム認証キーが必要（一般ユーザーからのアクセス制限）
 
     Args:
@@ -628,18 +864,21 @@ async def publish_monthly_reports(
     - X-System-Key (header): システム認証キー
 
     Returns:
-    - MonthlyReportPublishResponse: 公開結果
+    - JobStatus: 登録したジョブ（完了時の result は MonthlyReportPublishResponse の形式）
 
     [English]
     Publish monthly reports (System use only)
 
+    - Copying the reports, recording the publication and sending the notification email are enqueued as a job
+      (returns 202; the publication result is the result of GET /api/v1/jobs/{job_id})
+
     Args:
     - medical_id (int): Medical facility ID
     - publication_ym (str): Publication month (YYYY-MM format)  
     - X-System-Key (header): System authentication key
 
     Returns:
-    - MonthlyReportPublishResponse: Publication result
+    - JobStatus: Enqueued job (the result has the MonthlyReportPublishResponse format once completed)
     """
     try:
         logger.info(f"月次レポート公開開始: 医療機関ID={medical_id}, 公開年月={publication_ym}")
@@ -663,72 +902,28 @@ async def publish_monthly_reports(
                 detail="公開年月は YYYY-MM 形式で指定してください"
             )
         
-        # オンプレミスレポートをコピー
-        copied_files = copy_onpremise_reports_to_publication(medical_id, publication_ym)
-        if not copied_files:
+        # オンプレミスレポートの存在チェック（コピー・公開記録はジョブで実行）
+        year, month = publication_ym.split("-")
+        if not get_onpremise_report_files(medical_id, int(year), int(month)):
             raise HTTPException(
                 status_code=404,
                 detail=f"オンプレミスレポートが見つかりません: 医療機関ID={medical_id}, 年月={publication_ym}"
             )
         
-        # DB履歴記録
-        published_records = []
-        publication_datetime = datetime.now()
-        
-        # 各コピーされたファイルについてレコード作成
-        for filename in copied_files:
-            # ファイル種別を推定（簡易実装）
-            if filename.lower().endswith('.pptx') or filename.lower().endswith('.pdf'):
-                file_type = 1  # 分析レポート
-            elif 'failure' in filename.lower() or '故障' in filename:
-                file_type = 2  # 故障リスト
-            else:
-                file_type = 3  # 未実績リスト（その他）
-            
-            db_record = ReportPublicationLog(
-                medical_id=medical_id,
-                file_type=file_type,
-                file_name=filename,
-                publication_ym=publication_ym,
-                upload_datetime=publication_datetime,  # publication_datetimeではなくupload_datetime
-                download_user_id=0,  # システム公開のため0
-                reg_user_id=0,  # システム公開のため0
-                regdate=publication_datetime,
-                update_user_id=0,  # システム公開のため0
-                lastupdate=publication_datetime
-            )
-            db.add(db_record)
-            db.commit()
-            db.refresh(db_record)
-            published_records.append(db_record)
-            
-            logger.info(f"レポート公開記録作成: {filename} (ファイル種別={file_type})")
-        
-        # 通知メール送信
-        notification_sent = await send_notification_email(
-            medical_id, "report_published", publication_ym
+        job = enqueue_job(
+            db,
+            PUBLISH_REPORTS_JOB,
+            {"medical_id": medical_id, "publication_ym": publication_ym},
+            "0",  # システム公開のため0
+            medical_id=medical_id,
+            priority=PUBLISH_REPORTS_PRIORITY
         )
+        db.commit()
+        db.refresh(job)
         
-        logger.info(f"月次レポート公開完了: 医療機関ID={medical_id}, {len(published_records)}件公開")
+        logger.info(f"月次レポート公開ジョブ登録: 医療機関ID={medical_id}, 公開年月={publication_ym}, job_id={job.job_id}")
         
-        return MonthlyReportPublishResponse(
-            medical_id=medical_id,
-            publication_ym=publication_ym,
-            publish_datetime=publication_datetime.isoformat(),
-            published_reports=[ReportPublication(
-                medical_id=record.medical_id,
-                publication_ym=record.publication_ym,
-                file_type=record.file_type,
-                file_name=record.file_name,
-                download_user_id=record.download_user_id,
-                publication_id=record.publication_id,
-                upload_datetime=record.upload_datetime,
-                download_datetime=record.download_datetime,
-                regdate=record.regdate,
-                lastupdate=record.lastupdate
-            ) for record in published_records],
-            notification_sent=notification_sent
-        )
+        return to_job_status(job)
         
     except HTTPException:
         raise
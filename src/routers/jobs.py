@@ -0,0 +1,94 @@
+"""routers/jobs.py
+
+バックグラウンドジョブの状態取得APIエンドポイント定義
+
+Note:
+    - ファイルアップロード後の処理やレポート公開は、APIでジョブとして登録し、ワーカーが実行します。
+    - 登録したAPIが返すジョブIDで、本APIから実行状態と結果を取得します。
+    - キューの処理の詳細は src/utils/job_queue.py を参照してください。
+
+ChangeLog:
+    v1.0.0 (2026-10-19)
+    - 初版作成
+    - ユーザーの認証を X-User-Id ヘッダーからセッショントークン（Authorization: Bearer）に変更
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Header
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from ..models.pg_optigate.job_queue import JobQueue
+from ..schemas.job_queue import JobStatus
+from ..utils.auth import SYSTEM_API_KEY, AuthManager, get_current_claims
+from ..utils.job_queue import to_job_status
+import logging
+
+router = APIRouter(
+    prefix="/api/v1/jobs",
+    tags=["jobs"],
+)
+
+# 標準ロガーの取得
+logger = logging.getLogger(__name__)
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@router.get("/{job_id}", response_model=JobStatus)
+def read_job(
+    job_id: int,
+    authorization: Optional[str] = Header(None, alias="Authorization", description="Bearer <セッショントークン>"),
+    x_system_key: Optional[str] = Header(None, alias="X-System-Key", description="システム認証キー"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get Job Status
+
+    [Japanese]
+    ジョブの状態取得
+
+    - 指定したジョブの状態（実行待ち・実行中・完了・失敗）と、完了時の結果を返します
+    - システム認証キー、またはログインユーザーのセッショントークンが必要です
+        - ユーザーは対象の医療機関へのアクセス権限が必要（医療機関に関係しないジョブはシステム管理者のみ）
+
+    Args:
+    - job_id (int): ジョブID
+    - Authorization (header): Bearer <セッショントークン>
+    - X-System-Key (header): システム認証キー
+
+    Returns:
+    - JobStatus: ジョブの状態
+
+    [English]
+    Get the status of a background job
+
+    - Returns the job status (queued / running / succeeded / failed) and its result once completed
+    - Requires either the system authentication key or the logged-in user's session token
+        - Users need access to the target medical facility (admin only for jobs without a facility)
+
+    Args:
+    - job_id (int): Job ID
+    - Authorization (header): Bearer <session token>
+    - X-System-Key (header): System authentication key
+
+    Returns:
+    - JobStatus: Job status
+    """
+    current_user_id = get_current_claims(authorization).user_id if x_system_key != SYSTEM_API_KEY else None
+
+    job = db.query(JobQueue).filter(JobQueue.job_id == job_id).first()
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"ジョブID {job_id} は存在しません")
+
+    if x_system_key != SYSTEM_API_KEY:
+        if job.medical_id is not None:
+            AuthManager.require_medical_permission(current_user_id, job.medical_id, db)
+        else:
+            AuthManager.require_admin_permission(current_user_id, db)
+
+    return to_job_status(job)
@@ -12,17 +12,26 @@ Note:
 ChangeLog:
     v1.0.0 (2025-08-14)
     - 初版作成
+    v1.1.0 (2026-10-19)
+    - 分類IDフィルタを、指定分類の子孫（閉包テーブル）に一致する機器も含めるように変更
+    - 機器分類別の集計API（GET /summary）を追加。分析設定の更新・削除時に集計値の増減を同じトランザクションで加算
+    - 一覧取得で上書き分類を機器ごとに問い合わせていた処理（N+1クエリ）を、一覧のクエリの結合に変更
+    - 一覧取得を、必要な列のタプルから辞書を組み立てて直接JSONにする処理に変更（項目ごとのモデルの生成・検証を省略）
+    - ログインユーザーを X-User-Id ヘッダーではなくセッショントークン（Depends(get_current_user_id)）から取得するよう変更
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Path, Header
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Path
+from sqlalchemy.orm import Session, aliased
 from sqlalchemy import text, and_, or_
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 import json
 
 from ..database import get_db
-from ..utils.auth import AuthManager
+from ..utils.auth import AuthManager, get_current_user_id
+from ..utils.classification_hierarchy import descendant_ids_subquery
+from ..utils.equipment_stats import UNCLASSIFIED_ID, EquipmentStatsDelta, setting_values
+from ..utils.json_response import FastJSONResponse
 from ..schemas.medical_equipment_analysis import (
     MedicalEquipmentAnalysisResponse,
     MedicalEquipmentAnalysisListResponse,
@@ -32,15 +41,21 @@ from ..schemas.medical_equipment_analysis import (
     ClassificationOverrideUpdateRequest,
     ClassificationOverrideUpdateResponse,
     DefaultRestoreResponse,
+    EquipmentClassificationStatItem,
+    EquipmentStatsSummaryResponse,
     ValidationErrorResponse,
     NoteHistoryItem
 )
 from ..models.pg_optigate.medical_equipment_ledger import MedicalEquipmentLedger
 from ..models.pg_optigate.medical_equipment_analysis_setting import MedicalEquipmentAnalysisSetting
+from ..models.pg_optigate.medical_equipment_classification_stat import MedicalEquipmentClassificationStat
 from ..models.pg_optigate.mst_equipment_classification import MstEquipmentClassification
 
 router = APIRouter(prefix="/api/v1/medical-equipment-analysis-settings", tags=["equipment-analysis-overrides"])
 
+# 変更履歴の項目（user_id, timestamp, note）
+NOTE_HISTORY_FIELDS = tuple(NoteHistoryItem.model_fields)
+
 
 
 
@@ -77,13 +92,69 @@ def parse_note_history(note_json: str) -> List[NoteHistoryItem]:
         return []
 
 
+def parse_note_history_dicts(note_json: str) -> List[Dict[str, str]]:
+    """JSON形式の履歴をパースし、NoteHistoryItem の形の辞書で返す（parse_note_history と同じく不正な履歴は空）"""
+    try:
+        if not note_json:
+            return []
+        history = [{key: item[key] for key in NOTE_HISTORY_FIELDS} for item in json.loads(note_json)]
+    except (json.JSONDecodeError, TypeError, KeyError, ValueError):
+        return []
+    if not all(isinstance(value, str) for item in history for value in item.values()):
+        return []
+    return history
+
+
+def build_analysis_item(row) -> Dict[str, Any]:
+    """一覧のクエリの行から MedicalEquipmentAnalysisResponse と同じ形の辞書を組み立てる"""
+    has_override = row.setting_ledger_id is not None
+    # 有効な値を決定
+    effective_is_included = row.override_is_included if has_override else row.is_included
+    effective_classification_id = (
+        row.override_classification_id
+        if has_override and row.override_classification_id else row.classification_id
+    )
+    # 分類情報（上書き分類がある場合は上書き分類）
+    classification_name, classification_level = row.classification_name, row.classification_level
+    if (effective_classification_id and effective_classification_id != row.classification_id
+            and row.override_classification_exists is not None):
+        classification_name, classification_level = row.override_classification_name, row.override_classification_level
+    return {
+        # 機器台帳情報
+        "ledger_id": row.ledger_id,
+        "medical_id": row.medical_id,
+        "model_number": row.model_number,
+        "product_name": row.product_name,
+        "maker_name": row.maker_name,
+        "stock_quantity": row.stock_quantity,
+        # デフォルト値
+        "default_is_included": row.is_included,
+        "default_classification_id": row.classification_id,
+        # 有効値
+        "effective_is_included": effective_is_included,
+        "effective_classification_id": effective_classification_id,
+        # 上書き設定
+        "has_override": has_override,
+        "override_is_included": row.override_is_included if has_override else None,
+        "override_classification_id": row.override_classification_id if has_override else None,
+        # 分類情報
+        "classification_name": classification_name,
+        "classification_level": classification_level,
+        # 履歴情報
+        "note_history": parse_note_history_dicts(row.note if has_override else ""),
+        "last_modified": row.lastupdate.isoformat() if has_override and row.lastupdate else None,
+        "last_modified_user_id": row.update_user_id if has_override else None,
+    }
+
+
 @router.get("", response_model=MedicalEquipmentAnalysisListResponse)
 async def get_medical_equipment_analysis_settings(
     medical_id: Optional[int] = Query(None, description="医療機関ID（省略時は認証ユーザーの医療機関）"),
     classification_id: Optional[int] = Query(None, description="分類IDでフィルタ"),
+    include_descendants: bool = Query(True, description="分類IDフィルタに子孫の分類を含める"),
     skip: int = Query(0, ge=0, description="スキップ件数"),
     limit: int = Query(100, ge=1, le=1000, description="取得件数"),
-    current_user_id: str = Header(..., alias="X-User-Id", description="ログインユーザーのuser_id"),
+    current_user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
     """
@@ -98,7 +169,8 @@ async def get_medical_equipment_analysis_settings(
     検索例:
     - /medical-equipment-analysis-settings ← 認証ユーザーの医療機関の全件取得
     - /medical-equipment-analysis-settings?medical_id=5 ← 指定医療機関の全件取得
-    - /medical-equipment-analysis-settings?classification_id=123 ← 指定分類でフィルタ
+    - /medical-equipment-analysis-settings?classification_id=123 ← 指定分類とその子孫の分類でフィルタ
+    - /medical-equipment-analysis-settings?classification_id=123&include_descendants=false ← 指定分類のみでフィルタ
 
     ページング:
     - 001～100件 : ?skip=0&limit=100
@@ -108,6 +180,7 @@ async def get_medical_equipment_analysis_settings(
     Args:
     - medical_id (int, optional): 医療機関ID（省略時は認証ユーザーの医療機関）
     - classification_id (int, optional): 分類IDでフィルタ（デフォルト分類または上書き分類）
+    - include_descendants (bool, optional): 分類IDフィルタに子孫の分類を含める（デフォルトTrue。大分類を指定すると配下の中分類・小分類の機器も対象）
     - skip (int, optional): スキップ件数（デフォルトは0）
     - limit (int, optional): 取得件数（デフォルトは100、最大1000件）
 
@@ -123,7 +196,8 @@ async def get_medical_equipment_analysis_settings(
     Search examples:
     - /medical-equipment-analysis-settings ← All records for authenticated user's medical facility
     - /medical-equipment-analysis-settings?medical_id=5 ← All records for specified medical facility
-    - /medical-equipment-analysis-settings?classification_id=123 ← Filter by classification
+    - /medical-equipment-analysis-settings?classification_id=123 ← Filter by classification and its descendants
+    - /medical-equipment-analysis-settings?classification_id=123&include_descendants=false ← Filter by the classification only
 
     Pagination:
     - Records 001-100: ?skip=0&limit=100
@@ -133,6 +207,7 @@ async def get_medical_equipment_analysis_settings(
     Args:
     - medical_id (int, optional): Medical facility ID (defaults to authenticated user's facility)
     - classification_id (int, optional): Filter by classification ID (default or override classification)
+    - include_descendants (bool, optional): Include descendant classifications in the filter (default: True)
     - skip (int, optional): Number of records to skip (default: 0)
     - limit (int, optional): Number of records to retrieve (default: 100, max: 1000)
 
@@ -151,105 +226,169 @@ async def get_medical_equipment_analysis_settings(
             if target_medical_id is None:
                 raise HTTPException(status_code=403, detail="医療機関ユーザーまたはシステム管理者である必要があります")
         
-        # ベースクエリ構築
+        # ベースクエリ構築（上書き分類の情報も同じクエリで取得し、機器ごとの問い合わせを行わない）
+        # レスポンスに必要な列のみをタプルで取得し、ORMのオブジェクトは生成しない
+        OverrideClassification = aliased(MstEquipmentClassification)
         base_query = db.query(
-            MedicalEquipmentLedger,
-            MedicalEquipmentAnalysisSetting,
-            MstEquipmentClassification
+            MedicalEquipmentLedger.ledger_id,
+            MedicalEquipmentLedger.medical_id,
+            MedicalEquipmentLedger.model_number,
+            MedicalEquipmentLedger.product_name,
+            MedicalEquipmentLedger.maker_name,
+            MedicalEquipmentLedger.stock_quantity,
+            MedicalEquipmentLedger.is_included,
+            MedicalEquipmentLedger.classification_id,
+            MedicalEquipmentAnalysisSetting.ledger_id.label("setting_ledger_id"),
+            MedicalEquipmentAnalysisSetting.override_is_included,
+            MedicalEquipmentAnalysisSetting.override_classification_id,
+            MedicalEquipmentAnalysisSetting.note,
+            MedicalEquipmentAnalysisSetting.lastupdate,
+            MedicalEquipmentAnalysisSetting.update_user_id,
+            MstEquipmentClassification.classification_name,
+            MstEquipmentClassification.classification_level,
+            OverrideClassification.classification_id.label("override_classification_exists"),
+            OverrideClassification.classification_name.label("override_classification_name"),
+            OverrideClassification.classification_level.label("override_classification_level"),
         ).outerjoin(
             MedicalEquipmentAnalysisSetting,
             MedicalEquipmentLedger.ledger_id == MedicalEquipmentAnalysisSetting.ledger_id
         ).outerjoin(
             MstEquipmentClassification,
             MedicalEquipmentLedger.classification_id == MstEquipmentClassification.classification_id
+        ).outerjoin(
+            OverrideClassification,
+            MedicalEquipmentAnalysisSetting.override_classification_id == OverrideClassification.classification_id
         ).filter(
             MedicalEquipmentLedger.medical_id == target_medical_id
         )
         
         # 分類IDフィルタ
         if classification_id:
-            base_query = base_query.filter(
-                or_(
-                    MedicalEquipmentLedger.classification_id == classification_id,
-                    MedicalEquipmentAnalysisSetting.override_classification_id == classification_id
+            if include_descendants:
+                # 閉包テーブルで指定分類の子孫（自身を含む）に一致する機器を対象
+                classification_ids = descendant_ids_subquery(classification_id)
+                base_query = base_query.filter(
+                    or_(
+                        MedicalEquipmentLedger.classification_id.in_(classification_ids),
+                        MedicalEquipmentAnalysisSetting.override_classification_id.in_(classification_ids)
+                    )
+                )
+            else:
+                base_query = base_query.filter(
+                    or_(
+                        MedicalEquipmentLedger.classification_id == classification_id,
+                        MedicalEquipmentAnalysisSetting.override_classification_id == classification_id
+                    )
                 )
-            )
         
         # 総件数取得
         total_count = base_query.count()
         
         # データ取得（ページング適用）
-        results = base_query.offset(skip).limit(limit).all()
-        
-        # レスポンス構築
-        items = []
-        for ledger, analysis_setting, classification in results:
-            # 有効な値を決定
-            effective_is_included = (
-                analysis_setting.override_is_included 
-                if analysis_setting else ledger.is_included
-            )
-            effective_classification_id = (
-                analysis_setting.override_classification_id 
-                if analysis_setting and analysis_setting.override_classification_id else ledger.classification_id
-            )
-            
-            # 分類情報取得
-            if effective_classification_id and effective_classification_id != ledger.classification_id:
-                # 上書き分類の情報を取得
-                override_classification = db.query(MstEquipmentClassification).filter(
-                    MstEquipmentClassification.classification_id == effective_classification_id
-                ).first()
-                classification = override_classification if override_classification else classification
-            
-            item = MedicalEquipmentAnalysisResponse(
-                # 機器台帳情報
-                ledger_id=ledger.ledger_id,
-                medical_id=ledger.medical_id,
-                model_number=ledger.model_number,
-                product_name=ledger.product_name,
-                maker_name=ledger.maker_name,
-                stock_quantity=ledger.stock_quantity,
-                
-                # デフォルト値
-                default_is_included=ledger.is_included,
-                default_classification_id=ledger.classification_id,
-                
-                # 有効値
-                effective_is_included=effective_is_included,
-                effective_classification_id=effective_classification_id,
-                
-                # 上書き設定
-                has_override=analysis_setting is not None,
-                override_is_included=analysis_setting.override_is_included if analysis_setting else None,
-                override_classification_id=analysis_setting.override_classification_id if analysis_setting else None,
-                
-                # 分類情報
-                classification_name=classification.classification_name if classification else None,
-                classification_level=classification.classification_level if classification else None,
-                
-                # 履歴情報
-                note_history=parse_note_history(analysis_setting.note if analysis_setting else ""),
-                last_modified=analysis_setting.lastupdate if analysis_setting else None,
-                last_modified_user_id=analysis_setting.update_user_id if analysis_setting else None
-            )
-            items.append(item)
+        rows = base_query.offset(skip).limit(limit).all()
         
-        return MedicalEquipmentAnalysisListResponse(
-            items=items,
-            total_count=total_count,
-            has_next=(skip + limit) < total_count
-        )
+        # レスポンス構築（項目ごとのモデルの生成・検証を行わず、MedicalEquipmentAnalysisResponse と同じ形の辞書を返す）
+        return FastJSONResponse(content={
+            "items": [build_analysis_item(row) for row in rows],
+            "total_count": total_count,
+            "has_next": (skip + limit) < total_count,
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"データ取得エラー: {str(e)}")
 
 
+@router.get("/summary", response_model=EquipmentStatsSummaryResponse)
+async def get_medical_equipment_stats_summary(
+    medical_id: Optional[int] = Query(None, description="医療機関ID（省略時は認証ユーザーの医療機関）"),
+    current_user_id: str = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    """
+    Get Medical Equipment Statistics Summary
+
+    [Japanese]\n
+    機器分類別の集計を取得
+
+    機器分類ごとの機器数・分析対象の機器数・上書き設定のある機器数・台数の合計を返します。
+    分析設定の上書きを反映した有効な機器分類・分析対象フラグで集計した値です。
+    台帳の取込・分析設定の更新時に更新される集計値のテーブルから取得するため、機器台帳の件数によらず高速に応答します。
+
+    利用例:
+    - /medical-equipment-analysis-settings/summary ← 認証ユーザーの医療機関
+    - /medical-equipment-analysis-settings/summary?medical_id=5 ← 指定医療機関
+
+    Args:
+    - medical_id (int, optional): 医療機関ID（省略時は認証ユーザーの医療機関）
+
+    Returns:
+    - EquipmentStatsSummaryResponse: 機器分類ごとの集計値と医療機関全体の合計
+
+    [English]\n
+    Retrieve equipment statistics per classification
+
+    Returns the number of equipment, included equipment, equipment with overrides and stock totals
+    per classification, using the effective classification and analysis target flag after overrides.
+    Values are read from a pre-computed table maintained on ledger ingestion and override updates,
+    so the response time does not depend on the ledger size.
+
+    Usage examples:
+    - /medical-equipment-analysis-settings/summary ← Authenticated user's medical facility
+    - /medical-equipment-analysis-settings/summary?medical_id=5 ← Specified medical facility
+
+    Args:
+    - medical_id (int, optional): Medical facility ID (defaults to authenticated user's facility)
+
+    Returns:
+    - EquipmentStatsSummaryResponse: Statistics per classification and totals for the facility
+    """
+    # 医療機関IDの決定
+    if medical_id:
+        AuthManager.require_medical_permission(current_user_id, medical_id, db)
+        target_medical_id = medical_id
+    else:
+        target_medical_id = AuthManager.get_user_medical_id(current_user_id, db)
+        if target_medical_id is None:
+            raise HTTPException(status_code=403, detail="医療機関ユーザーまたはシステム管理者である必要があります")
+
+    stat = MedicalEquipmentClassificationStat
+    results = db.query(stat, MstEquipmentClassification).outerjoin(
+        MstEquipmentClassification,
+        stat.classification_id == MstEquipmentClassification.classification_id
+    ).filter(
+        stat.medical_id == target_medical_id
+    ).order_by(stat.classification_id).all()
+
+    items = [
+        EquipmentClassificationStatItem(
+            classification_id=None if row.classification_id == UNCLASSIFIED_ID else row.classification_id,
+            classification_name=classification.classification_name if classification else None,
+            classification_level=classification.classification_level if classification else None,
+            ledger_count=row.ledger_count,
+            included_count=row.included_count,
+            override_count=row.override_count,
+            stock_quantity=row.stock_quantity,
+            included_stock_quantity=row.included_stock_quantity
+        )
+        for row, classification in results
+    ]
+
+    return EquipmentStatsSummaryResponse(
+        medical_id=target_medical_id,
+        items=items,
+        ledger_count=sum(item.ledger_count for item in items),
+        included_count=sum(item.included_count for item in items),
+        override_count=sum(item.override_count for item in items),
+        stock_quantity=sum(item.stock_quantity for item in items),
+        included_stock_quantity=sum(item.included_stock_quantity for item in items)
+    )
+
+
 @router.put("/{ledger_id}/analysis-target", response_model=AnalysisTargetUpdateResponse)
 async def update_analysis_target(
     ledger_id: int = Path(..., description="機器台帳ID"),
     request: AnalysisTargetUpdateRequest = ...,
-    current_user_id: str = Header(..., alias="X-User-Id", description="ログインユーザーのuser_id"),
+    current_user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
     """
@@ -328,6 +467,7 @@ async def update_analysis_target(
         
         current_time = datetime.now()
         note_item = create_note_history_item(current_user_id, request.note)
+        before = setting_values(analysis_setting)
         
         if analysis_setting:
             # 既存設定を更新
@@ -349,6 +489,11 @@ async def update_analysis_target(
             )
             db.add(analysis_setting)
         
+        # 機器分類別の集計値に増減を加算
+        stats = EquipmentStatsDelta(ledger.medical_id)
+        stats.replace(ledger, before, setting_values(analysis_setting))
+        stats.apply(db, current_user_id)
+        
         db.commit()
         
         return AnalysisTargetUpdateResponse(
@@ -370,7 +515,7 @@ async def update_analysis_target(
 async def update_classification_override(
     ledger_id: int = Path(..., description="機器台帳ID"),
     request: ClassificationOverrideUpdateRequest = ...,
-    current_user_id: str = Header(..., alias="X-User-Id", description="ログインユーザーのuser_id"),
+    current_user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
     """
@@ -457,6 +602,7 @@ async def update_classification_override(
         
         current_time = datetime.now()
         note_item = create_note_history_item(current_user_id, request.note)
+        before = setting_values(analysis_setting)
         
         if analysis_setting:
             # 既存設定を更新
@@ -478,6 +624,11 @@ async def update_classification_override(
             )
             db.add(analysis_setting)
         
+        # 機器分類別の集計値に増減を加算
+        stats = EquipmentStatsDelta(ledger.medical_id)
+        stats.replace(ledger, before, setting_values(analysis_setting))
+        stats.apply(db, current_user_id)
+        
         db.commit()
         
         return ClassificationOverrideUpdateResponse(
@@ -499,7 +650,7 @@ async def update_classification_override(
 @router.delete("", response_model=DefaultRestoreResponse)
 async def restore_to_default_all(
     medical_id: int = Query(..., description="医療機関ID"),
-    current_user_id: str = Header(..., alias="X-User-Id", description="ログインユーザーのuser_id"),
+    current_user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
     """
@@ -552,19 +703,22 @@ async def restore_to_default_all(
         AuthManager.require_medical_permission(current_user_id, medical_id, db)
         
         # 該当する設定を取得
-        settings_to_delete = db.query(MedicalEquipmentAnalysisSetting).join(
+        settings_to_delete = db.query(MedicalEquipmentAnalysisSetting, MedicalEquipmentLedger).join(
             MedicalEquipmentLedger,
             MedicalEquipmentAnalysisSetting.ledger_id == MedicalEquipmentLedger.ledger_id
         ).filter(
             MedicalEquipmentLedger.medical_id == medical_id
         ).all()
         
-        ledger_ids = [setting.ledger_id for setting in settings_to_delete]
+        ledger_ids = [setting.ledger_id for setting, _ in settings_to_delete]
         affected_count = len(settings_to_delete)
         
-        # 設定を削除
-        for setting in settings_to_delete:
+        # 設定を削除し、機器分類別の集計値をデフォルト設定の値に戻す
+        stats = EquipmentStatsDelta(medical_id)
+        for setting, ledger in settings_to_delete:
+            stats.replace(ledger, setting_values(setting), None)
             db.delete(setting)
+        stats.apply(db, current_user_id)
         
         db.commit()
         
@@ -582,7 +736,7 @@ async def restore_to_default_all(
 @router.delete("/{ledger_id}", response_model=DefaultRestoreResponse)
 async def restore_to_default_single(
     ledger_id: int = Path(..., description="機器台帳ID"),
-    current_user_id: str = Header(..., alias="X-User-Id", description="ログインユーザーのuser_id"),
+    current_user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)
 ):
     """
@@ -651,8 +805,11 @@ async def restore_to_default_single(
         if not analysis_setting:
             raise HTTPException(status_code=404, detail="該当機器に上書き設定が存在しません")
         
-        # 設定を削除
+        # 設定を削除し、機器分類別の集計値をデフォルト設定の値に戻す
+        stats = EquipmentStatsDelta(ledger.medical_id)
+        stats.replace(ledger, setting_values(analysis_setting), None)
         db.delete(analysis_setting)
+        stats.apply(db, current_user_id)
         db.commit()
         
         return DefaultRestoreResponse(
@@ -0,0 +1,74 @@
+"""routers/metrics.py
+
+Prometheus形式のメトリクス出力エンドポイント定義
+
+Note:
+    - リクエストの処理時間・レスポンスサイズ・DBクエリ数などを Prometheus の scrape 形式で返します。
+    - 計測内容は src/utils/metrics.py を参照してください。
+    - config.yaml の metrics.allow_remote が false の場合、ローカル（ループバック）からのアクセス、
+      またはシステム認証キーを指定したアクセスのみ受け付けます。
+
+ChangeLog:
+    v1.0.0 (2026-10-19)
+    - 初版作成
+"""
+import ipaddress
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+from ..utils.auth import SYSTEM_API_KEY
+from ..utils.metrics import CONTENT_TYPE, get_metrics_settings, render_metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+def _is_loopback(host: Optional[str]) -> bool:
+    if not host:
+        return False
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return host == "localhost"
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def read_metrics(
+    request: Request,
+    x_system_key: Optional[str] = Header(None, alias="X-System-Key", description="システム認証キー")
+):
+    """
+    Get Metrics
+
+    [Japanese]
+    メトリクスの取得（Prometheus形式）
+
+    - ルートごとの処理時間・レスポンスサイズ・DBクエリ数とDBクエリ時間のヒストグラム、リクエスト数を返します
+    - 値はAPIサーバーのプロセスごとに保持します（複数ワーカー構成ではワーカーごとの値）
+    - config.yaml の metrics.allow_remote が false の場合、ローカルからのアクセスまたはシステム認証キーが必要です
+
+    Args:
+    - X-System-Key (header, optional): システム認証キー（ローカル以外からのアクセス時）
+
+    Returns:
+    - text/plain: Prometheus text exposition format 0.0.4
+
+    [English]
+    Get metrics in Prometheus format
+
+    - Returns per-route latency, response size, DB query count and DB time histograms, and request counts
+    - Values are kept per API server process (per worker when running multiple workers)
+    - When metrics.allow_remote in config.yaml is false, requires local access or the system authentication key
+
+    Args:
+    - X-System-Key (header, optional): System authentication key (for non-local access)
+
+    Returns:
+    - text/plain: Prometheus text exposition format 0.0.4
+    """
+    if not get_metrics_settings().allow_remote and x_system_key != SYSTEM_API_KEY:
+        if not _is_loopback(request.client.host if request.client else None):
+            raise HTTPException(status_code=403, detail="メトリクスはローカルからのみ取得できます")
+
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
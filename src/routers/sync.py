@@ -0,0 +1,144 @@
+"""routers/sync.py
+
+差分同期（オンプレミスシステム用）のAPIエンドポイント定義
+
+Note:
+    - 本モジュールは、マスタテーブルの変更（登録・更新・削除）を指定日時以降の差分で返すAPIを提供します。
+    - オンプレミスシステムはテーブル全件を再取得せず、前回取得時の watermark 以降の変更のみを取得します。
+    - 処理の詳細は src/utils/change_feed.py を参照してください。
+    - システム認証キーが必要です（一般ユーザーからのアクセス制限）。
+
+ChangeLog:
+    v1.0.0 (2026-10-19)
+    - 初版作成
+"""
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from ..schemas.sync import SyncChangesResponse, SyncTableInfo
+from ..utils.auth import verify_system_key
+from ..utils.change_feed import (
+    SYNC_TABLES,
+    SyncCursorError,
+    get_changes,
+    primary_key_columns,
+    sync_columns,
+)
+import logging
+
+router = APIRouter(
+    prefix="/api/v1/sync",
+    tags=["sync"],
+)
+
+# 標準ロガーの取得
+logger = logging.getLogger(__name__)
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@router.get("/tables", response_model=List[SyncTableInfo])
+def read_sync_tables(
+    system_key: str = Depends(verify_system_key)
+):
+    """
+    List Sync Tables (System Only)
+
+    [Japanese]
+    差分同期の対象テーブル一覧
+
+    - 差分同期APIで取得できるテーブルと、主キー・同期する列を返します
+    - システム認証キーが必要（一般ユーザーからのアクセス制限）
+
+    Returns:
+    - List[SyncTableInfo]: 対象テーブル一覧
+
+    [English]
+    List tables available from the change feed with their primary keys and columns
+
+    Returns:
+    - List[SyncTableInfo]: Sync tables
+    """
+    return [
+        SyncTableInfo(
+            table_name=table_name,
+            primary_key=[column.name for column in primary_key_columns(table)],
+            columns=[column.name for column in sync_columns(table)],
+        )
+        for table_name, table in SYNC_TABLES.items()
+    ]
+
+@router.get("/{table_name}/changes", response_model=SyncChangesResponse)
+def read_changes(
+    table_name: str,
+    since: Optional[datetime] = Query(None, description="この日時以降の変更を取得（前回の watermark を指定。省略時は全件）"),
+    cursor: Optional[str] = Query(None, description="前ページの next_cursor（指定時は since は不要）"),
+    limit: int = Query(1000, ge=1, le=5000, description="1ページの最大件数"),
+    system_key: str = Depends(verify_system_key),
+    db: Session = Depends(get_db)
+):
+    """
+    Get Changes Since Watermark (System Only)
+
+    [Japanese]
+    差分同期用の変更データ取得
+
+    - since 以降に登録・更新された行（op=upsert）と、削除された行の主キー（op=delete）を返します
+    - 登録・更新を（lastupdate, 主キー）順に返した後、削除を返します
+    - has_more が True の間は next_cursor を指定して続きを取得し、
+      最後まで取得したら watermark を次回の since として保存してください
+    - since を省略すると全件を返します（初回同期用。削除は含みません）
+    - システム認証キーが必要（一般ユーザーからのアクセス制限）
+
+    例:
+    - /sync/mst_user/changes ← 全件（1ページ目）
+    - /sync/mst_user/changes?since=2026-10-19T09:00:00 ← 差分（1ページ目）
+    - /sync/mst_user/changes?cursor=... ← 2ページ目以降
+
+    Args:
+    - table_name (str): テーブル名（GET /sync/tables の一覧）
+    - since (datetime, optional): 基準日時
+    - cursor (str, optional): 前ページの next_cursor
+    - limit (int): 1ページの最大件数（1〜5000、既定1000）
+    - X-System-Key (header): システム認証キー
+
+    Returns:
+    - SyncChangesResponse: 変更一覧
+
+    [English]
+    Return rows inserted/updated since the watermark (op=upsert) and primary keys of deleted rows (op=delete),
+    using keyset pagination. Store the returned watermark once has_more is False and pass it as the next since.
+
+    Args:
+    - table_name (str): Table name (see GET /sync/tables)
+    - since (datetime, optional): Watermark of the previous sync (omit for a full snapshot)
+    - cursor (str, optional): next_cursor of the previous page
+    - limit (int): Page size (1-5000, default 1000)
+    - X-System-Key (header): System authentication key
+
+    Returns:
+    - SyncChangesResponse: Changes
+    """
+    if table_name not in SYNC_TABLES:
+        raise HTTPException(status_code=404, detail=f"差分同期の対象外のテーブルです: {table_name}")
+
+    try:
+        result = get_changes(table_name, db, since=since, cursor=cursor, limit=limit)
+    except SyncCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"差分同期データ取得エラー: table={table_name}, {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+    logger.info(
+        f"差分同期データ取得: table={table_name}, since={result.since}, 件数={len(result.items)}, has_more={result.has_more}"
+    )
+    return result
@@ -9,20 +9,27 @@ Note:
     - FastAPIを使用しており、SQLAlchemy ORMを介してPostgreSQLデータベースと連携します。
     - 各エンドポイントは、Pydanticモデルを使用してリクエストとレスポンスのバリデーションを行います。
 
+    - 取得APIは件数と最終更新日時によるETagを返し、If-None-Match が一致する場合は 304 Not Modified を返します。
+
 ChangeLog:
     v1.0.0 (2025-08-07)
     - 初版作成
+    v1.1.0 (2026-10-19)
+    - 一覧・個別取得にETag（If-None-Match / 304）と Cache-Control を追加
+    - ログインユーザーを X-User-Id ヘッダーではなくセッショントークン（Depends(get_current_user_id)）から取得するよう変更
 """
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Header
+from fastapi import APIRouter, Depends, HTTPException, Header, Response
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 import json
 from ..database import SessionLocal
 from src.models.pg_optigate.user_entity_link import UserEntityLink
 from src.models.pg_optigate.mst_medical_facility import MstMedicalFacility
 from src.schemas.user_entity_link import UserEntityLink as UserEntityLinkSchema, UserEntityLinkCreate
-from ..utils.auth import AuthManager
+from ..utils.auth import AuthManager, get_current_user_id
+from ..utils.etag import build_etag, etag_matches, get_cache_control, not_modified_response, set_etag_headers
 import logging
 
 router = APIRouter(
@@ -59,9 +66,11 @@ def get_db():
 
 @router.get("/", response_model=List[UserEntityLinkSchema])
 def read_user_entity_links(
+    response: Response,
     skip: int = 0, 
     limit: int = 100, 
-    current_user_id: str = Header(..., alias="X-User-Id", description="ログインユーザーのuser_id"),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match", description="前回取得時のETag"),
+    current_user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)):
     """
     Read User Entity Links
@@ -72,6 +81,7 @@ def read_user_entity_links(
     - 全てのユーザー組織連携情報を取得します
     - skipとlimitパラメータでページネーション可能です
     - 1〜100件までの範囲で取得件数を指定できます
+    - アクセス可能な連携情報の件数と最終更新日時からETagを返し、If-None-Match が一致する場合は 304 Not Modified を返します
 
     例:
     - /user-entity-links ← 全件取得（最大100件）
@@ -92,6 +102,7 @@ def read_user_entity_links(
     - Retrieves all user-organization link information
     - Supports pagination with skip and limit parameters
     - Can specify the number of records to retrieve within the range of 1-100
+    - Returns an ETag built from the count and latest lastupdate of accessible links, and 304 Not Modified when If-None-Match matches
 
     Examples:
     - /user-entity-links ← Retrieve all records (maximum 100 records)
@@ -111,13 +122,29 @@ def read_user_entity_links(
     filtered_query = AuthManager.filter_by_medical_permission(
         query, current_user_id, db, UserEntityLink.entity_relation_id
     )
-    return filtered_query.offset(skip).limit(limit).all()
+
+    # 行を取得する前に件数と最終更新日時のみを集計し、変更が無ければ 304 を返す
+    count, last_modified = filtered_query.with_entities(
+        func.count(UserEntityLink.entity_relation_id), func.max(UserEntityLink.lastupdate)
+    ).one()
+    etag = build_etag("user_entity_links", current_user_id, skip, limit, count, last_modified)
+    cache_control = get_cache_control("user_entity_links")
+    if etag_matches(if_none_match, etag):
+        return not_modified_response(etag, cache_control)
+
+    set_etag_headers(response, etag, cache_control)
+    # ページの内容がETagと対応するよう、主キー順に並べる
+    return filtered_query.order_by(
+        UserEntityLink.entity_type, UserEntityLink.entity_relation_id
+    ).offset(skip).limit(limit).all()
 
 @router.get("/{entity_type}/{entity_relation_id}", response_model=UserEntityLinkSchema)
 def read_user_entity_link(
     entity_type: int, 
     entity_relation_id: int, 
-    current_user_id: str = Header(..., alias="X-User-Id", description="ログインユーザーのuser_id"),
+    response: Response,
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match", description="前回取得時のETag"),
+    current_user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)):
     """
     Read User Entity Link by Composite Key
@@ -127,6 +154,7 @@ def read_user_entity_link(
 
     - 組織種別と組織IDで指定されたユーザー組織連携情報を取得します
     - 連携情報が存在しない場合は404エラーを返します
+    - 最終更新日時からETagを返し、If-None-Match が一致する場合は 304 Not Modified を返します
 
     例:
     - /user-entity-links/1/6 ← entity_type=1, entity_relation_id=6
@@ -144,6 +172,7 @@ def read_user_entity_link(
 
     - Retrieves user-organization link information specified by entity type and relation ID
     - Returns 404 error if the link information does not exist
+    - Returns an ETag built from lastupdate, and 304 Not Modified when If-None-Match matches
 
     Examples:
     - /user-entity-links/1/6 ← entity_type=1, entity_relation_id=6
@@ -168,12 +197,18 @@ def read_user_entity_link(
             status_code=404, 
             detail=f"User entity link not found: entity_type={entity_type}, entity_relation_id={entity_relation_id}"
         )
+
+    etag = build_etag("user_entity_link", link.entity_type, link.entity_relation_id, link.lastupdate)
+    cache_control = get_cache_control("user_entity_links")
+    if etag_matches(if_none_match, etag):
+        return not_modified_response(etag, cache_control)
+    set_etag_headers(response, etag, cache_control)
     return link
 
 @router.post("/", response_model=UserEntityLinkSchema)
 def create_user_entity_link(
     link: UserEntityLinkCreate,
-    current_user_id: str = Header(..., alias="X-User-Id", description="ログインユーザーのuser_id"),
+    current_user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)):
     """
     Create a new user entity link
@@ -306,7 +341,7 @@ def update_user_entity_link(
     entity_type: int,
     entity_relation_id: int,
     link: UserEntityLinkCreate,
-    current_user_id: str = Header(..., alias="X-User-Id", description="ログインユーザーのuser_id"),
+    current_user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)):
     """
     Update an existing user entity link
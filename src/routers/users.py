@@ -11,17 +11,33 @@ Note:
 ChangeLog:
     v1.0.0 (2025-07-15)
     - 初版作成
+    v1.1.0 (2026-10-19)
+    - user_id採番をuser_id_sequenceテーブルのカウンタに変更（同時登録時のID重複を解消）
+    - ユーザー一括登録API（POST /users/bulk）を追加
+    - ユーザー検索API（GET /users/search）を追加（前方一致・部分一致、キーセットページング、総件数）
+    - パスワードをscryptでハッシュ化して保存（登録・更新時）。仮パスワードは登録時のレスポンスでのみ平文で返却
+    - ユーザー無効化時に発行済みのセッショントークンを失効
+    - ログインユーザーを X-User-Id ヘッダーではなくセッショントークン（Depends(get_current_user_id)）から取得するよう変更
 """
-from fastapi import APIRouter, Depends, HTTPException, Query, Path, Body, Header
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Body
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, insert, select, table, column, literal_column
+from pydantic import ValidationError
 from typing import List
+from collections import defaultdict
 from datetime import datetime
 from ..database import SessionLocal
 from src.models.pg_optigate.mst_user import MstUser
-from src.schemas.mst_user import User, UserCreate, UserUpdate, UserInactive
-from src.utils.password import generate_temp_password
-from ..utils.auth import AuthManager
+from src.schemas.mst_user import (
+    User, UserCreate, UserUpdate, UserInactive,
+    UserBulkCreateRequest, UserBulkCreateResult, UserBulkCreateResponse,
+    UserSearchResponse
+)
+from src.validators.mst_user import find_duplicate_values
+from src.utils.password import generate_temp_password, hash_password_in_pool, hash_passwords_in_pool
+from ..utils.auth import AuthManager, get_current_user_id
+from ..utils.session_token import revoke_user_tokens
+from ..utils.user_id_allocator import allocate_user_ids
 
 router = APIRouter(
     prefix="/api/v1/users",
@@ -35,7 +51,7 @@ def get_db():
     finally:
         db.close()
 
-def generate_next_user_id(entity_type: int, db: Session) -> str:
+def generate_next_user_id(entity_type: int, db: Session, user_id: str = "0") -> str:
     """
     entity_typeに応じたuser_idを生成する
     
@@ -44,10 +60,13 @@ def generate_next_user_id(entity_type: int, db: Session) -> str:
     - 医療機関: 100001 - 199999
     - ディーラー: 200001 - 299999
     - メーカー: 300001 - 399999
+
+    採番はuser_id_sequenceテーブルのカウンタで行います（src/utils/user_id_allocator.py）。
     
     Args:
         entity_type (int): 組織種別 (1:医療機関, 2:ディーラー, 3:メーカー, 9:システム)
         db (Session): データベースセッション
+        user_id (str, optional): 採番を行うユーザーID
         
     Returns:
         str: 生成されたuser_id
@@ -56,48 +75,36 @@ def generate_next_user_id(entity_type: int, db: Session) -> str:
         ValueError: 未対応のentity_typeの場合
         HTTPException: 採番範囲が上限に達した場合
     """
-    # entity_typeに応じた開始値と終了値を定義
-    range_map = {
-        1: (100001, 199999),  # 医療機関
-        2: (200001, 299999),  # ディーラー
-        3: (300001, 399999),  # メーカー
-        9: (900001, 999999),  # システム
-    }
-    
-    if entity_type not in range_map:
-        raise ValueError(f"未対応のentity_type: {entity_type}")
-    
-    start_id, end_id = range_map[entity_type]
-    
-    # 該当範囲内での最大user_idを取得（CASTで数値に変換して比較）
-    from sqlalchemy import cast, Integer
-    max_user_id_str = db.query(func.max(MstUser.user_id)).filter(
-        cast(MstUser.user_id, Integer) >= start_id,
-        cast(MstUser.user_id, Integer) <= end_id
-    ).scalar()
-    
-    # 初回の場合は開始値を返す
-    if max_user_id_str is None:
-        return str(start_id)
-    
-    # 次のIDを計算
-    max_user_id = int(max_user_id_str)
-    next_id = max_user_id + 1
-    
-    # 上限チェック
-    if next_id > end_id:
-        entity_name = {
-            1: "医療機関",
-            2: "ディーラー", 
-            3: "メーカー",
-            9: "システム"
-        }.get(entity_type, "不明")
-        raise HTTPException(
-            status_code=400, 
-            detail=f"{entity_name}のuser_id採番範囲が上限に達しました (最大: {end_id})"
-        )
-    
-    return str(next_id)
+    return allocate_user_ids(entity_type, 1, db, user_id)[0]
+
+# SQLite用のユーザー検索インデックス（FTS5 trigram、mst_userとトリガーで同期）
+mst_user_fts = table("mst_user_fts", column("rowid"), column("user_name"), column("e_mail"))
+
+def escape_like(value: str) -> str:
+    """LIKE検索用に特殊文字（\\, %, _）をエスケープする"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def user_like_condition(db: Session, column_name: str, pattern: str):
+    """
+    mst_userの文字列カラムに対するLIKE条件を、DBごとの検索インデックスを使う形で生成する
+
+    - PostgreSQL: ILIKE（pg_trgm の GIN インデックス idx_user_*_trgm を使用）
+    - SQLite: FTS5 trigram の仮想テーブル mst_user_fts に対するLIKE（大文字小文字は区別しない）
+
+    Args:
+        db (Session): データベースセッション
+        column_name (str): 対象カラム名（user_name または e_mail）
+        pattern (str): エスケープ済みのLIKEパターン
+
+    Returns:
+        SQLAlchemyの条件式
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        fts_column = mst_user_fts.c[column_name]
+        # ESCAPE句を付けるとFTS5のインデックスが使われないため、エスケープが必要な場合のみ付与
+        condition = fts_column.like(pattern, escape="\\") if "\\" in pattern else fts_column.like(pattern)
+        return literal_column("mst_user.rowid").in_(select(mst_user_fts.c.rowid).where(condition))
+    return getattr(MstUser, column_name).ilike(pattern, escape="\\")
 
 @router.get("/", response_model=List[User])
 def read_users(
@@ -110,7 +117,7 @@ def read_users(
     user_status: int | None = Query(None, description="ユーザーステータスでフィルタリング"),
     skip: int = Query(0, ge=0, description="スキップ件数（0以上）"),
     limit: int = Query(100, ge=1, le=100, description="1〜100件で指定"),
-    current_user_id: str = Header(..., alias="X-User-Id", description="ログインユーザーのuser_id"),
+    current_user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)
     ):
     """
@@ -205,10 +212,121 @@ def read_users(
         query = query.filter(MstUser.user_status == user_status)
     return query.offset(skip).limit(limit).all()
 
+@router.get("/search", response_model=UserSearchResponse)
+def search_users(
+    name_prefix: str | None = Query(None, min_length=1, description="ユーザー名の前方一致"),
+    keyword: str | None = Query(None, min_length=1, description="ユーザー名・メールアドレスの部分一致"),
+    e_mail_domain: str | None = Query(None, min_length=1, description="メールアドレスのドメイン（例: example.com）"),
+    entity_type: int | None = Query(None, description="組織種別でフィルタリング"),
+    entity_relation_id: int | None = Query(None, description="組織IDでフィルタリング"),
+    user_status: int | None = Query(None, description="ユーザーステータスでフィルタリング"),
+    cursor: str | None = Query(None, description="前ページのnext_cursor"),
+    limit: int = Query(100, ge=1, le=500, description="1〜500件で指定"),
+    include_total: bool = Query(False, description="総件数を取得する場合True"),
+    current_user_id: str = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+    ):
+    """
+    Search Users
+
+    [Japanese]\n
+    ユーザー検索（管理画面向け）
+
+    - ユーザー名の前方一致、ユーザー名・メールアドレスの部分一致、メールドメインで検索できます
+    - 部分一致・前方一致は検索用インデックスを使用します（PostgreSQL: pg_trgm、SQLite: FTS5 trigram）
+    - 結果はuser_idの昇順で返し、キーセット方式（cursor）でページングします
+    - include_total=True の場合のみ総件数を取得します
+
+    検索例:
+    - /users/search?name_prefix=セイエイ
+    - /users/search?keyword=taro
+    - /users/search?e_mail_domain=example.com&entity_type=1
+    - 次ページ: /users/search?keyword=taro&cursor={前ページのnext_cursor}
+
+    Args:
+    - name_prefix (str, optional): ユーザー名の前方一致
+    - keyword (str, optional): ユーザー名・メールアドレスの部分一致
+    - e_mail_domain (str, optional): メールアドレスのドメイン
+    - entity_type (int, optional): 組織種別でフィルタリング
+    - entity_relation_id (int, optional): 組織IDでフィルタリング
+    - user_status (int, optional): ユーザーステータスでフィルタリング
+    - cursor (str, optional): 前ページのnext_cursor
+    - limit (int, optional): 取得件数（デフォルトは100、最大500件）
+    - include_total (bool, optional): 総件数を取得する場合True
+
+    Returns:
+    - UserSearchResponse: ユーザー情報のリスト、次ページカーソル、総件数
+
+    [English]\n
+    Search users (for the admin console)
+
+    - Search by user name prefix, partial match on user name / e-mail, or e-mail domain
+    - Partial and prefix matches use search indexes (PostgreSQL: pg_trgm, SQLite: FTS5 trigram)
+    - Results are ordered by user_id and paged with a keyset cursor
+    - The total count is only computed when include_total=True
+
+    Args:
+    - name_prefix (str, optional): User name prefix
+    - keyword (str, optional): Partial match on user name or e-mail
+    - e_mail_domain (str, optional): E-mail domain
+    - entity_type (int, optional): Filter by entity type
+    - entity_relation_id (int, optional): Filter by entity relation ID
+    - user_status (int, optional): Filter by user status
+    - cursor (str, optional): next_cursor from the previous page
+    - limit (int, optional): Number of records to retrieve (default 100, max 500)
+    - include_total (bool, optional): Compute the total count
+
+    Returns:
+    - UserSearchResponse: User list, cursor for the next page and total count
+    """
+    query = db.query(MstUser)
+
+    # 医療機関アクセス権限に基づいてフィルタリング
+    user_info = AuthManager.get_user_info(current_user_id, db)
+    if not user_info.is_admin:
+        # 医療機関ユーザーは自分の医療機関のユーザーのみ閲覧可能
+        if user_info.entity_type == 1:
+            query = query.filter(MstUser.entity_relation_id == user_info.entity_relation_id)
+        else:
+            # その他のユーザーはアクセス不可
+            return UserSearchResponse(items=[], next_cursor=None, has_next=False,
+                                      total_count=0 if include_total else None)
+
+    if name_prefix:
+        query = query.filter(user_like_condition(db, "user_name", f"{escape_like(name_prefix)}%"))
+    if keyword:
+        pattern = f"%{escape_like(keyword)}%"
+        query = query.filter(
+            user_like_condition(db, "user_name", pattern) | user_like_condition(db, "e_mail", pattern)
+        )
+    if e_mail_domain:
+        query = query.filter(user_like_condition(db, "e_mail", f"%@{escape_like(e_mail_domain.lstrip('@'))}"))
+    if entity_type:
+        query = query.filter(MstUser.entity_type == entity_type)
+    if entity_relation_id:
+        query = query.filter(MstUser.entity_relation_id == entity_relation_id)
+    if user_status is not None:
+        query = query.filter(MstUser.user_status == user_status)
+
+    total_count = query.count() if include_total else None
+
+    if cursor:
+        query = query.filter(MstUser.user_id > cursor)
+    users = query.order_by(MstUser.user_id).limit(limit + 1).all()
+
+    has_next = len(users) > limit
+    users = users[:limit]
+    return UserSearchResponse(
+        items=users,
+        next_cursor=users[-1].user_id if has_next else None,
+        has_next=has_next,
+        total_count=total_count
+    )
+
 @router.get("/{user_id}", response_model=User)
 def read_user(
         user_id: str = Path(..., description="ユーザーID"),
-        current_user_id: str = Header(..., alias="X-User-Id", description="ログインユーザーのuser_id"),
+        current_user_id: str = Depends(get_current_user_id),
         db: Session = Depends(get_db)):
     """
     Read User by ID
@@ -258,7 +376,7 @@ def read_user(
 @router.post("/", response_model=User)
 def create_user(
     user: UserCreate = Body(..., description="ユーザー情報"),
-    current_user_id: str = Header(..., alias="X-User-Id", description="ログインユーザーのuser_id"),
+    current_user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)):
     """
     Create a new user
@@ -294,12 +412,12 @@ def create_user(
     temp_password = generate_temp_password()  # 仮のパスワード生成
 
     # entity_typeに応じたuser_idを生成
-    next_user_id = generate_next_user_id(user.entity_type, db)
+    next_user_id = generate_next_user_id(user.entity_type, db, current_user_id)
     
     db_user = MstUser(
         user_id=next_user_id,
         **user.model_dump(),
-        password=temp_password,
+        password=hash_password_in_pool(temp_password, temporary=True),
         user_status=0,  # 新規登録時は仮登録としてユーザーステータスを0に設定
         reg_user_id=current_user_id,
         regdate=now,
@@ -309,13 +427,140 @@ def create_user(
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
-    return db_user
+    # 仮パスワードは登録者が本人に通知するため、レスポンスでのみ平文で返す
+    return User.model_validate(db_user).model_copy(update={"password": temp_password})
+
+@router.post("/bulk", response_model=UserBulkCreateResponse)
+def create_users_bulk(
+    request: UserBulkCreateRequest = Body(..., description="一括登録するユーザー情報"),
+    current_user_id: str = Depends(get_current_user_id),
+    db: Session = Depends(get_db)):
+    """
+    Create users in bulk
+
+    [Japanese]\n
+    ユーザー一括登録
+
+    - 複数のユーザー情報をまとめて登録します (管理者権限が必要)
+    - 各行はユーザー新規登録（POST /users）と同じ項目・同じバリデーションで検証します
+    - メールアドレスのリクエスト内重複、および登録済みユーザーとの重複はエラーとします
+    - user_idは組織種別ごとに件数分をまとめて採番し、1回のINSERT（executemany）と1回のコミットで登録します
+    - 行ごとの結果（user_id、仮パスワード、エラー内容）を返します
+    - all_or_nothing=True の場合、1件でもエラーがあれば何も登録しません
+
+    Args:
+    - request (UserBulkCreateRequest): 一括登録するユーザー情報（最大1000件）
+    - db (Session, optional): SQLAlchemyのDBセッション。デフォルトは依存関係で取得
+
+    Returns:
+    - UserBulkCreateResponse: 行ごとの登録結果
+
+    [English]\n
+    Create users in bulk
+
+    - Registers multiple users at once (requires admin privileges)
+    - Each row is validated with the same fields and rules as POST /users
+    - Duplicate e-mail addresses within the request or against existing users are rejected
+    - user_ids are reserved per entity type in one step, and rows are inserted with a single executemany and one commit
+    - Returns per-row results (user_id, temporary password, errors)
+    - With all_or_nothing=True, nothing is registered if any row has an error
+
+    Args:
+    - request (UserBulkCreateRequest): User information to register (max 1000 rows)
+    - db (Session, optional): SQLAlchemy database session, obtained via dependency injection
+
+    Returns:
+    - UserBulkCreateResponse: Per-row registration results
+    """
+    # 管理者権限チェック
+    AuthManager.require_admin_permission(current_user_id, db)
+
+    results = [UserBulkCreateResult(index=index, success=False) for index in range(len(request.users))]
+    valid_users = {}
+
+    # 行ごとのバリデーション（POST /users と同じ UserCreate で検証）
+    for index, row in enumerate(request.users):
+        results[index].e_mail = row.get("e_mail")
+        try:
+            valid_users[index] = UserCreate.model_validate(row)
+        except ValidationError as e:
+            results[index].errors = [
+                f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}" for error in e.errors()
+            ]
+
+    # メールアドレスの重複チェック（リクエスト内・登録済みユーザー）
+    duplicate_emails = find_duplicate_values([user.e_mail for user in valid_users.values()])
+    emails = list({user.e_mail.lower() for user in valid_users.values()})
+    existing_emails = set()
+    for offset in range(0, len(emails), 500):
+        existing_emails.update(
+            e_mail.lower() for (e_mail,) in db.query(MstUser.e_mail).filter(
+                func.lower(MstUser.e_mail).in_(emails[offset:offset + 500])
+            )
+        )
+    for index, user in list(valid_users.items()):
+        e_mail = user.e_mail.lower()
+        if e_mail in duplicate_emails:
+            results[index].errors.append("e_mail: リクエスト内でメールアドレスが重複しています")
+        if e_mail in existing_emails:
+            results[index].errors.append("e_mail: このメールアドレスは既に登録されています")
+        if not user.mobile_number:
+            results[index].errors.append("mobile_number: 携帯番号は必須です")  # mst_user.mobile_numberはNOT NULL
+        if results[index].errors:
+            del valid_users[index]
+
+    failed_count = len(request.users) - len(valid_users)
+    if not valid_users or (request.all_or_nothing and failed_count):
+        return UserBulkCreateResponse(
+            total=len(request.users),
+            created_count=0,
+            failed_count=failed_count,
+            results=results
+        )
+
+    # 組織種別ごとにuser_idをまとめて採番
+    indexes_by_entity_type = defaultdict(list)
+    for index, user in valid_users.items():
+        indexes_by_entity_type[user.entity_type].append(index)
+    allocated_ids = {}
+    for entity_type, indexes in indexes_by_entity_type.items():
+        allocated_ids.update(zip(indexes, allocate_user_ids(entity_type, len(indexes), db, current_user_id)))
+
+    now = datetime.now()
+    rows = []
+    temp_passwords = {index: generate_temp_password() for index in valid_users}  # 仮のパスワード生成
+    password_hashes = dict(zip(temp_passwords, hash_passwords_in_pool(list(temp_passwords.values()), temporary=True)))
+    for index, user in valid_users.items():
+        temp_password = temp_passwords[index]
+        rows.append({
+            "user_id": allocated_ids[index],
+            **user.model_dump(),
+            "password": password_hashes[index],
+            "user_status": 0,  # 新規登録時は仮登録としてユーザーステータスを0に設定
+            "reg_user_id": current_user_id,
+            "regdate": now,
+            "update_user_id": current_user_id,
+            "lastupdate": now,
+        })
+        results[index].success = True
+        results[index].user_id = allocated_ids[index]
+        results[index].password = temp_password
+
+    db.execute(insert(MstUser), rows)
+    db.commit()
+
+    return UserBulkCreateResponse(
+        total=len(request.users),
+        created_count=len(rows),
+        failed_count=failed_count,
+        results=results
+    )
 
 @router.put("/{user_id}", response_model=User)
 def update_user(
     user_id: int = Path(..., description="ユーザーID"),
     user: UserUpdate = Body(..., description="更新するユーザー情報"),
-    current_user_id: str = Header(..., alias="X-User-Id", description="ログインユーザーのuser_id"),
+    current_user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)):
     """
     Update an existing user
@@ -352,6 +597,8 @@ def update_user(
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
     update_data = user.model_dump(exclude_unset=True)  # 更新するフィールドのみを取得
+    if update_data.get("password"):
+        update_data["password"] = hash_password_in_pool(update_data["password"])
     for field, value in update_data.items():  # 取得したレコードに対して更新部分を反映
         setattr(db_user, field, value)
     db_user.user_status = 1  # 更新時はユーザーステータスを1に設定
@@ -365,7 +612,7 @@ def update_user(
 def inactive_user(
     user_id: int = Path(..., description="ユーザーID"),
     reason: UserInactive = Body(..., description="無効化理由"),
-    current_user_id: str = Header(..., alias="X-User-Id", description="ログインユーザーのuser_id"),
+    current_user_id: str = Depends(get_current_user_id),
     db: Session = Depends(get_db)):
     """
     Inactivate a user
@@ -377,6 +624,7 @@ def inactive_user(
     - 無効化処理としてユーザーステータスを9に設定し、その理由を登録します
     - 無効化理由は必須項目として、reason_codeとnoteを受け取ります
     - 無効化したユーザーはログイン出来なくなり、復活も出来ません
+    - 無効化したユーザーの発行済みセッショントークンは失効します
 
     Args:
     - user_id (str): ユーザーID
@@ -393,6 +641,7 @@ def inactive_user(
     - Sets the user status to 9 for inactivation and registers the reason
     - The inactivation reason is required and includes reason_code and note
     - Inactivated users cannot log in or be reactivated
+    - Session tokens already issued to the inactivated user are revoked
 
     Args:
     - user_id (str): User ID
@@ -413,6 +662,8 @@ def inactive_user(
     db_user.inactive_reason_note = reason.note
     db_user.update_user_id = current_user_id
     db_user.lastupdate = datetime.now()  # 更新日時を現在時刻に設定
+    # 発行済みのトークンの失効記録を無効化と同じトランザクションで登録する
+    revoke_user_tokens(db_user.user_id, db, current_user_id)
     db.commit()
     db.refresh(db_user)
     return db_user
@@ -5,6 +5,8 @@ OptiServeへのログインに関するスキーマ定義
 ChangeLog:
     v1.0.0 (2025-07-14)
         - 初版作成
+    v1.1.0 (2026-10-19)
+        - ログインレスポンスに署名付きセッショントークン（access_token）を追加
 """
 from pydantic import BaseModel, EmailStr, Field
 
@@ -29,3 +31,6 @@ class LoginResponse(BaseModel):
                             "show_main_menu: 通常メニューへ"
                             )
     message: str
+    access_token: str | None = Field(None, description="署名付きセッショントークン（Authorization: Bearer で送信）")
+    token_type: str | None = Field(None, description="トークン種別（Bearer）")
+    expires_in: int | None = Field(None, description="トークンの有効期間（秒）")
@@ -9,6 +9,12 @@ Note:
 ChangeLog:
     v1.0.0 (2025-08-08)
     - 初版作成
+    v1.1.0 (2026-10-19)
+    - 機器分類ツリー（入れ子形式）のレスポンスモデルを追加
+    - 機器分類の子孫・祖先取得のレスポンスモデルを追加
+    - 機器分類一括取込のレスポンスモデルを追加
+    - レポート選択情報にバージョン番号（楽観的排他制御）と差分更新の件数を追加
+    - 全医療機関のレポート選択情報（システム用）のモデルを追加
 """
 from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List
@@ -63,6 +69,49 @@ class EquipmentClassificationListResponse(BaseModel):
     limit: int = Field(..., description="取得件数")
     items: List[EquipmentClassification] = Field(..., description="機器分類一覧")
 
+class EquipmentClassificationTreeNode(BaseModel):
+    """機器分類ツリーのノード（子分類を入れ子で保持）"""
+    classification_id: int = Field(..., description="機器分類ID")
+    classification_level: int = Field(..., description="分類レベル（1:大分類, 2:中分類, 3:小分類）")
+    classification_name: str = Field(..., description="機器分類名")
+    parent_classification_id: Optional[int] = Field(None, description="親分類ID")
+    publication_classification_id: Optional[int] = Field(None, description="公開用機器分類ID")
+    children: List["EquipmentClassificationTreeNode"] = Field(default_factory=list, description="子分類")
+
+class EquipmentClassificationTreeResponse(BaseModel):
+    """機器分類ツリーレスポンスモデル"""
+    medical_id: int = Field(..., description="医療機関ID")
+    version: str = Field(..., description="機器分類のバージョン（ETagと同じ値）")
+    total: int = Field(..., description="機器分類の総件数")
+    items: List[EquipmentClassificationTreeNode] = Field(..., description="最上位の機器分類（大分類）")
+
+class EquipmentClassificationHierarchyItem(EquipmentClassification):
+    """子孫・祖先の機器分類（指定分類からの距離付き）"""
+    depth: int = Field(..., description="指定分類からの階層の距離（0: 指定分類自身）")
+
+class EquipmentClassificationHierarchyResponse(BaseModel):
+    """機器分類の子孫・祖先レスポンスモデル"""
+    medical_id: int = Field(..., description="医療機関ID")
+    classification_id: int = Field(..., description="指定した機器分類ID")
+    direction: str = Field(..., description="descendants: 子孫, ancestors: 祖先")
+    items: List[EquipmentClassificationHierarchyItem] = Field(..., description="機器分類一覧（距離、分類名の順）")
+
+class ClassificationImportError(BaseModel):
+    """機器分類一括取込の行ごとのエラー"""
+    row: int = Field(..., description="ファイルの行番号（ヘッダー行が1行目）")
+    classification_name: Optional[str] = Field(None, description="機器分類名")
+    message: str = Field(..., description="エラー内容")
+
+class ClassificationImportResponse(BaseModel):
+    """機器分類一括取込レスポンスモデル"""
+    total_rows: int = Field(..., description="データ行数（空行を除く）")
+    inserted_count: int = Field(..., description="新規登録件数（dry_runの場合は登録予定件数）")
+    updated_count: int = Field(..., description="更新件数（公開用機器分類IDの変更）")
+    unchanged_count: int = Field(..., description="既存と同じ内容の件数")
+    error_count: int = Field(..., description="エラー件数")
+    committed: bool = Field(..., description="登録・更新を確定した場合True")
+    errors: List[ClassificationImportError] = Field(..., description="行ごとのエラー（先頭1000件まで）")
+
 class ReportSelectionItem(BaseModel):
     """レポート選択項目モデル"""
     rank: int = Field(..., description="表示順序")
@@ -73,11 +122,13 @@ class ReportSelectionResponse(BaseModel):
     """レポート選択情報レスポンスモデル"""
     medical_id: int = Field(..., description="医療機関ID")
     max_count: int = Field(..., description="最大選択可能件数")
+    version: int = Field(..., description="選択情報のバージョン（未登録の場合は0）")
     selections: List[ReportSelectionItem] = Field(..., description="選択済み機器分類一覧")
 
 class ReportSelectionRequest(BaseModel):
     """レポート選択情報登録リクエストモデル"""
     classification_ids: List[int] = Field(..., description="機器分類ID一覧（rank順）")
+    version: Optional[int] = Field(None, ge=0, description="取得時のバージョン（指定時は他のユーザーが先に更新していれば409）")
     
     @field_validator('classification_ids')
     def validate_classification_ids(cls, v):
@@ -92,9 +143,22 @@ class ReportSelectionCreateResponse(BaseModel):
     """レポート選択情報登録レスポンスモデル"""
     medical_id: int = Field(..., description="医療機関ID")
     created_count: int = Field(..., description="登録件数")
+    updated_count: int = Field(..., description="登録・更新したrankの件数（機器分類IDが変わらないrankは含まない）")
+    deleted_count: int = Field(..., description="削除したrankの件数")
+    version: int = Field(..., description="更新後のバージョン")
     selections: List[ReportSelectionItem] = Field(..., description="登録済み機器分類一覧")
 
 class ReportSelectionDeleteResponse(BaseModel):
     """レポート選択情報削除レスポンスモデル"""
     medical_id: int = Field(..., description="医療機関ID")
-    deleted_count: int = Field(..., description="削除件数")
\ No newline at end of file
+    deleted_count: int = Field(..., description="削除件数")
+    version: int = Field(..., description="更新後のバージョン")
+
+class ReportSelectionSummaryItem(BaseModel):
+    """医療機関ごとのレポート選択情報（システム用一括取得の1件分）"""
+    medical_id: int = Field(..., description="医療機関ID")
+    medical_name: str = Field(..., description="医療機関名（user_entity_link.entity_name）")
+    max_count: int = Field(..., description="最大選択可能件数（user_entity_link.count_reportout_classification）")
+    version: int = Field(..., description="選択情報のバージョン（未登録の場合は0）")
+    lastupdate: datetime = Field(..., description="組織情報・選択情報の最終更新日時")
+    selections: List[ReportSelectionItem] = Field(..., description="選択済み機器分類一覧（rank順、最大選択可能件数まで）")
@@ -10,6 +10,9 @@ Note:
 ChangeLog:
     v1.0.0 (2025-08-07)
     - 初版作成
+    v1.1.0 (2026-10-19)
+    - アップロードレスポンスにアップロード後の処理のジョブID（job_id）を追加
+    - アップロードレスポンスの notification_sent を非推奨に変更（送信結果はジョブの結果の notification_sent を参照）
 """
 from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List
@@ -84,7 +87,12 @@ class FileUploadResponse(BaseModel):
     target_month: str = Field(..., description="アップロード実行年月（YYYY-MM形式）")
     upload_datetime: str = Field(..., description="アップロード完了日時")
     uploaded_files: List[FacilityUpload] = Field(..., description="アップロードされたファイル一覧")
-    notification_sent: bool = Field(..., description="通知メール送信完了フラグ")
+    notification_sent: bool = Field(
+        False,
+        deprecated="通知メールはアップロード後の処理のジョブで送信します。送信結果は GET /api/v1/jobs/{job_id} の result.notification_sent を参照してください",
+        description="非推奨。常にFalse（後方互換のため残しています）。通知メールの送信結果はジョブの結果（result.notification_sent）を参照",
+    )
+    job_id: Optional[int] = Field(None, description="アップロード後の処理（医療機器台帳の取込・通知メール送信）のジョブID")
     
     class Config:
         from_attributes = True
\ No newline at end of file
@@ -10,6 +10,9 @@ Note:
 ChangeLog:
     v1.0.0 (2025-08-07)
     - 初版作成
+    v1.1.0 (2026-10-19)
+    - 医療機器台帳CSVの取込結果（LedgerIngestionResult）を追加
+    - アップロードファイルの検証結果（UploadValidationError / UploadValidationResult）を追加
 """
 from pydantic import BaseModel, Field, validator
 from typing import Optional, List, Dict
@@ -71,6 +74,35 @@ class NotificationSettings(BaseModel):
     send_upload_notification: bool = Field(default=True, description="アップロード通知送信フラグ")
     send_report_notification: bool = Field(default=True, description="レポート公開通知送信フラグ")
 
+class LedgerIngestionResult(BaseModel):
+    """医療機器台帳CSVの取込結果"""
+    medical_id: int = Field(..., description="医療機関ID")
+    encoding: str = Field(..., description="判定した文字コード")
+    total_rows: int = Field(..., description="データ行数（空行を除く）")
+    skipped_rows: int = Field(..., description="対象外の行数（型番が空欄・不明、台数が不正）")
+    model_count: int = Field(..., description="型番の件数（取込後の台帳件数）")
+    inserted_count: int = Field(..., description="新規登録件数")
+    updated_count: int = Field(..., description="更新件数")
+    deleted_count: int = Field(..., description="削除件数（ファイルに無くなった型番）")
+    unchanged_count: int = Field(..., description="変更なしの件数")
+    unmatched_classification_count: int = Field(..., description="機器分類名が機器分類マスタに無い型番の件数")
+
+class UploadValidationError(BaseModel):
+    """アップロードファイルの検証エラー1件"""
+    row: int = Field(..., description="行番号（1行目がヘッダー行）")
+    column: Optional[str] = Field(None, description="列名（行全体のエラーの場合はNULL）")
+    value: Optional[str] = Field(None, description="誤りのある値（先頭50文字）")
+    message: str = Field(..., description="エラーメッセージ")
+
+class UploadValidationResult(BaseModel):
+    """アップロードファイルの検証結果"""
+    file_type: int = Field(..., description="ファイル種別（1: 医療機器台帳, 2: 貸出履歴, 3: 故障履歴）")
+    file_label: str = Field(..., description="ファイル種別名")
+    encoding: str = Field(..., description="判定した文字コード")
+    total_rows: int = Field(..., description="検証したデータ行数（空行を除く）")
+    errors: List[UploadValidationError] = Field(..., description="エラー一覧（先頭から上限件数まで）")
+    truncated: bool = Field(..., description="エラーが上限件数に達したため検証を途中で終了した場合True")
+
 def validate_file_extension(filename: str, expected_extension: str) -> bool:
     """ファイル拡張子のバリデーション"""
     return filename.lower().endswith(expected_extension.lower())
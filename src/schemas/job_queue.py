@@ -0,0 +1,30 @@
+""" schemas/job_queue.py
+
+バックグラウンドジョブの Pydantic スキーマ定義
+
+ChangeLog:
+    v1.0.0 (2026-10-19)
+    - 新規作成
+"""
+from datetime import datetime
+from typing import Any, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+
+class JobStatus(BaseModel):
+    """ジョブの状態"""
+    job_id: int = Field(..., description="ジョブID")
+    job_type: str = Field(..., description="ジョブ種別")
+    status: Literal["queued", "running", "succeeded", "failed"] = Field(
+        ..., description="queued: 実行待ち（再試行待ちを含む）, running: 実行中, succeeded: 完了, failed: 失敗"
+    )
+    medical_id: Optional[int] = Field(None, description="対象の医療機関ID")
+    priority: int = Field(..., description="優先度（大きいほど先に実行）")
+    attempts: int = Field(..., description="実行回数")
+    max_attempts: int = Field(..., description="最大実行回数")
+    run_after: datetime = Field(..., description="実行可能日時（再試行待ちの場合は次回の実行日時）")
+    result: Optional[Any] = Field(None, description="実行結果（完了時のみ）")
+    last_error: Optional[str] = Field(None, description="最後に失敗した実行のエラーメッセージ")
+    regdate: datetime = Field(..., description="登録日時")
+    lastupdate: datetime = Field(..., description="最終更新日時")
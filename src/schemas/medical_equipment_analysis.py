@@ -6,6 +6,7 @@ medical_equipment_analysis.py
 - 取得用の複合スキーマ（medical_equipment_ledger + analysis_setting + classification）
 - 更新用のリクエスト・レスポンススキーマ
 - note履歴管理用のスキーマ
+- 機器分類別の集計用のスキーマ
 """
 
 from pydantic import BaseModel, Field, validator
@@ -116,6 +117,30 @@ class DefaultRestoreResponse(BaseModel):
     message: str = Field(..., description="処理結果メッセージ")
 
 
+# 機器分類別の集計用スキーマ
+class EquipmentClassificationStatItem(BaseModel):
+    """機器分類ごとの集計値"""
+    classification_id: Optional[int] = Field(None, description="有効な機器分類ID（分類なしの場合はNone）")
+    classification_name: Optional[str] = Field(None, description="分類名")
+    classification_level: Optional[int] = Field(None, description="分類レベル")
+    ledger_count: int = Field(..., description="機器数")
+    included_count: int = Field(..., description="分析対象の機器数")
+    override_count: int = Field(..., description="上書き設定のある機器数")
+    stock_quantity: int = Field(..., description="台数の合計")
+    included_stock_quantity: int = Field(..., description="分析対象の台数の合計")
+
+
+class EquipmentStatsSummaryResponse(BaseModel):
+    """機器分類別の集計レスポンス"""
+    medical_id: int = Field(..., description="医療機関ID")
+    items: List[EquipmentClassificationStatItem] = Field(..., description="機器分類ごとの集計値（機器分類ID順、分類なしは先頭）")
+    ledger_count: int = Field(..., description="機器数の合計")
+    included_count: int = Field(..., description="分析対象の機器数の合計")
+    override_count: int = Field(..., description="上書き設定のある機器数の合計")
+    stock_quantity: int = Field(..., description="台数の合計")
+    included_stock_quantity: int = Field(..., description="分析対象の台数の合計")
+
+
 # エラーレスポンス
 class ValidationErrorResponse(BaseModel):
     """バリデーションエラーレスポンス"""
@@ -31,9 +31,12 @@ Note:
 ChangeLog:
     v1.0.0 (2025-07-14)
     - 初版作成
+    v1.1.0 (2026-10-19)
+    - ユーザー一括登録用モデルを追加
+    - ユーザー検索レスポンスモデルを追加
 """
 from pydantic import BaseModel, EmailStr, Field, field_validator
-from typing import Optional
+from typing import Optional, List, Dict, Any
 from datetime import datetime
 from src.validators.mst_user import (
     validate_user_name,
@@ -134,3 +137,47 @@ class User(BaseModel):
     class Config:
         from_attributes = True      # 旧: orm_mode
         validate_by_name = True     # 旧: allow_population_by_field_name
+
+
+# 一括登録の最大件数
+USER_BULK_CREATE_MAX = 1000
+
+class UserBulkCreateRequest(BaseModel):
+    """ユーザー一括登録リクエストモデル
+
+    行ごとのバリデーションエラーを結果として返すため、usersの各要素は辞書のまま受け取り、
+    API側でUserCreateによる検証を行います。
+    """
+    users: List[Dict[str, Any]] = Field(..., description="登録するユーザー情報の一覧（UserCreateと同じ項目）")
+    all_or_nothing: bool = Field(False, description="Trueの場合、1件でもエラーがあれば全件登録しない")
+
+    @field_validator('users')
+    def validate_users(cls, v):
+        if not v:
+            raise ValueError("users は1件以上指定してください。")
+        if len(v) > USER_BULK_CREATE_MAX:
+            raise ValueError(f"一括登録は{USER_BULK_CREATE_MAX}件までです。")
+        return v
+
+class UserBulkCreateResult(BaseModel):
+    """ユーザー一括登録の行ごとの結果"""
+    index: int = Field(..., description="リクエスト内の行番号（0始まり）")
+    success: bool = Field(..., description="登録成功の場合True")
+    user_id: Optional[str] = Field(None, description="払い出されたユーザーID")
+    e_mail: Optional[str] = Field(None, description="メールアドレス")
+    password: Optional[str] = Field(None, description="仮パスワード")
+    errors: List[str] = Field(default_factory=list, description="エラー内容")
+
+class UserBulkCreateResponse(BaseModel):
+    """ユーザー一括登録レスポンスモデル"""
+    total: int = Field(..., description="リクエスト件数")
+    created_count: int = Field(..., description="登録件数")
+    failed_count: int = Field(..., description="エラー件数")
+    results: List[UserBulkCreateResult] = Field(..., description="行ごとの登録結果")
+
+class UserSearchResponse(BaseModel):
+    """ユーザー検索レスポンスモデル"""
+    items: List[User] = Field(..., description="ユーザー情報の一覧（user_id昇順）")
+    next_cursor: Optional[str] = Field(None, description="次ページ取得用カーソル（次ページが無い場合はNone）")
+    has_next: bool = Field(..., description="次ページの有無")
+    total_count: Optional[int] = Field(None, description="検索条件に一致する総件数（include_total=Trueの場合のみ）")
@@ -0,0 +1,37 @@
+""" schemas/sync.py
+
+差分同期API（オンプレミスシステム用）の Pydantic スキーマ定義
+
+ChangeLog:
+    v1.0.0 (2026-10-19)
+    - 新規作成
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+
+class SyncChange(BaseModel):
+    """変更1件（登録・更新、または削除）"""
+    op: Literal["upsert", "delete"] = Field(..., description="upsert: 登録・更新, delete: 削除")
+    key: Dict[str, Any] = Field(..., description="主キー")
+    row: Optional[Dict[str, Any]] = Field(None, description="行の内容（deleteの場合はNULL）")
+    changed_at: datetime = Field(..., description="変更日時（upsertは lastupdate、deleteは削除日時）")
+
+
+class SyncChangesResponse(BaseModel):
+    """差分同期レスポンスモデル"""
+    table_name: str = Field(..., description="テーブル名")
+    since: Optional[datetime] = Field(None, description="取得条件の基準日時（NULLの場合は全件）")
+    items: List[SyncChange] = Field(..., description="変更一覧（登録・更新をlastupdate順に返した後、削除を返す）")
+    has_more: bool = Field(..., description="続きがある場合True（next_cursor を指定して再取得する）")
+    next_cursor: Optional[str] = Field(None, description="次ページのカーソル")
+    watermark: datetime = Field(..., description="次回の since に指定する日時（has_more が False になるまで同じ値）")
+
+
+class SyncTableInfo(BaseModel):
+    """差分同期の対象テーブル"""
+    table_name: str = Field(..., description="テーブル名")
+    primary_key: List[str] = Field(..., description="主キーの列名")
+    columns: List[str] = Field(..., description="同期する列名")
@@ -5,12 +5,27 @@ auth.py
 
 OptiServeの統一認証システム。
 ユーザー権限の確認、医療機関アクセス権限のチェック等を提供。
+
+ChangeLog:
+    v1.1.0 (2026-10-19)
+    - 署名付きセッショントークンの検証済みクレームがある場合、DBを参照せずにユーザー情報を返すように変更
+    - 暫定のユーザーID取得関数 get_current_user_id（固定値を返す関数）を、セッショントークンを必須として検証する依存関数に変更
+      （各エンドポイントは X-User-Id ヘッダーではなく Depends(get_current_user_id) でログインユーザーを取得する）
+    - システム用APIキーの認証（verify_system_key）を routers/file_management.py から移動
 """
 
-from fastapi import HTTPException
+from fastapi import Depends, Header, HTTPException
 from sqlalchemy.orm import Session
 from typing import Optional, NamedTuple
 from ..models.pg_optigate.mst_user import MstUser
+from .session_token import (
+    TOKEN_TYPE,
+    SessionClaims,
+    SessionTokenError,
+    current_session_claims,
+    get_bearer_token,
+    verify_session_token,
+)
 
 
 class UserInfo(NamedTuple):
@@ -30,6 +45,8 @@ class AuthManager:
         """
         ユーザー情報を取得
         
+        セッショントークンで認証済みのリクエストでは、トークンのクレームから返します（DB参照なし）。
+        
         Args:
             user_id: ユーザーID
             db: データベースセッション
@@ -40,6 +57,10 @@ class AuthManager:
         Raises:
             HTTPException: ユーザーが存在しない場合
         """
+        claims = current_session_claims.get()
+        if claims is not None and claims.user_id == str(user_id):
+            return user_info_from_claims(claims)
+        
         user = db.query(MstUser).filter(MstUser.user_id == user_id).first()
         
         if not user:
@@ -241,6 +262,72 @@ class AuthManager:
         return query.filter(False)
 
 
+def user_info_from_claims(claims: SessionClaims) -> UserInfo:
+    """
+    セッショントークンのクレームからユーザー情報を生成
+    
+    Args:
+        claims: 検証済みのクレーム
+        
+    Returns:
+        UserInfo: ユーザー情報
+    """
+    return UserInfo(
+        user_id=claims.user_id,
+        user_name=claims.user_name,
+        entity_type=claims.entity_type,
+        entity_relation_id=claims.entity_relation_id,
+        is_admin=claims.is_admin
+    )
+
+
+def get_current_claims(
+    authorization: Optional[str] = Header(None, alias="Authorization", description="Bearer <セッショントークン>")
+) -> SessionClaims:
+    """
+    セッショントークンを必須として、検証済みのクレームを返す（DB参照なし）
+
+    SessionTokenMiddleware で検証済みの場合はそのクレームを返し、
+    それ以外（ミドルウェアを通らない呼び出し）はここで検証します。
+
+    Raises:
+        HTTPException: トークンが無い、または不正な場合（401）
+    """
+    claims = current_session_claims.get()
+    if claims is not None:
+        return claims
+    token = get_bearer_token(authorization)
+    if token is None:
+        raise HTTPException(
+            status_code=401,
+            detail="セッショントークンが必要です（Authorization: Bearer <token>）",
+            headers={"WWW-Authenticate": TOKEN_TYPE}
+        )
+    try:
+        return verify_session_token(token)
+    except SessionTokenError as e:
+        raise HTTPException(status_code=401, detail=str(e), headers={"WWW-Authenticate": TOKEN_TYPE})
+
+
+def get_current_user_id(claims: SessionClaims = Depends(get_current_claims)) -> str:
+    """ログインユーザーのuser_id（セッショントークンのクレームから取得）"""
+    return claims.user_id
+
+
+# システム用APIキー（本番環境では環境変数から取得推奨）
+SYSTEM_API_KEY = "optiserve-internal-system-key-2025"
+
+
+def verify_system_key(x_system_key: str = Header(None, alias="X-System-Key")):
+    """システム用APIキーの認証（オンプレミスシステムからの呼び出し用）"""
+    if not x_system_key or x_system_key != SYSTEM_API_KEY:
+        raise HTTPException(
+            status_code=401,
+            detail="System API key is required for this endpoint"
+        )
+    return x_system_key
+
+
 # 後方互換性のためのヘルパー関数
 def get_user_medical_id(user_id: str, db: Session) -> Optional[int]:
     """
@@ -254,13 +341,3 @@ def get_user_medical_id(user_id: str, db: Session) -> Optional[int]:
         int: 医療機関ID
     """
     return AuthManager.get_user_medical_id(user_id, db)
-
-
-def get_current_user_id() -> str:
-    """
-    暫定的なユーザーID取得関数（本来はJWT等で実装）
-    
-    Returns:
-        int: 現在のユーザーID
-    """
-    return "900001"  # 暫定値
\ No newline at end of file
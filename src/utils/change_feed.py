@@ -0,0 +1,239 @@
+"""change_feed.py
+
+マスタテーブルの差分同期（lastupdate を基準にした変更データの取得）
+
+Note:
+    - 指定日時（since）以降に登録・更新された行と、削除された行の主キー（トゥームストーン）を返します。
+        - 登録・更新: 各テーブルの lastupdate >= since の行を（lastupdate, 主キー）順に返します
+          （インデックス idx_<テーブル名>_lastupdate を使用したキーセットページング）
+        - 削除: 削除トリガーが記録した sync_tombstone の行を削除記録ID順に返します。
+          同じ主キーの行が再登録された場合は削除記録も消えるため、登録・更新と削除の適用順序は問いません
+    - since を省略した場合は全件を返します（初回同期用。削除は含みません）。
+    - カーソルには since と watermark（次回の since）を含めるため、2ページ目以降はカーソルのみ指定します。
+    - watermark は取得開始時刻から config.yaml の sync.watermark_lag_seconds をさかのぼった日時です。
+      lastupdate はコミット前に設定されるため、取得中にコミットされた行も次回の同期で取得できます
+      （同じ行が複数回返ることがあるため、同期側は主キーで上書きしてください）。
+
+ChangeLog:
+    v1.0.0 (2026-10-19)
+    - 新規作成
+"""
+import base64
+import json
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import inspect, select, tuple_
+from sqlalchemy.orm import Session
+
+from ..models.pg_optigate.equipment_classification_report_selection import EquipmentClassificationReportSelection
+from ..models.pg_optigate.medical_equipment_analysis_setting import MedicalEquipmentAnalysisSetting
+from ..models.pg_optigate.medical_equipment_ledger import MedicalEquipmentLedger
+from ..models.pg_optigate.mst_equipment_classification import MstEquipmentClassification
+from ..models.pg_optigate.mst_medical_facility import MstMedicalFacility
+from ..models.pg_optigate.mst_user import MstUser
+from ..models.pg_optigate.sync_tombstone import SyncTombstone
+from ..models.pg_optigate.user_entity_link import UserEntityLink
+from ..schemas.sync import SyncChange, SyncChangesResponse
+from .config_loader import load_config
+
+# カーソルのページ種別（登録・更新 → 削除の順に取得）
+_ROWS = "rows"
+_DELETES = "deletes"
+
+
+class SyncTable(NamedTuple):
+    """差分同期の対象テーブル"""
+    model: Any
+    excluded_columns: Tuple[str, ...] = ()
+
+
+# 差分同期の対象テーブル（トリガー・インデックスはマイグレーション 012c2f028980 で作成）
+SYNC_TABLES: Dict[str, SyncTable] = {
+    "mst_user": SyncTable(MstUser, excluded_columns=("password",)),
+    "mst_medical_facility": SyncTable(MstMedicalFacility),
+    "user_entity_link": SyncTable(UserEntityLink),
+    "mst_equipment_classification": SyncTable(MstEquipmentClassification),
+    "medical_equipment_ledger": SyncTable(MedicalEquipmentLedger),
+    "medical_equipment_analysis_setting": SyncTable(MedicalEquipmentAnalysisSetting),
+    "equipment_classification_report_selection": SyncTable(EquipmentClassificationReportSelection),
+}
+
+
+class SyncCursorError(ValueError):
+    """カーソルの形式不正"""
+
+
+@lru_cache(maxsize=1)
+def get_watermark_lag() -> timedelta:
+    """config.yaml の sync.watermark_lag_seconds を取得する（既定60秒）"""
+    try:
+        config = load_config().get("sync", {}) or {}
+    except FileNotFoundError:
+        config = {}
+    return timedelta(seconds=int(config.get("watermark_lag_seconds", 60)))
+
+
+def primary_key_columns(table: SyncTable) -> List:
+    """主キーの列（定義順）"""
+    return list(inspect(table.model).primary_key)
+
+
+def sync_columns(table: SyncTable) -> List:
+    """同期する列（除外列を除く）"""
+    return [column for column in table.model.__table__.columns if column.name not in table.excluded_columns]
+
+
+def _encode_cursor(state: Dict[str, Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(state, separators=(",", ":")).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if state["p"] not in (_ROWS, _DELETES):
+            raise ValueError(state["p"])
+        return state
+    except (ValueError, KeyError, TypeError) as e:
+        raise SyncCursorError(f"カーソルの形式が不正です: {e}")
+
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _fetch_rows(
+    table: SyncTable,
+    since: Optional[datetime],
+    after: Optional[list],
+    limit: int,
+    db: Session
+) -> Tuple[List[SyncChange], Optional[list]]:
+    """登録・更新された行を（lastupdate, 主キー）順に取得する。続きがある場合は最後のキーも返す"""
+    model = table.model
+    key_columns = primary_key_columns(table)
+    columns = sync_columns(table)
+    order_columns = [model.__table__.c.lastupdate, *key_columns]
+
+    stmt = select(*columns).order_by(*order_columns).limit(limit + 1)
+    if since is not None:
+        stmt = stmt.where(model.__table__.c.lastupdate >= since)
+    if after is not None:
+        stmt = stmt.where(tuple_(*order_columns) > tuple_(_parse_datetime(after[0]), *after[1:]))
+
+    rows = db.execute(stmt).mappings().all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    items = [
+        SyncChange(
+            op="upsert",
+            key={column.name: row[column.name] for column in key_columns},
+            row=dict(row),
+            changed_at=row["lastupdate"],
+        )
+        for row in rows
+    ]
+    if not has_more:
+        return items, None
+    last = rows[-1]
+    return items, [last["lastupdate"].isoformat(), *(last[column.name] for column in key_columns)]
+
+
+def _fetch_deletes(
+    table_name: str,
+    since: datetime,
+    after_id: int,
+    limit: int,
+    db: Session
+) -> Tuple[List[SyncChange], Optional[int]]:
+    """削除記録を削除記録ID順に取得する。続きがある場合は最後のIDも返す"""
+    tombstones = db.execute(
+        select(SyncTombstone.tombstone_id, SyncTombstone.row_key, SyncTombstone.deleted_at)
+        .where(
+            SyncTombstone.table_name == table_name,
+            SyncTombstone.deleted_at >= since,
+            SyncTombstone.tombstone_id > after_id
+        )
+        .order_by(SyncTombstone.tombstone_id)
+        .limit(limit + 1)
+    ).all()
+    has_more = len(tombstones) > limit
+    tombstones = tombstones[:limit]
+    items = [
+        SyncChange(op="delete", key=json.loads(row_key), row=None, changed_at=deleted_at)
+        for _, row_key, deleted_at in tombstones
+    ]
+    return items, (tombstones[-1][0] if has_more else None)
+
+
+def get_changes(
+    table_name: str,
+    db: Session,
+    since: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = 1000
+) -> SyncChangesResponse:
+    """
+    指定テーブルの変更を1ページ分取得する
+
+    Args:
+        table_name (str): テーブル名（SYNC_TABLES のキー）
+        db (Session): データベースセッション
+        since (datetime, optional): この日時以降の変更を取得する（省略時は全件。カーソル指定時は無視）
+        cursor (str, optional): 前ページの next_cursor
+        limit (int): 1ページの最大件数
+
+    Returns:
+        SyncChangesResponse: 変更一覧
+
+    Raises:
+        KeyError: 対象外のテーブルの場合
+        SyncCursorError: カーソルの形式が不正な場合
+    """
+    table = SYNC_TABLES[table_name]
+
+    if cursor:
+        state = _decode_cursor(cursor)
+        if state.get("t") != table_name:
+            raise SyncCursorError("カーソルのテーブルが一致しません")
+        try:
+            since = _parse_datetime(state.get("s"))
+            watermark = _parse_datetime(state["w"])
+        except (ValueError, KeyError, TypeError) as e:
+            raise SyncCursorError(f"カーソルの形式が不正です: {e}")
+    else:
+        state = {"p": _ROWS}
+        watermark = datetime.now() - get_watermark_lag()
+
+    items: List[SyncChange] = []
+    next_state: Optional[Dict[str, Any]] = None
+
+    if state["p"] == _ROWS:
+        items, last_key = _fetch_rows(table, since, state.get("k"), limit, db)
+        if last_key is not None:
+            next_state = {"p": _ROWS, "k": last_key}
+        elif since is not None:
+            state = {"p": _DELETES}
+            if len(items) == limit:
+                next_state = {"p": _DELETES, "i": 0}
+
+    if state["p"] == _DELETES and next_state is None and since is not None:
+        deletes, last_id = _fetch_deletes(table_name, since, int(state.get("i", 0)), limit - len(items), db)
+        items.extend(deletes)
+        if last_id is not None:
+            next_state = {"p": _DELETES, "i": last_id}
+
+    next_cursor = None
+    if next_state is not None:
+        next_state.update(t=table_name, s=since.isoformat() if since else None, w=watermark.isoformat())
+        next_cursor = _encode_cursor(next_state)
+
+    return SyncChangesResponse(
+        table_name=table_name,
+        since=since,
+        items=items,
+        has_more=next_cursor is not None,
+        next_cursor=next_cursor,
+        watermark=watermark,
+    )
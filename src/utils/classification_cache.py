@@ -0,0 +1,253 @@
+"""classification_cache.py
+
+医療機関ごとの機器分類ツリーのプロセス内キャッシュ
+
+Note:
+    - mst_equipment_classification を医療機関単位で一括取得し、以下をまとめてキャッシュします。
+        - 階層順（classification_level, parent_classification_id, classification_name）に並べた一覧
+        - 一覧の各分類をJSONの形式に変換した辞書（一覧取得APIでモデルの検証をせずにレスポンスに使用）
+        - 大分類→中分類→小分類の入れ子ツリー（JSONにシリアライズ済み）
+        - バージョン（内容のハッシュ値）。ETagとして使用するため、プロセスが異なっても同じ内容なら同じ値になります
+    - 本アプリケーションのセッションで機器分類を登録・更新・削除した場合、コミット時に該当医療機関のキャッシュを破棄します。
+    - 他のワーカー・バッチ処理など他プロセスからの更新に備え、キャッシュの使用時に医療機関の機器分類の
+      件数と最終更新日時（max(lastupdate)）を集計し、構築時と異なる場合は構築し直します（集計のみの軽いクエリ）。
+    - lastupdate を更新せずに直接SQLで変更した場合に備え、config.yaml の cache.classification_tree.ttl_seconds で
+      有効期間も設定します。
+
+ChangeLog:
+    v1.0.0 (2026-10-19)
+    - 新規作成
+    - 一覧の各分類をJSONの形式に変換した辞書（item_dicts）をキャッシュに追加
+    - キャッシュの使用時に件数と最終更新日時を確認し、他プロセスでの更新を反映するように変更
+"""
+import hashlib
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from ..models.pg_optigate.mst_equipment_classification import MstEquipmentClassification
+from ..schemas.equipment_classification import (
+    EquipmentClassification,
+    EquipmentClassificationTreeNode,
+    EquipmentClassificationTreeResponse,
+)
+from .config_loader import load_config
+
+# session.info に記録する破棄対象のキー
+_SESSION_INFO_KEY = "classification_cache_invalidations"
+# 破棄対象を特定できない一括更新（全医療機関を破棄）
+_ALL_MEDICAL_IDS = "*"
+
+
+class ClassificationTree(NamedTuple):
+    """キャッシュする医療機関の機器分類"""
+    medical_id: int
+    version: str
+    stamp: Tuple[int, Optional[datetime]]  # 構築時の件数と最終更新日時
+    built_at: float
+    items: List[EquipmentClassification]
+    item_dicts: List[Dict[str, Any]]
+    tree_json: bytes
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.version}"'
+
+
+_cache: Dict[int, ClassificationTree] = {}
+# 破棄のたびに加算する世代番号（構築中に破棄された結果を保存しないため）
+_generations: Dict[int, int] = {}
+_global_generation = 0
+_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def get_ttl_seconds() -> int:
+    """config.yaml の cache.classification_tree.ttl_seconds を取得する（既定300秒）"""
+    try:
+        config = load_config().get("cache", {}).get("classification_tree", {}) or {}
+    except FileNotFoundError:
+        config = {}
+    return int(config.get("ttl_seconds", 300))
+
+
+def _sort_key(c: MstEquipmentClassification):
+    # DBの並び順（NULLの親分類IDを先頭）に合わせる
+    return (
+        c.classification_level,
+        c.parent_classification_id is not None,
+        c.parent_classification_id or 0,
+        c.classification_name,
+    )
+
+
+def _build_tree(items: List[EquipmentClassification]) -> List[EquipmentClassificationTreeNode]:
+    """一覧から入れ子ツリーを組み立てる（親分類が見つからない分類は最上位に置く）"""
+    nodes = {
+        item.classification_id: EquipmentClassificationTreeNode(
+            classification_id=item.classification_id,
+            classification_level=item.classification_level,
+            classification_name=item.classification_name,
+            parent_classification_id=item.parent_classification_id,
+            publication_classification_id=item.publication_classification_id,
+        )
+        for item in items
+    }
+    roots = []
+    for item in items:
+        node = nodes[item.classification_id]
+        parent = nodes.get(item.parent_classification_id)
+        if parent is not None and parent is not node:
+            parent.children.append(node)
+        else:
+            roots.append(node)
+    return roots
+
+
+def _compute_version(items: List[EquipmentClassification]) -> str:
+    digest = hashlib.sha1()
+    for item in items:
+        digest.update(
+            f"{item.classification_id}\t{item.classification_level}\t{item.classification_name}\t"
+            f"{item.parent_classification_id}\t{item.publication_classification_id}\t{item.lastupdate}\n"
+            .encode("utf-8")
+        )
+    return digest.hexdigest()
+
+
+def _query_stamp(medical_id: int, db: Session) -> Tuple[int, Optional[datetime]]:
+    """医療機関の機器分類の件数と最終更新日時を集計する（行は取得しない）"""
+    count, last_modified = db.query(
+        func.count(MstEquipmentClassification.classification_id),
+        func.max(MstEquipmentClassification.lastupdate),
+    ).filter(MstEquipmentClassification.medical_id == medical_id).one()
+    return count, last_modified
+
+
+def _valid_cache(medical_id: int, stamp: Tuple[int, Optional[datetime]]) -> Optional[ClassificationTree]:
+    tree = _cache.get(medical_id)
+    if tree is None or tree.stamp != stamp or time.monotonic() - tree.built_at > get_ttl_seconds():
+        return None
+    return tree
+
+
+def get_cached_classification_tree(medical_id: int, db: Session) -> Optional[ClassificationTree]:
+    """
+    有効なキャッシュを返す（無い場合、または構築後にDBの機器分類が変更されている場合はNone）
+
+    Args:
+        medical_id (int): 医療機関ID
+        db (Session): データベースセッション（件数と最終更新日時の確認に使用）
+
+    Returns:
+        Optional[ClassificationTree]: キャッシュ済みの機器分類
+    """
+    if medical_id not in _cache:
+        return None
+    return _valid_cache(medical_id, _query_stamp(medical_id, db))
+
+
+def load_classification_tree(medical_id: int, db: Session) -> ClassificationTree:
+    """
+    キャッシュから機器分類を取得する（無い場合はDBから構築してキャッシュする）
+
+    Args:
+        medical_id (int): 医療機関ID
+        db (Session): データベースセッション
+
+    Returns:
+        ClassificationTree: 医療機関の機器分類
+    """
+    # 行より先に集計する（集計後の変更は次回の確認で検出される）
+    stamp = _query_stamp(medical_id, db)
+    tree = _valid_cache(medical_id, stamp)
+    if tree is not None:
+        return tree
+
+    with _lock:
+        generation = (_global_generation, _generations.get(medical_id, 0))
+
+    classifications = db.query(MstEquipmentClassification).filter(
+        MstEquipmentClassification.medical_id == medical_id
+    ).all()
+    classifications.sort(key=_sort_key)
+    items = [EquipmentClassification.model_validate(c) for c in classifications]
+    version = _compute_version(items)
+    tree_json = EquipmentClassificationTreeResponse(
+        medical_id=medical_id,
+        version=version,
+        total=len(items),
+        items=_build_tree(items),
+    ).model_dump_json().encode("utf-8")
+    item_dicts = [item.model_dump(mode="json") for item in items]
+    tree = ClassificationTree(medical_id, version, stamp, time.monotonic(), items, item_dicts, tree_json)
+
+    with _lock:
+        if generation == (_global_generation, _generations.get(medical_id, 0)):
+            _cache[medical_id] = tree
+    return tree
+
+
+def invalidate_classification_tree(medical_id: Optional[int] = None) -> None:
+    """
+    キャッシュを破棄する
+
+    Args:
+        medical_id (int, optional): 医療機関ID。省略時は全医療機関のキャッシュを破棄
+    """
+    global _global_generation
+    with _lock:
+        if medical_id is None:
+            _global_generation += 1
+            _cache.clear()
+        else:
+            _generations[medical_id] = _generations.get(medical_id, 0) + 1
+            _cache.pop(medical_id, None)
+
+
+def _mark(session: Session, medical_id) -> None:
+    # 公開用分類（medical_id=NULL）は医療機関ごとのキャッシュに含まれない
+    if medical_id is not None:
+        session.info.setdefault(_SESSION_INFO_KEY, set()).add(medical_id)
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _collect_flushed_classifications(session: Session, flush_context) -> None:
+    """フラッシュされた機器分類の医療機関IDを記録する"""
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, MstEquipmentClassification):
+            _mark(session, obj.medical_id)
+            # 医療機関IDが変更された場合は変更前の医療機関も破棄対象
+            for previous_medical_id in inspect(obj).attrs.medical_id.history.deleted:
+                _mark(session, previous_medical_id)
+
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _collect_bulk_statements(orm_execute_state) -> None:
+    """insert/update/delete文による一括更新は、対象を特定せず全医療機関を破棄対象とする"""
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ is MstEquipmentClassification:
+        _mark(orm_execute_state.session, _ALL_MEDICAL_IDS)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    medical_ids: Set = session.info.pop(_SESSION_INFO_KEY, set())
+    if _ALL_MEDICAL_IDS in medical_ids:
+        invalidate_classification_tree()
+        return
+    for medical_id in medical_ids:
+        invalidate_classification_tree(medical_id)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_rolled_back(session: Session) -> None:
+    session.info.pop(_SESSION_INFO_KEY, None)
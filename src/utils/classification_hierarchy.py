@@ -0,0 +1,70 @@
+"""classification_hierarchy.py
+
+閉包テーブル（mst_equipment_classification_closure）による機器分類の階層検索
+
+Note:
+    - 閉包テーブルは mst_equipment_classification のトリガーで登録・付け替え・削除に合わせて更新されます。
+    - 子孫・祖先は閉包テーブルと機器分類マスタの結合1回で取得でき、親分類IDを再帰的にたどる必要はありません。
+
+ChangeLog:
+    v1.0.0 (2026-10-19)
+    - 新規作成
+"""
+from typing import List, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..models.pg_optigate.mst_equipment_classification import MstEquipmentClassification
+from ..models.pg_optigate.mst_equipment_classification_closure import MstEquipmentClassificationClosure
+
+DESCENDANTS = "descendants"
+ANCESTORS = "ancestors"
+
+
+def descendant_ids_subquery(classification_id: int):
+    """
+    指定分類とその子孫の分類IDを返すサブクエリ（IN句で使用）
+
+    Args:
+        classification_id (int): 機器分類ID
+
+    Returns:
+        Select: 分類IDのSELECT文
+    """
+    return select(MstEquipmentClassificationClosure.descendant_id).where(
+        MstEquipmentClassificationClosure.ancestor_id == classification_id
+    )
+
+
+def get_related_classifications(
+    classification_id: int,
+    direction: str,
+    db: Session
+) -> List[Tuple[MstEquipmentClassification, int]]:
+    """
+    指定分類の子孫または祖先を取得する（指定分類自身をdepth=0で含む）
+
+    Args:
+        classification_id (int): 機器分類ID
+        direction (str): DESCENDANTS または ANCESTORS
+        db (Session): データベースセッション
+
+    Returns:
+        List[Tuple[MstEquipmentClassification, int]]: 機器分類と階層の距離の組（距離、分類名の順）
+        指定分類が存在しない場合は空のリスト
+    """
+    closure = MstEquipmentClassificationClosure
+    if direction == DESCENDANTS:
+        key_column, related_column = closure.ancestor_id, closure.descendant_id
+    else:
+        key_column, related_column = closure.descendant_id, closure.ancestor_id
+
+    return db.query(MstEquipmentClassification, closure.depth).join(
+        closure, related_column == MstEquipmentClassification.classification_id
+    ).filter(
+        key_column == classification_id
+    ).order_by(
+        closure.depth,
+        MstEquipmentClassification.classification_name
+    ).all()
@@ -0,0 +1,385 @@
+"""classification_import.py
+
+機器分類マスタ（mst_equipment_classification）のCSV/XLSX一括取込
+
+Note:
+    - ファイルを1行ずつ読み込み、検証、親分類の解決、登録・更新を1トランザクションで行います。
+    - 列名は英語名（mst_equipment_classification.csv 形式）と日本語名（機器分類マスタ.csv 形式）に対応します。
+        - classification_id / 機器分類ID: ファイル内の分類ID（親分類の参照にのみ使用し、DBの機器分類IDにはなりません）
+        - medical_id / 病院コード / 医療機関ID: 医療機関ID（空欄は公開用分類）
+        - classification_level / 分類レベル: 1:大分類, 2:中分類, 3:小分類（列が無い場合は1）
+        - classification_name / 機器分類名: 機器分類名（必須）
+        - parent_id / parent_classification_id / 親分類ID: 親分類のファイル内の分類ID（中分類・小分類は必須）
+        - publication_classification_id / 公開用機器分類ID / マスタ機器分類ID: 公開用機器分類ID
+    - 親分類は同じ医療機関の1つ上のレベルの分類をメモリ上で解決します（行の並び順は問いません）。
+    - 既存の分類とは（医療機関ID, 分類レベル, 親分類, 機器分類名）で照合し、
+      一致する場合は公開用機器分類IDを更新、一致しない場合は新規登録します（削除は行いません）。
+    - 新規登録はレベルごとに一括INSERT（executemany）し、採番されたIDを1クエリで取得して子分類の親分類IDに使用します。
+    - 行ごとのエラー（行番号とエラー内容）を返します。
+    - XLSXの読み込みには openpyxl が必要です（未インストールの場合はCSVのみ対応）。
+
+ChangeLog:
+    v1.0.0 (2026-10-19)
+    - 新規作成（tests/initial の1行ずつINSERTするスクリプトを置き換え）
+    - openpyxl の読み込みをXLSXの取込時に変更（APIサーバーの起動時間の短縮）
+"""
+import csv
+import importlib.util
+import io
+from datetime import datetime
+from typing import Any, Dict, IO, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert, or_, update
+from sqlalchemy.orm import Session
+
+from ..models.pg_optigate.mst_equipment_classification import MstEquipmentClassification
+from ..models.pg_optigate.mst_medical_facility import MstMedicalFacility
+from ..schemas.equipment_classification import ClassificationImportError, ClassificationImportResponse
+
+# openpyxlの有無を確認（XLSX取込のみで使用するため、読み込みは取込時に行う）
+OPENPYXL_AVAILABLE = importlib.util.find_spec("openpyxl") is not None
+
+# 列名の別名（日本語の列名にも対応）
+COLUMN_ALIASES = {
+    "classification_id": ("classification_id", "機器分類ID"),
+    "medical_id": ("medical_id", "病院コード", "医療機関ID"),
+    "classification_level": ("classification_level", "分類レベル"),
+    "classification_name": ("classification_name", "機器分類名"),
+    "parent_id": ("parent_id", "parent_classification_id", "親分類ID"),
+    "publication_classification_id": ("publication_classification_id", "公開用機器分類ID", "マスタ機器分類ID"),
+}
+
+# 応答に含めるエラーの最大件数（件数自体は error_count に全件を計上）
+MAX_REPORTED_ERRORS = 1000
+
+
+class ClassificationImportFormatError(ValueError):
+    """ファイル形式・列構成が不正"""
+
+
+class _ImportRow:
+    """検証済みの取込行"""
+    __slots__ = ("row_number", "file_id", "medical_id", "level", "name", "parent_file_id",
+                 "publication_id", "parent", "db_id")
+
+    def __init__(self, row_number, file_id, medical_id, level, name, parent_file_id, publication_id):
+        self.row_number = row_number
+        self.file_id = file_id
+        self.medical_id = medical_id
+        self.level = level
+        self.name = name
+        self.parent_file_id = parent_file_id
+        self.publication_id = publication_id
+        self.parent: Optional["_ImportRow"] = None
+        self.db_id: Optional[int] = None
+
+
+def _resolve_columns(header: List[str]) -> Dict[str, int]:
+    """ヘッダー行から列位置を求める"""
+    normalized = [str(h).strip().lstrip("\ufeff") if h is not None else "" for h in header]
+    columns = {}
+    for key, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in normalized:
+                columns[key] = normalized.index(alias)
+                break
+    if "classification_name" not in columns:
+        raise ClassificationImportFormatError("機器分類名（classification_name）の列がありません")
+    if "parent_id" in columns and "classification_id" not in columns:
+        raise ClassificationImportFormatError("親分類IDを指定する場合は分類ID（classification_id）の列が必要です")
+    return columns
+
+
+def iter_csv_rows(stream: IO[bytes], encoding: str = "utf-8-sig") -> Iterator[List[str]]:
+    """バイナリストリームのCSVを1行ずつ読み込む（呼び出し元のストリームは閉じない）"""
+    text = io.TextIOWrapper(stream, encoding=encoding, newline="")
+    try:
+        yield from csv.reader(text)
+    finally:
+        text.detach()
+
+
+def iter_xlsx_rows(stream: IO[bytes]) -> Iterator[List[Any]]:
+    """XLSXの先頭シートを1行ずつ読み込む（read_onlyモード）"""
+    if not OPENPYXL_AVAILABLE:
+        raise ClassificationImportFormatError("XLSXの取込には openpyxl が必要です。CSVで取り込んでください")
+    import openpyxl
+    workbook = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield ["" if value is None else value for value in row]
+    finally:
+        workbook.close()
+
+
+def iter_file_rows(stream: IO[bytes], filename: str) -> Iterator[List[Any]]:
+    """拡張子に応じてCSVまたはXLSXの行を返す"""
+    lower = (filename or "").lower()
+    if lower.endswith(".xlsx"):
+        return iter_xlsx_rows(stream)
+    if lower.endswith(".csv") or lower.endswith(".txt"):
+        return iter_csv_rows(stream)
+    raise ClassificationImportFormatError("CSV（.csv）またはXLSX（.xlsx）ファイルを指定してください")
+
+
+def _to_optional_int(value: Any, label: str) -> Optional[int]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, float):
+        if value.is_integer():
+            return int(value)
+    else:
+        try:
+            return int(value)  # 前後の空白は int() が除去する
+        except ValueError:
+            if not str(value).strip():
+                return None
+    raise ValueError(f"{label}は整数で指定してください: {value}")
+
+
+def _parse_rows(rows: Iterator[List[Any]], errors: List[Tuple[int, Optional[str], str]]) -> Tuple[List[_ImportRow], int]:
+    """
+    ファイルの各行を検証して取込行に変換する
+
+    Returns:
+        Tuple[List[_ImportRow], int]: 単独で検証に通った行と、データ行の総数
+    """
+    try:
+        header = next(rows)
+    except StopIteration:
+        raise ClassificationImportFormatError("ファイルが空です")
+    columns = _resolve_columns(header)
+    get = {key: (lambda row, i=index: row[i] if i < len(row) else None) for key, index in columns.items()}
+    no_value = lambda row: None
+
+    get_file_id = get.get("classification_id", no_value)
+    get_medical_id = get.get("medical_id", no_value)
+    get_level = get.get("classification_level", no_value)
+    get_name = get["classification_name"]
+    get_parent = get.get("parent_id", no_value)
+    get_publication = get.get("publication_classification_id", no_value)
+
+    parsed = []
+    total = 0
+    for row_number, row in enumerate(rows, start=2):
+        if not any(str(value).strip() for value in row):
+            continue  # 空行
+        total += 1
+        name = get_name(row)
+        name = str(name).strip() if name is not None else ""
+        try:
+            if not name:
+                raise ValueError("機器分類名は必須です")
+            level = _to_optional_int(get_level(row), "分類レベル")
+            level = 1 if level is None else level
+            if level not in (1, 2, 3):
+                raise ValueError(f"分類レベルは1-3で指定してください: {level}")
+            parent_file_id = _to_optional_int(get_parent(row), "親分類ID")
+            if level == 1 and parent_file_id is not None:
+                raise ValueError("大分類（レベル1）に親分類は指定できません")
+            if level > 1 and parent_file_id is None:
+                raise ValueError("中分類・小分類は親分類IDが必須です")
+            parsed.append(_ImportRow(
+                row_number=row_number,
+                file_id=_to_optional_int(get_file_id(row), "分類ID"),
+                medical_id=_to_optional_int(get_medical_id(row), "医療機関ID"),
+                level=level,
+                name=name,
+                parent_file_id=parent_file_id,
+                publication_id=_to_optional_int(get_publication(row), "公開用機器分類ID"),
+            ))
+        except ValueError as e:
+            errors.append((row_number, name or None, str(e)))
+    return parsed, total
+
+
+def _assign_inserted_ids(new_rows: List[_ImportRow], level: int, regdate: datetime, user_id: str, db: Session) -> None:
+    """
+    登録した分類の採番済みIDを取得する（子分類の親分類IDに使用）
+
+    RETURNINGは行の順序を保証するために1行ずつのINSERTとなる方言があるため、executemanyで登録した後、
+    登録日時・レベルで絞り込んだ1クエリで（医療機関ID, 親分類ID, 機器分類名）からIDを引き当てます。
+    同じキーの既存分類は登録対象から除外済みのため、キーは一意に決まります。
+    """
+    inserted = db.query(
+        MstEquipmentClassification.classification_id,
+        MstEquipmentClassification.medical_id,
+        MstEquipmentClassification.parent_classification_id,
+        MstEquipmentClassification.classification_name,
+    ).filter(
+        MstEquipmentClassification.classification_level == level,
+        MstEquipmentClassification.regdate == regdate,
+        MstEquipmentClassification.reg_user_id == user_id,
+    )
+    ids = {
+        (medical_id, parent_id, name): classification_id
+        for classification_id, medical_id, parent_id, name in inserted
+    }
+    for row in new_rows:
+        row.db_id = ids[(row.medical_id, row.parent.db_id if row.parent else None, row.name)]
+
+
+def import_classifications(
+    rows: Iterator[List[Any]],
+    db: Session,
+    user_id: str,
+    all_or_nothing: bool = True,
+    dry_run: bool = False
+) -> ClassificationImportResponse:
+    """
+    機器分類を一括で取り込む
+
+    Args:
+        rows (Iterator[List[Any]]): ヘッダー行から始まるファイルの行
+        db (Session): データベースセッション
+        user_id (str): 取込を行うユーザーID（登録・更新ユーザーIDとして記録）
+        all_or_nothing (bool, optional): Trueの場合、1件でもエラーがあれば何も登録しない
+        dry_run (bool, optional): Trueの場合、検証のみ行い登録しない
+
+    Returns:
+        ClassificationImportResponse: 取込結果（件数と行ごとのエラー）
+
+    Raises:
+        ClassificationImportFormatError: ファイル形式・列構成が不正な場合
+    """
+    errors: List[Tuple[int, Optional[str], str]] = []
+    parsed, total = _parse_rows(rows, errors)
+
+    # 医療機関の存在チェック（1クエリ）
+    medical_ids = {row.medical_id for row in parsed if row.medical_id is not None}
+    existing_facilities = {
+        medical_id for (medical_id,) in db.query(MstMedicalFacility.medical_id).filter(
+            MstMedicalFacility.medical_id.in_(medical_ids)
+        )
+    } if medical_ids else set()
+
+    # ファイル内IDの索引（医療機関ごと）と、ファイル内の重複チェック
+    by_file_id: Dict[Tuple[Optional[int], int], _ImportRow] = {}
+    valid: List[_ImportRow] = []
+    for row in parsed:
+        if row.medical_id is not None and row.medical_id not in existing_facilities:
+            errors.append((row.row_number, row.name, f"医療機関ID {row.medical_id} は存在しません"))
+            continue
+        if row.file_id is not None:
+            key = (row.medical_id, row.file_id)
+            if key in by_file_id:
+                errors.append((row.row_number, row.name,
+                               f"分類ID {row.file_id} がファイル内で重複しています（{by_file_id[key].row_number}行目）"))
+                continue
+            by_file_id[key] = row
+        valid.append(row)
+
+    # 既存の分類を読み込み（医療機関単位の1クエリ）
+    existing: Dict[Tuple[Optional[int], int, Optional[int], str], Tuple[int, Optional[int]]] = {}
+    query = db.query(
+        MstEquipmentClassification.classification_id,
+        MstEquipmentClassification.medical_id,
+        MstEquipmentClassification.classification_level,
+        MstEquipmentClassification.parent_classification_id,
+        MstEquipmentClassification.classification_name,
+        MstEquipmentClassification.publication_classification_id,
+    )
+    scopes = [MstEquipmentClassification.medical_id.in_(medical_ids)] if medical_ids else []
+    if any(row.medical_id is None for row in valid):
+        scopes.append(MstEquipmentClassification.medical_id.is_(None))
+    if scopes:
+        for classification_id, medical_id, level, parent_id, name, publication_id in query.filter(or_(*scopes)):
+            existing[(medical_id, level, parent_id, name)] = (classification_id, publication_id)
+
+    # 上位レベルから順に親分類を解決し、登録・更新対象を振り分け
+    failed_rows = set()
+    inserts_by_level: Dict[int, List[_ImportRow]] = {1: [], 2: [], 3: []}
+    updates: List[Dict[str, Any]] = []
+    unchanged_count = 0
+    seen_keys: Dict[Tuple, _ImportRow] = {}
+    for level in (1, 2, 3):
+        for row in (r for r in valid if r.level == level):
+            if level > 1:
+                parent = by_file_id.get((row.medical_id, row.parent_file_id))
+                if parent is None or id(parent) in failed_rows:
+                    reason = "が見つかりません" if parent is None else "はエラーのため取り込めません"
+                    errors.append((row.row_number, row.name, f"親分類ID {row.parent_file_id}{reason}"))
+                    failed_rows.add(id(row))
+                    continue
+                if parent.level != level - 1:
+                    errors.append((row.row_number, row.name,
+                                   f"親分類ID {row.parent_file_id} はレベル{level - 1}の分類ではありません"))
+                    failed_rows.add(id(row))
+                    continue
+                row.parent = parent
+
+            natural_key = (row.medical_id, level, id(row.parent) if row.parent else None, row.name)
+            if natural_key in seen_keys:
+                errors.append((row.row_number, row.name,
+                               f"同じ親分類に同名の分類がファイル内で重複しています（{seen_keys[natural_key].row_number}行目）"))
+                failed_rows.add(id(row))
+                continue
+            seen_keys[natural_key] = row
+
+            # 親分類が新規の場合は既存の分類とは一致しない
+            parent_db_id = row.parent.db_id if row.parent else None
+            match = existing.get((row.medical_id, level, parent_db_id, row.name)) if (
+                row.parent is None or parent_db_id is not None) else None
+            if match is None:
+                inserts_by_level[level].append(row)
+                continue
+            row.db_id, publication_id = match
+            if row.publication_id != publication_id:
+                updates.append({"classification_id": row.db_id, "publication_classification_id": row.publication_id})
+            else:
+                unchanged_count += 1
+
+    error_count = len(errors)
+    inserted_count = sum(len(rows_) for rows_ in inserts_by_level.values())
+    write = not dry_run and not (all_or_nothing and error_count) and (inserted_count or updates)
+
+    if write:
+        now = datetime.now()
+        try:
+            for level in (1, 2, 3):
+                new_rows = inserts_by_level[level]
+                if not new_rows:
+                    continue
+                db.execute(
+                    insert(MstEquipmentClassification),
+                    [
+                        {
+                            "medical_id": row.medical_id,
+                            "classification_level": row.level,
+                            "classification_name": row.name,
+                            "parent_classification_id": row.parent.db_id if row.parent else None,
+                            "publication_classification_id": row.publication_id,
+                            "reg_user_id": user_id,
+                            "regdate": now,
+                            "update_user_id": user_id,
+                            "lastupdate": now,
+                        }
+                        for row in new_rows
+                    ]
+                )
+                _assign_inserted_ids(new_rows, level, now, user_id, db)
+            if updates:
+                for item in updates:
+                    item.update(update_user_id=user_id, lastupdate=now)
+                db.execute(update(MstEquipmentClassification), updates)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+    elif not dry_run:
+        inserted_count = 0
+        updates = []
+
+    errors.sort(key=lambda e: e[0])
+    return ClassificationImportResponse(
+        total_rows=total,
+        inserted_count=inserted_count,
+        updated_count=len(updates),
+        unchanged_count=unchanged_count,
+        error_count=error_count,
+        committed=bool(write),
+        errors=[
+            ClassificationImportError(row=row_number, classification_name=name, message=message)
+            for row_number, name, message in errors[:MAX_REPORTED_ERRORS]
+        ]
+    )
@@ -0,0 +1,203 @@
+"""compression.py
+
+レスポンスの圧縮（Brotli / gzip）を行うASGIミドルウェア
+
+Note:
+    - リクエストの Accept-Encoding に応じて Brotli（br）または gzip で圧縮します。
+      両方を受け付ける場合は Brotli を優先します（brotli / brotlicffi が無い場合は gzip のみ）。
+    - minimum_size バイト未満のレスポンス、圧縮済みの形式（PDF・XLSX/PPTX・画像など excluded_content_types）、
+      Content-Encoding 設定済み・部分取得（206）のレスポンスは圧縮しません。
+    - StreamingResponse・FileResponse など分割して送信するレスポンスは、分割したまま順に圧縮します（Content-Length は削除）。
+      1回で送信するレスポンスは Content-Length を圧縮後のサイズにします。
+    - ETag は圧縮の有無によらず同じ値のままとします（内容のバージョンから作成しており、
+      src/utils/etag.py の If-None-Match は弱い比較のため。圧縮したレスポンスは部分取得（Range）に対応しません）。
+    - 設定は config.yaml の compression を使用します。
+
+ChangeLog:
+    v1.0.0 (2026-10-19)
+    - 新規作成
+"""
+import zlib
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Tuple
+
+from .config_loader import load_section_settings
+
+# Brotliの有無を確認（無い場合は gzip のみ）
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    try:
+        import brotlicffi as brotli
+        BROTLI_AVAILABLE = True
+    except ImportError:
+        BROTLI_AVAILABLE = False
+
+# 圧縮済みの形式（圧縮しても小さくならず、CPUのみ消費する）
+DEFAULT_EXCLUDED_CONTENT_TYPES = (
+    "application/pdf",
+    "application/vnd.openxmlformats-officedocument.",  # XLSX・PPTX・DOCX（ZIP形式）
+    "application/zip",
+    "application/gzip",
+    "application/octet-stream",
+    "image/",
+    "audio/",
+    "video/",
+    "text/event-stream",
+)
+
+
+class CompressionSettings(NamedTuple):
+    """config.yaml の compression"""
+    enabled: bool = True
+    minimum_size: int = 1024  # このバイト数未満のレスポンスは圧縮しない
+    gzip_level: int = 6  # 1（速い）〜 9（小さい）
+    brotli_quality: int = 4  # 0（速い）〜 11（小さい）。動的なレスポンスでは 4〜5 程度
+    excluded_content_types: Tuple[str, ...] = DEFAULT_EXCLUDED_CONTENT_TYPES  # 前方一致
+
+
+@lru_cache(maxsize=1)
+def get_compression_settings() -> CompressionSettings:
+    """config.yaml の compression を取得する（未設定の項目は既定値）"""
+    return load_section_settings("compression", CompressionSettings)
+
+
+def select_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Accept-Encoding から圧縮方式を選択する（br > gzip。q=0 の方式は使用しない）
+
+    Args:
+        accept_encoding (str): Accept-Encoding ヘッダーの値
+
+    Returns:
+        Optional[str]: "br" / "gzip"（圧縮しない場合はNone）
+    """
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            accepted[coding.strip()] = quality
+    for coding in (("br", "gzip") if BROTLI_AVAILABLE else ("gzip",)):
+        if accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return None
+
+
+class _Compressor:
+    """分割して送信するレスポンスを順に圧縮する"""
+
+    def __init__(self, encoding: str, settings: CompressionSettings):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=settings.brotli_quality)
+            self._zlib = None
+        else:
+            # wbits=31: gzip形式（ヘッダー・トレーラー付き）
+            self._brotli = None
+            self._zlib = zlib.compressobj(settings.gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, finish: bool) -> bytes:
+        if self._zlib is not None:
+            chunk = self._zlib.compress(data)
+            return chunk + (self._zlib.flush() if finish else self._zlib.flush(zlib.Z_SYNC_FLUSH))
+        chunk = self._brotli.process(data)
+        return chunk + (self._brotli.finish() if finish else self._brotli.flush())
+
+
+def _header(headers: List[Tuple[bytes, bytes]], name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+class CompressionMiddleware:
+    """
+    レスポンスを Brotli / gzip で圧縮するASGIミドルウェア
+    """
+
+    def __init__(self, app, settings: Optional[CompressionSettings] = None):
+        self.app = app
+        self.settings = settings or get_compression_settings()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = ""
+        for key, value in scope["headers"]:
+            if key == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+        encoding = select_encoding(accept_encoding) if accept_encoding else None
+
+        start_message = None
+        compressor: Optional[_Compressor] = None
+        compressible = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, compressible
+            if message["type"] == "http.response.start":
+                # 最初の本文を確認して圧縮するかを決めるまで送信を保留する
+                start_message = message
+                headers = message.get("headers", [])
+                content_type = (_header(headers, b"content-type") or b"").decode("latin-1").lower()
+                compressible = (
+                    message["status"] not in (204, 206, 304)
+                    and _header(headers, b"content-encoding") is None
+                    and not content_type.startswith(self.settings.excluded_content_types)
+                )
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start_message is not None:
+                initial, start_message = start_message, None
+                if compressible and (more_body or len(body) >= self.settings.minimum_size):
+                    # 圧縮の有無が Accept-Encoding で変わるため、共有キャッシュには方式ごとに保存させる
+                    self._add_vary(initial)
+                    if encoding is not None:
+                        compressor = _Compressor(encoding, self.settings)
+                        compressed = compressor.compress(body, finish=not more_body)
+                        # 1回で送信するレスポンスは圧縮後のサイズを Content-Length に設定する
+                        self._set_compressed_headers(initial, encoding, None if more_body else len(compressed))
+                        await send(initial)
+                        await send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+                        return
+                await send(initial)
+            if compressor is None:
+                await send(message)
+                return
+            compressed = compressor.compress(body, finish=not more_body)
+            await send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    def _add_vary(message) -> None:
+        headers = [(key, value) for key, value in message.get("headers", [])]
+        vary = _header(headers, b"vary")
+        if vary is None:
+            headers.append((b"vary", b"Accept-Encoding"))
+        elif b"accept-encoding" not in vary.lower():
+            headers = [(key, value + b", Accept-Encoding" if key.lower() == b"vary" else value)
+                       for key, value in headers]
+        message["headers"] = headers
+
+    @staticmethod
+    def _set_compressed_headers(message, encoding: str, content_length: Optional[int]) -> None:
+        headers = [(key, value) for key, value in message.get("headers", []) if key.lower() != b"content-length"]
+        headers.append((b"content-encoding", encoding.encode("latin-1")))
+        if content_length is not None:
+            headers.append((b"content-length", str(content_length).encode("latin-1")))
+        message["headers"] = headers
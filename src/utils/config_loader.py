@@ -9,15 +9,40 @@ ChangeLog:
     v1.0.0 (2025-08-26)
         - 新規作成
         - OS環境に応じた動的設定置換機能実装
+    v1.1.0 (2026-10-19)
+        - 読み込んだ設定ファイルをプロセス内でキャッシュ（起動時に各設定の取得で何度も解析しないため）
+          設定ファイルを変更した場合はプロセスの再起動、または clear_config_cache() で反映します
+    v1.2.0 (2026-10-19)
+        - load_section_settings() を追加（各モジュールの設定の取得を共通化）
 """
+import copy
 import os
 import yaml
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any
+from typing import Any, Dict, Mapping, Optional, Type, TypeVar
 from .path_config import path_config
 
+# libyaml がある場合はC実装のローダーを使用
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+SettingsT = TypeVar("SettingsT")
+
+
+@lru_cache(maxsize=8)
+def _read_config(config_file_path: Path) -> Dict[str, Any]:
+    """設定ファイルを解析する（キャッシュ。呼び出し元で変更しないこと）"""
+    with open(config_file_path, 'r', encoding='utf-8') as f:
+        return yaml.load(f, Loader=_YAML_LOADER)
+
+
+def clear_config_cache() -> None:
+    """設定ファイルのキャッシュを破棄する（次回の load_config で読み直す）"""
+    _read_config.cache_clear()
+
+
 def load_config(config_path: str = "config.yaml") -> Dict[str, Any]:
-    """設定ファイルを読み込み、OS環境に応じてパスを置換"""
+    """設定ファイルを読み込み、OS環境に応じてパスを置換（戻り値は呼び出しごとの複製）"""
     
     # 設定ファイル読み込み
     config_file_path = path_config.base_path / config_path
@@ -27,8 +52,7 @@ def load_config(config_path: str = "config.yaml") -> Dict[str, Any]:
         if not config_file_path.exists():
             raise FileNotFoundError(f"設定ファイルが見つかりません: {config_path}")
     
-    with open(config_file_path, 'r', encoding='utf-8') as f:
-        config = yaml.safe_load(f)
+    config = copy.deepcopy(_read_config(config_file_path.resolve()))
     
     # OS環境に応じたパス置換
     if 'logging' in config:
@@ -45,6 +69,48 @@ def load_config(config_path: str = "config.yaml") -> Dict[str, Any]:
     
     return config
 
+def _cast_setting(value: Any, default: Any) -> Any:
+    """設定値を既定値の型に変換する（文字列の "false" / "0" も bool の False とする）"""
+    if isinstance(default, bool) and isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return type(default)(value)
+
+
+def load_section_settings(
+    section: str,
+    settings_cls: Type[SettingsT],
+    env_prefix: Optional[str] = None,
+    environ: Optional[Mapping[str, str]] = None,
+) -> SettingsT:
+    """
+    config.yaml のセクションを設定（NamedTuple）として取得する
+
+    設定ファイルや項目が無い場合は既定値を使用し、値は既定値の型に変換します。
+
+    Args:
+        section (str): セクション名（例: "job_queue"）
+        settings_cls (Type): 設定のNamedTuple（全項目に既定値があること）
+        env_prefix (str, optional): 指定した場合、環境変数 <env_prefix><項目名の大文字> を config.yaml より優先
+        environ (Mapping, optional): 環境変数（省略時は os.environ）
+
+    Returns:
+        設定のNamedTuple
+    """
+    try:
+        config = load_config().get(section, {}) or {}
+    except FileNotFoundError:
+        config = {}
+    environ = os.environ if environ is None else environ
+    values = {}
+    for field, default in settings_cls._field_defaults.items():
+        value = environ.get(env_prefix + field.upper()) if env_prefix else None
+        if value in (None, ""):
+            value = config.get(field)
+        if value is not None:
+            values[field] = _cast_setting(value, default)
+    return settings_cls(**values)
+
+
 def get_config_info() -> Dict[str, Any]:
     """現在の設定情報を取得（デバッグ用）"""
     try:
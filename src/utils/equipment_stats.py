@@ -0,0 +1,203 @@
+"""equipment_stats.py
+
+医療機関・機器分類ごとの機器台帳の集計値（medical_equipment_classification_stat）の管理
+
+Note:
+    - ダッシュボードの機器数・分析対象の機器数・上書き設定のある機器数・台数の合計を、
+      medical_equipment_ledger を集計せずに集計値のテーブルから取得します。
+    - 集計は分析設定の上書きを反映した有効な値で行います（一覧取得APIの effective_* と同じ規則）。
+        - 機器分類: 分類上書きがある場合は上書き後の分類、無い場合は台帳の分類（分類の無い機器は0）
+        - 分析対象フラグ: 分析設定がある場合は override_is_included、無い場合は台帳の is_included
+    - 台帳の取込・分析設定の更新・削除では、変更前の機器の集計値を減算・変更後の集計値を加算した増減分を
+      EquipmentStatsDelta に記録し、同じトランザクションで INSERT ... ON CONFLICT DO UPDATE の1文で加算します。
+      （医療機関の台帳全体を再集計しません。機器が0件になった行は削除します）
+    - 移行時・台帳を直接更新した場合は rebuild_equipment_stats で医療機関の集計値を作り直します。
+
+ChangeLog:
+    v1.0.0 (2026-10-19)
+    - 新規作成
+    - ON CONFLICT のINSERT文の作成を utils/upsert.py の dialect_insert から使用するよう変更
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy import case, delete, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from ..models.pg_optigate.medical_equipment_analysis_setting import MedicalEquipmentAnalysisSetting
+from ..models.pg_optigate.medical_equipment_classification_stat import MedicalEquipmentClassificationStat
+from ..models.pg_optigate.medical_equipment_ledger import MedicalEquipmentLedger
+from .upsert import dialect_insert
+
+# 機器分類の無い機器を集計する機器分類ID
+UNCLASSIFIED_ID = 0
+# 集計値の列
+STAT_COLUMNS = ("ledger_count", "included_count", "override_count", "stock_quantity", "included_stock_quantity")
+# 1文で加算する行数
+BATCH_SIZE = 500
+
+
+class SettingValues(NamedTuple):
+    """分析設定の上書き値（変更前の値の保持用）"""
+    override_is_included: bool
+    override_classification_id: Optional[int]
+
+
+def setting_values(setting: Optional[MedicalEquipmentAnalysisSetting]) -> Optional[SettingValues]:
+    """分析設定の現在の上書き値を返す（設定が無い場合はNone）"""
+    if setting is None:
+        return None
+    return SettingValues(setting.override_is_included, setting.override_classification_id)
+
+
+class EquipmentStatsDelta:
+    """医療機関の集計値の増減分（機器分類ID → 列ごとの増減）"""
+
+    def __init__(self, medical_id: int):
+        self.medical_id = medical_id
+        self._deltas: Dict[int, List[int]] = defaultdict(lambda: [0] * len(STAT_COLUMNS))
+
+    def add(
+        self,
+        classification_id: Optional[int],
+        is_included: bool,
+        stock_quantity: int,
+        setting=None,
+        sign: int = 1
+    ) -> None:
+        """
+        1機器の集計値を加算する（sign=-1 で減算）
+
+        Args:
+            classification_id (Optional[int]): 台帳の機器分類ID
+            is_included (bool): 台帳の分析対象フラグ
+            stock_quantity (int): 台数
+            setting (optional): 分析設定（override_is_included / override_classification_id を持つオブジェクト）。無い場合はNone
+            sign (int): 1: 加算, -1: 減算
+        """
+        if setting is not None:
+            classification_id = setting.override_classification_id or classification_id
+            is_included = setting.override_is_included
+        included = 1 if is_included else 0
+        stock_quantity = stock_quantity or 0
+        delta = self._deltas[classification_id or UNCLASSIFIED_ID]
+        for index, value in enumerate((1, included, 1 if setting is not None else 0,
+                                       stock_quantity, stock_quantity * included)):
+            delta[index] += sign * value
+
+    def replace(self, ledger, before, after) -> None:
+        """分析設定の変更（before → after。どちらも無い場合はNone）による増減を記録する"""
+        self.add(ledger.classification_id, ledger.is_included, ledger.stock_quantity, before, sign=-1)
+        self.add(ledger.classification_id, ledger.is_included, ledger.stock_quantity, after)
+
+    def apply(self, db: Session, user_id: str) -> int:
+        """
+        増減分を集計値に加算する（コミットは呼び出し元で行う）
+
+        Args:
+            db (Session): データベースセッション
+            user_id (str): 更新ユーザーID
+
+        Returns:
+            int: 加算した機器分類の数
+        """
+        stat = MedicalEquipmentClassificationStat
+        now = datetime.now()
+        rows = [
+            {
+                "medical_id": self.medical_id,
+                "classification_id": classification_id,
+                **dict(zip(STAT_COLUMNS, delta)),
+                "reg_user_id": user_id,
+                "regdate": now,
+                "update_user_id": user_id,
+                "lastupdate": now,
+            }
+            for classification_id, delta in sorted(self._deltas.items())
+            if any(delta)
+        ]
+        for start in range(0, len(rows), BATCH_SIZE):
+            stmt = dialect_insert(db, stat).values(rows[start:start + BATCH_SIZE])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[stat.medical_id, stat.classification_id],
+                set_={
+                    **{column: getattr(stat, column) + stmt.excluded[column] for column in STAT_COLUMNS},
+                    "update_user_id": stmt.excluded.update_user_id,
+                    "lastupdate": stmt.excluded.lastupdate,
+                },
+            )
+            db.execute(stmt)
+
+        if rows:
+            db.execute(
+                delete(stat)
+                .where(stat.medical_id == self.medical_id, stat.ledger_count <= 0)
+                .execution_options(synchronize_session=False)
+            )
+        self._deltas.clear()
+        return len(rows)
+
+
+def rebuild_equipment_stats(medical_id: int, db: Session, user_id: str) -> int:
+    """
+    医療機関の集計値を機器台帳・分析設定から作り直す（コミットは呼び出し元で行う）
+
+    Args:
+        medical_id (int): 医療機関ID
+        db (Session): データベースセッション
+        user_id (str): 登録・更新ユーザーID
+
+    Returns:
+        int: 作成した機器分類の数
+    """
+    ledger = MedicalEquipmentLedger
+    setting = MedicalEquipmentAnalysisSetting
+    stat = MedicalEquipmentClassificationStat
+    now = datetime.now()
+
+    included = case(
+        (setting.ledger_id.is_not(None), case((setting.override_is_included, 1), else_=0)),
+        (ledger.is_included, 1),
+        else_=0
+    )
+    effective = (
+        select(
+            ledger.medical_id.label("medical_id"),
+            func.coalesce(setting.override_classification_id, ledger.classification_id, UNCLASSIFIED_ID)
+            .label("classification_id"),
+            included.label("included"),
+            case((setting.ledger_id.is_(None), 0), else_=1).label("has_override"),
+            ledger.stock_quantity.label("stock_quantity"),
+        )
+        .outerjoin(setting, setting.ledger_id == ledger.ledger_id)
+        .where(ledger.medical_id == medical_id)
+        .subquery()
+    )
+    aggregated = (
+        select(
+            effective.c.medical_id,
+            effective.c.classification_id,
+            func.count(),
+            func.sum(effective.c.included),
+            func.sum(effective.c.has_override),
+            func.sum(effective.c.stock_quantity),
+            func.sum(effective.c.included * effective.c.stock_quantity),
+            literal(user_id),
+            literal(now),
+            literal(user_id),
+            literal(now),
+        )
+        .group_by(effective.c.medical_id, effective.c.classification_id)
+    )
+
+    db.execute(
+        delete(stat).where(stat.medical_id == medical_id).execution_options(synchronize_session=False)
+    )
+    return db.execute(
+        insert(stat).from_select(
+            ["medical_id", "classification_id", *STAT_COLUMNS,
+             "reg_user_id", "regdate", "update_user_id", "lastupdate"],
+            aggregated
+        )
+    ).rowcount
@@ -0,0 +1,81 @@
+"""etag.py
+
+ETagによる条件付きGET（If-None-Match / 304 Not Modified）の共通処理
+
+Note:
+    - マスタ系の取得APIは、対象の行の件数と最終更新日時（max(lastupdate)）から build_etag でETagを作成します。
+      行の取得・シリアライズの前に集計のみを実行し、If-None-Match が一致する場合は 304 を返します。
+    - Cache-Control はルートごとに config.yaml の cache.http で設定します（get_cache_control）。
+
+ChangeLog:
+    v1.0.0 (2026-10-19)
+    - 新規作成
+    v1.1.0 (2026-10-19)
+    - build_etag・get_cache_control を追加し、Cache-Control をルートごとに指定可能に変更
+"""
+import hashlib
+from functools import lru_cache
+from typing import Any, Optional
+
+from fastapi import Response
+
+from .config_loader import load_config
+
+# ユーザーごとに応答内容が異なるため共有キャッシュには保存させず、ブラウザには毎回再検証させる
+CACHE_CONTROL = "private, no-cache"
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    If-None-Match ヘッダーが ETag と一致するかを判定する（弱いETag比較）
+
+    Args:
+        if_none_match (str): If-None-Match ヘッダーの値（カンマ区切りで複数可、"*" は常に一致）
+        etag (str): 現在のETag（ダブルクォートを含む）
+
+    Returns:
+        bool: 一致する場合True
+    """
+    if not if_none_match:
+        return False
+    target = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == target:
+            return True
+    return False
+
+
+@lru_cache(maxsize=None)
+def get_cache_control(route: str) -> str:
+    """config.yaml の cache.http.<route> を取得する（未設定の場合は CACHE_CONTROL）"""
+    try:
+        config = load_config().get("cache", {}).get("http", {}) or {}
+    except FileNotFoundError:
+        config = {}
+    return str(config.get(route) or CACHE_CONTROL)
+
+
+def build_etag(*parts: Any) -> str:
+    """
+    バージョンを表す値（件数・最終更新日時・ページの範囲など）からETagを作成する
+
+    Args:
+        *parts (Any): ETagに含める値（同じ値なら同じETagになる）
+
+    Returns:
+        str: ETag（ダブルクォートを含む）
+    """
+    digest = hashlib.sha1("\t".join(str(part) for part in parts).encode("utf-8"))
+    return f'"{digest.hexdigest()}"'
+
+
+def not_modified_response(etag: str, cache_control: str = CACHE_CONTROL) -> Response:
+    """304 Not Modified のレスポンスを返す"""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+def set_etag_headers(response: Response, etag: str, cache_control: str = CACHE_CONTROL) -> None:
+    """レスポンスにETagとCache-Controlを設定する"""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
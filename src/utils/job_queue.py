@@ -0,0 +1,424 @@
+"""job_queue.py
+
+DBのテーブル（job_queue）を使ったバックグラウンドジョブのキュー
+
+Note:
+    - APIはジョブを登録してジョブIDを返し、ワーカーが優先度順（priority の大きい順、同じ優先度は登録順）に実行します。
+    - ジョブの処理は job_handler デコレータでジョブ種別ごとに登録します。
+        - 処理は (引数のdict, データベースセッション) を受け取り、結果のdict（JSONに変換できる値）を返します
+        - 処理がコミットせずに返した変更は、完了の記録と同じトランザクションでコミットします。
+          実行期限を過ぎて他のワーカーに移っていた場合は破棄するため、再実行で重複して登録されません
+        - ワーカーは処理を登録済みのジョブ種別のみ取り出します
+        - 処理を登録するモジュールは JOB_HANDLER_MODULES に記載し、ワーカーの起動時に読み込みます
+    - 取り出しは1文のUPDATEで行い、複数のワーカー（スレッド・プロセス・サーバー）で同じジョブを重複して実行しません。
+        - PostgreSQL: FOR UPDATE SKIP LOCKED で他のワーカーが取り出し中の行を飛ばします
+        - SQLite: DBの書き込みロックで直列化されます
+    - 可視性タイムアウト: 取り出したジョブは locked_until まで他のワーカーから見えなくなります。
+      期限までに完了しない場合（ワーカーの停止など）は他のワーカーが再度取り出します。
+      期限後に元のワーカーが完了・失敗を報告しても反映しません。
+    - 再試行: 処理が例外で終了した場合、最大実行回数まで待ち時間を指数的に延ばして再実行します。
+      PermanentJobError の場合は再試行せずに失敗とします。
+    - ワーカーの起動方法
+        - APIサーバー内のスレッド: config.yaml の job_queue.embedded_workers（src/main.py で起動）
+        - 別プロセス: python -m src.cli.job_worker --workers 4
+        - テスト・バッチ: run_pending_jobs() で実行待ちのジョブを呼び出し元のプロセス内で実行
+
+ChangeLog:
+    v1.0.0 (2026-10-19)
+    - 新規作成
+    v1.1.0 (2026-10-19)
+    - 処理の未コミットの変更を完了の記録と同じトランザクションでコミットし、実行期限切れの場合は破棄するよう変更
+"""
+import importlib
+import json
+import logging
+import os
+import socket
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from ..models.pg_optigate.job_queue import JobQueue
+from ..schemas.job_queue import JobStatus
+from .config_loader import load_section_settings
+
+logger = logging.getLogger(__name__)
+
+# ジョブの状態
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# ジョブの処理を登録するモジュール（ワーカーの起動時に読み込む）
+JOB_HANDLER_MODULES = (
+    "src.routers.file_management",
+)
+
+JobHandler = Callable[[Dict[str, Any], Session], Optional[Dict[str, Any]]]
+
+_handlers: Dict[str, JobHandler] = {}
+
+
+class PermanentJobError(Exception):
+    """再試行しても成功しないエラー（入力ファイルの不備など）。再試行せずに失敗とする"""
+
+
+class JobQueueSettings(NamedTuple):
+    """ジョブキューの設定（config.yaml の job_queue）"""
+    embedded_workers: int = 1
+    poll_interval_seconds: float = 1.0
+    visibility_timeout_seconds: int = 600
+    max_attempts: int = 3
+    retry_delay_seconds: int = 30
+
+
+class ClaimedJob(NamedTuple):
+    """ワーカーが取り出したジョブ"""
+    job_id: int
+    job_type: str
+    payload: Dict[str, Any]
+    attempts: int
+    max_attempts: int
+    locked_by: str
+
+
+def get_job_queue_settings() -> JobQueueSettings:
+    """config.yaml の job_queue を取得する（未設定の項目は既定値）"""
+    return load_section_settings("job_queue", JobQueueSettings)
+
+
+def job_handler(job_type: str) -> Callable[[JobHandler], JobHandler]:
+    """ジョブ種別の処理を登録するデコレータ"""
+    def register(handler: JobHandler) -> JobHandler:
+        _handlers[job_type] = handler
+        return handler
+    return register
+
+
+def load_job_handlers() -> List[str]:
+    """JOB_HANDLER_MODULES を読み込み、処理が登録済みのジョブ種別を返す"""
+    for module in JOB_HANDLER_MODULES:
+        importlib.import_module(module)
+    return sorted(_handlers)
+
+
+def default_worker_id() -> str:
+    """ワーカーの識別子（ホスト名:プロセスID:スレッド名）"""
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+
+
+def enqueue_job(
+    db: Session,
+    job_type: str,
+    payload: Dict[str, Any],
+    user_id: str,
+    medical_id: Optional[int] = None,
+    priority: int = 0,
+    max_attempts: Optional[int] = None
+) -> JobQueue:
+    """
+    ジョブを登録する（コミットは呼び出し元で行う）
+
+    Args:
+        db (Session): データベースセッション
+        job_type (str): ジョブ種別
+        payload (Dict[str, Any]): ジョブの引数（JSONに変換できる値）
+        user_id (str): 登録ユーザーID
+        medical_id (int, optional): 対象の医療機関ID（状態取得APIのアクセス権限の判定に使用）
+        priority (int): 優先度（大きいほど先に実行）
+        max_attempts (int, optional): 最大実行回数。省略時は config.yaml の job_queue.max_attempts
+
+    Returns:
+        JobQueue: 登録したジョブ（job_id 採番済み）
+    """
+    now = datetime.now()
+    job = JobQueue(
+        job_type=job_type,
+        payload=json.dumps(payload, ensure_ascii=False),
+        medical_id=medical_id,
+        priority=priority,
+        status=QUEUED,
+        attempts=0,
+        max_attempts=max_attempts or get_job_queue_settings().max_attempts,
+        run_after=now,
+        reg_user_id=user_id,
+        regdate=now,
+        update_user_id=user_id,
+        lastupdate=now
+    )
+    db.add(job)
+    db.flush()
+    return job
+
+
+def fail_expired_jobs(db: Session, now: Optional[datetime] = None) -> int:
+    """実行期限を過ぎ、最大実行回数に達した実行中のジョブを失敗とする（コミットは呼び出し元で行う）"""
+    now = now or datetime.now()
+    return db.execute(
+        update(JobQueue)
+        .where(
+            JobQueue.status == RUNNING,
+            JobQueue.locked_until < now,
+            JobQueue.attempts >= JobQueue.max_attempts
+        )
+        .values(
+            status=FAILED,
+            last_error="実行期限までに完了しませんでした",
+            locked_by=None,
+            locked_until=None,
+            lastupdate=now
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def claim_job(
+    db: Session,
+    worker_id: str,
+    job_types: Iterable[str],
+    visibility_timeout: int,
+    now: Optional[datetime] = None
+) -> Optional[ClaimedJob]:
+    """
+    実行待ちのジョブを1件取り出す（コミットは呼び出し元で行う）
+
+    実行待ちで実行可能日時を過ぎたジョブと、実行期限を過ぎた実行中のジョブが対象です。
+
+    Args:
+        db (Session): データベースセッション
+        worker_id (str): ワーカーの識別子
+        job_types (Iterable[str]): 取り出すジョブ種別（処理を登録済みのもの）
+        visibility_timeout (int): 可視性タイムアウト（秒）
+        now (datetime, optional): 現在日時
+
+    Returns:
+        Optional[ClaimedJob]: 取り出したジョブ。対象が無い場合はNone
+    """
+    job_types = list(job_types)
+    if not job_types:
+        return None
+    now = now or datetime.now()
+
+    candidate = (
+        select(JobQueue.job_id)
+        .where(
+            JobQueue.job_type.in_(job_types),
+            or_(
+                and_(JobQueue.status == QUEUED, JobQueue.run_after <= now),
+                and_(JobQueue.status == RUNNING, JobQueue.locked_until < now),
+            ),
+            JobQueue.attempts < JobQueue.max_attempts
+        )
+        .order_by(JobQueue.priority.desc(), JobQueue.job_id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    row = db.execute(
+        update(JobQueue)
+        .where(JobQueue.job_id == candidate)
+        .values(
+            status=RUNNING,
+            attempts=JobQueue.attempts + 1,
+            locked_by=worker_id,
+            locked_until=now + timedelta(seconds=visibility_timeout),
+            lastupdate=now
+        )
+        .returning(JobQueue.job_id, JobQueue.job_type, JobQueue.payload, JobQueue.attempts, JobQueue.max_attempts)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if row is None:
+        return None
+    return ClaimedJob(row.job_id, row.job_type, json.loads(row.payload), row.attempts, row.max_attempts, worker_id)
+
+
+def _update_claimed_job(db: Session, job: ClaimedJob, **values) -> bool:
+    """取り出したワーカー・実行回数が一致する実行中のジョブのみ更新する（期限切れ後の報告は反映しない）"""
+    return db.execute(
+        update(JobQueue)
+        .where(
+            JobQueue.job_id == job.job_id,
+            JobQueue.status == RUNNING,
+            JobQueue.locked_by == job.locked_by,
+            JobQueue.attempts == job.attempts
+        )
+        .values(locked_by=None, locked_until=None, lastupdate=datetime.now(), **values)
+        .execution_options(synchronize_session=False)
+    ).rowcount == 1
+
+
+def complete_job(db: Session, job: ClaimedJob, result: Optional[Dict[str, Any]]) -> bool:
+    """ジョブを完了とする（コミットは呼び出し元で行う）。実行期限切れで他のワーカーに移っていた場合はFalse"""
+    return _update_claimed_job(
+        db, job,
+        status=SUCCEEDED,
+        result=json.dumps(result, ensure_ascii=False, default=str) if result is not None else None
+    )
+
+
+def fail_job(
+    db: Session,
+    job: ClaimedJob,
+    error: str,
+    retry_delay: int,
+    retry: bool = True
+) -> bool:
+    """
+    ジョブの失敗を記録する（コミットは呼び出し元で行う）
+
+    最大実行回数に達していない場合は、retry_delay × 2^(実行回数-1) 秒後に再実行します。
+
+    Returns:
+        bool: 更新した場合True。実行期限切れで他のワーカーに移っていた場合はFalse
+    """
+    if retry and job.attempts < job.max_attempts:
+        return _update_claimed_job(
+            db, job,
+            status=QUEUED,
+            last_error=error,
+            run_after=datetime.now() + timedelta(seconds=retry_delay * 2 ** (job.attempts - 1))
+        )
+    return _update_claimed_job(db, job, status=FAILED, last_error=error)
+
+
+def run_next_job(
+    worker_id: str,
+    session_factory: Callable[[], Session] = SessionLocal,
+    settings: Optional[JobQueueSettings] = None
+) -> Optional[ClaimedJob]:
+    """
+    実行待ちのジョブを1件取り出して実行する
+
+    Returns:
+        Optional[ClaimedJob]: 実行したジョブ。実行待ちのジョブが無い場合はNone
+    """
+    settings = settings or get_job_queue_settings()
+
+    db = session_factory()
+    try:
+        fail_expired_jobs(db)
+        job = claim_job(db, worker_id, list(_handlers), settings.visibility_timeout_seconds)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    if job is None:
+        return None
+
+    logger.info(f"ジョブ実行開始: job_id={job.job_id}, 種別={job.job_type}, 実行回数={job.attempts}")
+    db = session_factory()
+    try:
+        try:
+            result = _handlers[job.job_type](job.payload, db)
+        except Exception as e:
+            db.rollback()
+            retry = not isinstance(e, PermanentJobError)
+            logger.error(f"ジョブ実行エラー: job_id={job.job_id}, 種別={job.job_type}, 実行回数={job.attempts}, {str(e)}")
+            updated = fail_job(db, job, str(e), settings.retry_delay_seconds, retry=retry)
+        else:
+            # 処理の未コミットの変更は完了の記録と同じトランザクションでコミットする
+            updated = complete_job(db, job, result)
+            if updated:
+                logger.info(f"ジョブ実行完了: job_id={job.job_id}, 種別={job.job_type}")
+            else:
+                # 他のワーカーが再実行するため、処理の変更も反映しない
+                db.rollback()
+        db.commit()
+        if not updated:
+            logger.warning(f"実行期限切れのため結果を反映しませんでした: job_id={job.job_id}, ワーカー={worker_id}")
+    finally:
+        db.close()
+    return job
+
+
+def run_pending_jobs(
+    worker_id: Optional[str] = None,
+    session_factory: Callable[[], Session] = SessionLocal,
+    settings: Optional[JobQueueSettings] = None,
+    max_jobs: Optional[int] = None
+) -> List[ClaimedJob]:
+    """
+    実行待ちのジョブが無くなるまで、呼び出し元のプロセス内で実行する（テスト・バッチ用）
+
+    再試行待ちのジョブは実行可能日時を過ぎたものだけが対象です（retry_delay_seconds=0 の設定を渡すと即時に再実行）。
+
+    Args:
+        worker_id (str, optional): ワーカーの識別子
+        session_factory (Callable[[], Session]): データベースセッションの生成関数
+        settings (JobQueueSettings, optional): ジョブキューの設定。省略時は config.yaml
+        max_jobs (int, optional): 実行するジョブ数の上限
+
+    Returns:
+        List[ClaimedJob]: 実行したジョブ（実行順）
+    """
+    worker_id = worker_id or default_worker_id()
+    settings = settings or get_job_queue_settings()
+    executed: List[ClaimedJob] = []
+    while max_jobs is None or len(executed) < max_jobs:
+        job = run_next_job(worker_id, session_factory, settings)
+        if job is None:
+            break
+        executed.append(job)
+    return executed
+
+
+class JobWorker(threading.Thread):
+    """実行待ちのジョブを一定間隔で取り出して実行するワーカースレッド"""
+
+    def __init__(self, name: str, settings: Optional[JobQueueSettings] = None):
+        super().__init__(name=name, daemon=True)
+        self.settings = settings or get_job_queue_settings()
+        self.stop_event = threading.Event()
+
+    def run(self):
+        worker_id = default_worker_id()
+        logger.info(f"ジョブワーカー起動: {worker_id}, ジョブ種別={sorted(_handlers)}")
+        while not self.stop_event.is_set():
+            try:
+                job = run_next_job(worker_id, settings=self.settings)
+            except Exception as e:
+                # DBのロック待ちのタイムアウトなど。次の周期で再度取り出す
+                logger.error(f"ジョブの取り出しエラー: {worker_id}, {str(e)}")
+                job = None
+            if job is None:
+                self.stop_event.wait(self.settings.poll_interval_seconds)
+        logger.info(f"ジョブワーカー停止: {worker_id}")
+
+    def stop(self, timeout: Optional[float] = None):
+        """実行中のジョブの完了を待ってから停止する"""
+        self.stop_event.set()
+        self.join(timeout)
+
+
+def start_job_workers(count: int, settings: Optional[JobQueueSettings] = None) -> List[JobWorker]:
+    """ジョブの処理を読み込み、ワーカースレッドを起動する"""
+    load_job_handlers()
+    workers = [JobWorker(f"job-worker-{index}", settings) for index in range(1, count + 1)]
+    for worker in workers:
+        worker.start()
+    return workers
+
+
+def to_job_status(job: JobQueue) -> JobStatus:
+    """ジョブの状態をレスポンスの形式に変換する"""
+    return JobStatus(
+        job_id=job.job_id,
+        job_type=job.job_type,
+        status=job.status,
+        medical_id=job.medical_id,
+        priority=job.priority,
+        attempts=job.attempts,
+        max_attempts=job.max_attempts,
+        run_after=job.run_after,
+        result=json.loads(job.result) if job.result is not None else None,
+        last_error=job.last_error,
+        regdate=job.regdate,
+        lastupdate=job.lastupdate
+    )
@@ -0,0 +1,50 @@
+"""json_response.py
+
+高速なJSONレスポンス（orjson によるシリアライズ）
+
+Note:
+    - FastJSONResponse は APIのデフォルトのレスポンスクラスです（src/main.py の default_response_class）。
+      orjson がインストールされている場合は orjson で、無い場合は標準の json モジュールでシリアライズします。
+      どちらの場合も出力は Starlette の JSONResponse と同じ形式（区切りの空白無し・非ASCII文字はそのまま）です。
+    - response_model を指定したエンドポイントでは、従来どおり Pydantic で検証・変換した値をシリアライズします。
+      件数の多い一覧のエンドポイントは、行のタプルから辞書を組み立てて FastJSONResponse を直接返すことで、
+      項目ごとのモデルの生成・検証を省略します（response_model は OpenAPI の定義にのみ使用されます）。
+      その場合、日時は isoformat() の文字列にしてから渡してください（標準の json モジュールでもシリアライズできるように）。
+
+ChangeLog:
+    v1.0.0 (2026-10-19)
+    - 新規作成
+"""
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+# orjsonの有無を確認（無い場合は標準の json モジュールを使用）
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def dumps_json(content: Any) -> bytes:
+    """
+    JSONにシリアライズする（Starlette の JSONResponse と同じ形式）
+
+    Args:
+        content (Any): シリアライズする値（辞書のキーは文字列以外も可）
+
+    Returns:
+        bytes: UTF-8のJSON
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """orjson でシリアライズする JSONResponse"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
@@ -0,0 +1,381 @@
+"""ledger_ingestion.py
+
+アップロードされた医療機器台帳CSV（equipment.csv）の medical_equipment_ledger への取込
+
+Note:
+    - ファイルアップロード（POST /files/upload-files/{medical_id}）の後にバックグラウンドで実行します。
+    - CSVは1行ずつ読み込みます。文字コードは先頭部分から chardet で判定します（Shift_JISはcp932として扱う）。
+    - 列名は英語名・日本語名に対応します。
+        - model_number / modelnumber / 型番 / メーカー型番: 型番（必須。空欄・"不明"の行は対象外）
+        - product_name / productname / 製品名 / 機器製品名 / 機器名: 製品名
+        - maker_name / makername / メーカー名: メーカー名
+        - classification_name / bunrui / 分類 / 分類名 / 機器分類名: 機器分類名
+        - stock_quantity / quantity / 台数 / 保有台数: 台数（列が無い場合は1行を1台として数える）
+    - 台帳は（医療機関ID, 型番）単位に集約します（製品名・メーカー名・分類名は最大値、台数は合計）。
+    - 機器分類名は医療機関の機器分類キャッシュから作成した 分類名→機器分類ID のマップで変換します
+      （同名の分類がある場合は小分類 > 中分類 > 大分類の順に優先）。
+    - 分析対象フラグ（is_included）は、貸出履歴・故障履歴CSVに型番の列がある場合、
+      いずれかに記録がある型番をTrueとします。型番の列が無い場合、既存の行は変更せず、新規の行はTrueとします。
+    - 既存の台帳と型番で照合し、登録・更新・削除のみを一括で行います。
+      コミット・ロールバックは呼び出し元で行います（ジョブではジョブの完了と同じトランザクションでコミット）。
+      削除した台帳の分析設定（medical_equipment_analysis_setting）も合わせて削除します。
+    - 機器分類ごとの集計値（medical_equipment_classification_stat）に、登録・更新・削除した機器の増減分を
+      同じトランザクションで加算します（equipment_stats.EquipmentStatsDelta）。
+    - 型番の列が無いファイルや有効な行が無いファイルは取込を中止します（既存の台帳は変更しません）。
+
+ChangeLog:
+    v1.0.0 (2026-10-19)
+    - 新規作成（tests/initial/create_medical_equipment_ledger.py の1行ずつの処理を置き換え）
+    - 文字コードの判定で、UTF-8として読めるファイルを先に判定し、短いcp932のファイルの誤判定を防止
+    - 機器分類ごとの集計値（medical_equipment_classification_stat）の増減を追加
+    - chardet のインポートを文字コードの判定時に変更（APIサーバーの起動時に読み込まない）
+    - 取込処理内のコミットを削除し、呼び出し元（ジョブの実行・再取込API）でコミットするよう変更
+"""
+import csv
+import io
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, IO, Iterable, Iterator, List, Optional, Set
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from ..models.pg_optigate.medical_equipment_analysis_setting import MedicalEquipmentAnalysisSetting
+from ..models.pg_optigate.medical_equipment_ledger import MedicalEquipmentLedger
+from ..schemas.file_management import LedgerIngestionResult
+from .classification_cache import load_classification_tree
+from .equipment_stats import EquipmentStatsDelta
+
+# 列名の別名（日本語の列名にも対応）
+COLUMN_ALIASES = {
+    "model_number": ("model_number", "modelnumber", "型番", "メーカー型番"),
+    "product_name": ("product_name", "productname", "製品名", "機器製品名", "機器名"),
+    "maker_name": ("maker_name", "makername", "メーカー名"),
+    "classification_name": ("classification_name", "bunrui", "bunrui_name", "分類", "分類名", "機器分類名"),
+    "stock_quantity": ("stock_quantity", "quantity", "台数", "保有台数"),
+}
+
+# 型番が不明な行（台帳の対象外）
+UNKNOWN_MODEL_NUMBERS = {"", "不明"}
+
+# 文字コード判定に使用する先頭のバイト数
+DETECT_BYTES = 64 * 1024
+# chardet の判定結果をそのまま使う文字コード（Shift_JIS は拡張文字を含む cp932 として読む）
+JAPANESE_ENCODINGS = ("euc-jp", "iso-2022-jp", "utf-16", "utf-32")
+# 登録・更新・削除の1回あたりの件数
+BATCH_SIZE = 1000
+
+
+class LedgerIngestionFormatError(ValueError):
+    """ファイル形式・列構成が不正"""
+
+
+def detect_encoding(stream: IO[bytes]) -> str:
+    """
+    ストリームの先頭部分から文字コードを判定する（読み込み位置は先頭に戻す）
+
+    先頭部分がUTF-8として読める場合はUTF-8とし、それ以外は chardet で判定します。
+    chardet の判定結果が日本語の文字コード以外の場合（数行の短いファイルで誤判定しやすい）は cp932 とします。
+
+    Args:
+        stream (IO[bytes]): バイナリストリーム
+
+    Returns:
+        str: Pythonのコーデック名（判定できない場合は cp932）
+    """
+    sample = stream.read(DETECT_BYTES)
+    stream.seek(0)
+    try:
+        sample.decode("utf-8")
+        return "utf-8-sig"
+    except UnicodeDecodeError as e:
+        # 先頭部分の末尾で文字が途切れた場合
+        if len(sample) == DETECT_BYTES and e.start >= len(sample) - 3 and e.reason == "unexpected end of data":
+            return "utf-8-sig"
+
+    from chardet.universaldetector import UniversalDetector
+
+    detector = UniversalDetector()
+    detector.feed(sample)
+    detector.close()
+    encoding = (detector.result.get("encoding") or "").lower()
+    if encoding in JAPANESE_ENCODINGS:
+        return encoding
+    # 日本語のWindows環境で作成されたCSVを想定（Shift_JISの拡張文字を含むcp932）
+    return "cp932"
+
+
+def _iter_csv(path: Path, encoding: Optional[str] = None) -> Iterator[List[str]]:
+    """CSVファイルを1行ずつ読み込む（文字コードの指定が無い場合は判定する）"""
+    with open(path, "rb") as stream:
+        text = io.TextIOWrapper(stream, encoding=encoding or detect_encoding(stream), newline="")
+        yield from csv.reader(text)
+
+
+def _resolve_columns(header: List[str]) -> Dict[str, int]:
+    """ヘッダー行から列位置を求める"""
+    normalized = [h.strip().lstrip("\ufeff") for h in header]
+    columns = {}
+    for key, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in normalized:
+                columns[key] = normalized.index(alias)
+                break
+    return columns
+
+
+def _cell(row: List[str], index: Optional[int]) -> Optional[str]:
+    if index is None or index >= len(row):
+        return None
+    value = row[index].strip()
+    return value or None
+
+
+def _max(current: Optional[str], value: Optional[str]) -> Optional[str]:
+    if value is None:
+        return current
+    return value if current is None or value > current else current
+
+
+class _LedgerRow:
+    """型番単位に集約した台帳の行"""
+    __slots__ = ("product_name", "maker_name", "classification_name", "stock_quantity")
+
+    def __init__(self):
+        self.product_name: Optional[str] = None
+        self.maker_name: Optional[str] = None
+        self.classification_name: Optional[str] = None
+        self.stock_quantity = 0
+
+
+def read_history_model_numbers(paths: Iterable[Path]) -> Optional[Set[str]]:
+    """
+    貸出履歴・故障履歴CSVに記録のある型番を取得する
+
+    Args:
+        paths (Iterable[Path]): 貸出履歴・故障履歴のファイルパス
+
+    Returns:
+        Optional[Set[str]]: 型番の集合。型番の列があるファイルが1つも無い場合はNone
+    """
+    model_numbers: Optional[Set[str]] = None
+    for path in paths:
+        if not path.exists():
+            continue
+        rows = _iter_csv(path)
+        header = next(rows, None)
+        index = _resolve_columns(header or []).get("model_number")
+        if index is None:
+            continue
+        if model_numbers is None:
+            model_numbers = set()
+        for row in rows:
+            model_number = _cell(row, index)
+            if model_number not in UNKNOWN_MODEL_NUMBERS and model_number is not None:
+                model_numbers.add(model_number)
+    return model_numbers
+
+
+def build_classification_map(medical_id: int, db: Session) -> Dict[str, int]:
+    """
+    医療機関の 機器分類名→機器分類ID のマップを作成する（小分類 > 中分類 > 大分類の順に優先）
+
+    Args:
+        medical_id (int): 医療機関ID
+        db (Session): データベースセッション
+
+    Returns:
+        Dict[str, int]: 機器分類名と機器分類IDのマップ
+    """
+    classification_map: Dict[str, int] = {}
+    levels: Dict[str, int] = {}
+    for item in load_classification_tree(medical_id, db).items:
+        if item.classification_level > levels.get(item.classification_name, 0):
+            classification_map[item.classification_name] = item.classification_id
+            levels[item.classification_name] = item.classification_level
+    return classification_map
+
+
+def _batches(items: List, size: int = BATCH_SIZE) -> Iterator[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def ingest_equipment_ledger(
+    medical_id: int,
+    equipment_path: Path,
+    db: Session,
+    user_id: str,
+    history_paths: Iterable[Path] = ()
+) -> LedgerIngestionResult:
+    """
+    医療機器台帳CSVを medical_equipment_ledger に取り込む
+
+    Args:
+        medical_id (int): 医療機関ID
+        equipment_path (Path): 医療機器台帳CSVのパス
+        db (Session): データベースセッション
+        user_id (str): 登録・更新ユーザーID
+        history_paths (Iterable[Path], optional): 貸出履歴・故障履歴CSVのパス（分析対象フラグの判定に使用）
+
+    Returns:
+        LedgerIngestionResult: 取込結果
+
+    Raises:
+        LedgerIngestionFormatError: 型番の列が無い、または有効な行が無い場合
+    """
+    with open(equipment_path, "rb") as stream:
+        encoding = detect_encoding(stream)
+
+    # 1. CSVを1行ずつ読み込み、型番単位に集約
+    rows = _iter_csv(equipment_path, encoding)
+    header = next(rows, None)
+    if header is None:
+        raise LedgerIngestionFormatError("ファイルが空です")
+    columns = _resolve_columns(header)
+    if "model_number" not in columns:
+        raise LedgerIngestionFormatError("型番（model_number）の列がありません")
+
+    model_index = columns["model_number"]
+    product_index = columns.get("product_name")
+    maker_index = columns.get("maker_name")
+    classification_index = columns.get("classification_name")
+    quantity_index = columns.get("stock_quantity")
+
+    ledger: Dict[str, _LedgerRow] = {}
+    total_rows = 0
+    skipped_rows = 0
+    for row in rows:
+        if not any(row):
+            continue
+        total_rows += 1
+        model_number = _cell(row, model_index)
+        if model_number is None or model_number in UNKNOWN_MODEL_NUMBERS:
+            skipped_rows += 1
+            continue
+        quantity = 1
+        if quantity_index is not None:
+            try:
+                quantity = int(_cell(row, quantity_index) or 0)
+            except ValueError:
+                skipped_rows += 1
+                continue
+        item = ledger.get(model_number)
+        if item is None:
+            item = ledger[model_number] = _LedgerRow()
+        item.product_name = _max(item.product_name, _cell(row, product_index))
+        item.maker_name = _max(item.maker_name, _cell(row, maker_index))
+        item.classification_name = _max(item.classification_name, _cell(row, classification_index))
+        item.stock_quantity += quantity
+
+    if not ledger:
+        raise LedgerIngestionFormatError("取込対象の行がありません")
+
+    # 2. 機器分類・分析対象フラグの判定に使うデータをまとめて用意
+    classification_map = build_classification_map(medical_id, db)
+    history_model_numbers = read_history_model_numbers(history_paths)
+
+    existing = {
+        row.model_number: row
+        for row in db.execute(
+            select(
+                MedicalEquipmentLedger.ledger_id,
+                MedicalEquipmentLedger.model_number,
+                MedicalEquipmentLedger.product_name,
+                MedicalEquipmentLedger.maker_name,
+                MedicalEquipmentLedger.classification_id,
+                MedicalEquipmentLedger.stock_quantity,
+                MedicalEquipmentLedger.is_included,
+                MedicalEquipmentAnalysisSetting.ledger_id.label("setting_ledger_id"),
+                MedicalEquipmentAnalysisSetting.override_is_included,
+                MedicalEquipmentAnalysisSetting.override_classification_id,
+            )
+            .outerjoin(
+                MedicalEquipmentAnalysisSetting,
+                MedicalEquipmentAnalysisSetting.ledger_id == MedicalEquipmentLedger.ledger_id
+            )
+            .where(MedicalEquipmentLedger.medical_id == medical_id)
+        )
+    }
+
+    # 3. 既存の台帳との差分（機器分類ごとの集計値の増減も記録）
+    now = datetime.now()
+    stats = EquipmentStatsDelta(medical_id)
+    inserts = []
+    updates = []
+    unchanged_count = 0
+    unmatched_classification_count = 0
+    for model_number, item in ledger.items():
+        classification_id = classification_map.get(item.classification_name) if item.classification_name else None
+        if item.classification_name and classification_id is None:
+            unmatched_classification_count += 1
+
+        current = existing.get(model_number)
+        if history_model_numbers is not None:
+            is_included = model_number in history_model_numbers
+        else:
+            is_included = current.is_included if current is not None else True
+
+        values = {
+            "product_name": item.product_name,
+            "maker_name": item.maker_name,
+            "classification_id": classification_id,
+            "stock_quantity": item.stock_quantity,
+            "is_included": is_included,
+        }
+        if current is None:
+            stats.add(classification_id, is_included, item.stock_quantity)
+            inserts.append({
+                "medical_id": medical_id,
+                "model_number": model_number,
+                **values,
+                "reg_user_id": user_id,
+                "regdate": now,
+                "update_user_id": user_id,
+                "lastupdate": now,
+            })
+        elif any(getattr(current, key) != value for key, value in values.items()):
+            setting = current if current.setting_ledger_id is not None else None
+            stats.add(current.classification_id, current.is_included, current.stock_quantity, setting, sign=-1)
+            stats.add(classification_id, is_included, item.stock_quantity, setting)
+            updates.append({"ledger_id": current.ledger_id, **values, "update_user_id": user_id, "lastupdate": now})
+        else:
+            unchanged_count += 1
+
+    deleted_ids = []
+    for model_number, row in existing.items():
+        if model_number not in ledger:
+            deleted_ids.append(row.ledger_id)
+            setting = row if row.setting_ledger_id is not None else None
+            stats.add(row.classification_id, row.is_included, row.stock_quantity, setting, sign=-1)
+
+    # 4. 登録・更新・削除を一括で適用（コミットは呼び出し元で行う）
+    for batch in _batches(inserts):
+        db.execute(insert(MedicalEquipmentLedger), batch)
+    for batch in _batches(updates):
+        db.execute(update(MedicalEquipmentLedger), batch)
+    for batch in _batches(deleted_ids):
+        db.execute(
+            delete(MedicalEquipmentAnalysisSetting)
+            .where(MedicalEquipmentAnalysisSetting.ledger_id.in_(batch))
+            .execution_options(synchronize_session=False)
+        )
+        db.execute(
+            delete(MedicalEquipmentLedger)
+            .where(MedicalEquipmentLedger.ledger_id.in_(batch))
+            .execution_options(synchronize_session=False)
+        )
+    stats.apply(db, user_id)
+
+    return LedgerIngestionResult(
+        medical_id=medical_id,
+        encoding=encoding,
+        total_rows=total_rows,
+        skipped_rows=skipped_rows,
+        model_count=len(ledger),
+        inserted_count=len(inserts),
+        updated_count=len(updates),
+        deleted_count=len(deleted_ids),
+        unchanged_count=unchanged_count,
+        unmatched_classification_count=unmatched_classification_count,
+    )
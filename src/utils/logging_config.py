@@ -0,0 +1,247 @@
+"""logging_config.py
+
+APIサーバーのログ設定（キューを介した非同期出力・JSON形式・ローテーション）
+
+Note:
+    - リクエストの処理中のログは QueueHandler でキューに追加するのみとし、ファイル・コンソールへの出力は
+      QueueListener の専用スレッドで行います（ログのI/Oでリクエストの処理を待たせない）。
+        - キューが上限（queue_size）に達した場合、ログを破棄して件数を数えます（dropped_count）
+        - 例外の情報はキューに追加する時点で文字列にします（出力スレッドで例外オブジェクトを参照しない）
+    - 出力形式は JSON（1行1レコード）または従来のテキスト形式です。
+      JSON には logger.info(..., extra={"medical_id": 5}) で指定した項目も含めます。
+    - ファイルは日付ごと（<file_prefix>_YYYYMMDD.log）に作成し、max_bytes を超えた場合は .1, .2 ... に退避します。
+      retention_days より古い日付のファイルは日付が変わった時点で削除します。
+    - ロガーごとのレベル（loggers）を設定できます。uvicorn のログも同じキューを経由して出力します（capture_uvicorn）。
+    - 設定は config.yaml の logging を使用します。
+
+ChangeLog:
+    v1.0.0 (2026-10-19)
+    - 新規作成（src/main.py の FileHandler / StreamHandler による同期出力を置き換え）
+    - fork したプロセスで出力スレッドを作り直すための discard_logging_after_fork を追加（src/cli/serve.py）
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import traceback
+from datetime import date, datetime, timedelta
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from .config_loader import load_section_settings
+
+TEXT_FORMAT = '[%(asctime)s][%(levelname)s] %(message)s'
+UVICORN_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+
+# LogRecord の標準の属性（これ以外の属性は extra で指定された項目としてJSONに含める。
+# color_message は uvicorn がコンソール用に追加する色付きのメッセージ）
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message", "asctime", "taskName", "color_message"
+}
+
+
+class LoggingSettings(NamedTuple):
+    """config.yaml の logging"""
+    level: str = "INFO"
+    format: str = "json"  # json / text
+    log_dir: str = "./log"
+    file_prefix: str = "OptiServe"
+    max_bytes: int = 10 * 1024 * 1024  # 0 の場合はサイズによる退避を行わない
+    backup_count: int = 5  # 1日あたりの退避ファイル数
+    retention_days: int = 30  # 0 の場合は古いファイルを削除しない
+    console: bool = True
+    queue_size: int = 10000
+    capture_uvicorn: bool = True
+    loggers: Dict[str, str] = {}
+
+
+def get_logging_settings() -> LoggingSettings:
+    """config.yaml の logging を取得する（未設定の項目は既定値）"""
+    return load_section_settings("logging", LoggingSettings)
+
+
+class JsonFormatter(logging.Formatter):
+    """1行1レコードのJSON形式"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created).astimezone().isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno,
+            "process": record.process,
+            "thread": record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """キューが上限に達した場合は待たずにログを破棄する QueueHandler"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped_count = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 出力形式は出力スレッドのフォーマッターで決めるため、メッセージの展開と例外の文字列化のみ行う
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = "".join(traceback.format_exception(*record.exc_info)).rstrip()
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped_count += 1
+
+
+class DailyRotatingFileHandler(RotatingFileHandler):
+    """日付ごとのファイル（<prefix>_YYYYMMDD.log）に出力し、サイズの上限を超えた場合は .1, .2 ... に退避する"""
+
+    def __init__(self, log_dir: Path, prefix: str, max_bytes: int, backup_count: int, retention_days: int):
+        self.log_dir = Path(log_dir)
+        self.prefix = prefix
+        self.retention_days = retention_days
+        self.current_date = date.today()
+        super().__init__(self.path_for(self.current_date), maxBytes=max_bytes, backupCount=backup_count,
+                         encoding="utf-8", delay=True)
+
+    def _open(self):
+        # ディレクトリは最初の出力時に作成する（ログ設定の時点ではファイルを作成しない）
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
+    def path_for(self, day: date) -> str:
+        return str(self.log_dir / f"{self.prefix}_{day:%Y%m%d}.log")
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if date.today() != self.current_date:
+            return True
+        return self.maxBytes > 0 and bool(super().shouldRollover(record))
+
+    def doRollover(self) -> None:
+        today = date.today()
+        if today == self.current_date:
+            super().doRollover()
+            return
+        # 日付が変わった場合は新しい日付のファイルに切り替え、保存期間を過ぎたファイルを削除
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        self.current_date = today
+        self.baseFilename = os.path.abspath(self.path_for(today))
+        self.delete_expired_files()
+
+    def delete_expired_files(self) -> None:
+        if self.retention_days <= 0:
+            return
+        oldest = f"{self.prefix}_{self.current_date - timedelta(days=self.retention_days):%Y%m%d}"
+        for path in self.log_dir.glob(f"{self.prefix}_*.log*"):
+            if path.name[:len(oldest)] < oldest:
+                path.unlink(missing_ok=True)
+
+
+def build_log_pipeline(settings: LoggingSettings) -> Tuple[DroppingQueueHandler, QueueListener]:
+    """
+    キューに追加するハンドラーと、キューからファイル・コンソールへ出力するリスナーを作成する（リスナーは未開始）
+
+    Args:
+        settings (LoggingSettings): ログ設定
+
+    Returns:
+        Tuple[DroppingQueueHandler, QueueListener]: ロガーに追加するハンドラーと出力スレッドのリスナー
+    """
+    formatter = JsonFormatter() if settings.format == "json" else logging.Formatter(TEXT_FORMAT)
+    handlers = []
+    if settings.log_dir:
+        file_handler = DailyRotatingFileHandler(
+            Path(settings.log_dir), settings.file_prefix, settings.max_bytes,
+            settings.backup_count, settings.retention_days
+        )
+        handlers.append(file_handler)
+    if settings.console:
+        handlers.append(logging.StreamHandler(sys.stderr))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(maxsize=settings.queue_size)
+    return DroppingQueueHandler(log_queue), QueueListener(log_queue, *handlers, respect_handler_level=True)
+
+
+_listener: Optional[QueueListener] = None
+
+
+def setup_logging(settings: Optional[LoggingSettings] = None) -> QueueListener:
+    """
+    ルートロガーをキュー経由の出力に設定し、出力スレッドを開始する（2回目以降は何もしない）
+
+    Args:
+        settings (LoggingSettings, optional): ログ設定（省略時は config.yaml の logging）
+
+    Returns:
+        QueueListener: 出力スレッドのリスナー（プロセス終了時に stop_logging で停止）
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+    settings = settings or get_logging_settings()
+    queue_handler, listener = build_log_pipeline(settings)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(settings.level.upper())
+
+    if settings.capture_uvicorn:
+        # uvicorn は起動時に標準エラー出力へのハンドラーを設定するため、ルートロガー（キュー）に送る
+        for name in UVICORN_LOGGERS:
+            logger = logging.getLogger(name)
+            logger.handlers.clear()
+            logger.propagate = True
+    for name, level in settings.loggers.items():
+        logging.getLogger(name).setLevel(str(level).upper())
+
+    listener.start()
+    _listener = listener
+    # プロセス終了時にキューに残ったログを出力する（logging.shutdown より先に実行される）
+    atexit.register(stop_logging)
+    return listener
+
+
+def stop_logging() -> None:
+    """出力スレッドを停止する（キューに残ったログを出力してから停止）"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def discard_logging_after_fork() -> None:
+    """
+    fork で引き継いだ出力スレッドのリスナーを破棄する（停止はしない。次の setup_logging で作り直す）
+
+    Note:
+        出力スレッドは fork で引き継がれないため、引き継いだキューに残ったログは子プロセスでは出力しません。
+    """
+    global _listener
+    _listener = None
@@ -0,0 +1,266 @@
+"""metrics.py
+
+リクエストの処理時間・DBクエリ数などの計測と、Prometheus形式（text exposition format 0.0.4）での出力
+
+Note:
+    - MetricsMiddleware がリクエストごとに以下を計測します（ラベルの route はパスのテンプレート。例: /api/v1/jobs/{job_id}）。
+        - optiserve_http_requests_total: リクエスト数（method, route, status）
+        - optiserve_http_request_duration_seconds: 処理時間のヒストグラム（method, route）
+        - optiserve_http_response_size_bytes: レスポンスボディのサイズのヒストグラム（method, route）
+        - optiserve_http_request_db_queries: 1リクエストのDBクエリ数のヒストグラム（method, route）
+        - optiserve_http_request_db_seconds: 1リクエストのDBクエリ時間の合計のヒストグラム（method, route）
+        - optiserve_http_requests_in_progress: 処理中のリクエスト数
+    - DBクエリは instrument_engine で SQLAlchemy の before/after_cursor_execute イベントから計測します。
+        - リクエスト内のクエリはコンテキスト変数でリクエストに紐付けます（スレッドプールで実行する依存関数・
+          エンドポイントもコンテキストが引き継がれるため、AuthManager の問い合わせも含めて計測されます）
+        - リクエスト外（ジョブのワーカーなど）を含む全クエリは optiserve_db_queries_total / optiserve_db_query_seconds_total
+    - 処理時間からDBクエリ時間を引いた値が、ハンドラー（Python）の処理時間の目安になります。
+    - ルートに一致しないリクエスト（404）は route="unmatched" に集約します（ラベルの種類を増やさないため）。
+    - 計測値はプロセス内で保持します。複数ワーカープロセスで起動した場合は、プロセスごとの値になります。
+    - 設定は config.yaml の metrics（enabled, allow_remote）を使用します。
+
+ChangeLog:
+    v1.0.0 (2026-10-19)
+    - 新規作成
+"""
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config_loader import load_section_settings
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+UNMATCHED_ROUTE = "unmatched"
+
+# ヒストグラムのバケット（上限値）
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class MetricsSettings(NamedTuple):
+    """config.yaml の metrics"""
+    enabled: bool = True
+    allow_remote: bool = False  # False の場合、/metrics はローカル（ループバック）またはシステム認証キーのみ
+
+
+@lru_cache(maxsize=1)
+def get_metrics_settings() -> MetricsSettings:
+    """config.yaml の metrics を取得する（未設定の項目は既定値）"""
+    return load_section_settings("metrics", MetricsSettings)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    """メトリクスの共通部分（ラベルの値の組み合わせごとに値を保持）"""
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """加算のみのカウンター"""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+            for labels, value in values
+        ]
+
+
+class Gauge(Counter):
+    """増減する値"""
+    kind = "gauge"
+
+    def dec(self, labels: Tuple[str, ...] = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+
+class Histogram(_Metric):
+    """バケットごとの件数・合計・件数を保持するヒストグラム"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str], buckets: Sequence[float]):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(buckets)
+        # ラベルの値 → [バケットごとの件数（累積前）..., +Infの件数, 合計]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(labels)
+            if counts is None:
+                counts = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted((labels, list(counts)) for labels, counts in self._values.items())
+        lines = self.header()
+        for labels, counts in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _format_value(float(bound)) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {_format_value(counts[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+REQUESTS = Counter("optiserve_http_requests_total", "Total HTTP requests.", ("method", "route", "status"))
+REQUEST_DURATION = Histogram("optiserve_http_request_duration_seconds", "HTTP request latency in seconds.",
+                             ("method", "route"), DURATION_BUCKETS)
+RESPONSE_SIZE = Histogram("optiserve_http_response_size_bytes", "HTTP response body size in bytes.",
+                          ("method", "route"), SIZE_BUCKETS)
+REQUEST_DB_QUERIES = Histogram("optiserve_http_request_db_queries", "Database queries executed per HTTP request.",
+                               ("method", "route"), QUERY_COUNT_BUCKETS)
+REQUEST_DB_SECONDS = Histogram("optiserve_http_request_db_seconds",
+                               "Time spent in database queries per HTTP request in seconds.",
+                               ("method", "route"), DURATION_BUCKETS)
+REQUESTS_IN_PROGRESS = Gauge("optiserve_http_requests_in_progress", "HTTP requests currently being processed.")
+DB_QUERIES = Counter("optiserve_db_queries_total", "Total database queries (including background workers).")
+DB_QUERY_SECONDS = Counter("optiserve_db_query_seconds_total",
+                           "Total time spent in database queries in seconds (including background workers).")
+
+METRICS = (REQUESTS, REQUEST_DURATION, RESPONSE_SIZE, REQUEST_DB_QUERIES, REQUEST_DB_SECONDS,
+           REQUESTS_IN_PROGRESS, DB_QUERIES, DB_QUERY_SECONDS)
+
+
+def render_metrics() -> str:
+    """全メトリクスをPrometheus形式で出力する"""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class RequestStats:
+    """1リクエストのDBクエリの計測値（スレッドプールで実行される処理からも加算する）"""
+    __slots__ = ("query_count", "query_seconds")
+
+    def __init__(self):
+        self.query_count = 0
+        self.query_seconds = 0.0
+
+
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_start_time"].pop()
+    elapsed = time.perf_counter() - started
+    DB_QUERIES.inc()
+    DB_QUERY_SECONDS.inc(amount=elapsed)
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.query_count += 1
+        stats.query_seconds += elapsed
+
+
+def _handle_error(exception_context):
+    # 失敗したクエリは after_cursor_execute が呼ばれないため、開始時刻を破棄する
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_start_time"):
+        connection.info["query_start_time"].pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """エンジンのDBクエリの計測を開始する（複数回呼び出しても1回のみ登録）"""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class MetricsMiddleware:
+    """
+    リクエストの処理時間・レスポンスサイズ・DBクエリ数を計測するASGIミドルウェア
+
+    ルーティング後にscopeに設定されるルートからパスのテンプレートを取得するため、最も内側（最初に add_middleware）に追加します。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        stats = RequestStats()
+        context_token = current_request_stats.set(stats)
+        REQUESTS_IN_PROGRESS.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            REQUESTS_IN_PROGRESS.dec()
+            current_request_stats.reset(context_token)
+
+            route = scope.get("route")
+            labels = (scope["method"], getattr(route, "path", None) or UNMATCHED_ROUTE)
+            REQUESTS.inc(labels + (str(status),))
+            REQUEST_DURATION.observe(labels, elapsed)
+            RESPONSE_SIZE.observe(labels, size)
+            REQUEST_DB_QUERIES.observe(labels, stats.query_count)
+            REQUEST_DB_SECONDS.observe(labels, stats.query_seconds)
@@ -5,14 +5,83 @@
 Note:
     - 本モジュールは、パスワードの生成やバリデーションを行うためのユーティリティ関数を定義しています。
     - パスワードのセキュリティ要件に基づいて、強力なパスワードを生成する機能を提供します。
+    - パスワードは scrypt（hashlib標準）でハッシュ化して保存します。
+        - 保存形式: scrypt$<n>$<r>$<p>$<salt(base64)>$<hash(base64)>
+        - コストは config.yaml の security.password_hash で設定します。
+        - ハッシュ化前の平文で保存された既存データ（レガシー）も照合でき、ログイン成功時に再ハッシュします。
+    - ハッシュ計算はCPU負荷が高いため、CPU数を上限とした専用スレッドプールで実行します（*_in_pool）。
+      リクエスト処理スレッドはプールの結果を待つだけなので、同時ログインが集中してもKDFの並列数はCPU数に制限されます。
 
 ChangeLog:
     v1.0.0 (2025-07-15)
     - 初版作成
+    v1.1.0 (2026-10-19)
+    - 仮パスワード生成をrandomからsecretsに変更
+    - scryptによるパスワードのハッシュ化・照合・再ハッシュ判定を追加
 """
-import random
-import string
+import base64
+import hashlib
+import hmac
+import os
 import re
+import secrets
+import string
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, NamedTuple, Optional
+
+from .config_loader import load_config
+
+HASH_PREFIX = "scrypt"
+SALT_BYTES = 16
+HASH_BYTES = 32
+
+
+class PasswordHashSettings(NamedTuple):
+    """scryptのコスト設定"""
+    scrypt_n: int
+    scrypt_r: int
+    scrypt_p: int
+    temp_scrypt_n: int
+    max_workers: int
+
+
+@lru_cache(maxsize=1)
+def get_password_hash_settings() -> PasswordHashSettings:
+    """
+    config.yaml の security.password_hash からコスト設定を取得する
+
+    設定ファイルや項目が無い場合は既定値を使用します。
+    """
+    try:
+        config = load_config().get("security", {}).get("password_hash", {}) or {}
+    except FileNotFoundError:
+        config = {}
+    return PasswordHashSettings(
+        scrypt_n=int(config.get("scrypt_n", 16384)),
+        scrypt_r=int(config.get("scrypt_r", 8)),
+        scrypt_p=int(config.get("scrypt_p", 1)),
+        temp_scrypt_n=int(config.get("temp_scrypt_n", 1024)),
+        max_workers=int(config.get("max_workers", 0)) or (os.cpu_count() or 1),
+    )
+
+
+@lru_cache(maxsize=1)
+def _get_kdf_executor() -> ThreadPoolExecutor:
+    """ハッシュ計算用のスレッドプール（CPU数を上限とする）"""
+    return ThreadPoolExecutor(
+        max_workers=get_password_hash_settings().max_workers,
+        thread_name_prefix="password-kdf"
+    )
+
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    """scryptでハッシュ値を計算する（hashlib.scryptは計算中にGILを解放する）"""
+    return hashlib.scrypt(
+        password.encode("utf-8"), salt=salt, n=n, r=r, p=p,
+        maxmem=256 * r * (n + p + 2), dklen=HASH_BYTES
+    )
+
 
 def generate_temp_password(length: int = 12) -> str:
     """
@@ -25,7 +94,90 @@ def generate_temp_password(length: int = 12) -> str:
         str: 生成された一時パスワード
     """
     characters = string.ascii_letters + string.digits + "!@#$%^&*"
-    return ''.join(random.choice(characters) for _ in range(length))
+    return ''.join(secrets.choice(characters) for _ in range(length))
+
+
+def hash_password(password: str, temporary: bool = False) -> str:
+    """
+    パスワードをscryptでハッシュ化する
+
+    Args:
+        password (str): 平文のパスワード
+        temporary (bool, optional): 仮パスワードの場合True（temp_scrypt_nの低コストでハッシュ化）
+
+    Returns:
+        str: 保存形式のハッシュ文字列
+    """
+    settings = get_password_hash_settings()
+    n = settings.temp_scrypt_n if temporary else settings.scrypt_n
+    salt = secrets.token_bytes(SALT_BYTES)
+    digest = _scrypt(password, salt, n, settings.scrypt_r, settings.scrypt_p)
+    return "$".join([
+        HASH_PREFIX, str(n), str(settings.scrypt_r), str(settings.scrypt_p),
+        base64.b64encode(salt).decode("ascii"), base64.b64encode(digest).decode("ascii")
+    ])
+
+
+def is_password_hashed(stored_password: Optional[str]) -> bool:
+    """保存済みパスワードがハッシュ形式かどうかを判定する"""
+    return bool(stored_password) and stored_password.startswith(HASH_PREFIX + "$")
+
+
+def verify_password(password: str, stored_password: Optional[str]) -> bool:
+    """
+    パスワードを照合する
+
+    Args:
+        password (str): 入力された平文のパスワード
+        stored_password (str): DBに保存されたパスワード（ハッシュ形式、またはレガシーの平文）
+
+    Returns:
+        bool: 一致する場合True
+    """
+    if not stored_password:
+        return False
+    if not is_password_hashed(stored_password):
+        # レガシー（平文）データ: 定数時間で比較
+        return hmac.compare_digest(password.encode("utf-8"), stored_password.encode("utf-8"))
+    try:
+        _, n, r, p, salt, digest = stored_password.split("$")
+        expected = base64.b64decode(digest)
+        actual = _scrypt(password, base64.b64decode(salt), int(n), int(r), int(p))
+    except (ValueError, TypeError):
+        return False
+    return hmac.compare_digest(actual, expected)
+
+
+def needs_rehash(stored_password: Optional[str]) -> bool:
+    """
+    再ハッシュが必要かどうかを判定する
+
+    レガシーの平文データ、仮パスワード用の低コスト、または現在の設定と異なるコストの場合にTrueを返します。
+    """
+    if not is_password_hashed(stored_password):
+        return True
+    settings = get_password_hash_settings()
+    try:
+        _, n, r, p, _, _ = stored_password.split("$")
+        return (int(n), int(r), int(p)) != (settings.scrypt_n, settings.scrypt_r, settings.scrypt_p)
+    except ValueError:
+        return True
+
+
+def hash_password_in_pool(password: str, temporary: bool = False) -> str:
+    """hash_password をハッシュ計算用スレッドプールで実行する"""
+    return _get_kdf_executor().submit(hash_password, password, temporary).result()
+
+
+def hash_passwords_in_pool(passwords: List[str], temporary: bool = False) -> List[str]:
+    """複数のパスワードをハッシュ計算用スレッドプールで並列にハッシュ化する（一括登録用）"""
+    return list(_get_kdf_executor().map(lambda password: hash_password(password, temporary), passwords))
+
+
+def verify_password_in_pool(password: str, stored_password: Optional[str]) -> bool:
+    """verify_password をハッシュ計算用スレッドプールで実行する"""
+    return _get_kdf_executor().submit(verify_password, password, stored_password).result()
+
 
 def validate_password(password: str) -> str:
     """
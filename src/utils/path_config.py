@@ -10,19 +10,27 @@ ChangeLog:
         - 新規作成
         - OS判定による動的パス切り替え機能実装
         - データベース、ファイル管理、オンプレレポートのパス管理
+    v1.1.0 (2026-10-19)
+        - パスの判定（OS判定・/proc/version の読み込み）をインスタンス生成時から初回参照時に変更
 """
 import os
 import platform
+from functools import cached_property
 from pathlib import Path
 from typing import Dict, Any
 
 class PathConfig:
     """OS環境に応じたパス設定管理クラス"""
     
-    def __init__(self):
-        self._system = platform.system().lower()
-        self._base_paths = self._get_base_paths()
-        
+    # パスは初回参照時に判定する（モジュールのインポート時にファイルを読まないため）
+    @cached_property
+    def _system(self) -> str:
+        return platform.system().lower()
+
+    @cached_property
+    def _base_paths(self) -> Dict[str, Path]:
+        return self._get_base_paths()
+
     def _get_base_paths(self) -> Dict[str, Path]:
         """OS環境に応じたベースパスを取得"""
         
@@ -0,0 +1,261 @@
+"""report_selection.py
+
+レポート出力用機器分類選択情報の差分更新とバージョン管理
+
+Note:
+    - 選択情報の保存は全件削除→再登録ではなく、変更のあった表示順序（rank）のみを更新します。
+        - INSERT ... ON CONFLICT (medical_id, rank) DO UPDATE の1文で登録・更新し、
+          機器分類IDが変わらないrankは WHERE 句で更新対象から除外します
+        - 新しい選択数を超えるrankのみを削除します
+    - 医療機関ごとのバージョン番号（equipment_classification_report_selection_version）で楽観的排他制御を行います。
+        - 保存・削除のたびにバージョンを加算します（行が無い医療機関はバージョン0）
+        - 取得時のバージョンを指定した場合、他のユーザーが先に更新していれば409を返します
+        - バージョンの加算を最初に行うため、PostgreSQLでは同一医療機関の保存が行ロックで直列化されます
+          （SQLiteはDBの書き込みロックで直列化されます）
+    - オンプレミスの分析処理向けに、全医療機関の選択情報と最大選択数を1クエリで取得します。
+
+ChangeLog:
+    v1.0.0 (2026-10-19)
+    - 新規作成（全件削除→再登録による保存を置き換え）
+    - 全医療機関の選択情報の一括取得（iter_report_selection_summaries）を追加
+    - 方言ごとのINSERT文の作成（_dialect_insert）を utils/upsert.py の dialect_insert に移動
+"""
+from datetime import datetime
+from itertools import groupby
+from typing import Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.orm import Session
+
+from ..models.pg_optigate.equipment_classification_report_selection import EquipmentClassificationReportSelection
+from ..models.pg_optigate.equipment_classification_report_selection_version import (
+    EquipmentClassificationReportSelectionVersion,
+)
+from ..models.pg_optigate.mst_equipment_classification import MstEquipmentClassification
+from ..models.pg_optigate.user_entity_link import UserEntityLink
+from ..schemas.equipment_classification import ReportSelectionItem, ReportSelectionSummaryItem
+from .upsert import dialect_insert
+
+
+def get_report_selection_version(medical_id: int, db: Session) -> int:
+    """
+    選択情報の現在のバージョンを取得する（未登録の場合は0）
+
+    Args:
+        medical_id (int): 医療機関ID
+        db (Session): データベースセッション
+
+    Returns:
+        int: バージョン番号
+    """
+    version = db.execute(
+        select(EquipmentClassificationReportSelectionVersion.version).where(
+            EquipmentClassificationReportSelectionVersion.medical_id == medical_id
+        )
+    ).scalar()
+    return version or 0
+
+
+def increment_report_selection_version(
+    medical_id: int,
+    expected_version: Optional[int],
+    user_id: str,
+    db: Session
+) -> int:
+    """
+    選択情報のバージョンを加算する
+
+    Args:
+        medical_id (int): 医療機関ID
+        expected_version (int, optional): 取得時のバージョン。Noneの場合は確認せずに加算
+        user_id (str): 更新ユーザーID
+        db (Session): データベースセッション
+
+    Returns:
+        int: 加算後のバージョン番号
+
+    Raises:
+        HTTPException: 取得時のバージョンと現在のバージョンが異なる場合（409）
+    """
+    version_table = EquipmentClassificationReportSelectionVersion
+    now = datetime.now()
+
+    if expected_version:
+        stmt = (
+            update(version_table)
+            .where(
+                version_table.medical_id == medical_id,
+                version_table.version == expected_version
+            )
+            .values(version=version_table.version + 1, update_user_id=user_id, lastupdate=now)
+            .returning(version_table.version)
+            .execution_options(synchronize_session=False)
+        )
+    else:
+        # 未登録（バージョン0）の場合は登録、登録済みの場合は加算
+        stmt = dialect_insert(db, version_table).values(
+            medical_id=medical_id,
+            version=1,
+            reg_user_id=user_id,
+            regdate=now,
+            update_user_id=user_id,
+            lastupdate=now
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[version_table.medical_id],
+            set_={
+                "version": version_table.version + 1,
+                "update_user_id": stmt.excluded.update_user_id,
+                "lastupdate": stmt.excluded.lastupdate,
+            },
+            # バージョン0を指定した場合は、未登録のときのみ成功とする
+            where=None if expected_version is None else version_table.version == 0
+        ).returning(version_table.version)
+
+    version = db.execute(stmt).scalar()
+    if version is None:
+        raise HTTPException(
+            status_code=409,
+            detail=(
+                f"レポート選択情報は他のユーザーにより更新されています "
+                f"(指定バージョン: {expected_version}, 現在のバージョン: {get_report_selection_version(medical_id, db)})"
+            )
+        )
+    return version
+
+
+def upsert_report_selection(
+    medical_id: int,
+    classification_ids: List[int],
+    user_id: str,
+    db: Session
+) -> Tuple[int, int]:
+    """
+    選択情報を差分更新する（コミットは呼び出し元で行う）
+
+    Args:
+        medical_id (int): 医療機関ID
+        classification_ids (List[int]): 機器分類ID一覧（rank順）
+        user_id (str): 登録・更新ユーザーID
+        db (Session): データベースセッション
+
+    Returns:
+        Tuple[int, int]: 登録・更新したrankの件数と削除したrankの件数
+    """
+    selection = EquipmentClassificationReportSelection
+    now = datetime.now()
+
+    changed_count = 0
+    if classification_ids:
+        stmt = dialect_insert(db, selection).values([
+            {
+                "medical_id": medical_id,
+                "rank": rank,
+                "classification_id": classification_id,
+                "reg_user_id": user_id,
+                "regdate": now,
+                "update_user_id": user_id,
+                "lastupdate": now,
+            }
+            for rank, classification_id in enumerate(classification_ids, 1)
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[selection.medical_id, selection.rank],
+            set_={
+                "classification_id": stmt.excluded.classification_id,
+                "update_user_id": stmt.excluded.update_user_id,
+                "lastupdate": stmt.excluded.lastupdate,
+            },
+            # 機器分類IDが変わらないrankは更新しない
+            where=selection.classification_id.is_distinct_from(stmt.excluded.classification_id)
+        ).returning(selection.rank)
+        changed_count = len(db.execute(stmt).all())
+
+    deleted_count = db.execute(
+        delete(selection)
+        .where(
+            selection.medical_id == medical_id,
+            selection.rank > len(classification_ids)
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    return changed_count, deleted_count
+
+
+def iter_report_selection_summaries(
+    db: Session,
+    updated_since: Optional[datetime] = None
+) -> Iterator[ReportSelectionSummaryItem]:
+    """
+    全医療機関の選択情報を医療機関ID順に1件ずつ返す
+
+    組織情報（user_entity_link）、バージョン、選択情報、機器分類名を結合した1クエリを
+    医療機関ID・rank順に読み進めるため、医療機関数によらずメモリ使用量は一定です。
+
+    Args:
+        db (Session): データベースセッション
+        updated_since (datetime, optional): 指定日時以降に組織情報・選択情報が更新された医療機関のみ返す
+
+    Returns:
+        Iterator[ReportSelectionSummaryItem]: 医療機関ごとの選択情報
+    """
+    link = UserEntityLink
+    version_table = EquipmentClassificationReportSelectionVersion
+    selection = EquipmentClassificationReportSelection
+
+    stmt = (
+        select(
+            link.entity_relation_id,
+            link.entity_name,
+            link.count_reportout_classification,
+            link.lastupdate,
+            version_table.version,
+            version_table.lastupdate,
+            selection.rank,
+            selection.classification_id,
+            MstEquipmentClassification.classification_name,
+            selection.lastupdate,
+        )
+        .select_from(link)
+        .outerjoin(version_table, version_table.medical_id == link.entity_relation_id)
+        .outerjoin(selection, selection.medical_id == link.entity_relation_id)
+        .outerjoin(
+            MstEquipmentClassification,
+            MstEquipmentClassification.classification_id == selection.classification_id
+        )
+        .where(link.entity_type == 1)
+        .order_by(link.entity_relation_id, selection.rank)
+    )
+    if updated_since is not None:
+        # 選択情報の削除はバージョンの更新日時で検出する
+        stmt = stmt.where(or_(
+            link.lastupdate >= updated_since,
+            version_table.lastupdate >= updated_since,
+            link.entity_relation_id.in_(
+                select(selection.medical_id).where(selection.lastupdate >= updated_since)
+            ),
+        ))
+
+    rows = db.execute(stmt.execution_options(yield_per=1000))
+    for medical_id, facility_rows in groupby(rows, key=lambda row: row[0]):
+        facility_rows = list(facility_rows)
+        _, medical_name, max_count, link_lastupdate, version, version_lastupdate = facility_rows[0][:6]
+        selections = [
+            ReportSelectionItem(rank=rank, classification_id=classification_id, classification_name=name)
+            for *_, rank, classification_id, name, _ in facility_rows
+            if rank is not None and name is not None
+        ][:max_count]
+        lastupdate = max(
+            value for value in (link_lastupdate, version_lastupdate, *(row[9] for row in facility_rows))
+            if value is not None
+        )
+        yield ReportSelectionSummaryItem(
+            medical_id=medical_id,
+            medical_name=medical_name,
+            max_count=max_count,
+            version=version or 0,
+            lastupdate=lastupdate,
+            selections=selections
+        )
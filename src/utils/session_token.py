@@ -0,0 +1,336 @@
+"""session_token.py
+
+署名付きセッショントークン（HS256形式のJWT）の発行・検証
+
+Note:
+    - ログイン成功時にuser_id、組織種別、組織ID、管理者フラグを含むトークンを発行します。
+    - トークンはHMAC-SHA256で署名されているため、検証にDBへの問い合わせは不要です。
+    - SessionTokenMiddleware が Authorization: Bearer <token> を検証し、検証済みのクレームをコンテキスト変数
+      （current_session_claims）に設定します。
+      各エンドポイントは Depends(get_current_user_id)（src/utils/auth.py）でトークンを必須としてログインユーザーを取得し、
+      AuthManager.get_user_info はクレームからDBを参照せずにユーザー情報を返します。
+    - 無効化（退会）したユーザーのトークンは失効記録（session_revocation テーブル）に登録し、発行済みのトークンを拒否します。
+      各プロセスは有効期間内の失効記録を専用スレッド（start_revocation_refresher。src/main.py の lifespan で起動）で
+      revocation_refresh_seconds ごとにDBから読み込んでキャッシュするため、検証（イベントループ上のミドルウェア）では
+      辞書を参照するだけでDBへ問い合わせることはありません。
+      複数ワーカー・複数サーバー構成でも、他プロセスでの失効は revocation_refresh_seconds 以内に反映されます（失効させたプロセスでは即時）。
+    - 署名鍵は環境変数 OPTISERVE_SESSION_SECRET、config.yaml の security.session_token.secret の順に参照し、
+      どちらも無い場合は起動ごとにランダムな鍵を生成します（再起動で発行済みトークンは無効になります）。
+
+ChangeLog:
+    v1.0.0 (2026-10-19)
+    - 新規作成
+    v1.1.0 (2026-10-19)
+    - 失効リストをプロセス内の辞書から session_revocation テーブル（プロセスごとに短時間キャッシュ）に変更
+    - 失効記録の読み込みを検証時（イベントループ上）から専用スレッドに変更
+    - X-User-Id ヘッダーの上書きを廃止（エンドポイントはトークンのクレームからログインユーザーを取得する）
+"""
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from ..models.pg_optigate.session_revocation import SessionRevocation
+from .config_loader import load_config
+
+logger = logging.getLogger(__name__)
+
+TOKEN_TYPE = "Bearer"
+_TOKEN_HEADER = {"alg": "HS256", "typ": "JWT"}
+
+
+class SessionTokenError(ValueError):
+    """トークンの形式不正・署名不一致・有効期限切れ・失効"""
+
+
+class SessionTokenSettings(NamedTuple):
+    """セッショントークンの設定"""
+    secret: bytes
+    ttl_seconds: int
+    revocation_refresh_seconds: int
+
+
+class SessionClaims(NamedTuple):
+    """検証済みトークンのクレーム"""
+    user_id: str
+    user_name: str
+    entity_type: int
+    entity_relation_id: int
+    is_admin: bool
+    issued_at: int
+    expires_at: int
+
+
+# 検証済みのクレーム（SessionTokenMiddleware がリクエストごとに設定）
+current_session_claims: ContextVar[Optional[SessionClaims]] = ContextVar("current_session_claims", default=None)
+
+# 失効記録のキャッシュ（user_id -> 失効日時）。失効日時以前に発行されたトークンを拒否する
+# 読み込みのたびに辞書ごと置き換えるため、検証時はロックを取らずに参照する
+_revoked_users: Dict[str, int] = {}
+_revoked_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def get_session_token_settings() -> SessionTokenSettings:
+    """
+    環境変数と config.yaml の security.session_token から設定を取得する
+    """
+    try:
+        config = load_config().get("security", {}).get("session_token", {}) or {}
+    except FileNotFoundError:
+        config = {}
+    secret = os.environ.get("OPTISERVE_SESSION_SECRET") or config.get("secret")
+    if not secret:
+        logger.warning("セッショントークンの署名鍵が未設定のため、起動ごとにランダムな鍵を使用します")
+        secret = secrets.token_hex(32)
+    return SessionTokenSettings(
+        secret=str(secret).encode("utf-8"),
+        ttl_seconds=int(config.get("ttl_seconds", 900)),
+        revocation_refresh_seconds=int(config.get("revocation_refresh_seconds", 5)),
+    )
+
+
+def _b64url_encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64url_decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(signing_input: str, secret: bytes) -> str:
+    return _b64url_encode(hmac.new(secret, signing_input.encode("ascii"), hashlib.sha256).digest())
+
+
+def issue_session_token(
+    user_id: str,
+    user_name: str,
+    entity_type: int,
+    entity_relation_id: int,
+    is_admin: bool
+) -> Tuple[str, int]:
+    """
+    セッショントークンを発行する
+
+    Args:
+        user_id (str): ユーザーID
+        user_name (str): ユーザー名
+        entity_type (int): 組織種別
+        entity_relation_id (int): 組織ID
+        is_admin (bool): システム管理者の場合True
+
+    Returns:
+        Tuple[str, int]: トークン文字列と有効期間（秒）
+    """
+    settings = get_session_token_settings()
+    now = int(time.time())
+    payload = {
+        "sub": str(user_id),
+        "name": user_name,
+        "ety": int(entity_type),
+        "erid": int(entity_relation_id),
+        "adm": bool(is_admin),
+        "iat": now,
+        "exp": now + settings.ttl_seconds,
+    }
+    signing_input = ".".join([
+        _b64url_encode(json.dumps(_TOKEN_HEADER, separators=(",", ":")).encode("utf-8")),
+        _b64url_encode(json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")),
+    ])
+    return f"{signing_input}.{_sign(signing_input, settings.secret)}", settings.ttl_seconds
+
+
+def verify_session_token(token: str) -> SessionClaims:
+    """
+    セッショントークンを検証してクレームを返す
+
+    Args:
+        token (str): トークン文字列
+
+    Returns:
+        SessionClaims: 検証済みのクレーム
+
+    Raises:
+        SessionTokenError: 形式不正、署名不一致、有効期限切れ、または失効済みの場合
+    """
+    try:
+        header_b64, payload_b64, signature = token.split(".")
+    except (ValueError, AttributeError):
+        raise SessionTokenError("トークンの形式が不正です")
+
+    settings = get_session_token_settings()
+    if not hmac.compare_digest(signature, _sign(f"{header_b64}.{payload_b64}", settings.secret)):
+        raise SessionTokenError("トークンの署名が不正です")
+
+    try:
+        header = json.loads(_b64url_decode(header_b64))
+        payload = json.loads(_b64url_decode(payload_b64))
+        claims = SessionClaims(
+            user_id=str(payload["sub"]),
+            user_name=payload.get("name") or "",
+            entity_type=int(payload["ety"]),
+            entity_relation_id=int(payload["erid"]),
+            is_admin=bool(payload["adm"]),
+            issued_at=int(payload["iat"]),
+            expires_at=int(payload["exp"]),
+        )
+    except (ValueError, KeyError, TypeError):
+        raise SessionTokenError("トークンの形式が不正です")
+    if header.get("alg") != _TOKEN_HEADER["alg"]:
+        raise SessionTokenError("トークンの形式が不正です")
+
+    if claims.expires_at <= int(time.time()):
+        raise SessionTokenError("トークンの有効期限が切れています")
+
+    revoked_at = _revoked_users.get(claims.user_id)
+    if revoked_at is not None and claims.issued_at <= revoked_at:
+        raise SessionTokenError("トークンは失効しています")
+
+    return claims
+
+
+def refresh_revoked_users() -> None:
+    """
+    有効期間内の失効記録をDBから読み込み、キャッシュを置き換える（DBへ問い合わせるためイベントループ上では呼ばない）
+
+    読み込みに失敗した場合は前回の内容を使用します。
+    """
+    global _revoked_users
+    # 有効期限を過ぎたトークンは失効記録によらず拒否されるため、有効期間内の失効記録のみ読み込む
+    expired_before = int(time.time()) - get_session_token_settings().ttl_seconds
+    db = SessionLocal()
+    try:
+        rows = db.query(SessionRevocation.user_id, SessionRevocation.revoked_at).filter(
+            SessionRevocation.revoked_at >= expired_before
+        ).all()
+    except Exception as e:
+        logger.warning(f"セッショントークンの失効記録の読み込みに失敗しました（前回の内容を使用）: {e}")
+        return
+    finally:
+        db.close()
+    with _revoked_lock:
+        _revoked_users = {user_id: revoked_at for user_id, revoked_at in rows}
+
+
+class RevocationRefresher(threading.Thread):
+    """失効記録を revocation_refresh_seconds ごとにDBから読み込むスレッド"""
+
+    def __init__(self, interval_seconds: Optional[float] = None):
+        super().__init__(name="session-revocation-refresher", daemon=True)
+        self.interval_seconds = interval_seconds or get_session_token_settings().revocation_refresh_seconds
+        self.stop_event = threading.Event()
+
+    def run(self):
+        while not self.stop_event.wait(self.interval_seconds):
+            refresh_revoked_users()
+
+    def stop(self, timeout: Optional[float] = None):
+        self.stop_event.set()
+        self.join(timeout)
+
+
+def start_revocation_refresher() -> RevocationRefresher:
+    """失効記録を読み込み、以降は一定間隔で読み込み直すスレッドを起動する"""
+    refresh_revoked_users()
+    refresher = RevocationRefresher()
+    refresher.start()
+    return refresher
+
+
+def revoke_user_tokens(user_id: str, db: Session, update_user_id: str) -> None:
+    """
+    指定ユーザーの発行済みトークンを失効させる
+
+    失効記録を呼び出し元のセッションに追加します（コミットは呼び出し元で行うため、
+    ユーザーの無効化と同じトランザクションで登録されます）。
+    有効期限を過ぎた失効記録は、ここで合わせて削除します。
+
+    Args:
+        user_id (str): 失効させるユーザーID
+        db (Session): データベースセッション
+        update_user_id (str): 失効させたユーザーのID
+    """
+    now = int(time.time())
+    expired_before = now - get_session_token_settings().ttl_seconds
+    db.query(SessionRevocation).filter(SessionRevocation.revoked_at < expired_before).delete(synchronize_session=False)
+    db.merge(SessionRevocation(
+        user_id=str(user_id),
+        revoked_at=now,
+        update_user_id=update_user_id,
+        lastupdate=datetime.now(),
+    ))
+    # 失効させたプロセスでは次の読み込みを待たずに拒否する
+    with _revoked_lock:
+        _revoked_users[str(user_id)] = now
+
+
+def get_bearer_token(authorization: Optional[str]) -> Optional[str]:
+    """Authorizationヘッダーの値からBearerトークンを取り出す（Bearer以外はNone）"""
+    if not authorization:
+        return None
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != TOKEN_TYPE.lower() or not token.strip():
+        return None
+    return token.strip()
+
+
+class SessionTokenMiddleware:
+    """
+    Authorization: Bearer <token> を検証するASGIミドルウェア
+
+    - トークンが無いリクエストはそのまま通します（ログイン・システム認証キーのAPI。ログインが必要なAPIは依存関数で401を返す）
+    - トークンが不正な場合は401を返します
+    - トークンが正しい場合はクレームをコンテキスト変数に設定します
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        authorization = None
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                authorization = value.decode("latin-1")
+                break
+        token = get_bearer_token(authorization)
+        if token is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            claims = verify_session_token(token)
+        except SessionTokenError as e:
+            body = json.dumps({"detail": str(e)}, ensure_ascii=False).encode("utf-8")
+            await send({
+                "type": "http.response.start",
+                "status": 401,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("ascii")),
+                    (b"www-authenticate", TOKEN_TYPE.encode("ascii")),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        context_token = current_session_claims.set(claims)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_session_claims.reset(context_token)
@@ -0,0 +1,286 @@
+"""upload_validation.py
+
+アップロードされたCSV（医療機器台帳・貸出履歴・故障履歴）の内容の検証
+
+Note:
+    - ファイルアップロード（POST /files/upload-files/{medical_id}）で、ファイルを保存する前に検証します。
+      1ファイルでも誤りがある場合はアップロードを受け付けません（前回のファイルは上書きしません）。
+    - 検証内容
+        - ヘッダー行: 必須の列があること（列名は英語名・日本語名に対応）
+        - 列数: 各行の列数がヘッダー行と同じであること
+        - 必須項目: 値が空欄でないこと
+        - 型: 整数の列は0以上の整数、日付の列は YYYY-MM-DD / YYYY/MM/DD / YYYYMMDD（時刻付きも可）
+        - 文字コード: 判定した文字コードで読み込めること（判定は ledger_ingestion.detect_encoding と同じ）
+    - ファイルは一定サイズ（CHUNK_BYTES）ずつ行単位で読み込むため、メモリ使用量はファイルサイズによらず一定です。
+    - 高速化のため、チャンクごとに bytes のメソッドで全行をまとめて照合します（バイト列のまま照合。1行ずつの処理は行わない）。
+        - 列数は行ごとのカンマの数、値は列ごとに重複を除いた値を正規表現で検証します
+        - 照合できなかったチャンク、ダブルクォートを含むチャンクのみ csv モジュールで1行ずつ検証し、行番号付きのエラーを作成します
+        - UTF-8 / cp932 はカンマ・改行・ダブルクォートのバイトが文字の途中に現れないため、バイト列のまま照合できます
+    - エラーは先頭から max_errors 件まで返します（以降の検証は行いません）。
+
+ChangeLog:
+    v1.0.0 (2026-10-19)
+    - 新規作成
+    v1.1.0 (2026-10-19)
+    - チャンクの照合を1つの正規表現から bytes のメソッド（行の分割・カンマの数・列ごとの重複を除いた値の検証）に変更
+"""
+import csv
+import io
+import re
+from itertools import repeat
+from pathlib import Path
+from typing import Dict, IO, List, NamedTuple, Optional, Tuple
+
+from ..schemas.file_management import UploadValidationError, UploadValidationResult
+from .ledger_ingestion import COLUMN_ALIASES, detect_encoding
+
+# 1回に読み込むバイト数（行の途中で区切らないよう、続きの1行を加えて読み込む）
+CHUNK_BYTES = 4 * 1024 * 1024
+# 返すエラーの既定の上限
+MAX_ERRORS = 100
+# エラーに含める値の最大文字数
+MAX_VALUE_LENGTH = 50
+
+# 列の型
+TEXT = "text"
+INTEGER = "integer"
+DATE = "date"
+
+# 日付（年月日の範囲のみ検証。時刻は任意）
+_DATE_PATTERN = (
+    r"[0-9]{4}(?:[-/](?:0[1-9]|1[0-2]|[1-9])[-/](?:0[1-9]|[12][0-9]|3[01]|[1-9])|(?:0[1-9]|1[0-2])(?:0[1-9]|[12][0-9]|3[01]))"
+    r"(?:[ T](?:[01]?[0-9]|2[0-3]):[0-5][0-9](?::[0-5][0-9](?:\.[0-9]+)?)?)?"
+)
+_VALUE_PATTERNS = {
+    TEXT: r'[^,\r\n"]+',
+    INTEGER: r"[0-9]+",
+    DATE: _DATE_PATTERN,
+}
+_VALUE_REGEXES = {kind: re.compile(pattern) for kind, pattern in _VALUE_PATTERNS.items()}
+_BYTE_VALUE_REGEXES = {kind: re.compile(pattern.encode("ascii")) for kind, pattern in _VALUE_PATTERNS.items()}
+
+# 文字の途中にカンマ・改行・ダブルクォートのバイトが現れない文字コード（バイト列のまま照合できる）
+_ASCII_COMPATIBLE_ENCODINGS = {"utf-8", "utf-8-sig", "ascii", "cp932", "shift_jis", "euc-jp", "euc_jp"}
+
+
+class ColumnSpec(NamedTuple):
+    """検証する列"""
+    key: str
+    label: str
+    aliases: Tuple[str, ...]
+    kind: str = TEXT
+    required: bool = False  # 列が必須
+    not_empty: bool = False  # 値が必須
+
+
+class FileSpec(NamedTuple):
+    """ファイル種別ごとの検証内容"""
+    label: str
+    columns: Tuple[ColumnSpec, ...]
+    min_rows: int = 0
+
+
+# ファイル種別（1: 医療機器台帳, 2: 貸出履歴, 3: 故障履歴）ごとの検証内容。ここに無い列は検証しない
+FILE_SPECS: Dict[int, FileSpec] = {
+    1: FileSpec(
+        "医療機器台帳",
+        (
+            # 型番が空欄・"不明"の行は台帳の取込対象外のため、値は必須としない
+            ColumnSpec("model_number", "型番", COLUMN_ALIASES["model_number"], required=True),
+            ColumnSpec("stock_quantity", "台数", COLUMN_ALIASES["stock_quantity"], INTEGER),
+            ColumnSpec("install_date", "設置日", ("install_date", "設置日", "導入日", "購入日"), DATE),
+        ),
+        min_rows=1,
+    ),
+    2: FileSpec(
+        "貸出履歴",
+        (
+            ColumnSpec("rental_date", "貸出日", ("rental_date", "lend_date", "貸出日", "貸出日時", "日付"), DATE,
+                       required=True, not_empty=True),
+            ColumnSpec("return_date", "返却日", ("return_date", "返却日", "返却日時"), DATE),
+        ),
+    ),
+    3: FileSpec(
+        "故障履歴",
+        (
+            ColumnSpec("failure_date", "故障日", ("failure_date", "故障日", "故障日時", "発生日", "日付"), DATE,
+                       required=True, not_empty=True),
+            ColumnSpec("repair_date", "修理完了日", ("repair_date", "修理完了日", "修理日"), DATE),
+        ),
+    ),
+}
+
+
+class _Validator:
+    """1ファイルの検証（ヘッダー行で決まる列の位置と、行の正規表現を保持）"""
+
+    def __init__(self, spec: FileSpec, header: List[str], max_errors: int):
+        self.spec = spec
+        self.max_errors = max_errors
+        self.errors: List[UploadValidationError] = []
+        self.column_count = len(header)
+
+        normalized = [h.strip().lstrip("\ufeff") for h in header]
+        self.columns: List[Tuple[int, ColumnSpec]] = []
+        for column in spec.columns:
+            index = next((normalized.index(alias) for alias in column.aliases if alias in normalized), None)
+            if index is not None:
+                self.columns.append((index, column))
+            elif column.required:
+                self.add_error(1, column.label, None, f"必須の列「{column.label}」がありません")
+
+        # 値を検証する列（列の位置の順）
+        self.checked_columns = [
+            (index, column) for index, column in sorted(self.columns, key=lambda item: item[0])
+            if column.kind != TEXT or column.not_empty
+        ]
+
+    def match_chunk(self, chunk: bytes, line_count: int) -> bool:
+        """
+        チャンクの全行が正しい形式かをバイト列のまま照合する（空行・ダブルクォートを含む場合などはFalse）
+
+        列数は行ごとのカンマの数で確認し、値は列ごとに全行分をまとめて取り出し、重複を除いてから検証します。
+        """
+        if b'"' in chunk:
+            return False
+        newline = b"\n"
+        if b"\r" in chunk:
+            # 改行コードが全てCRLFの場合のみ（CRのみ・混在は1行ずつ検証）
+            newline = b"\r\n"
+            if not chunk.endswith(newline) or chunk.count(b"\r") != line_count:
+                return False
+        body = chunk[:-len(newline)]
+        lines = body.split(newline)
+        if len(lines) != line_count or b"" in lines:
+            return False
+        if set(map(bytes.count, lines, repeat(b","))) != {self.column_count - 1}:
+            return False
+        if not self.checked_columns:
+            return True
+        fields = body.replace(newline, b",").split(b",")
+        for index, column in self.checked_columns:
+            for value in set(fields[index::self.column_count]):
+                if value == b"":
+                    if column.not_empty:
+                        return False
+                elif column.kind != TEXT and not _BYTE_VALUE_REGEXES[column.kind].fullmatch(value):
+                    return False
+        return True
+
+    @property
+    def full(self) -> bool:
+        return len(self.errors) >= self.max_errors
+
+    def add_error(self, row: int, column: Optional[str], value: Optional[str], message: str) -> None:
+        if self.full:
+            return
+        if value is not None and len(value) > MAX_VALUE_LENGTH:
+            value = value[:MAX_VALUE_LENGTH] + "…"
+        self.errors.append(UploadValidationError(row=row, column=column, value=value, message=message))
+
+    def validate_rows(self, text: str, first_line: int) -> int:
+        """チャンクを1行ずつ検証する（行番号はファイルの物理行。1行目がヘッダー行）。データ行数を返す"""
+        reader = csv.reader(io.StringIO(text, newline=""))
+        row_count = 0
+        for row in reader:
+            if not row:
+                continue
+            row_count += 1
+            line = first_line + reader.line_num - 1
+            if len(row) != self.column_count:
+                self.add_error(line, None, None, f"列数が不正です（ヘッダー: {self.column_count}列, この行: {len(row)}列）")
+                continue
+            for index, column in self.columns:
+                value = row[index]
+                if value == "":
+                    if column.not_empty:
+                        self.add_error(line, column.label, None, f"「{column.label}」は必須です")
+                elif column.kind != TEXT and not _VALUE_REGEXES[column.kind].fullmatch(value):
+                    expected = "0以上の整数" if column.kind == INTEGER else "日付（YYYY-MM-DD / YYYY/MM/DD / YYYYMMDD）"
+                    self.add_error(line, column.label, value, f"「{column.label}」は{expected}で入力してください")
+            if self.full:
+                break
+        return row_count
+
+
+def _read_chunks(stream: IO[bytes], chunk_bytes: int):
+    """行の途中で区切らずに一定サイズずつ読み込む（ダブルクォート内の改行の途中でも区切らない）"""
+    while True:
+        chunk = stream.read(chunk_bytes)
+        if not chunk:
+            return
+        chunk += stream.readline()
+        while chunk.count(b'"') % 2:
+            line = stream.readline()
+            if not line:
+                break
+            chunk += line
+        if not chunk.endswith(b"\n"):
+            chunk += b"\n"
+        yield chunk
+
+
+def validate_upload_file(
+    source: Path,
+    file_type: int,
+    max_errors: int = MAX_ERRORS,
+    chunk_bytes: int = CHUNK_BYTES
+) -> UploadValidationResult:
+    """
+    アップロードされたCSVの内容を検証する
+
+    Args:
+        source (Path): CSVファイルのパス
+        file_type (int): ファイル種別（1: 医療機器台帳, 2: 貸出履歴, 3: 故障履歴）
+        max_errors (int): 返すエラーの上限（上限に達した時点で検証を終了）
+        chunk_bytes (int): 1回に読み込むバイト数
+
+    Returns:
+        UploadValidationResult: 検証結果（errors が空の場合は正常）
+    """
+    spec = FILE_SPECS[file_type]
+    with open(source, "rb") as stream:
+        encoding = detect_encoding(stream)
+        result = UploadValidationResult(file_type=file_type, file_label=spec.label, encoding=encoding,
+                                        total_rows=0, errors=[], truncated=False)
+
+        header_line = stream.readline()
+        try:
+            header = next(csv.reader([header_line.decode(encoding)]), [])
+        except UnicodeDecodeError:
+            header = None
+        if not header:
+            result.errors.append(UploadValidationError(
+                row=1, message="ヘッダー行がありません" if header is not None else f"文字コード（{encoding}）で読み込めません"
+            ))
+            return result
+
+        validator = _Validator(spec, header, max_errors)
+        if validator.errors:
+            result.errors = validator.errors
+            return result
+
+        byte_level = encoding.lower() in _ASCII_COMPATIBLE_ENCODINGS
+        next_line = 2
+        for chunk in _read_chunks(stream, chunk_bytes):
+            line_count = chunk.count(b"\n")
+            try:
+                text = chunk.decode(encoding)
+            except UnicodeDecodeError as e:
+                line = next_line + chunk.count(b"\n", 0, e.start)
+                validator.add_error(line, None, None, f"文字コード（{encoding}）で読み込めない文字があります")
+                break
+
+            if byte_level and validator.match_chunk(chunk, line_count):
+                result.total_rows += line_count
+            else:
+                result.total_rows += validator.validate_rows(text, next_line)
+            next_line += line_count
+            if validator.full:
+                result.truncated = True
+                break
+
+    if not validator.errors and result.total_rows < spec.min_rows:
+        validator.add_error(2, None, None, "データ行がありません")
+    result.errors = validator.errors
+    return result
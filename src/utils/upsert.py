@@ -0,0 +1,41 @@
+"""upsert.py
+
+INSERT ... ON CONFLICT（登録または更新）文の作成
+
+Note:
+    - ON CONFLICT 句はデータベースごとの方言のINSERT文にしか無いため、セッションの接続先に合わせて
+      postgresql.insert / sqlite.insert を選びます（PoCはSQLite、本番はPostgreSQL）。
+    - 選択情報の差分更新（report_selection.py）と機器台帳の集計値の加算（equipment_stats.py）で使用します。
+
+ChangeLog:
+    v1.0.0 (2026-10-19)
+    - 新規作成（report_selection.py の _dialect_insert を共通化）
+"""
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+_INSERT_BY_DIALECT = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def dialect_insert(db: Session, table):
+    """
+    ON CONFLICT 句を使えるINSERT文を返す（PostgreSQL / SQLite）
+
+    Args:
+        db (Session): データベースセッション（接続先の方言の判定に使用）
+        table: 登録先のテーブル（モデルクラス）
+
+    Returns:
+        Insert: 接続先の方言のINSERT文（on_conflict_do_update / on_conflict_do_nothing を使用可能）
+
+    Raises:
+        NotImplementedError: 未対応のデータベースの場合
+    """
+    dialect = db.get_bind().dialect.name
+    try:
+        return _INSERT_BY_DIALECT[dialect](table)
+    except KeyError:
+        raise NotImplementedError(f"未対応のデータベースです: {dialect}")
@@ -0,0 +1,128 @@
+"""user_id_allocator.py
+
+組織種別ごとのuser_id採番
+
+Note:
+    - user_id_sequenceテーブルのカウンタを UPDATE ... RETURNING で加算し、払い出し済みの最終値を取得します。
+    - 加算と取得が1文で完結するため、PostgreSQLでは行ロック、SQLiteではDBの書き込みロックにより
+      同時に採番しても同じIDが払い出されることはありません。
+    - 採番はmst_userへの登録と同じトランザクションで行うため、登録に失敗した場合はカウンタも巻き戻ります。
+    - 件数を指定すると連続したIDの範囲をまとめて払い出します（一括登録用）。
+
+ChangeLog:
+    v1.0.0 (2026-10-19)
+    - 新規作成（MAX(user_id)の範囲検索による採番を置き換え）
+"""
+from datetime import datetime
+from typing import List
+
+from fastapi import HTTPException
+from sqlalchemy import Integer, cast, func, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models.pg_optigate.mst_user import MstUser
+from ..models.pg_optigate.user_id_sequence import UserIdSequence
+
+# entity_typeに応じた開始値と終了値
+USER_ID_RANGES = {
+    1: (100001, 199999),  # 医療機関
+    2: (200001, 299999),  # ディーラー
+    3: (300001, 399999),  # メーカー
+    9: (900001, 999999),  # システム
+}
+
+ENTITY_TYPE_NAMES = {
+    1: "医療機関",
+    2: "ディーラー",
+    3: "メーカー",
+    9: "システム",
+}
+
+
+def _initialize_sequence(entity_type: int, user_id: str, db: Session) -> None:
+    """
+    カウンタ行が存在しない場合に既存ユーザーの最大IDから初期化する
+
+    マイグレーションで初期化済みの環境では呼ばれません。
+    同時に初期化された場合は先に登録された行を採用します。
+    """
+    range_start, range_end = USER_ID_RANGES[entity_type]
+    max_user_id = db.query(func.max(cast(MstUser.user_id, Integer))).filter(
+        cast(MstUser.user_id, Integer) >= range_start,
+        cast(MstUser.user_id, Integer) <= range_end
+    ).scalar()
+
+    now = datetime.now()
+    try:
+        with db.begin_nested():
+            db.add(UserIdSequence(
+                entity_type=entity_type,
+                range_start=range_start,
+                range_end=range_end,
+                last_value=max_user_id if max_user_id is not None else range_start - 1,
+                reg_user_id=user_id,
+                regdate=now,
+                update_user_id=user_id,
+                lastupdate=now
+            ))
+    except IntegrityError:
+        pass  # 他のリクエストが先に初期化済み
+
+
+def allocate_user_ids(entity_type: int, count: int, db: Session, user_id: str = "0") -> List[str]:
+    """
+    entity_typeに応じたuser_idを指定件数分払い出す
+
+    Args:
+        entity_type (int): 組織種別 (1:医療機関, 2:ディーラー, 3:メーカー, 9:システム)
+        count (int): 払い出す件数（1以上）
+        db (Session): データベースセッション
+        user_id (str, optional): 採番を行うユーザーID（更新ユーザーIDとして記録）
+
+    Returns:
+        List[str]: 払い出されたuser_idのリスト（昇順・連続）
+
+    Raises:
+        ValueError: 未対応のentity_type、または件数が1未満の場合
+        HTTPException: 採番範囲が上限に達した場合
+    """
+    if entity_type not in USER_ID_RANGES:
+        raise ValueError(f"未対応のentity_type: {entity_type}")
+    if count < 1:
+        raise ValueError(f"採番件数は1以上で指定してください: {count}")
+
+    stmt = (
+        update(UserIdSequence)
+        .where(
+            UserIdSequence.entity_type == entity_type,
+            UserIdSequence.last_value + count <= UserIdSequence.range_end
+        )
+        .values(
+            last_value=UserIdSequence.last_value + count,
+            update_user_id=user_id,
+            lastupdate=datetime.now()
+        )
+        .returning(UserIdSequence.last_value)
+        .execution_options(synchronize_session=False)
+    )
+
+    last_value = db.execute(stmt).scalar()
+    if last_value is None:
+        exists = db.query(UserIdSequence.entity_type).filter(
+            UserIdSequence.entity_type == entity_type
+        ).first()
+        if not exists:
+            _initialize_sequence(entity_type, user_id, db)
+            last_value = db.execute(stmt).scalar()
+
+    if last_value is None:
+        _, range_end = USER_ID_RANGES[entity_type]
+        entity_name = ENTITY_TYPE_NAMES.get(entity_type, "不明")
+        raise HTTPException(
+            status_code=400,
+            detail=f"{entity_name}のuser_id採番範囲が上限に達しました (最大: {range_end})"
+        )
+
+    first_value = last_value - count + 1
+    return [str(value) for value in range(first_value, last_value + 1)]
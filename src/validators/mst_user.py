@@ -10,6 +10,8 @@ Note:
 ChangeLog:
     v1.0.0 (2025-07-14)
         - 初版作成
+    v1.1.0 (2026-10-19)
+        - 一括登録用の重複チェック（find_duplicate_values）を追加
 """
 import re
 
@@ -142,3 +144,25 @@ def validate_inactive_reason_note(note: str) -> str:
     if note and len(note) > 255:
         raise ValueError("無効化理由の詳細は255文字を越えることはできません。")
     return note
+
+def find_duplicate_values(values: list) -> set:
+    """一括登録時の重複値の検出
+
+    空値（None・空文字）は対象外とし、大文字小文字は区別しない。
+
+    Args:
+        values (list): チェック対象の値のリスト（メールアドレス等）
+
+    Returns:
+        set: 2件以上出現した値（小文字化済み）
+    """
+    seen = set()
+    duplicates = set()
+    for value in values:
+        if not value:
+            continue
+        key = str(value).lower()
+        if key in seen:
+            duplicates.add(key)
+        seen.add(key)
+    return duplicates
@@ -36,4 +36,5 @@ uvicorn src.main:app \
     --port $UVICORN_PORT \
     --reload
 
-# --reload は開発用（本番は外してください）
+# --reload は開発用です。本番環境では複数ワーカー構成の python -m src.cli.serve で起動してください
+# （config.yaml の server、環境変数 OPTISERVE_SESSION_SECRET を参照）
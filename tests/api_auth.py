@@ -0,0 +1,48 @@
+"""api_auth.py
+
+APIテスト用の認証ヘッダー（セッショントークン）を取得します。
+
+Note:
+    - ログインが必要なAPIは Authorization: Bearer <セッショントークン> を必須とします（X-User-Id ヘッダーでは認証しない）。
+    - システム管理者は初期データ（data/03_mst_user.csv）のメールアドレス・パスワードでログインします。
+    - 取得したトークンはテストの実行中（有効期間内）は使い回します。
+"""
+
+import os
+from functools import lru_cache
+from typing import Dict
+
+import requests
+
+API_HOST = os.environ.get("OPTISERVE_API_HOST", "localhost")
+BASE_URL = f"http://{API_HOST}:8000/api/v1"
+
+# 初期データのシステム管理者
+ADMIN_E_MAIL = "smds@seiei-ashd.co.jp"
+ADMIN_PASSWORD = "sysad2025"
+
+
+@lru_cache(maxsize=None)
+def login_headers(e_mail: str, password: str) -> Dict[str, str]:
+    """ログインしてセッショントークンの認証ヘッダーを返す"""
+    res = requests.post(f"{BASE_URL}/auth/login", json={"e_mail": e_mail, "password": password})
+    data = res.json()
+    assert res.status_code == 200 and data["success"] is True, f"ログインに失敗しました: {e_mail}, {data}"
+    return {"Authorization": f"{data['token_type']} {data['access_token']}"}
+
+
+def admin_headers() -> Dict[str, str]:
+    """システム管理者の認証ヘッダー"""
+    return dict(login_headers(ADMIN_E_MAIL, ADMIN_PASSWORD))
+
+
+def create_user_headers(entity_type: int = 1, entity_relation_id: int = 1) -> Dict[str, str]:
+    """ユーザーを登録してログインし、そのユーザーの認証ヘッダーを返す（権限エラーのテスト用）"""
+    import uuid
+
+    payload = {"user_name": "Pytest権限確認", "entity_type": entity_type, "entity_relation_id": entity_relation_id,
+               "e_mail": f"pytest_{uuid.uuid4().hex[:12]}@example.com", "mobile_number": "090-1234-5678"}
+    res = requests.post(f"{BASE_URL}/users", json=payload, headers=admin_headers())
+    assert res.status_code == 200, res.text
+    user = res.json()
+    return dict(login_headers(user["e_mail"], user["password"]))
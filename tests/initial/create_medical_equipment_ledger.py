@@ -198,6 +198,28 @@ def get_next_ledger_id(sqlite_conn) -> int:
     cursor.close()
     return (result or 0) + 1
 
+# 機器分類別の集計値の作成（分析設定の上書きを反映。alembic の 7cc8e24c444d と同じ集計）
+REBUILD_CLASSIFICATION_STAT_SQL = """
+    INSERT INTO medical_equipment_classification_stat (
+        medical_id, classification_id, ledger_count, included_count, override_count,
+        stock_quantity, included_stock_quantity, reg_user_id, regdate, update_user_id, lastupdate
+    )
+    SELECT
+        medical_id, classification_id, COUNT(*), SUM(included), SUM(has_override),
+        SUM(stock_quantity), SUM(included * stock_quantity), ?, ?, ?, ?
+    FROM (
+        SELECT
+            l.medical_id,
+            COALESCE(s.override_classification_id, l.classification_id, 0) AS classification_id,
+            CASE WHEN COALESCE(s.override_is_included, l.is_included) THEN 1 ELSE 0 END AS included,
+            CASE WHEN s.ledger_id IS NULL THEN 0 ELSE 1 END AS has_override,
+            l.stock_quantity
+        FROM medical_equipment_ledger l
+        LEFT JOIN medical_equipment_analysis_setting s ON s.ledger_id = l.ledger_id
+    ) effective
+    GROUP BY medical_id, classification_id
+"""
+
 def create_equipment_ledger_records(sqlite_conn, equipment_data: List[Tuple], classification_map: Dict, pg_conn):
     """機器台帳レコードを作成"""
     
@@ -273,6 +295,10 @@ def create_equipment_ledger_records(sqlite_conn, equipment_data: List[Tuple], cl
             if total_records % 100 == 0:
                 print(f"  処理済み: {total_records}件")
         
+        # 機器分類別の集計値（medical_equipment_classification_stat）を作り直す
+        cursor.execute("DELETE FROM medical_equipment_classification_stat")
+        cursor.execute(REBUILD_CLASSIFICATION_STAT_SQL, (REG_USER_ID, current_time, UPDATE_USER_ID, current_time))
+        
         # コミット
         sqlite_conn.commit()
         cursor.close()
@@ -12,13 +12,14 @@ import requests
 import random
 import string
 import os
+from api_auth import admin_headers
 
 # 環境に応じたAPI接続先の自動判定
 API_HOST = os.environ.get("OPTISERVE_API_HOST", "localhost")
 BASE_URL = f"http://{API_HOST}:8000/api/v1"
 
 # テスト用の共通ヘッダー（認証情報）
-TEST_HEADERS = {"X-User-Id": "900001"}  # システム管理者のuser_id
+TEST_HEADERS = admin_headers()  # システム管理者のセッショントークン
 
 def random_facility_name():
     rand = ''.join(random.choices(string.ascii_lowercase + string.digits, k=6))
@@ -118,6 +119,44 @@ def test_get_facility(test_facility):
     assert data["medical_id"] == facility_id
     assert data["medical_name"] == test_facility["facility_name"]
 
+def test_get_facilities_etag():
+    """医療機関一覧のETag（304 Not Modified）テスト（登録すると変わること）"""
+    res = requests.get(f"{BASE_URL}/facilities/", headers=TEST_HEADERS)
+    assert res.status_code == 200
+    etag = res.headers["ETag"]
+    assert res.headers["Cache-Control"] == "private, max-age=60"
+
+    res = requests.get(f"{BASE_URL}/facilities/", headers={**TEST_HEADERS, "If-None-Match": etag})
+    assert res.status_code == 304
+    assert res.content == b""
+    assert res.headers["ETag"] == etag
+
+    # ページの範囲が異なる場合は別のETag
+    res = requests.get(f"{BASE_URL}/facilities/?skip=0&limit=5", headers={**TEST_HEADERS, "If-None-Match": etag})
+    assert res.status_code == 200
+
+    res = requests.post(f"{BASE_URL}/facilities/", json={"medical_name": random_facility_name()}, headers=TEST_HEADERS)
+    assert res.status_code == 200
+    res = requests.get(f"{BASE_URL}/facilities/", headers={**TEST_HEADERS, "If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.headers["ETag"] != etag
+
+def test_get_facility_etag(test_facility):
+    """医療機関個別取得のETag（304 Not Modified）テスト（更新すると変わること）"""
+    url = f"{BASE_URL}/facilities/{test_facility['facility_id']}"
+    res = requests.get(url, headers=TEST_HEADERS)
+    assert res.status_code == 200
+    etag = res.headers["ETag"]
+
+    res = requests.get(url, headers={**TEST_HEADERS, "If-None-Match": f"W/{etag}"})
+    assert res.status_code == 304
+
+    res = requests.put(url, json={"medical_name": test_facility["facility_name"]}, headers=TEST_HEADERS)
+    assert res.status_code == 200
+    res = requests.get(url, headers={**TEST_HEADERS, "If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.headers["ETag"] != etag
+
 def test_get_facility_not_found():
     """存在しない医療機関の取得でエラーテスト"""
     nonexistent_id = 99999
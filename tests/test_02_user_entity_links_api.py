@@ -18,6 +18,7 @@ import string
 import json
 import sys
 import os
+from api_auth import admin_headers
 
 # プロジェクトルートをsys.pathに追加
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -28,7 +29,7 @@ API_HOST = os.environ.get("OPTISERVE_API_HOST", "localhost")
 BASE_URL = f"http://{API_HOST}:8000/api/v1"
 
 # テスト用の共通ヘッダー（認証情報）
-TEST_HEADERS = {"X-User-Id": "900001"}  # システム管理者のuser_id
+TEST_HEADERS = admin_headers()  # システム管理者のセッショントークン
 
 def cleanup_test_links():
     """テスト実行前のクリーンアップ - entity_relation_id=6の連携データを削除"""
@@ -321,6 +322,28 @@ def test_read_user_entity_link_by_id(test_link):
     assert link["entity_name"] == test_link["entity_name"]
     print(f"✅ 連携情報個別取得成功: entity_type={entity_type}, entity_relation_id={entity_relation_id}, 組織名={link['entity_name']}")
 
+def test_read_user_entity_links_etag(test_link):
+    """連携情報一覧・個別取得のETag（304 Not Modified）テスト（更新すると変わること）"""
+    list_url = f"{BASE_URL}/user-entity-links/"
+    url = f"{BASE_URL}/user-entity-links/{test_link['entity_type']}/{test_link['entity_relation_id']}"
+    list_res = requests.get(list_url, headers=TEST_HEADERS)
+    res = requests.get(url, headers=TEST_HEADERS)
+    assert list_res.status_code == 200 and res.status_code == 200
+    list_etag, etag = list_res.headers["ETag"], res.headers["ETag"]
+    assert res.headers["Cache-Control"] == "private, no-cache"
+
+    assert requests.get(list_url, headers={**TEST_HEADERS, "If-None-Match": list_etag}).status_code == 304
+    res = requests.get(url, headers={**TEST_HEADERS, "If-None-Match": etag})
+    assert res.status_code == 304
+    assert res.content == b""
+
+    res = requests.put(url, json={**test_link["payload"], "entity_name": f"更新済み_{random_entity_name()}"},
+                       headers=TEST_HEADERS)
+    assert res.status_code == 200
+    assert requests.get(list_url, headers={**TEST_HEADERS, "If-None-Match": list_etag}).status_code == 200
+    assert requests.get(url, headers={**TEST_HEADERS, "If-None-Match": etag}).status_code == 200
+    print("✅ ETagテスト成功")
+
 def test_read_nonexistent_user_entity_link():
     """存在しない連携情報取得でのエラーテスト"""
     res = requests.get(f"{BASE_URL}/user-entity-links/1/99999", headers=TEST_HEADERS)  # 存在しないentity_relation_id
@@ -12,13 +12,14 @@ import requests
 import random
 import string
 import os
+from api_auth import admin_headers, create_user_headers
 
 # 環境に応じたAPI接続先の自動判定
 API_HOST = os.environ.get("OPTISERVE_API_HOST", "localhost")
 BASE_URL = f"http://{API_HOST}:8000/api/v1"
 
 # テスト用の共通ヘッダー（認証情報）
-TEST_HEADERS = {"X-User-Id": "900001"}  # システム管理者のuser_id
+TEST_HEADERS = admin_headers()  # システム管理者のセッショントークン
 
 def random_email():
     rand = ''.join(random.choices(string.ascii_lowercase + string.digits, k=8))
@@ -113,3 +114,184 @@ def test_login_suspended_user(test_user):
     assert data.get("user_status") is None
     assert data.get("next_action") == "none"
     assert data.get("message") == "対象のユーザーは利用できません。"
+
+def test_create_users_concurrently_unique_ids():
+    # 7. 同時登録でもuser_idが重複しないこと（user_id_sequenceによる採番）
+    from concurrent.futures import ThreadPoolExecutor
+
+    def create(_):
+        payload = {
+            "user_name": "Pytest同時登録",
+            "entity_type": 1,
+            "entity_relation_id": 1,
+            "e_mail": random_email(),
+            "mobile_number": "090-1234-5678",
+        }
+        return requests.post(f"{BASE_URL}/users", json=payload, headers=TEST_HEADERS)
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        responses = list(executor.map(create, range(10)))
+
+    assert all(res.status_code == 200 for res in responses)
+    user_ids = [res.json()["user_id"] for res in responses]
+    assert len(set(user_ids)) == len(user_ids)
+    assert all(100001 <= int(user_id) <= 199999 for user_id in user_ids)
+
+def test_create_users_bulk():
+    # 8. ユーザー一括登録（正常行とエラー行の混在）
+    duplicate_email = random_email()
+    users = [
+        {
+            "user_name": f"Pytest一括{i}",
+            "entity_type": 1,
+            "entity_relation_id": 1,
+            "e_mail": random_email(),
+            "mobile_number": "090-1234-5678",
+        }
+        for i in range(50)
+    ]
+    users.append({"user_name": "", "entity_type": 1, "entity_relation_id": 1,
+                  "e_mail": random_email(), "mobile_number": "090-1234-5678"})   # ユーザー名空
+    users.append({"user_name": "Pytest一括", "entity_type": 5, "entity_relation_id": 1,
+                  "e_mail": random_email(), "mobile_number": "090-1234-5678"})   # 組織種別不正
+    users.append({"user_name": "Pytest重複1", "entity_type": 1, "entity_relation_id": 1,
+                  "e_mail": duplicate_email, "mobile_number": "090-1234-5678"})
+    users.append({"user_name": "Pytest重複2", "entity_type": 1, "entity_relation_id": 1,
+                  "e_mail": duplicate_email, "mobile_number": "090-1234-5678"})
+
+    res = requests.post(f"{BASE_URL}/users/bulk", json={"users": users}, headers=TEST_HEADERS)
+    assert res.status_code == 200
+    data = res.json()
+    assert data["total"] == 54
+    assert data["created_count"] == 50
+    assert data["failed_count"] == 4
+
+    created = [r for r in data["results"] if r["success"]]
+    user_ids = [int(r["user_id"]) for r in created]
+    assert len(set(user_ids)) == 50
+    assert user_ids == list(range(user_ids[0], user_ids[0] + 50))  # 連続した範囲で採番
+    assert all(r["password"] for r in created)
+    assert all(r["errors"] for r in data["results"][50:])
+
+    # 登録されたユーザーが仮パスワードでログインできること
+    login_payload = {"e_mail": created[0]["e_mail"], "password": created[0]["password"]}
+    res = requests.post(f"{BASE_URL}/auth/login", json=login_payload)
+    assert res.json().get("success") is True
+
+def test_create_users_bulk_all_or_nothing():
+    # 9. all_or_nothing=True の場合、エラー行があれば何も登録しない
+    users = [
+        {"user_name": "Pytest一括", "entity_type": 1, "entity_relation_id": 1,
+         "e_mail": random_email(), "mobile_number": "090-1234-5678"},
+        {"user_name": "Pytest一括", "entity_type": 1, "entity_relation_id": 0,
+         "e_mail": random_email(), "mobile_number": "090-1234-5678"},   # 組織ID不正
+    ]
+    res = requests.post(f"{BASE_URL}/users/bulk", json={"users": users, "all_or_nothing": True}, headers=TEST_HEADERS)
+    assert res.status_code == 200
+    data = res.json()
+    assert data["created_count"] == 0
+    assert data["failed_count"] == 1
+    assert data["results"][0]["user_id"] is None
+
+def test_create_users_bulk_requires_admin():
+    # 10. 一括登録は管理者のみ
+    users = [{"user_name": "Pytest一括", "entity_type": 1, "entity_relation_id": 1,
+              "e_mail": random_email(), "mobile_number": "090-1234-5678"}]
+    res = requests.post(f"{BASE_URL}/users/bulk", json={"users": users}, headers=create_user_headers())
+    assert res.status_code == 403
+
+def test_search_users_keyset_paging():
+    # 11. ユーザー検索（部分一致・メールドメイン・キーセットページング・総件数）
+    suffix = ''.join(random.choices(string.ascii_lowercase, k=6))
+    users = [
+        {"user_name": f"検索{suffix}{i:02d}", "entity_type": 1, "entity_relation_id": 1,
+         "e_mail": f"pytest_{suffix}{i:02d}@search-{suffix}.example.com", "mobile_number": "090-1234-5678"}
+        for i in range(5)
+    ]
+    res = requests.post(f"{BASE_URL}/users/bulk", json={"users": users}, headers=TEST_HEADERS)
+    assert res.json()["created_count"] == 5
+
+    params = {"keyword": suffix, "limit": 2, "include_total": True}
+    res = requests.get(f"{BASE_URL}/users/search", params=params, headers=TEST_HEADERS)
+    assert res.status_code == 200
+    data = res.json()
+    assert data["total_count"] == 5
+    assert data["has_next"] is True
+    collected = [u["user_id"] for u in data["items"]]
+    while data["has_next"]:
+        res = requests.get(f"{BASE_URL}/users/search",
+                           params={"keyword": suffix, "limit": 2, "cursor": data["next_cursor"]},
+                           headers=TEST_HEADERS)
+        data = res.json()
+        assert data["total_count"] is None
+        collected.extend(u["user_id"] for u in data["items"])
+    assert len(collected) == 5
+    assert collected == sorted(collected)
+
+    res = requests.get(f"{BASE_URL}/users/search", params={"name_prefix": f"検索{suffix}0"}, headers=TEST_HEADERS)
+    assert len(res.json()["items"]) == 5
+    res = requests.get(f"{BASE_URL}/users/search", params={"e_mail_domain": f"search-{suffix}.example.com"}, headers=TEST_HEADERS)
+    assert len(res.json()["items"]) == 5
+    res = requests.get(f"{BASE_URL}/users/search", params={"name_prefix": suffix}, headers=TEST_HEADERS)
+    assert res.json()["items"] == []   # 前方一致のため途中一致は対象外
+    res = requests.get(f"{BASE_URL}/users/search", params={"keyword": "%"}, headers=TEST_HEADERS)
+    assert res.json()["items"] == []   # ワイルドカードはエスケープされる
+
+def test_password_is_hashed_and_rehashed_on_login():
+    # 12. 仮パスワードはハッシュ化して保存され、ログイン成功時に通常コストで再ハッシュされる
+    e_mail = random_email()
+    payload = {"user_name": "Pytestハッシュ", "entity_type": 1, "entity_relation_id": 1,
+               "e_mail": e_mail, "mobile_number": "090-1234-5678"}
+    res = requests.post(f"{BASE_URL}/users", json=payload, headers=TEST_HEADERS)
+    assert res.status_code == 200
+    user = res.json()
+    temp_password = user["password"]
+
+    res = requests.get(f"{BASE_URL}/users/{user['user_id']}", headers=TEST_HEADERS)
+    stored_before = res.json()["password"]
+    assert stored_before.startswith("scrypt$")
+    assert temp_password not in stored_before
+
+    res = requests.post(f"{BASE_URL}/auth/login", json={"e_mail": e_mail, "password": temp_password})
+    assert res.json().get("success") is True
+    res = requests.get(f"{BASE_URL}/users/{user['user_id']}", headers=TEST_HEADERS)
+    stored_after = res.json()["password"]
+    assert stored_after.startswith("scrypt$") and stored_after != stored_before
+
+    res = requests.post(f"{BASE_URL}/auth/login", json={"e_mail": e_mail, "password": "wrong-password"})
+    assert res.json().get("success") is False
+
+def test_session_token_auth_and_revocation():
+    # 13. ログイン時に発行されたトークンで認証でき、無効化したユーザーのトークンは失効する
+    e_mail = random_email()
+    payload = {"user_name": "Pytestトークン", "entity_type": 1, "entity_relation_id": 1,
+               "e_mail": e_mail, "mobile_number": "090-1234-5678"}
+    res = requests.post(f"{BASE_URL}/users", json=payload, headers=TEST_HEADERS)
+    assert res.status_code == 200
+    user = res.json()
+
+    res = requests.post(f"{BASE_URL}/auth/login", json={"e_mail": e_mail, "password": user["password"]})
+    data = res.json()
+    assert data["success"] is True
+    assert data["token_type"] == "Bearer" and data["expires_in"] > 0
+    token_headers = {"Authorization": f"Bearer {data['access_token']}"}
+
+    # X-User-Id を詐称してもトークンのユーザー（医療機関ID=1）の権限で検索される
+    res = requests.get(f"{BASE_URL}/users/search", params={"limit": 500},
+                       headers={**token_headers, "X-User-Id": "900001"})
+    assert res.status_code == 200
+    assert all(item["entity_relation_id"] == 1 for item in res.json()["items"])
+
+    res = requests.get(f"{BASE_URL}/users/search", headers={"Authorization": "Bearer invalid.token.value"})
+    assert res.status_code == 401
+
+    # トークンが無い場合は X-User-Id ヘッダーがあっても401
+    res = requests.get(f"{BASE_URL}/users/search", headers={"X-User-Id": "900001"})
+    assert res.status_code == 401
+    assert res.headers["www-authenticate"] == "Bearer"
+
+    res = requests.put(f"{BASE_URL}/users/{user['user_id']}/inactive",
+                       json={"reason_code": 1, "note": "トークン失効テスト"}, headers=TEST_HEADERS)
+    assert res.status_code == 200
+    res = requests.get(f"{BASE_URL}/users/search", headers=token_headers)
+    assert res.status_code == 401
@@ -578,6 +578,132 @@ class TestAuthManagerQueryFiltering:
         assert result == mock_filtered_query
 
 
+
+class TestPasswordHashing:
+    """src/utils/password.py のハッシュ化・照合のテスト"""
+
+    def test_hash_and_verify(self):
+        """ハッシュ化したパスワードの照合テスト"""
+        from src.utils.password import hash_password, verify_password, is_password_hashed
+
+        stored = hash_password("Passw0rd!")
+        assert is_password_hashed(stored)
+        assert "Passw0rd!" not in stored
+        assert verify_password("Passw0rd!", stored) is True
+        assert verify_password("passw0rd!", stored) is False
+        assert hash_password("Passw0rd!") != stored  # ソルトが毎回異なる
+
+    def test_verify_legacy_plaintext(self):
+        """平文（レガシー）パスワードの照合と再ハッシュ判定テスト"""
+        from src.utils.password import verify_password, needs_rehash
+
+        assert verify_password("sysad2025", "sysad2025") is True
+        assert verify_password("wrong", "sysad2025") is False
+        assert verify_password("sysad2025", None) is False
+        assert needs_rehash("sysad2025") is True
+
+    def test_needs_rehash_for_temporary_cost(self):
+        """仮パスワード用の低コストハッシュは再ハッシュ対象となるテスト"""
+        from src.utils.password import hash_password, needs_rehash, verify_password_in_pool
+
+        temporary = hash_password("Temp-Passw0rd", temporary=True)
+        assert needs_rehash(temporary) is True
+        assert verify_password_in_pool("Temp-Passw0rd", temporary) is True
+        assert needs_rehash(hash_password("Temp-Passw0rd")) is False
+
+    def test_generate_temp_password(self):
+        """仮パスワード生成テスト"""
+        from src.utils.password import generate_temp_password
+
+        passwords = {generate_temp_password() for _ in range(20)}
+        assert len(passwords) == 20
+        assert all(len(p) == 12 for p in passwords)
+
+
+class TestSessionToken:
+    """src/utils/session_token.py の発行・検証・失効のテスト"""
+
+    def test_issue_and_verify(self):
+        """発行したトークンの検証テスト"""
+        from src.utils.session_token import issue_session_token, verify_session_token
+
+        token, expires_in = issue_session_token("100001", "医療機関ユーザー", 1, 6, False)
+        claims = verify_session_token(token)
+        assert expires_in > 0
+        assert claims.user_id == "100001"
+        assert claims.user_name == "医療機関ユーザー"
+        assert claims.entity_type == 1
+        assert claims.entity_relation_id == 6
+        assert claims.is_admin is False
+
+    def test_verify_tampered_and_expired(self, monkeypatch):
+        """改ざん・有効期限切れのトークンの拒否テスト"""
+        import time
+        from src.utils.session_token import SessionTokenError, issue_session_token, verify_session_token
+
+        token, expires_in = issue_session_token("100001", "医療機関ユーザー", 1, 6, False)
+        header, payload, signature = token.split(".")
+        _, admin_payload, _ = issue_session_token("100001", "医療機関ユーザー", 9, 0, True)[0].split(".")
+        with pytest.raises(SessionTokenError):
+            verify_session_token(f"{header}.{admin_payload}.{signature}")
+        with pytest.raises(SessionTokenError):
+            verify_session_token("not-a-token")
+
+        now = time.time()
+        monkeypatch.setattr(time, "time", lambda: now + expires_in + 1)
+        with pytest.raises(SessionTokenError):
+            verify_session_token(token)
+
+    def test_revoke_user_tokens(self, db_session, monkeypatch):
+        """失効したユーザーのトークンの拒否テスト（他プロセスではDBの失効記録から拒否されること）"""
+        import time
+        from src.models.pg_optigate.session_revocation import SessionRevocation
+        from src.utils.session_token import (
+            SessionTokenError, issue_session_token, refresh_revoked_users, revoke_user_tokens, verify_session_token
+        )
+
+        now = time.time()
+        monkeypatch.setattr(time, "time", lambda: now)
+        token, _ = issue_session_token("100099", "退会ユーザー", 1, 6, False)
+        try:
+            revoke_user_tokens("100099", db_session, "900001")
+            with pytest.raises(SessionTokenError):
+                verify_session_token(token)
+
+            # DBから読み込み直した（別プロセス相当）キャッシュでも拒否される
+            db_session.commit()
+            refresh_revoked_users()
+            with pytest.raises(SessionTokenError):
+                verify_session_token(token)
+
+            # 失効後に発行されたトークンは有効
+            monkeypatch.setattr(time, "time", lambda: now + 1)
+            token, _ = issue_session_token("100099", "退会ユーザー", 1, 6, False)
+            assert verify_session_token(token).user_id == "100099"
+        finally:
+            db_session.query(SessionRevocation).filter(SessionRevocation.user_id == "100099").delete()
+            db_session.commit()
+            refresh_revoked_users()
+
+    def test_get_user_info_from_claims_without_db(self, db_session, monkeypatch):
+        """トークンで認証済みの場合はDBを参照しないテスト"""
+        from src.utils.session_token import current_session_claims, issue_session_token, verify_session_token
+
+        def mock_query(*_):
+            raise AssertionError("DBが参照されました")
+
+        monkeypatch.setattr(db_session, "query", mock_query)
+        claims = verify_session_token(issue_session_token("900001", "システム管理者", 9, 0, True)[0])
+        context_token = current_session_claims.set(claims)
+        try:
+            user_info = AuthManager.get_user_info("900001", db_session)
+            AuthManager.require_admin_permission("900001", db_session)
+        finally:
+            current_session_claims.reset(context_token)
+        assert user_info.is_admin is True
+        assert user_info.entity_type == 9
+
+
 if __name__ == "__main__":
     print("AuthManager認証・認可テストを実行します...")
     print("前提: テスト用ユーザーと医療機関が登録済みであること")
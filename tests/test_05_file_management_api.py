@@ -22,6 +22,7 @@ import os
 import tempfile
 from pathlib import Path
 import io
+from api_auth import admin_headers
 
 # プロジェクトルートをsys.pathに追加
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -39,7 +40,7 @@ API_HOST = os.environ.get("OPTISERVE_API_HOST", "localhost")
 BASE_URL = f"http://{API_HOST}:8000/api/v1"
 
 # テスト用の共通ヘッダー（認証情報）
-TEST_HEADERS = {"X-User-Id": "900001"}  # システム管理者のuser_id
+TEST_HEADERS = admin_headers()  # システム管理者のセッショントークン
 
 def cleanup_test_files():
     """テスト実行前のクリーンアップ - テスト用ファイルとDBレコードを削除"""
@@ -76,6 +77,7 @@ def cleanup_test_files():
             from src.database import SessionLocal
             from src.models.pg_optigate.facility_upload_log import FacilityUploadLog
             from src.models.pg_optigate.report_publication_log import ReportPublicationLog
+            from src.models.pg_optigate.medical_equipment_ledger import MedicalEquipmentLedger
             
             db = SessionLocal()
             try:
@@ -89,6 +91,11 @@ def cleanup_test_files():
                     ReportPublicationLog.medical_id.in_([5, 6, 999])
                 ).delete(synchronize_session=False)
                 
+                # テスト用医療機関の医療機器台帳（取込テストで登録）を削除
+                db.query(MedicalEquipmentLedger).filter(
+                    MedicalEquipmentLedger.medical_id == 6
+                ).delete(synchronize_session=False)
+                
                 db.commit()
                 print(f"🧹 DB クリーンアップ: アップロードログ{deleted_upload_logs}件, レポートログ{deleted_report_logs}件を削除")
                 
@@ -118,14 +125,33 @@ def setup_test_environment():
     cleanup_test_files()
     print("✅ ファイル管理テスト環境セットアップ完了\\n")
 
+def wait_for_job(job_id: int, headers: dict, timeout: float = 30) -> dict:
+    """ジョブの完了（succeeded / failed）を待って状態を返す（APIサーバー内のワーカーが実行）"""
+    import time
+    deadline = time.monotonic() + timeout
+    while True:
+        res = requests.get(f"{BASE_URL}/jobs/{job_id}", headers=headers)
+        assert res.status_code == 200, res.text
+        job = res.json()
+        if job["status"] in ("succeeded", "failed") or time.monotonic() > deadline:
+            return job
+        time.sleep(0.2)
+
 def random_string(length=6):
     """ランダムな文字列生成"""
     return ''.join(random.choices(string.ascii_lowercase + string.digits, k=length))
 
 def create_test_csv_file(filename: str = "test.csv", content: str = None) -> io.BytesIO:
-    """テスト用CSVファイル作成"""
+    """テスト用CSVファイル作成（内容の指定が無い場合はファイル名に応じた正しい形式の内容）"""
     if content is None:
-        content = f"id,name,date\\n1,テスト機器_{random_string()},2025-01-01\\n2,テスト機器2,2025-01-02\\n"
+        if "equipment" in filename:
+            content = f"型番,製品名,台数\nMODEL-{random_string()},テスト機器,1\nMODEL-002,テスト機器2,2\n"
+        elif "rental" in filename:
+            content = "貸出ID,型番,貸出日\n1,MODEL-002,2025-01-01\n"
+        elif "failure" in filename:
+            content = "故障ID,型番,故障日\n1,MODEL-002,2025-01-02\n"
+        else:
+            content = f"id,name,date\\n1,テスト機器_{random_string()},2025-01-01\\n2,テスト機器2,2025-01-02\\n"
     
     file_obj = io.BytesIO(content.encode('utf-8'))
     file_obj.name = filename
@@ -146,9 +172,9 @@ def test_file_upload_success():
     upload_user_id = "1"
     
     # テスト用CSVファイルを作成
-    equipment_file = create_test_csv_file("equipment.csv", "機器ID,機器名,設置日\\n1,MRI,2024-01-01\\n")
-    rental_file = create_test_csv_file("rental.csv", "貸出ID,機器ID,貸出日\\n1,1,2024-12-01\\n")
-    failure_file = create_test_csv_file("failure.csv", "故障ID,機器ID,故障日\\n1,1,2024-11-15\\n")
+    equipment_file = create_test_csv_file("equipment.csv", "型番,機器名,設置日\nMRI-001,MRI,2024-01-01\n")
+    rental_file = create_test_csv_file("rental.csv", "貸出ID,型番,貸出日\n1,MRI-001,2024-12-01\n")
+    failure_file = create_test_csv_file("failure.csv", "故障ID,型番,故障日\n1,MRI-001,2024-11-15\n")
     
     files = {
         'equipment_file': ('equipment.csv', equipment_file, 'text/csv'),
@@ -179,7 +205,17 @@ def test_file_upload_success():
     assert "target_month" in response_data  # 実行月が記録される
     assert "upload_datetime" in response_data
     assert len(response_data["uploaded_files"]) == 3
-    assert response_data["notification_sent"] in [True, False]  # 通知機能は実装状況による
+    assert response_data["notification_sent"] is False  # 非推奨（送信結果はジョブの結果を参照）
+    assert response_data["job_id"] is not None
+    
+    # アップロード後の処理（台帳の取込）
+    job = wait_for_job(response_data["job_id"], TEST_HEADERS)
+    assert job["status"] == "succeeded"
+    assert job["result"]["notification_sent"] in [True, False]  # 通知機能は実装状況による
+    assert job["job_type"] == "upload_post_process"
+    assert job["medical_id"] == medical_id
+    assert job["result"]["ledger"]["model_count"] == 1
+    assert job["result"]["ledger_error"] is None
     
     # アップロードされたファイルの検証
     for uploaded_file in response_data["uploaded_files"]:
@@ -282,13 +318,106 @@ def test_file_upload_missing_file():
     assert res.status_code == 422  # FastAPIのバリデーションエラー
     print("✅ ファイル不足エラー確認完了")
 
+def test_file_upload_invalid_content():
+    """ファイル内容の検証エラーテスト（行番号付きのエラーを返し、前回のファイルは上書きしない）"""
+    medical_id = 6
+    equipment_path = path_config.uploads_path / str(medical_id) / "equipment.csv"
+    previous_content = equipment_path.read_bytes() if equipment_path.exists() else None
+    
+    files = {
+        'equipment_file': ('equipment.csv', create_test_csv_file("equipment.csv", "製品名,台数\n輸液ポンプ,1\n"), 'text/csv'),
+        'rental_file': ('rental.csv', create_test_csv_file(
+            "rental.csv", "貸出ID,型番,貸出日,返却日\n1,A,2025-01-01,2025-01-03\n2,B,,\n3,C,2025-13-01,\n4,D,2025-01-04\n"
+        ), 'text/csv'),
+        'failure_file': ('failure.csv', create_test_csv_file("failure.csv"), 'text/csv')
+    }
+    res = requests.post(
+        f"{BASE_URL}/files/upload-files/{medical_id}",
+        files=files,
+        data={'upload_user_id': "1"},
+        headers=TEST_HEADERS
+    )
+    assert res.status_code == 400
+    detail = res.json()["detail"]
+    files_with_errors = {result["file_type"]: result for result in detail["files"]}
+    assert set(files_with_errors) == {1, 2}  # 故障履歴は正常
+    
+    # 医療機器台帳: 必須の列が無い
+    assert files_with_errors[1]["errors"][0]["row"] == 1
+    assert files_with_errors[1]["errors"][0]["column"] == "型番"
+    
+    # 貸出履歴: 必須項目・日付形式・列数のエラーを行番号付きで返す
+    rental_errors = [(error["row"], error["column"]) for error in files_with_errors[2]["errors"]]
+    assert rental_errors == [(3, "貸出日"), (4, "貸出日"), (5, None)]
+    assert files_with_errors[2]["total_rows"] == 4
+    
+    # 前回のファイルは上書きしない
+    current_content = equipment_path.read_bytes() if equipment_path.exists() else None
+    assert current_content == previous_content
+    assert not list(equipment_path.parent.glob("*.uploading"))  # 一時ファイルは削除済み
+    print(f"✅ ファイル内容の検証エラー: {rental_errors}")
+
+def test_upload_validation_chunks(tmp_path):
+    """チャンク単位の照合（bytes のメソッド）で誤りを見逃さず、誤りのあるチャンクは行番号付きのエラーを返すこと"""
+    from src.utils.upload_validation import validate_upload_file
+
+    header = "貸出ID,型番,貸出日,返却日"
+    valid_rows = [f"{i},MODEL-{i},2024/1/{i % 28 + 1},{'' if i % 3 else '2024-12-31'}" for i in range(1, 201)]
+    cases = {
+        "lf": ("\n".join([header] + valid_rows) + "\n", []),
+        "crlf_no_final_newline": ("\r\n".join([header] + valid_rows), []),
+        # 1行の列数の過不足が他の行で相殺される場合
+        "offset_columns": ("\n".join([header] + valid_rows[:100] + ["101,A,2024-01-01,,", "102,2024-01-01"] + valid_rows[102:]) + "\n",
+                           [(102, None), (103, None)]),
+        "mixed_newline": ("\r\n".join([header] + valid_rows[:150]) + "\n" + "\n".join(valid_rows[150:]) + "\n", []),
+        "invalid_date": ("\n".join([header] + valid_rows[:180] + ["181,A,2024-02-30x,"] + valid_rows[181:]) + "\n",
+                         [(182, "貸出日")]),
+        "empty_required": ("\n".join([header] + valid_rows[:50] + ["51,A,,"] + valid_rows[51:]) + "\n", [(52, "貸出日")]),
+    }
+    for name, (content, expected) in cases.items():
+        path = tmp_path / f"{name}.csv"
+        path.write_bytes(content.encode("utf-8"))
+        result = validate_upload_file(path, 2, chunk_bytes=512)
+        assert [(error.row, error.column) for error in result.errors] == expected, name
+        assert result.total_rows == 200, name
+
+def test_file_upload_concurrent_same_facility():
+    """同じ医療機関への同時アップロードで一時ファイルが競合しないテスト"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    medical_id = 6
+    # 一時ファイルの書き込み・検証の時間を確保するため行数を多めにする
+    equipment = "型番,製品名,台数\n" + "".join(f"MODEL-{i:05d},テスト機器,1\n" for i in range(20000))
+
+    def upload(_):
+        files = {
+            'equipment_file': ('equipment.csv', create_test_csv_file("equipment.csv", equipment), 'text/csv'),
+            'rental_file': ('rental.csv', create_test_csv_file("rental.csv"), 'text/csv'),
+            'failure_file': ('failure.csv', create_test_csv_file("failure.csv"), 'text/csv')
+        }
+        return requests.post(
+            f"{BASE_URL}/files/upload-files/{medical_id}",
+            files=files,
+            data={'upload_user_id': "1"},
+            headers=TEST_HEADERS
+        )
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        responses = list(executor.map(upload, range(4)))
+    assert [res.status_code for res in responses] == [200] * 4, [res.text for res in responses]
+    for res in responses:
+        assert wait_for_job(res.json()["job_id"], TEST_HEADERS)["status"] == "succeeded"
+    upload_dir = path_config.uploads_path / str(medical_id)
+    assert not list(upload_dir.glob("*.uploading"))  # 一時ファイルは残らない
+    print("✅ 同時アップロード: 4件とも成功")
+
 def test_file_upload_overwrite():
     """ファイル上書きテスト"""
     medical_id = 6
     upload_user_id = "1"
     
     # 1回目のアップロード
-    equipment_file1 = create_test_csv_file("equipment_v1.csv", "ID,名前\\n1,初回機器\\n")
+    equipment_file1 = create_test_csv_file("equipment_v1.csv", "型番,名前\n1,初回機器\n")
     rental_file1 = create_test_csv_file("rental_v1.csv")
     failure_file1 = create_test_csv_file("failure_v1.csv")
     
@@ -314,7 +443,7 @@ def test_file_upload_overwrite():
     print(f"✅ 1回目アップロード成功: {len(response1['uploaded_files'])}件")
     
     # 2回目のアップロード（上書き）
-    equipment_file2 = create_test_csv_file("equipment_v2.csv", "ID,名前\\n1,更新済み機器\\n")
+    equipment_file2 = create_test_csv_file("equipment_v2.csv", "型番,名前\n1,更新済み機器\n")
     rental_file2 = create_test_csv_file("rental_v2.csv")
     failure_file2 = create_test_csv_file("failure_v2.csv")
     
@@ -481,6 +610,135 @@ def test_system_file_download_invalid_file_type():
     assert download_res.status_code == 400
     print("✅ 無効なファイル種別テスト成功: ファイル種別99で400エラー")
 
+def test_ingest_equipment_ledger():
+    """医療機器台帳ファイルの取込テスト（アップロード後のジョブによる取込と再取込）"""
+    from src.database import SessionLocal
+    from src.models.pg_optigate.medical_equipment_classification_stat import MedicalEquipmentClassificationStat
+    from src.models.pg_optigate.medical_equipment_ledger import MedicalEquipmentLedger
+
+    medical_id = 6
+    system_headers = {"X-System-Key": "optiserve-internal-system-key-2025"}
+
+    def ledger_rows():
+        db = SessionLocal()
+        try:
+            return {
+                row.model_number: row
+                for row in db.query(MedicalEquipmentLedger).filter(MedicalEquipmentLedger.medical_id == medical_id)
+            }
+        finally:
+            db.close()
+
+    # Shift_JIS（cp932）・日本語の列名のファイルをアップロード
+    equipment_csv = (
+        "型番,製品名,メーカー名,分類\n"
+        "TEST-A,テスト輸液ポンプ,テストメーカー,テスト分類\n"
+        "TEST-A,テスト輸液ポンプ,テストメーカー,テスト分類\n"
+        "TEST-B,テストシリンジポンプ,テストメーカー,\n"
+        "TEST-C,テスト心電計,テストメーカー,\n"
+        "不明,型番不明の機器,テストメーカー,\n"
+    ).encode("cp932")
+    rental_csv = "貸出ID,型番,貸出日\n1,TEST-A,2025-01-01\n".encode("cp932")
+    failure_csv = "故障ID,型番,故障日\n1,TEST-B,2025-01-02\n".encode("cp932")
+
+    files = {
+        'equipment_file': ('equipment.csv', io.BytesIO(equipment_csv), 'text/csv'),
+        'rental_file': ('rental.csv', io.BytesIO(rental_csv), 'text/csv'),
+        'failure_file': ('failure.csv', io.BytesIO(failure_csv), 'text/csv')
+    }
+    try:
+        res = requests.post(
+            f"{BASE_URL}/files/upload-files/{medical_id}",
+            files=files,
+            data={'upload_user_id': "1"},
+            headers=TEST_HEADERS
+        )
+        assert res.status_code == 200
+
+        # ジョブによる取込完了を待つ
+        job = wait_for_job(res.json()["job_id"], TEST_HEADERS)
+        assert job["status"] == "succeeded"
+        # 先行するアップロードのジョブが同じファイルを取り込んでいる場合があるため、件数は台帳で確認
+        assert job["result"]["ledger"]["model_count"] == 3
+        rows = ledger_rows()
+        assert set(rows) == {"TEST-A", "TEST-B", "TEST-C"}
+        assert rows["TEST-A"].stock_quantity == 2
+        assert rows["TEST-A"].product_name == "テスト輸液ポンプ"
+        # 貸出・故障履歴に記録のある型番のみ分析対象
+        assert rows["TEST-A"].is_included and rows["TEST-B"].is_included
+        assert not rows["TEST-C"].is_included
+        ledger_id_a = rows["TEST-A"].ledger_id
+
+        # 変更なしの再取込
+        res = requests.post(f"{BASE_URL}/files/system/ingest-equipment/{medical_id}", headers=system_headers)
+        assert res.status_code == 200
+        result = res.json()
+        assert result["encoding"] == "cp932"
+        assert result["total_rows"] == 5
+        assert result["skipped_rows"] == 1
+        assert result["unchanged_count"] == 3
+        assert result["inserted_count"] == result["updated_count"] == result["deleted_count"] == 0
+        assert result["unmatched_classification_count"] == 1
+
+        # 1件更新・1件削除・1件追加（UTF-8・英語の列名）
+        equipment_path = path_config.uploads_path / str(medical_id) / "equipment.csv"
+        equipment_path.write_text(
+            "model_number,product_name,maker_name,stock_quantity\n"
+            "TEST-A,テスト輸液ポンプ,テストメーカー,2\n"
+            "TEST-B,テストシリンジポンプ改,テストメーカー,1\n"
+            "TEST-D,テスト除細動器,テストメーカー,1\n",
+            encoding="utf-8"
+        )
+        res = requests.post(f"{BASE_URL}/files/system/ingest-equipment/{medical_id}", headers=system_headers)
+        assert res.status_code == 200
+        result = res.json()
+        assert result["inserted_count"] == 1
+        assert result["deleted_count"] == 1
+        # TEST-A は分類名の列が無くなったため機器分類IDが変わらず（None）変更なし
+        assert result["updated_count"] == 1
+        assert result["unchanged_count"] == 1
+
+        rows = ledger_rows()
+        assert set(rows) == {"TEST-A", "TEST-B", "TEST-D"}
+        assert rows["TEST-A"].ledger_id == ledger_id_a  # 既存の行は残る
+        assert rows["TEST-B"].product_name == "テストシリンジポンプ改"
+
+        # 機器分類別の集計値に取込の増減が反映される（TEST-A・TEST-B が分析対象）
+        res = requests.get(
+            f"{BASE_URL}/medical-equipment-analysis-settings/summary?medical_id={medical_id}", headers=TEST_HEADERS
+        )
+        assert res.status_code == 200
+        summary = res.json()
+        assert summary["ledger_count"] == 3
+        assert summary["stock_quantity"] == 4
+        assert summary["included_count"] == 2
+        assert summary["included_stock_quantity"] == 3
+        assert [item["classification_id"] for item in summary["items"]] == [None]
+
+        # 型番の列が無いファイルは取込を中止（既存の台帳は変更しない）
+        equipment_path.write_text("機器ID,機器名,設置日\n1,MRI,2024-01-01\n", encoding="utf-8")
+        res = requests.post(f"{BASE_URL}/files/system/ingest-equipment/{medical_id}", headers=system_headers)
+        assert res.status_code == 400
+        assert len(ledger_rows()) == 3
+
+        # 認証エラー
+        res = requests.post(f"{BASE_URL}/files/system/ingest-equipment/{medical_id}")
+        assert res.status_code == 401
+    finally:
+        db = SessionLocal()
+        try:
+            db.query(MedicalEquipmentLedger).filter(
+                MedicalEquipmentLedger.medical_id == medical_id
+            ).delete(synchronize_session=False)
+            db.query(MedicalEquipmentClassificationStat).filter(
+                MedicalEquipmentClassificationStat.medical_id == medical_id
+            ).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    print("✅ 医療機器台帳取込テスト成功: 登録・更新・削除の差分のみ反映")
+
 def test_publish_reports_unauthorized():
     """レポート公開エンドポイント認証エラーテスト"""
     medical_id = 6
@@ -547,10 +805,17 @@ def test_publish_onpremise_reports():
         headers=headers
     )
     
-    if publish_res.status_code != 200:
+    if publish_res.status_code != 202:
         print(f"❌ エラー詳細: {publish_res.status_code}, {publish_res.text}")
-    assert publish_res.status_code == 200
-    response_data = publish_res.json()
+    assert publish_res.status_code == 202
+    job = publish_res.json()
+    assert job["job_type"] == "publish_reports"
+    assert job["status"] in ("queued", "running", "succeeded")
+    
+    # ジョブの完了を待ち、結果（公開結果）を確認
+    job = wait_for_job(job["job_id"], headers)
+    assert job["status"] == "succeeded", job["last_error"]
+    response_data = job["result"]
     
     # レスポンス内容確認
     assert response_data["medical_id"] == medical_id
@@ -19,6 +19,7 @@ import random
 import sys
 import os
 from pathlib import Path
+from api_auth import admin_headers, create_user_headers
 
 # プロジェクトルートをsys.pathに追加
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -29,7 +30,7 @@ API_HOST = os.environ.get("OPTISERVE_API_HOST", "localhost")
 BASE_URL = f"http://{API_HOST}:8000/api/v1"
 
 # テスト用の共通ヘッダー（認証情報）
-TEST_HEADERS = {"X-User-Id": "900001"}  # システム管理者のuser_id
+TEST_HEADERS = admin_headers()  # システム管理者のセッショントークン
 
 def cleanup_test_data():
     """テスト実行前のクリーンアップ - テスト用レポート選択データを削除"""
@@ -260,6 +261,76 @@ def test_update_report_selection():
 
     print(f"✅ レポート選択情報更新成功: 更新数={data['created_count']}")
 
+def test_report_selection_version_conflict():
+    """レポート選択情報の差分更新と楽観的排他制御テスト"""
+    medical_id = 5
+    url = f"{BASE_URL}/equipment-classifications/report-selection/{medical_id}"
+
+    classifications_res = requests.get(f"{BASE_URL}/equipment-classifications/{medical_id}?limit=10", headers=TEST_HEADERS)
+    classifications = classifications_res.json()["items"]
+    if len(classifications) < 5:
+        pytest.skip("テスト用機器分類データが不足しています")
+    ids = [item["classification_id"] for item in classifications[:5]]
+
+    version = requests.get(url, headers=TEST_HEADERS).json()["version"]
+    res = requests.post(url, json={"classification_ids": ids[:4], "version": version}, headers=TEST_HEADERS)
+    assert res.status_code == 200
+    data = res.json()
+    assert data["version"] == version + 1
+
+    # rank2,3のみ変更し、rank4を削除
+    new_ids = [ids[0], ids[2], ids[1]]
+    res = requests.post(url, json={"classification_ids": new_ids, "version": data["version"]}, headers=TEST_HEADERS)
+    assert res.status_code == 200
+    data = res.json()
+    assert (data["updated_count"], data["deleted_count"], data["version"]) == (2, 1, version + 2)
+    assert [item["classification_id"] for item in data["selections"]] == new_ids
+
+    # 古いバージョンでの保存・削除は409で、選択情報は変わらない
+    res = requests.post(url, json={"classification_ids": ids[3:], "version": version + 1}, headers=TEST_HEADERS)
+    assert res.status_code == 409
+    res = requests.delete(url, params={"version": version + 1}, headers=TEST_HEADERS)
+    assert res.status_code == 409
+    get_data = requests.get(url, headers=TEST_HEADERS).json()
+    assert get_data["version"] == version + 2
+    assert [item["classification_id"] for item in get_data["selections"]] == new_ids
+
+    print(f"✅ レポート選択情報の楽観的排他制御成功: version={get_data['version']}")
+
+def test_get_all_report_selections_for_system():
+    """全医療機関のレポート選択情報取得テスト（システム用・差分取得）"""
+    medical_id = 5
+    url = f"{BASE_URL}/equipment-classifications/system/report-selections"
+    system_headers = {"X-System-Key": "optiserve-internal-system-key-2025"}
+
+    res = requests.get(url, headers=TEST_HEADERS)
+    assert res.status_code == 401
+
+    res = requests.get(url, headers=system_headers)
+    assert res.status_code == 200
+    data = res.json()
+    assert data["total"] == len(data["items"])
+    assert [item["medical_id"] for item in data["items"]] == sorted(item["medical_id"] for item in data["items"])
+
+    # 医療機関ごとの取得APIと同じ内容
+    summary = next(item for item in data["items"] if item["medical_id"] == medical_id)
+    single = requests.get(f"{BASE_URL}/equipment-classifications/report-selection/{medical_id}", headers=TEST_HEADERS).json()
+    assert summary["max_count"] == single["max_count"]
+    assert summary["version"] == single["version"]
+    assert summary["selections"] == single["selections"]
+
+    # 前回取得以降に更新された医療機関のみ取得
+    res = requests.get(url, params={"updated_since": data["generated_at"]}, headers=system_headers)
+    assert medical_id not in [item["medical_id"] for item in res.json()["items"]]
+    ids = [item["classification_id"] for item in single["selections"]][::-1]
+    requests.post(f"{BASE_URL}/equipment-classifications/report-selection/{medical_id}",
+                  json={"classification_ids": ids}, headers=TEST_HEADERS)
+    res = requests.get(url, params={"updated_since": data["generated_at"]}, headers=system_headers)
+    changed = {item["medical_id"]: item for item in res.json()["items"]}
+    assert [item["classification_id"] for item in changed[medical_id]["selections"]] == ids
+
+    print(f"✅ 全医療機関レポート選択情報取得成功: 件数={data['total']}, 差分={len(changed)}")
+
 def test_create_report_selection_invalid_classification_ids():
     """無効な機器分類IDでの登録エラーテスト"""
     medical_id = 5
@@ -353,6 +424,217 @@ def test_report_selection_nonexistent_medical_id():
 
     print("✅ 存在しない医療機関IDでのレポート選択エラーテスト成功")
 
+def test_get_equipment_classifications_etag():
+    """機器分類一覧・ツリーのETag（304 Not Modified）テスト"""
+    medical_id = 5
+
+    res = requests.get(f"{BASE_URL}/equipment-classifications/{medical_id}", headers=TEST_HEADERS)
+    assert res.status_code == 200
+    etag = res.headers["ETag"]
+
+    res = requests.get(f"{BASE_URL}/equipment-classifications/{medical_id}",
+                       headers={**TEST_HEADERS, "If-None-Match": etag})
+    assert res.status_code == 304
+    assert res.content == b""
+
+    res = requests.get(f"{BASE_URL}/equipment-classifications/{medical_id}/tree", headers=TEST_HEADERS)
+    assert res.status_code == 200
+    assert res.headers["ETag"] == etag
+    res = requests.get(f"{BASE_URL}/equipment-classifications/{medical_id}/tree",
+                       headers={**TEST_HEADERS, "If-None-Match": f"W/{etag}"})
+    assert res.status_code == 304
+
+    print("✅ ETagテスト成功")
+
+def test_get_equipment_classification_tree():
+    """機器分類ツリー取得テスト（一覧と同じ分類が入れ子で返る）"""
+    medical_id = 5
+
+    res = requests.get(f"{BASE_URL}/equipment-classifications/{medical_id}/tree", headers=TEST_HEADERS)
+    assert res.status_code == 200
+    data = res.json()
+    assert data["medical_id"] == medical_id
+    assert data["version"] == res.headers["ETag"].strip('"')
+
+    def walk(nodes, parent_id):
+        for node in nodes:
+            if parent_id is not None:
+                assert node["parent_classification_id"] == parent_id
+            yield node
+            yield from walk(node["children"], node["classification_id"])
+
+    nodes = list(walk(data["items"], None))
+    assert len(nodes) == data["total"]
+
+    flat = requests.get(f"{BASE_URL}/equipment-classifications/{medical_id}?limit=1000", headers=TEST_HEADERS).json()
+    assert data["total"] == flat["total"]
+    assert {n["classification_id"] for n in nodes} == {i["classification_id"] for i in flat["items"]}
+
+    res = requests.get(f"{BASE_URL}/equipment-classifications/999/tree", headers=TEST_HEADERS)
+    assert res.status_code == 404
+
+    print(f"✅ 機器分類ツリー取得成功: total={data['total']}, 大分類={len(data['items'])}件")
+
+def test_classification_cache_invalidated_on_commit():
+    """機器分類をセッション経由で更新した場合、コミット時にキャッシュが破棄されるテスト（プロセス内）"""
+    from datetime import datetime
+    from src.database import SessionLocal
+    from src.models.pg_optigate.mst_equipment_classification import MstEquipmentClassification
+    from src.utils.classification_cache import get_cached_classification_tree, load_classification_tree
+
+    medical_id = 5
+    db = SessionLocal()
+    try:
+        before = load_classification_tree(medical_id, db)
+        assert get_cached_classification_tree(medical_id, db) is before
+
+        now = datetime.now()
+        classification = MstEquipmentClassification(
+            medical_id=medical_id, classification_level=1, classification_name="pytestキャッシュ確認",
+            reg_user_id="900001", regdate=now, update_user_id="900001", lastupdate=now
+        )
+        db.add(classification)
+        db.commit()
+        assert get_cached_classification_tree(medical_id, db) is None
+
+        after = load_classification_tree(medical_id, db)
+        assert after.version != before.version
+        assert len(after.items) == len(before.items) + 1
+
+        db.delete(classification)
+        db.commit()
+        assert get_cached_classification_tree(medical_id, db) is None
+        assert load_classification_tree(medical_id, db).version == before.version
+    finally:
+        db.close()
+
+def test_classification_cache_detects_external_changes():
+    """他プロセス（セッションのイベントを経由しない更新）で機器分類が変更された場合、件数と最終更新日時の確認でキャッシュを使用しないテスト"""
+    from datetime import datetime
+    from sqlalchemy import text
+    from src.database import SessionLocal, engine
+    from src.utils.classification_cache import get_cached_classification_tree, load_classification_tree
+
+    medical_id = 5
+    db = SessionLocal()
+    try:
+        before = load_classification_tree(medical_id, db)
+        assert get_cached_classification_tree(medical_id, db) is before
+        db.commit()
+
+        with engine.begin() as conn:
+            conn.execute(text(
+                "INSERT INTO mst_equipment_classification (medical_id, classification_level, classification_name, "
+                "reg_user_id, regdate, update_user_id, lastupdate) "
+                "VALUES (:medical_id, 1, 'pytest他プロセス更新', '900001', :now, '900001', :now)"
+            ), {"medical_id": medical_id, "now": datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")})
+        try:
+            assert get_cached_classification_tree(medical_id, db) is None
+            after = load_classification_tree(medical_id, db)
+            assert len(after.items) == len(before.items) + 1
+            assert after.etag != before.etag
+            db.commit()
+        finally:
+            with engine.begin() as conn:
+                conn.execute(text(
+                    "DELETE FROM mst_equipment_classification "
+                    "WHERE medical_id = :medical_id AND classification_name = 'pytest他プロセス更新'"
+                ), {"medical_id": medical_id})
+        assert load_classification_tree(medical_id, db).version == before.version
+    finally:
+        db.close()
+
+def test_get_classification_descendants_and_ancestors():
+    """機器分類の子孫・祖先取得テスト（閉包テーブル）"""
+    medical_id = 5
+
+    tree = requests.get(f"{BASE_URL}/equipment-classifications/{medical_id}/tree", headers=TEST_HEADERS).json()
+    root = next((node for node in tree["items"] if node["children"]), None)
+    if root is None:
+        pytest.skip("子分類を持つ大分類が存在しません")
+
+    def collect(node):
+        for child in node["children"]:
+            yield child["classification_id"]
+            yield from collect(child)
+
+    res = requests.get(f"{BASE_URL}/equipment-classifications/{medical_id}/{root['classification_id']}/descendants",
+                       headers=TEST_HEADERS)
+    assert res.status_code == 200
+    data = res.json()
+    assert data["direction"] == "descendants"
+    assert {item["classification_id"] for item in data["items"]} == set(collect(root))
+    assert all(item["depth"] >= 1 for item in data["items"])
+
+    leaf = root["children"][0]
+    res = requests.get(f"{BASE_URL}/equipment-classifications/{medical_id}/{leaf['classification_id']}/ancestors",
+                       params={"include_self": True}, headers=TEST_HEADERS)
+    assert res.status_code == 200
+    items = res.json()["items"]
+    assert [item["classification_id"] for item in items] == [leaf["classification_id"], root["classification_id"]]
+    assert [item["depth"] for item in items] == [0, 1]
+
+    res = requests.get(f"{BASE_URL}/equipment-classifications/{medical_id}/999999/descendants", headers=TEST_HEADERS)
+    assert res.status_code == 404
+
+    print(f"✅ 子孫・祖先取得成功: 大分類={root['classification_name']}, 子孫={len(data['items'])}件")
+
+def test_import_equipment_classifications():
+    """機器分類マスタ一括取込テスト（登録・再取込・エラー行）"""
+    medical_id = 5
+    suffix = random.randint(100000, 999999)
+    csv_text = (
+        "classification_id,medical_id,classification_level,classification_name,parent_id,publication_classification_id\n"
+        f"3,{medical_id},3,pytest取込小{suffix},2,\n"   # 親分類より前の行でも解決される
+        f"1,{medical_id},1,pytest取込大{suffix},,\n"
+        f"2,{medical_id},2,pytest取込中{suffix},1,\n"
+    )
+    files = {"file": ("classification.csv", csv_text.encode("utf-8"), "text/csv")}
+
+    before = requests.get(f"{BASE_URL}/equipment-classifications/{medical_id}/tree", headers=TEST_HEADERS).json()
+
+    res = requests.post(f"{BASE_URL}/equipment-classifications/import", files=files, headers=TEST_HEADERS)
+    assert res.status_code == 200
+    data = res.json()
+    assert data["committed"] is True
+    assert (data["total_rows"], data["inserted_count"], data["error_count"]) == (3, 3, 0)
+
+    # 取込結果はキャッシュ破棄によりツリーに反映され、閉包テーブルで子孫を取得できる
+    after = requests.get(f"{BASE_URL}/equipment-classifications/{medical_id}/tree", headers=TEST_HEADERS).json()
+    assert after["total"] == before["total"] + 3
+    root = next(node for node in after["items"] if node["classification_name"] == f"pytest取込大{suffix}")
+    res = requests.get(f"{BASE_URL}/equipment-classifications/{medical_id}/{root['classification_id']}/descendants",
+                       headers=TEST_HEADERS)
+    assert [item["classification_name"] for item in res.json()["items"]] == [f"pytest取込中{suffix}", f"pytest取込小{suffix}"]
+
+    # 同じファイルの再取込は変更なし
+    res = requests.post(f"{BASE_URL}/equipment-classifications/import", files=files, headers=TEST_HEADERS)
+    data = res.json()
+    assert (data["inserted_count"], data["unchanged_count"]) == (0, 3)
+
+    # エラー行があれば登録しない（all_or_nothing）
+    error_csv = (
+        "classification_id,medical_id,classification_level,classification_name,parent_id\n"
+        f"1,{medical_id},1,pytest取込エラー{suffix},,\n"
+        f"2,{medical_id},2,pytest取込エラー中{suffix},99,\n"
+        f"3,{medical_id},4,pytest取込エラーレベル{suffix},,\n"
+    )
+    res = requests.post(f"{BASE_URL}/equipment-classifications/import",
+                        files={"file": ("error.csv", error_csv.encode("utf-8"), "text/csv")}, headers=TEST_HEADERS)
+    data = res.json()
+    assert data["committed"] is False
+    assert data["error_count"] == 2
+    assert [error["row"] for error in data["errors"]] == [3, 4]
+
+    # 管理者以外は取込不可、CSV/XLSX以外は400
+    res = requests.post(f"{BASE_URL}/equipment-classifications/import", files=files, headers=create_user_headers())
+    assert res.status_code == 403
+    res = requests.post(f"{BASE_URL}/equipment-classifications/import",
+                        files={"file": ("classification.pdf", b"dummy", "application/pdf")}, headers=TEST_HEADERS)
+    assert res.status_code == 400
+
+    print(f"✅ 機器分類一括取込成功: suffix={suffix}")
+
 if __name__ == "__main__":
     print("機器分類・レポート選択APIテストを実行します...")
     print("前提: APIサーバーがlocalhost:8000で起動していること")
@@ -10,6 +10,7 @@ test_medical_equipment_analysis_api.py
 3. 分類上書き更新API
 4. デフォルト復帰API（個別・全件）
 5. エラーケースのテスト
+6. 機器分類別の集計API
 """
 import os
 import pytest
@@ -19,6 +20,7 @@ import random
 import string
 from datetime import datetime
 from typing import Dict, Any, List
+from api_auth import admin_headers
 
 
 # テスト設定
@@ -26,7 +28,7 @@ from typing import Dict, Any, List
 API_HOST = os.environ.get("OPTISERVE_API_HOST", "localhost")
 BASE_URL = f"http://{API_HOST}:8000"
 API_PREFIX = "/api/v1/medical-equipment-analysis-settings"
-TEST_HEADERS = {"X-User-Id": "900001"}  # システム管理者のuser_id
+TEST_HEADERS = admin_headers()  # システム管理者のセッショントークン
 
 # テスト用のダミーデータ
 TEST_MEDICAL_ID = 5
@@ -403,6 +405,124 @@ class TestMedicalEquipmentAnalysisAPI:
 
         print(f"✅ 期待通りのエラー: {error_data['detail']}")
 
+    def test_classification_filter_includes_descendants(self):
+        """分類IDフィルタが子孫の分類の機器を含むテスト（閉包テーブル）"""
+        print("\n=== 分類IDフィルタ（子孫を含む）テスト ===")
+
+        response = requests.get(f"{self.base_url}?medical_id={TEST_MEDICAL_ID}&limit=100", headers=TEST_HEADERS)
+        assert response.status_code == 200
+        items = [item for item in response.json()["items"] if item["default_classification_id"]]
+        if not items:
+            pytest.skip("分類付きのテスト対象データが存在しません")
+        child_id = items[0]["default_classification_id"]
+
+        # 機器の分類の最上位（大分類）を取得
+        response = requests.get(
+            f"{BASE_URL}/api/v1/equipment-classifications/{TEST_MEDICAL_ID}/{child_id}/ancestors",
+            headers=TEST_HEADERS
+        )
+        assert response.status_code == 200
+        ancestors = response.json()["items"]
+        if not ancestors:
+            pytest.skip("親分類を持つ分類が存在しません")
+        root_id = ancestors[-1]["classification_id"]
+
+        child = requests.get(f"{self.base_url}?medical_id={TEST_MEDICAL_ID}&classification_id={child_id}&limit=1",
+                             headers=TEST_HEADERS).json()
+        subtree = requests.get(f"{self.base_url}?medical_id={TEST_MEDICAL_ID}&classification_id={root_id}&limit=1000",
+                               headers=TEST_HEADERS).json()
+        exact = requests.get(
+            f"{self.base_url}?medical_id={TEST_MEDICAL_ID}&classification_id={root_id}&include_descendants=false&limit=1",
+            headers=TEST_HEADERS
+        ).json()
+
+        assert subtree["total_count"] >= child["total_count"] > 0
+        assert subtree["total_count"] > exact["total_count"]
+
+        # 大分類の子孫に機器の分類が含まれる
+        response = requests.get(
+            f"{BASE_URL}/api/v1/equipment-classifications/{TEST_MEDICAL_ID}/{root_id}/descendants",
+            headers=TEST_HEADERS
+        )
+        descendant_ids = {c["classification_id"] for c in response.json()["items"]}
+        assert child_id in descendant_ids
+        assert all(item["default_classification_id"] in descendant_ids | {root_id} for item in subtree["items"]
+                   if not item["has_override"])
+
+        print(f"✅ 大分類ID={root_id}: 子孫を含む{subtree['total_count']}件, 指定分類のみ{exact['total_count']}件")
+
+    def get_summary(self):
+        response = requests.get(f"{self.base_url}/summary?medical_id={TEST_MEDICAL_ID}", headers=TEST_HEADERS)
+        assert response.status_code == 200
+        summary = response.json()
+        return summary, {item["classification_id"]: item for item in summary["items"]}
+
+    def test_equipment_stats_summary(self):
+        """機器分類別の集計テスト（一覧の有効値の集計と一致し、分析設定の更新・削除で増減する）"""
+        print("\n=== 機器分類別の集計テスト ===")
+
+        # 一覧の有効値から集計した値と一致する
+        items = []
+        while True:
+            page = requests.get(f"{self.base_url}?medical_id={TEST_MEDICAL_ID}&skip={len(items)}&limit=1000",
+                                headers=TEST_HEADERS).json()
+            items.extend(page["items"])
+            if not page["has_next"]:
+                break
+        if not items:
+            pytest.skip("テスト対象データが存在しません")
+
+        summary, by_classification = self.get_summary()
+        assert summary["medical_id"] == TEST_MEDICAL_ID
+        assert summary["ledger_count"] == len(items)
+        assert summary["stock_quantity"] == sum(item["stock_quantity"] for item in items)
+        assert summary["included_count"] == sum(1 for item in items if item["effective_is_included"])
+        assert summary["override_count"] == 0
+        for classification_id, stat in by_classification.items():
+            members = [item for item in items if item["effective_classification_id"] == classification_id]
+            assert stat["ledger_count"] == len(members)
+            assert stat["included_stock_quantity"] == sum(
+                item["stock_quantity"] for item in members if item["effective_is_included"]
+            )
+
+        # 分析対象フラグの上書き
+        target = next(item for item in items if item["default_classification_id"])
+        source_id = target["default_classification_id"]
+        other_id = next((item["default_classification_id"] for item in items
+                         if item["default_classification_id"] not in (None, source_id)), None)
+        response = requests.put(f"{self.base_url}/{target['ledger_id']}/analysis-target", headers=TEST_HEADERS,
+                                json={"override_is_included": not target["default_is_included"], "note": "集計テスト"})
+        assert response.status_code == 200
+
+        after, after_by_classification = self.get_summary()
+        sign = -1 if target["default_is_included"] else 1
+        assert after["override_count"] == 1
+        assert after["included_count"] == summary["included_count"] + sign
+        assert after_by_classification[source_id]["included_stock_quantity"] == (
+            by_classification[source_id]["included_stock_quantity"] + sign * target["stock_quantity"]
+        )
+
+        # 分類の上書き（集計が上書き後の分類に移る）
+        if other_id is not None:
+            response = requests.put(f"{self.base_url}/{target['ledger_id']}/classification", headers=TEST_HEADERS,
+                                    json={"override_classification_id": other_id, "note": "集計テスト"})
+            assert response.status_code == 200
+            moved, moved_by_classification = self.get_summary()
+            assert moved["ledger_count"] == summary["ledger_count"]
+            assert moved_by_classification.get(source_id, {"ledger_count": 0})["ledger_count"] == (
+                by_classification[source_id]["ledger_count"] - 1
+            )
+            assert moved_by_classification[other_id]["ledger_count"] == by_classification[other_id]["ledger_count"] + 1
+
+        # デフォルトに復帰すると元の集計値に戻る
+        response = requests.delete(f"{self.base_url}/{target['ledger_id']}", headers=TEST_HEADERS)
+        assert response.status_code == 200
+        restored, restored_by_classification = self.get_summary()
+        assert restored == summary
+
+        print(f"✅ 集計値: 機器数={summary['ledger_count']}, 分析対象={summary['included_count']}, "
+              f"分類数={len(summary['items'])}")
+
 
 def run_all_tests():
     """全テストを実行"""
@@ -419,7 +539,9 @@ def run_all_tests():
         test_instance.test_restore_to_default_single,
         test_instance.test_restore_to_default_all,
         test_instance.test_invalid_ledger_id_error,
-        test_instance.test_invalid_classification_id_error
+        test_instance.test_invalid_classification_id_error,
+        test_instance.test_classification_filter_includes_descendants,
+        test_instance.test_equipment_stats_summary
     ]
 
     passed = 0
@@ -0,0 +1,121 @@
+"""test_08_sync_api.py
+
+pytestを使用して差分同期API（オンプレミスシステム用）のテストを行います。
+
+実行方法:
+- startup_optiserve.shを実行してAPIサーバーを起動
+- pytest tests/test_08_sync_api.py -v
+
+前提条件:
+- medical_id=5でテスト用医療機関と機器分類が登録済みであること
+"""
+
+import pytest
+import requests
+import os
+from api_auth import admin_headers
+
+# 環境に応じたAPI接続先の自動判定
+API_HOST = os.environ.get("OPTISERVE_API_HOST", "localhost")
+BASE_URL = f"http://{API_HOST}:8000/api/v1"
+
+# テスト用の共通ヘッダー（認証情報）
+TEST_HEADERS = admin_headers()  # システム管理者のセッショントークン
+SYSTEM_HEADERS = {"X-System-Key": "optiserve-internal-system-key-2025"}
+
+
+def fetch_all_changes(table_name, params, limit):
+    """next_cursor をたどって全ページを取得する"""
+    res = requests.get(f"{BASE_URL}/sync/{table_name}/changes", params={**params, "limit": limit}, headers=SYSTEM_HEADERS)
+    assert res.status_code == 200
+    pages = [res.json()]
+    while pages[-1]["has_more"]:
+        res = requests.get(f"{BASE_URL}/sync/{table_name}/changes",
+                           params={"cursor": pages[-1]["next_cursor"], "limit": limit}, headers=SYSTEM_HEADERS)
+        assert res.status_code == 200
+        pages.append(res.json())
+    assert len({page["watermark"] for page in pages}) == 1  # 全ページで同じ watermark
+    return [item for page in pages for item in page["items"]], pages[-1]["watermark"], len(pages)
+
+
+def test_sync_requires_system_key():
+    """システム認証キーが無い場合は401"""
+    res = requests.get(f"{BASE_URL}/sync/mst_user/changes", headers=TEST_HEADERS)
+    assert res.status_code == 401
+    print("✅ システム認証キー必須の確認完了")
+
+
+def test_sync_tables():
+    """対象テーブル一覧（パスワードは同期しない）"""
+    res = requests.get(f"{BASE_URL}/sync/tables", headers=SYSTEM_HEADERS)
+    assert res.status_code == 200
+    tables = {table["table_name"]: table for table in res.json()}
+    assert tables["mst_user"]["primary_key"] == ["user_id"]
+    assert "password" not in tables["mst_user"]["columns"]
+    assert tables["equipment_classification_report_selection"]["primary_key"] == ["medical_id", "rank"]
+
+    res = requests.get(f"{BASE_URL}/sync/mst_user/changes", params={"limit": 5}, headers=SYSTEM_HEADERS)
+    assert all("password" not in item["row"] for item in res.json()["items"])
+    print(f"✅ 差分同期対象テーブル: {list(tables)}")
+
+
+def test_sync_full_snapshot_keyset_pagination():
+    """全件取得（キーセットページング）で重複・欠落なく取得できる"""
+    items, _, page_count = fetch_all_changes("mst_medical_facility", {}, limit=4)
+    medical_ids = [item["key"]["medical_id"] for item in items]
+    assert page_count > 1
+    assert len(medical_ids) == len(set(medical_ids))
+    assert all(item["op"] == "upsert" for item in items)
+    # （lastupdate, 主キー）順
+    order = [(item["changed_at"], item["key"]["medical_id"]) for item in items]
+    assert order == sorted(order)
+
+    single_page, _, _ = fetch_all_changes("mst_medical_facility", {}, limit=1000)
+    assert sorted(medical_ids) == sorted(item["key"]["medical_id"] for item in single_page)
+    print(f"✅ 全件取得成功: 件数={len(items)}, ページ数={page_count}")
+
+
+def test_sync_changes_with_tombstones():
+    """差分取得で削除（トゥームストーン）が返り、再登録すると削除は返らない"""
+    medical_id = 5
+    url = f"{BASE_URL}/equipment-classifications/report-selection/{medical_id}"
+    classifications = requests.get(f"{BASE_URL}/equipment-classifications/{medical_id}?limit=3", headers=TEST_HEADERS).json()["items"]
+    if len(classifications) < 3:
+        pytest.skip("テスト用機器分類データが不足しています")
+    ids = [item["classification_id"] for item in classifications]
+
+    since = requests.get(f"{BASE_URL}/sync/equipment_classification_report_selection/changes",
+                         params={"limit": 1}, headers=SYSTEM_HEADERS).json()["watermark"]
+
+    assert requests.post(url, json={"classification_ids": ids}, headers=TEST_HEADERS).status_code == 200
+    assert requests.post(url, json={"classification_ids": ids[:2]}, headers=TEST_HEADERS).status_code == 200
+
+    items, watermark, _ = fetch_all_changes("equipment_classification_report_selection", {"since": since}, limit=1)
+    upserts = {(item["key"]["medical_id"], item["key"]["rank"]) for item in items if item["op"] == "upsert"}
+    deletes = [item["key"] for item in items if item["op"] == "delete"]
+    assert {(medical_id, 1), (medical_id, 2)} <= upserts
+    assert {"medical_id": medical_id, "rank": 3} in deletes
+    assert all(item["row"] is None for item in items if item["op"] == "delete")
+    assert watermark >= since
+
+    # 再登録された行の削除記録は消える
+    assert requests.post(url, json={"classification_ids": ids}, headers=TEST_HEADERS).status_code == 200
+    items, _, _ = fetch_all_changes("equipment_classification_report_selection", {"since": since}, limit=100)
+    assert {"medical_id": medical_id, "rank": 3} not in [item["key"] for item in items if item["op"] == "delete"]
+
+    requests.delete(url, headers=TEST_HEADERS)
+    print(f"✅ 差分取得成功: upsert={len(upserts)}, delete={len(deletes)}")
+
+
+def test_sync_invalid_requests():
+    """対象外のテーブルは404、不正なカーソルは400"""
+    res = requests.get(f"{BASE_URL}/sync/sync_tombstone/changes", headers=SYSTEM_HEADERS)
+    assert res.status_code == 404
+    res = requests.get(f"{BASE_URL}/sync/mst_user/changes", params={"cursor": "invalid"}, headers=SYSTEM_HEADERS)
+    assert res.status_code == 400
+    print("✅ 不正なリクエストの確認完了")
+
+
+if __name__ == "__main__":
+    print("差分同期APIテストを実行します...")
+    print("前提: APIサーバーがlocalhost:8000で起動していること")
@@ -0,0 +1,264 @@
+"""test_09_job_queue.py
+
+pytestを使用してジョブキュー（src/utils/job_queue.py）とジョブ状態取得APIのテストを行います。
+
+実行方法:
+- startup_optiserve.shを実行してAPIサーバーを起動
+- pytest tests/test_09_job_queue.py -v
+
+前提条件:
+- テスト用のジョブ種別の処理は本テストのプロセス内で登録し、run_pending_jobs() でプロセス内のワーカーとして実行します
+  （APIサーバー内のワーカーは処理を登録していないジョブ種別を取り出さないため、テストのジョブとは競合しません）
+- アップロード後の処理・レポート公開のジョブは tests/test_05_file_management_api.py で確認します
+"""
+
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+import requests
+
+# プロジェクトルートをsys.pathに追加
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.database import SessionLocal
+from src.models.pg_optigate.job_queue import JobQueue
+from src.utils.job_queue import (
+    JobQueueSettings,
+    PermanentJobError,
+    claim_job,
+    complete_job,
+    enqueue_job,
+    job_handler,
+    run_pending_jobs,
+)
+from api_auth import admin_headers
+
+# 環境に応じたAPI接続先の自動判定
+API_HOST = os.environ.get("OPTISERVE_API_HOST", "localhost")
+BASE_URL = f"http://{API_HOST}:8000/api/v1"
+
+# テスト用の共通ヘッダー（認証情報）
+TEST_HEADERS = admin_headers()  # システム管理者のセッショントークン
+SYSTEM_HEADERS = {"X-System-Key": "optiserve-internal-system-key-2025"}
+
+# 再試行を待たずに実行する設定
+HARNESS_SETTINGS = JobQueueSettings(retry_delay_seconds=0, visibility_timeout_seconds=60)
+
+
+@pytest.fixture
+def job_type():
+    """テストごとに一意のジョブ種別（終了時にテストのジョブを削除）"""
+    name = f"test_{uuid.uuid4().hex[:8]}"
+    yield name
+    db = SessionLocal()
+    try:
+        db.query(JobQueue).filter(JobQueue.job_type == name).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def enqueue(job_type, payload=None, **kwargs):
+    db = SessionLocal()
+    try:
+        job = enqueue_job(db, job_type, payload or {}, "900001", **kwargs)
+        db.commit()
+        return job.job_id
+    finally:
+        db.close()
+
+
+def get_job(job_id):
+    db = SessionLocal()
+    try:
+        return db.query(JobQueue).filter(JobQueue.job_id == job_id).first()
+    finally:
+        db.close()
+
+
+def test_jobs_run_in_priority_order(job_type):
+    """優先度の大きい順、同じ優先度は登録順に実行し、結果を記録する"""
+    executed = []
+
+    @job_handler(job_type)
+    def handler(payload, db):
+        executed.append(payload["name"])
+        return {"name": payload["name"]}
+
+    low = enqueue(job_type, {"name": "low"}, priority=0)
+    enqueue(job_type, {"name": "high"}, priority=10)
+    enqueue(job_type, {"name": "middle-1"}, priority=5)
+    enqueue(job_type, {"name": "middle-2"}, priority=5)
+
+    jobs = run_pending_jobs("test-harness", settings=HARNESS_SETTINGS)
+    assert executed == ["high", "middle-1", "middle-2", "low"]
+    assert len(jobs) == 4
+
+    job = get_job(low)
+    assert job.status == "succeeded"
+    assert job.attempts == 1
+    assert job.locked_by is None
+    print(f"✅ 優先度順の実行: {executed}")
+
+
+def test_job_retry_and_failure(job_type):
+    """例外で終了したジョブは最大実行回数まで再試行し、PermanentJobError は再試行しない"""
+    calls = {}
+
+    @job_handler(job_type)
+    def handler(payload, db):
+        calls[payload["name"]] = calls.get(payload["name"], 0) + 1
+        if payload["name"] == "permanent":
+            raise PermanentJobError("入力ファイルの不備")
+        if calls[payload["name"]] < payload["succeed_on"]:
+            raise RuntimeError(f"一時的なエラー {calls[payload['name']]}回目")
+        return {"calls": calls[payload["name"]]}
+
+    flaky = enqueue(job_type, {"name": "flaky", "succeed_on": 2}, max_attempts=3)
+    exhausted = enqueue(job_type, {"name": "exhausted", "succeed_on": 99}, max_attempts=3)
+    permanent = enqueue(job_type, {"name": "permanent"}, max_attempts=3)
+
+    run_pending_jobs("test-harness", settings=HARNESS_SETTINGS)
+
+    job = get_job(flaky)
+    assert job.status == "succeeded"
+    assert job.attempts == 2
+    assert "一時的なエラー 1回目" in job.last_error
+
+    job = get_job(exhausted)
+    assert job.status == "failed"
+    assert job.attempts == 3
+    assert calls["exhausted"] == 3
+
+    job = get_job(permanent)
+    assert job.status == "failed"
+    assert job.attempts == 1
+    assert job.last_error == "入力ファイルの不備"
+    print("✅ 再試行・失敗の確認完了")
+
+
+def test_job_retry_waits_for_delay(job_type):
+    """再試行は retry_delay_seconds × 2^(実行回数-1) 秒後まで取り出さない"""
+    @job_handler(job_type)
+    def handler(payload, db):
+        raise RuntimeError("一時的なエラー")
+
+    job_id = enqueue(job_type, max_attempts=3)
+    jobs = run_pending_jobs("test-harness", settings=JobQueueSettings(retry_delay_seconds=60))
+    assert [job.job_id for job in jobs] == [job_id]
+
+    job = get_job(job_id)
+    assert job.status == "queued"
+    assert job.run_after > datetime.now() + timedelta(seconds=50)
+    print(f"✅ 再試行の待ち時間: run_after={job.run_after}")
+
+
+def test_job_visibility_timeout(job_type):
+    """実行期限を過ぎたジョブは他のワーカーが取り出し、元のワーカーの完了報告は反映しない"""
+    job_handler(job_type)(lambda payload, db: {})
+    job_id = enqueue(job_type, max_attempts=3)
+
+    db = SessionLocal()
+    try:
+        now = datetime.now()
+        first = claim_job(db, "worker-a", [job_type], visibility_timeout=30, now=now)
+        db.commit()
+        assert first.job_id == job_id
+        assert first.attempts == 1
+
+        # 実行期限内は他のワーカーから見えない
+        assert claim_job(db, "worker-b", [job_type], visibility_timeout=30, now=now + timedelta(seconds=10)) is None
+
+        # 実行期限を過ぎると他のワーカーが取り出す
+        second = claim_job(db, "worker-b", [job_type], visibility_timeout=30, now=now + timedelta(seconds=31))
+        db.commit()
+        assert second.job_id == job_id
+        assert second.attempts == 2
+
+        # 期限切れ後の元のワーカーの報告は反映しない
+        assert complete_job(db, first, {"worker": "a"}) is False
+        assert complete_job(db, second, {"worker": "b"}) is True
+        db.commit()
+    finally:
+        db.close()
+
+    job = get_job(job_id)
+    assert job.status == "succeeded"
+    assert job.result == '{"worker": "b"}'
+    print("✅ 可視性タイムアウトの確認完了")
+
+
+def test_job_changes_committed_with_completion(job_type):
+    """処理の未コミットの変更は完了と同時にコミットし、実行期限切れで他のワーカーに移っていた場合は破棄する"""
+    @job_handler(job_type)
+    def handler(payload, db):
+        if payload.get("marker"):
+            return {}
+        if payload["lose_lease"]:
+            # 実行中に期限が切れ、他のワーカーが取り出した状態にする
+            other = SessionLocal()
+            try:
+                other.query(JobQueue).filter(JobQueue.job_id == payload["job_id"]).update({"locked_by": "worker-b"})
+                other.commit()
+            finally:
+                other.close()
+        enqueue_job(db, job_type, {"marker": payload["name"]}, "900001")
+        return {}
+
+    kept = enqueue(job_type)
+    lost = enqueue(job_type)
+    db = SessionLocal()
+    try:
+        for job_id, name, lose_lease in ((kept, "kept", False), (lost, "lost", True)):
+            db.query(JobQueue).filter(JobQueue.job_id == job_id).update(
+                {"payload": f'{{"job_id": {job_id}, "name": "{name}", "lose_lease": {str(lose_lease).lower()}}}'}
+            )
+        db.commit()
+    finally:
+        db.close()
+
+    run_pending_jobs("test-harness", settings=HARNESS_SETTINGS)
+
+    db = SessionLocal()
+    try:
+        markers = [job.payload for job in db.query(JobQueue).filter(
+            JobQueue.job_type == job_type, JobQueue.payload.like('{"marker"%')
+        )]
+    finally:
+        db.close()
+    assert markers == ['{"marker": "kept"}']
+    assert get_job(kept).status == "succeeded"
+    assert get_job(lost).status == "running"
+    print("✅ 完了と同時のコミット・期限切れ時の破棄の確認完了")
+
+
+def test_get_job_status_api(job_type):
+    """ジョブ状態取得API（システム認証キー・医療機関のアクセス権限）"""
+    job_handler(job_type)(lambda payload, db: {"ok": True})
+    job_id = enqueue(job_type, medical_id=5)
+    run_pending_jobs("test-harness", settings=HARNESS_SETTINGS)
+
+    res = requests.get(f"{BASE_URL}/jobs/{job_id}", headers=SYSTEM_HEADERS)
+    assert res.status_code == 200
+    job = res.json()
+    assert job["job_id"] == job_id
+    assert job["status"] == "succeeded"
+    assert job["result"] == {"ok": True}
+    assert job["medical_id"] == 5
+
+    # システム管理者は全医療機関のジョブを取得可能
+    res = requests.get(f"{BASE_URL}/jobs/{job_id}", headers=TEST_HEADERS)
+    assert res.status_code == 200
+
+    # 認証情報なし
+    res = requests.get(f"{BASE_URL}/jobs/{job_id}")
+    assert res.status_code == 401
+
+    # 存在しないジョブ
+    res = requests.get(f"{BASE_URL}/jobs/999999999", headers=SYSTEM_HEADERS)
+    assert res.status_code == 404
+    print(f"✅ ジョブ状態取得API: job_id={job_id}")
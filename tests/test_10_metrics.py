@@ -0,0 +1,74 @@
+"""test_10_metrics.py
+
+pytestを使用してメトリクス出力API（/metrics）と計測ミドルウェアのテストを行います。
+
+実行方法:
+- startup_optiserve.shを実行してAPIサーバーを起動
+- pytest tests/test_10_metrics.py -v
+"""
+
+import os
+import re
+
+import requests
+from api_auth import admin_headers
+
+# 環境に応じたAPI接続先の自動判定
+API_HOST = os.environ.get("OPTISERVE_API_HOST", "localhost")
+SERVER_URL = f"http://{API_HOST}:8000"
+BASE_URL = f"{SERVER_URL}/api/v1"
+
+# テスト用の共通ヘッダー（認証情報）
+TEST_HEADERS = admin_headers()  # システム管理者のセッショントークン
+
+SAMPLE_PATTERN = re.compile(r'^(?P<name>[a-z_]+)(?:\{(?P<labels>.*)\})? (?P<value>\S+)$')
+
+
+def get_samples():
+    """メトリクスを取得し、(メトリクス名, ラベル) → 値 の辞書を返す"""
+    res = requests.get(f"{SERVER_URL}/metrics")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain; version=0.0.4")
+    samples = {}
+    for line in res.text.splitlines():
+        if line.startswith("#") or not line:
+            continue
+        match = SAMPLE_PATTERN.match(line)
+        assert match, f"Prometheus形式ではない行: {line}"
+        labels = tuple(sorted(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', match["labels"] or "")))
+        samples[(match["name"], labels)] = float(match["value"])
+    return samples
+
+
+def test_metrics_records_route_latency_and_db_queries():
+    """ルートのテンプレートごとに処理時間・レスポンスサイズ・DBクエリ数を記録する"""
+    route = (("method", "GET"), ("route", "/api/v1/facilities/{facility_id}"))
+    before = get_samples()
+    count_before = before.get(("optiserve_http_request_duration_seconds_count", route), 0)
+
+    for facility_id in (1, 4, 5):
+        res = requests.get(f"{BASE_URL}/facilities/{facility_id}", headers=TEST_HEADERS)
+        assert res.status_code == 200
+
+    samples = get_samples()
+    assert samples[("optiserve_http_request_duration_seconds_count", route)] == count_before + 3
+    assert samples[("optiserve_http_request_duration_seconds_bucket", (("le", "+Inf"),) + route)] == count_before + 3
+    assert samples[("optiserve_http_requests_total", route + (("status", "200"),))] >= 3
+    # 認証（AuthManager）と施設の取得でDBに問い合わせる
+    assert samples[("optiserve_http_request_db_queries_sum", route)] >= 3
+    assert samples[("optiserve_http_request_db_seconds_sum", route)] > 0
+    assert samples[("optiserve_http_response_size_bytes_sum", route)] > 0
+    assert samples[("optiserve_db_queries_total", ())] >= samples[("optiserve_http_request_db_queries_sum", route)]
+    print(f"✅ 処理時間の合計: {samples[('optiserve_http_request_duration_seconds_sum', route)]:.4f}秒")
+
+
+def test_metrics_unmatched_route():
+    """ルートに一致しないリクエストは route="unmatched" に集約する"""
+    res = requests.get(f"{BASE_URL}/no-such-endpoint/12345")
+    assert res.status_code == 404
+
+    samples = get_samples()
+    key = ("optiserve_http_requests_total", (("method", "GET"), ("route", "unmatched"), ("status", "404")))
+    assert samples[key] >= 1
+    assert not any("/no-such-endpoint" in dict(labels).get("route", "") for _, labels in samples)
+    print("✅ 一致しないルートの集約")
@@ -0,0 +1,139 @@
+"""test_11_query_debug.py
+
+pytestを使用して遅いクエリのログとN+1クエリの検出（src/database.py の query_debug）のテストを行います。
+
+実行方法:
+- pytest tests/test_11_query_debug.py -v
+
+前提条件:
+- APIサーバーは使用せず、本テストのプロセス内でDBに接続して確認します
+- APIサーバー全体でN+1クエリを検出する場合は、OPTISERVE_QUERY_DEBUG=strict でAPIサーバーを起動してから
+  全テストを実行します（N+1クエリのあるAPIは500を返し、そのテストが失敗します）
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+# プロジェクトルートをsys.pathに追加
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.database import (
+    NPlusOneQueryError,
+    QueryDebugSettings,
+    SessionLocal,
+    enable_query_debug,
+    statement_shape,
+    track_queries,
+)
+from src.models.pg_optigate.medical_equipment_analysis_setting import MedicalEquipmentAnalysisSetting
+from src.models.pg_optigate.medical_equipment_ledger import MedicalEquipmentLedger
+from src.models.pg_optigate.mst_equipment_classification import MstEquipmentClassification
+from src.routers.medical_equipment_analysis import get_medical_equipment_analysis_settings
+
+STRICT = QueryDebugSettings(enabled=True, slow_query_ms=0, n_plus_one_threshold=5, raise_on_n_plus_one=True)
+
+
+@pytest.fixture
+def db():
+    enable_query_debug()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+
+def test_statement_shape_ignores_in_list_length():
+    """IN句の要素数・空白の違いは同じ形として扱う"""
+    assert statement_shape("SELECT * FROM t WHERE id IN (?, ?, ?)") == statement_shape("SELECT *\n FROM t WHERE id IN (?)")
+    assert statement_shape("SELECT * FROM t WHERE id = ?") != statement_shape("SELECT * FROM u WHERE id = ?")
+
+
+def test_n_plus_one_detected(db):
+    """同じ形のSQLがしきい値を超えて実行された場合に検出する"""
+    ids = [row.classification_id for row in db.query(MstEquipmentClassification.classification_id).limit(10)]
+    if len(ids) < 10:
+        pytest.skip("機器分類のデータが不足しています")
+
+    # しきい値以内は検出しない
+    with track_queries("within-threshold", STRICT) as tracker:
+        for classification_id in ids[:5]:
+            db.query(MstEquipmentClassification).filter(
+                MstEquipmentClassification.classification_id == classification_id
+            ).first()
+    assert tracker.n_plus_one == {}
+
+    # 1件ずつの問い合わせのループ
+    with pytest.raises(NPlusOneQueryError):
+        with track_queries("loop", STRICT):
+            for classification_id in ids:
+                db.query(MstEquipmentClassification).filter(
+                    MstEquipmentClassification.classification_id == classification_id
+                ).first()
+
+    # 例外を送出しない設定では検出結果のみ記録
+    with track_queries("log-only", STRICT._replace(raise_on_n_plus_one=False)) as tracker:
+        for classification_id in ids:
+            db.query(MstEquipmentClassification).filter(
+                MstEquipmentClassification.classification_id == classification_id
+            ).first()
+    assert list(tracker.n_plus_one.values()) == [10]
+    print(f"✅ N+1クエリの検出: {list(tracker.n_plus_one)[0][:80]}")
+
+
+def test_slow_query_logged_with_plan(db, caplog):
+    """しきい値以上かかったSELECTを実行計画付きでログに出力する"""
+    settings = STRICT._replace(slow_query_ms=0.000001, n_plus_one_threshold=0)
+    with caplog.at_level(logging.WARNING, logger="src.database"):
+        with track_queries("slow", settings):
+            db.query(MedicalEquipmentLedger).filter(MedicalEquipmentLedger.medical_id == 5).first()
+
+    messages = [record.getMessage() for record in caplog.records if "遅いクエリ" in record.getMessage()]
+    assert messages
+    assert "medical_equipment_ledger" in messages[0]
+    # SQLite: EXPLAIN QUERY PLAN の SCAN / SEARCH
+    assert "SCAN" in messages[0] or "SEARCH" in messages[0] or "Scan" in messages[0]
+    print(f"✅ 遅いクエリのログ: {messages[0][:120]}")
+
+
+def test_analysis_settings_list_has_no_n_plus_one(db):
+    """分析設定一覧の取得で、上書き分類を機器ごとに問い合わせない"""
+    ledgers = db.query(MedicalEquipmentLedger).filter(
+        MedicalEquipmentLedger.medical_id == 5,
+        MedicalEquipmentLedger.classification_id.isnot(None)
+    ).limit(20).all()
+    classification_ids = [row.classification_id for row in db.query(MstEquipmentClassification.classification_id)
+                          .filter(MstEquipmentClassification.medical_id == 5).limit(30)]
+    if len(ledgers) < 20 or len(classification_ids) < 2:
+        pytest.skip("テスト対象データが不足しています")
+
+    # 20件の機器に分類上書きを設定（テスト終了時にロールバック）
+    now = datetime.now()
+    for ledger in ledgers:
+        override_id = next(cid for cid in classification_ids if cid != ledger.classification_id)
+        db.add(MedicalEquipmentAnalysisSetting(
+            ledger_id=ledger.ledger_id, override_is_included=True, override_classification_id=override_id,
+            note=json.dumps([]), reg_user_id="900001", regdate=now, update_user_id="900001", lastupdate=now
+        ))
+    db.flush()
+
+    with track_queries("GET /api/v1/medical-equipment-analysis-settings", STRICT) as tracker:
+        response = asyncio.run(get_medical_equipment_analysis_settings(
+            medical_id=5, classification_id=None, include_descendants=True, skip=0, limit=1000,
+            current_user_id="900001", db=db
+        ))
+    assert tracker.n_plus_one == {}
+    items = json.loads(response.body)["items"]
+    assert sum(1 for item in items if item["has_override"]) == 20
+    overridden = next(item for item in items if item["has_override"])
+    assert overridden["effective_classification_id"] == overridden["override_classification_id"]
+    assert overridden["classification_name"] is not None
+    print(f"✅ 一覧取得のクエリ: {sum(tracker.counts.values())}件")
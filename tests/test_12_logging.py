@@ -0,0 +1,165 @@
+"""test_12_logging.py
+
+pytestを使用してキュー経由のログ出力（src/utils/logging_config.py）のテストを行います。
+
+実行方法:
+- pytest tests/test_12_logging.py -v
+
+前提条件:
+- APIサーバー・DBは使用せず、一時ディレクトリにログを出力して確認します
+- ルートロガーは変更せず、テスト用のロガーにキューのハンドラーを追加します
+"""
+
+import json
+import logging
+import os
+import queue
+import sys
+from datetime import date, timedelta
+
+import pytest
+
+# プロジェクトルートをsys.pathに追加
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.utils.logging_config import (
+    DroppingQueueHandler,
+    LoggingSettings,
+    build_log_pipeline,
+    get_logging_settings,
+)
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    """テスト用ロガーにキューのハンドラーを追加し、出力スレッドを開始する"""
+    created = []
+
+    def start(**overrides):
+        settings = LoggingSettings(log_dir=str(tmp_path), file_prefix="test", console=False, **overrides)
+        handler, listener = build_log_pipeline(settings)
+        logger = logging.getLogger(f"optiserve_test_logging_{len(created)}")
+        logger.setLevel(logging.DEBUG)
+        logger.propagate = False
+        logger.addHandler(handler)
+        listener.start()
+        created.append((logger, handler, listener))
+        return logger, listener
+
+    yield start
+    for logger, handler, listener in created:
+        logger.removeHandler(handler)
+        if listener._thread is not None:
+            listener.stop()
+        for output in listener.handlers:
+            output.close()
+
+
+def read_records(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_logging_settings_from_config():
+    """config.yaml の logging が読み込まれること"""
+    settings = get_logging_settings()
+    assert settings.format in ("json", "text")
+    assert settings.queue_size > 0
+    assert isinstance(settings.loggers, dict)
+
+
+def test_json_output_with_extra_and_exception(pipeline):
+    """JSON形式で、メッセージの引数・extra の項目・例外のトレースバックが出力されること"""
+    logger, listener = pipeline()
+    logger.info("取込完了: %d件", 3, extra={"medical_id": 5})
+    try:
+        raise ValueError("テスト例外")
+    except ValueError:
+        logger.exception("取込失敗")
+    listener.stop()  # キューに残ったログを出力してから停止
+
+    file_handler = listener.handlers[0]
+    assert os.path.basename(file_handler.baseFilename) == f"test_{date.today():%Y%m%d}.log"
+    records = read_records(file_handler.baseFilename)
+    assert [r["message"] for r in records] == ["取込完了: 3件", "取込失敗"]
+    assert records[0]["level"] == "INFO"
+    assert records[0]["logger"] == logger.name
+    assert records[0]["medical_id"] == 5
+    assert "exception" not in records[0]
+    assert "ValueError: テスト例外" in records[1]["exception"]
+
+
+def test_text_format(pipeline):
+    """text 形式では従来の [日時][レベル] メッセージ で出力されること"""
+    logger, listener = pipeline(format="text")
+    logger.warning("警告メッセージ")
+    listener.stop()
+
+    with open(listener.handlers[0].baseFilename, encoding="utf-8") as f:
+        line = f.read().strip()
+    assert line.endswith("[WARNING] 警告メッセージ")
+
+
+def test_size_rotation(pipeline, tmp_path):
+    """max_bytes を超えた場合に .1, .2 ... に退避され、backup_count を超えた分は削除されること"""
+    logger, listener = pipeline(max_bytes=1000, backup_count=2)
+    for i in range(100):
+        logger.info("x" * 100, extra={"seq": i})
+    listener.stop()
+
+    base = listener.handlers[0].baseFilename
+    assert os.path.exists(base + ".1")
+    assert os.path.exists(base + ".2")
+    assert not os.path.exists(base + ".3")
+    assert all(os.path.getsize(path) <= 1000 for path in (base, base + ".1", base + ".2"))
+    # 最新のログは現在のファイルに出力されている
+    assert read_records(base)[-1]["seq"] == 99
+
+
+def test_daily_rotation_and_retention(pipeline, tmp_path):
+    """日付が変わった場合に新しい日付のファイルに切り替え、保存期間を過ぎたファイルを削除すること"""
+    logger, listener = pipeline(retention_days=7)
+    file_handler = listener.handlers[0]
+    expired = tmp_path / f"test_{date.today() - timedelta(days=8):%Y%m%d}.log"
+    expired.write_text("", encoding="utf-8")
+    (tmp_path / f"{expired.name}.1").write_text("", encoding="utf-8")
+    kept = tmp_path / f"test_{date.today() - timedelta(days=6):%Y%m%d}.log"
+    kept.write_text("", encoding="utf-8")
+
+    # 前日から起動していた状態にする
+    yesterday = date.today() - timedelta(days=1)
+    file_handler.current_date = yesterday
+    file_handler.baseFilename = os.path.abspath(file_handler.path_for(yesterday))
+    logger.info("日付変更後のログ")
+    listener.stop()
+
+    assert os.path.basename(file_handler.baseFilename) == f"test_{date.today():%Y%m%d}.log"
+    assert read_records(file_handler.baseFilename)[0]["message"] == "日付変更後のログ"
+    assert not expired.exists()
+    assert not (tmp_path / f"{expired.name}.1").exists()
+    assert kept.exists()
+
+
+def test_logger_levels(pipeline):
+    """ロガーごとのレベル（loggers）がルートロガーより優先されること"""
+    logger, listener = pipeline()
+    child = logging.getLogger(f"{logger.name}.quiet")
+    child.setLevel(logging.WARNING)
+    child.info("出力されない")
+    child.warning("出力される")
+    logger.debug("デバッグ")
+    listener.stop()
+
+    records = read_records(listener.handlers[0].baseFilename)
+    assert [r["message"] for r in records] == ["出力される", "デバッグ"]
+
+
+def test_full_queue_drops_records():
+    """キューが上限に達した場合は待たずに破棄し、件数を数えること"""
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, "message", None, None)
+    for _ in range(5):
+        handler.handle(record)
+    assert handler.queue.qsize() == 2
+    assert handler.dropped_count == 3
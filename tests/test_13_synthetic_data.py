@@ -0,0 +1,103 @@
+"""test_13_synthetic_data.py
+
+pytestを使用して試験データの生成（src/cli/generate_synthetic_data.py）のテストを行います。
+
+実行方法:
+- pytest tests/test_13_synthetic_data.py -v
+
+前提条件:
+- APIサーバーは使用せず、poc_optigate.db を一時ディレクトリにコピーしたDBに生成します
+"""
+
+import os
+import shutil
+import sys
+from datetime import date
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+# プロジェクトルートをsys.pathに追加
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.cli.generate_synthetic_data import GenerationSettings, generate
+from src.models.pg_optigate.facility_upload_log import FacilityUploadLog
+from src.models.pg_optigate.medical_equipment_analysis_setting import MedicalEquipmentAnalysisSetting
+from src.models.pg_optigate.medical_equipment_classification_stat import MedicalEquipmentClassificationStat
+from src.models.pg_optigate.medical_equipment_ledger import MedicalEquipmentLedger
+from src.models.pg_optigate.mst_user import MstUser
+
+SETTINGS = GenerationSettings(facilities=2, ledger=400, override_ratio=0.05, months=6, seed=7,
+                              as_of=date(2026, 10, 1))
+
+
+def generate_into_copy(tmp_path, name, settings=SETTINGS):
+    """DBのコピーに試験データを生成し、生成した医療機関と機器台帳を返す"""
+    db_path = tmp_path / f"{name}.db"
+    shutil.copy(os.path.join(project_root, "poc_optigate.db"), db_path)
+    engine = create_engine(f"sqlite:///{db_path}")
+    try:
+        with Session(engine) as db:
+            facilities = generate(settings, db)
+            medical_ids = [facility.medical_id for facility in facilities]
+            ledger = db.execute(
+                select(MedicalEquipmentLedger.medical_id, MedicalEquipmentLedger.model_number,
+                       MedicalEquipmentLedger.classification_id, MedicalEquipmentLedger.stock_quantity,
+                       MedicalEquipmentLedger.is_included)
+                .where(MedicalEquipmentLedger.medical_id.in_(medical_ids))
+                .order_by(MedicalEquipmentLedger.ledger_id)
+            ).all()
+            counts = {
+                "users": db.scalar(select(func.count()).select_from(MstUser)
+                                   .where(MstUser.entity_type == 1, MstUser.entity_relation_id.in_(medical_ids))),
+                "overrides": db.scalar(select(func.count()).select_from(MedicalEquipmentAnalysisSetting)),
+                "uploads": db.scalar(select(func.count()).select_from(FacilityUploadLog)
+                                     .where(FacilityUploadLog.medical_id.in_(medical_ids))),
+                "stat_ledger_count": db.scalar(
+                    select(func.sum(MedicalEquipmentClassificationStat.ledger_count))
+                    .where(MedicalEquipmentClassificationStat.medical_id.in_(medical_ids))
+                ),
+            }
+        return facilities, ledger, counts
+    finally:
+        engine.dispose()
+
+
+def test_generate_counts(tmp_path):
+    """指定した件数の機器台帳・上書き・集計値が登録されること"""
+    facilities, ledger, counts = generate_into_copy(tmp_path, "counts")
+
+    assert len(facilities) == 2
+    assert [len(facility.ledger_ids) for facility in facilities] == [400, 400]
+    assert len(ledger) == 800
+    assert all(facility.user_ids and facility.classification_ids for facility in facilities)
+    assert counts["users"] >= 2
+    assert counts["overrides"] == 40
+    assert 0 < counts["uploads"] <= 2 * 6 * 3
+    assert counts["stat_ledger_count"] == 800
+    # 機器の分類は医療機関の最下位の分類（または分類無し）
+    for facility in facilities:
+        leaves = set(facility.classification_ids)
+        rows = [row for row in ledger if row.medical_id == facility.medical_id]
+        assert all(row.classification_id is None or row.classification_id in leaves for row in rows)
+        assert len({row.model_number for row in rows}) == len(rows)
+
+
+def test_generate_is_deterministic(tmp_path):
+    """同じ乱数の種・引数であれば同じデータが生成されること"""
+    first = generate_into_copy(tmp_path, "first")
+    second = generate_into_copy(tmp_path, "second")
+    assert first[1] == second[1]
+    assert first[2] == second[2]
+
+    _, other, _ = generate_into_copy(tmp_path, "other", SETTINGS._replace(seed=8))
+    assert other != first[1]
+
+
+def test_generate_fixed_classification_tree(tmp_path):
+    """--classifications を指定した場合は3階層の木の最下位の分類が使われること"""
+    facilities, _, _ = generate_into_copy(
+        tmp_path, "tree", SETTINGS._replace(facilities=1, ledger=50, classifications=56, months=1)
+    )
+    assert len(facilities[0].classification_ids) == 50
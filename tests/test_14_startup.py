@@ -0,0 +1,71 @@
+"""test_14_startup.py
+
+pytestを使用してAPIサーバーの起動時間（src/main.py の読み込み）のテストを行います。
+
+実行方法:
+- pytest tests/test_14_startup.py -v
+
+前提条件:
+- APIサーバーは使用せず、別プロセスで python -X importtime -c "import src.main" を実行して確認します
+- poc_optigate.db・config.yaml を一時ディレクトリにコピーし、OPTISERVE_BASE_PATH に指定します
+"""
+
+import os
+import re
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+# プロジェクトルートをsys.pathに追加
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+# src.main の読み込み時間の上限（秒）。計測環境の差を考慮して余裕を持たせる
+IMPORT_BUDGET_SECONDS = 3.0
+
+# 起動時に読み込まない（使用時に読み込む）モジュール
+DEFERRED_MODULES = ("chardet", "openpyxl")
+
+
+@pytest.fixture(scope="module")
+def import_profile(tmp_path_factory):
+    """別プロセスで src.main を読み込み、モジュールごとの読み込み時間（マイクロ秒）と一時ディレクトリを返す"""
+    base = tmp_path_factory.mktemp("startup")
+    shutil.copy(os.path.join(project_root, "poc_optigate.db"), base / "poc_optigate.db")
+    shutil.copy(os.path.join(project_root, "config.yaml"), base / "config.yaml")
+    env = dict(os.environ, OPTISERVE_BASE_PATH=str(base), PYTHONPATH=project_root)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import src.main"],
+        cwd=base, env=env, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    # import time: self [us] | cumulative | imported package
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)", line)
+        if match:
+            cumulative[match.group(4)] = int(match.group(2))
+    return cumulative, base
+
+
+def test_import_time_within_budget(import_profile):
+    """src.main の読み込みが上限時間内に終わること"""
+    cumulative, _ = import_profile
+    assert "src.main" in cumulative
+    assert cumulative["src.main"] / 1_000_000 < IMPORT_BUDGET_SECONDS
+
+
+def test_heavy_modules_deferred(import_profile):
+    """使用時にのみ必要なモジュールを起動時に読み込まないこと"""
+    cumulative, _ = import_profile
+    for module in DEFERRED_MODULES:
+        assert module not in cumulative, f"{module} が起動時に読み込まれています"
+
+
+def test_import_does_not_create_directories(import_profile):
+    """モジュールの読み込みでファイル管理のディレクトリを作成しないこと（lifespan で作成）"""
+    _, base = import_profile
+    assert not (base / "files").exists()
@@ -0,0 +1,133 @@
+"""test_15_serve.py
+
+pytestを使用して本番環境向けAPIサーバーの起動（src/cli/serve.py）のテストを行います。
+
+実行方法:
+- pytest tests/test_15_serve.py -v
+
+前提条件:
+- 起動のテストでは poc_optigate.db・config.yaml を一時ディレクトリにコピーし、
+  OPTISERVE_BASE_PATH に指定して別プロセスで gunicorn（2ワーカー）を起動します（ポート 8012）
+"""
+
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import time
+
+import pytest
+import requests
+
+# プロジェクトルートをsys.pathに追加
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.cli import serve
+from src.cli.serve import ServerSettings, build_gunicorn_options, get_server_settings, resolve_worker_count
+from src.utils import config_loader
+
+PORT = 8012
+
+
+def test_settings_from_config_and_env():
+    """config.yaml の server を環境変数 OPTISERVE_SERVER_* で上書きできること"""
+    settings = get_server_settings({})
+    assert settings.bind
+    assert settings.max_requests >= 0
+
+    settings = get_server_settings({
+        "OPTISERVE_SERVER_WORKERS": "3",
+        "OPTISERVE_SERVER_PRELOAD_APP": "false",
+        "OPTISERVE_SERVER_BIND": "127.0.0.1:9000",
+        "OPTISERVE_SERVER_TIMEOUT": "",  # 空の場合は config.yaml の値
+    })
+    assert settings.workers == 3
+    assert settings.preload_app is False
+    assert settings.bind == "127.0.0.1:9000"
+    assert settings.timeout == get_server_settings({}).timeout
+
+
+def test_load_section_settings(monkeypatch):
+    """config.yaml のセクションを既定値の型に変換し、未設定・null の項目は既定値とすること"""
+    monkeypatch.setattr(config_loader, "load_config", lambda: {"server": {"workers": "4", "preload_app": "off", "timeout": None}})
+    settings = config_loader.load_section_settings("server", ServerSettings)
+    assert settings.workers == 4
+    assert settings.preload_app is False
+    assert settings.timeout == ServerSettings().timeout
+    assert settings.bind == ServerSettings().bind
+
+    monkeypatch.setattr(config_loader, "load_config", lambda: {"server": None})
+    assert config_loader.load_section_settings("server", ServerSettings) == ServerSettings()
+
+
+def test_worker_count_and_options(monkeypatch):
+    """workers が 0 の場合はCPU数とし、gunicorn の設定に入れ替え・停止待ちの設定を含めること"""
+    monkeypatch.setattr(serve, "available_cpu_count", lambda: 6)
+    assert resolve_worker_count(ServerSettings(workers=0)) == 6
+    assert resolve_worker_count(ServerSettings(workers=2)) == 2
+
+    options = build_gunicorn_options(ServerSettings(workers=0, max_requests=100, max_requests_jitter=10))
+    assert options["workers"] == 6
+    assert options["worker_class"] == serve.WORKER_CLASS
+    assert options["preload_app"] is True
+    assert (options["max_requests"], options["max_requests_jitter"]) == (100, 10)
+    assert callable(options["post_fork"])
+    # 入れ替えを行わない場合は jitter も 0
+    assert build_gunicorn_options(ServerSettings(max_requests=0))["max_requests_jitter"] == 0
+
+
+def test_multiple_workers_require_session_secret(monkeypatch, capsys):
+    """複数ワーカー構成で署名鍵が未設定の場合は起動しないこと"""
+    monkeypatch.setattr(serve, "session_secret_configured", lambda: False)
+    monkeypatch.setattr(serve, "run", lambda settings: pytest.fail("起動してはいけない"))
+    assert serve.main(["--workers", "2"]) == 1
+    assert "OPTISERVE_SESSION_SECRET" in capsys.readouterr().err
+
+
+@pytest.fixture
+def server_base(tmp_path):
+    shutil.copy(os.path.join(project_root, "poc_optigate.db"), tmp_path / "poc_optigate.db")
+    shutil.copy(os.path.join(project_root, "config.yaml"), tmp_path / "config.yaml")
+    return tmp_path
+
+
+def test_serve_recycles_workers_and_stops_on_sigterm(server_base):
+    """2ワーカーで起動し、max_requests でワーカーを入れ替えながら応答し、SIGTERM で正常に停止すること"""
+    pytest.importorskip("gunicorn")
+    pytest.importorskip("uvicorn_worker")
+    env = dict(
+        os.environ, OPTISERVE_BASE_PATH=str(server_base), PYTHONPATH=project_root,
+        OPTISERVE_SESSION_SECRET="test-secret", OPTISERVE_SERVER_WORKERS="2",
+        OPTISERVE_SERVER_BIND=f"127.0.0.1:{PORT}", OPTISERVE_SERVER_MAX_REQUESTS="5",
+        OPTISERVE_SERVER_MAX_REQUESTS_JITTER="0", OPTISERVE_SERVER_GRACEFUL_TIMEOUT="10",
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "src.cli.serve"], cwd=server_base, env=env,
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+    )
+    try:
+        deadline = time.time() + 30
+        while True:
+            try:
+                requests.get(f"http://127.0.0.1:{PORT}/openapi.json", timeout=1)
+                break
+            except requests.ConnectionError:
+                assert process.poll() is None and time.time() < deadline, "APIサーバーが起動しません"
+                time.sleep(0.2)
+
+        # ワーカーごとに5件で入れ替わるため、20件の間に入れ替えが発生する
+        statuses = [requests.get(f"http://127.0.0.1:{PORT}/openapi.json", timeout=10).status_code
+                    for _ in range(20)]
+        assert statuses == [200] * 20
+        # uvicorn は処理件数の上限を1秒ごとに確認するため、入れ替えが始まるまで待つ
+        time.sleep(1.5)
+    finally:
+        process.send_signal(signal.SIGTERM)
+        output, _ = process.communicate(timeout=30)
+
+    assert process.returncode == 0, output[-2000:]
+    assert "Maximum request limit of 5 exceeded" in output
+    assert "Application shutdown complete" in output
+    assert "Shutting down: Master" in output
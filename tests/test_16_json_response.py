@@ -0,0 +1,81 @@
+"""test_16_json_response.py
+
+pytestを使用してJSONレスポンスの高速化（src/utils/json_response.py と一覧の辞書の組み立て）のテストを行います。
+
+実行方法:
+- pytest tests/test_16_json_response.py -v
+
+前提条件:
+- APIサーバー・DBは使用しません（APIの応答は test_06, test_07 で確認します）
+"""
+
+import json
+import os
+import sys
+from datetime import datetime
+
+import pytest
+from fastapi.responses import JSONResponse
+
+# プロジェクトルートをsys.pathに追加
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from benchmarks.bench_json_serialization import build_models, generate_rows
+from src.routers.medical_equipment_analysis import (
+    build_analysis_item,
+    parse_note_history,
+    parse_note_history_dicts,
+)
+from src.utils import json_response
+from src.utils.json_response import FastJSONResponse, dumps_json
+
+CONTENT = {"name": "輸液ポンプ", "values": [1, 2.5, None, True], "nested": {"ok": False}}
+
+
+@pytest.mark.parametrize("orjson_available", [True, False])
+def test_same_output_as_json_response(monkeypatch, orjson_available):
+    """orjson の有無によらず Starlette の JSONResponse と同じバイト列になること"""
+    if orjson_available and not json_response.ORJSON_AVAILABLE:
+        pytest.skip("orjson が未インストール")
+    monkeypatch.setattr(json_response, "ORJSON_AVAILABLE", orjson_available)
+    assert FastJSONResponse(CONTENT).body == JSONResponse(CONTENT).body
+    assert FastJSONResponse(CONTENT).headers["content-type"] == "application/json"
+    # 文字列以外のキーは文字列に変換される
+    assert json.loads(dumps_json({1: "a"})) == {"1": "a"}
+
+
+def test_rows_match_response_model():
+    """行から組み立てた辞書が、MedicalEquipmentAnalysisResponse でシリアライズした値と一致すること"""
+    rows = generate_rows(200, override_ratio=0.5)
+    expected = build_models(rows).model_dump(mode="json")["items"]
+    assert [build_analysis_item(row) for row in rows] == expected
+    assert any(item["note_history"] for item in expected)
+
+
+def test_override_classification_missing():
+    """上書き分類が分類マスタに無い場合は、台帳の分類の名称・レベルを返すこと（変更前と同じ）"""
+    row = generate_rows(1, override_ratio=1.0)[0]._replace(
+        override_classification_exists=None, override_classification_name=None, override_classification_level=None
+    )
+    item = build_analysis_item(row)
+    assert item["effective_classification_id"] == row.override_classification_id
+    assert (item["classification_name"], item["classification_level"]) == (row.classification_name, 3)
+    assert item["last_modified"] == row.lastupdate.isoformat()
+
+
+@pytest.mark.parametrize("note", [
+    "",
+    None,
+    "not json",
+    json.dumps([{"user_id": "1", "timestamp": "2026-10-19 10:00:00", "note": "変更", "extra": 1}]),
+    json.dumps([{"user_id": "1", "timestamp": "2026-10-19 10:00:00"}]),
+    json.dumps([{"user_id": 1, "timestamp": "2026-10-19 10:00:00", "note": "変更"}]),
+    json.dumps({"user_id": "1"}),
+    json.dumps(["text"]),
+    json.dumps(5),
+])
+def test_note_history_same_as_model(note):
+    """変更履歴の辞書が parse_note_history（NoteHistoryItem）と同じ判定・内容になること"""
+    expected = [item.model_dump() for item in parse_note_history(note)]
+    assert parse_note_history_dicts(note) == expected
@@ -0,0 +1,155 @@
+"""test_17_compression.py
+
+pytestを使用してレスポンスの圧縮（src/utils/compression.py）のテストを行います。
+
+実行方法:
+- pytest tests/test_17_compression.py -v
+
+前提条件:
+- ミドルウェアのテストはAPIサーバーを使用せず、テスト用のASGIアプリに対して実行します
+- 機器分類一覧のテストはAPIサーバーが localhost:8000 で起動していること
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import sys
+
+import pytest
+import requests
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+
+# プロジェクトルートをsys.pathに追加
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from src.utils import compression
+from src.utils.compression import CompressionMiddleware, CompressionSettings, select_encoding
+from src.utils.json_response import FastJSONResponse
+from api_auth import admin_headers
+
+BASE_URL = "http://localhost:8000/api/v1"
+TEST_HEADERS = admin_headers()  # システム管理者のセッショントークン
+
+LARGE_JSON = {"items": [{"classification_name": f"輸液ポンプ{i}", "classification_level": 3} for i in range(200)]}
+PDF_BYTES = b"%PDF-1.4\n" + b"0" * 5000
+
+
+def make_app(path: str):
+    """パスに応じたレスポンスを返すテスト用のASGIアプリ"""
+    async def app(scope, receive, send):
+        if path == "/json":
+            response = FastJSONResponse(LARGE_JSON, headers={"ETag": '"v1"'})
+        elif path == "/small":
+            response = PlainTextResponse("ok")
+        elif path == "/pdf":
+            response = Response(PDF_BYTES, media_type="application/pdf")
+        elif path == "/stream":
+            response = StreamingResponse(iter([b"line,\xe8\xbc\xb8\xe6\xb6\xb2\n" * 100] * 5), media_type="text/csv")
+        else:
+            response = Response(b"x" * 5000, status_code=206, media_type="text/plain")
+        await response(scope, receive, send)
+    return app
+
+
+def call(path: str, accept_encoding: str = None, method: str = "GET", settings=CompressionSettings()):
+    """ミドルウェアを通してリクエストし、ステータス・ヘッダー・本文（連結）を返す"""
+    headers = [(b"accept-encoding", accept_encoding.encode())] if accept_encoding is not None else []
+    scope = {"type": "http", "method": method, "path": path, "headers": headers}
+    messages = []
+    requested = []
+
+    async def receive():
+        # 本文を返した後は切断されるまで待つ（StreamingResponse は切断を監視する）
+        if requested:
+            await asyncio.Event().wait()
+        requested.append(True)
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(CompressionMiddleware(make_app(path), settings)(scope, receive, send))
+    start = messages[0]
+    response_headers = {key.decode().lower(): value.decode() for key, value in start["headers"]}
+    body = b"".join(m.get("body", b"") for m in messages[1:])
+    return start["status"], response_headers, body
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate, br", "br"),
+    ("gzip", "gzip"),
+    ("br;q=0, gzip", "gzip"),
+    ("identity", None),
+    ("*", "br"),
+    ("gzip;q=0", None),
+])
+def test_select_encoding(monkeypatch, header, expected):
+    """Accept-Encoding から br > gzip の順に方式を選択すること（q=0 は使用しない）"""
+    monkeypatch.setattr(compression, "BROTLI_AVAILABLE", True)
+    assert select_encoding(header) == expected
+
+
+def test_gzip_json():
+    """gzip を受け付ける場合、JSONを圧縮して Content-Length・Vary を設定すること（ETag は変更しない）"""
+    status, headers, body = call("/json", "gzip")
+    assert status == 200
+    assert headers["content-encoding"] == "gzip"
+    assert headers["vary"] == "Accept-Encoding"
+    assert headers["etag"] == '"v1"'
+    assert int(headers["content-length"]) == len(body)
+    assert json.loads(gzip.decompress(body)) == LARGE_JSON
+
+
+@pytest.mark.skipif(not compression.BROTLI_AVAILABLE, reason="brotli / brotlicffi が未インストール")
+def test_brotli_json():
+    """br を受け付ける場合は Brotli で圧縮すること"""
+    status, headers, body = call("/json", "br, gzip")
+    assert headers["content-encoding"] == "br"
+    assert json.loads(compression.brotli.decompress(body)) == LARGE_JSON
+
+
+def test_streaming_response():
+    """分割して送信するレスポンスは順に圧縮し、Content-Length を設定しないこと"""
+    status, headers, body = call("/stream", "gzip")
+    assert headers["content-encoding"] == "gzip"
+    assert "content-length" not in headers
+    assert gzip.decompress(body) == "line,輸液\n".encode() * 500
+
+
+@pytest.mark.parametrize("path, accept_encoding, method", [
+    ("/small", "gzip", "GET"),        # minimum_size 未満
+    ("/pdf", "gzip", "GET"),          # 圧縮済みの形式（レポートのPDF）
+    ("/partial", "gzip", "GET"),      # 部分取得（206）
+    ("/json", None, "GET"),           # Accept-Encoding 無し
+    ("/json", "identity", "GET"),     # 圧縮を受け付けない
+    ("/json", "gzip", "HEAD"),
+])
+def test_not_compressed(path, accept_encoding, method):
+    """圧縮しないレスポンスは本文・ヘッダーをそのまま返すこと"""
+    status, headers, body = call(path, accept_encoding, method)
+    assert "content-encoding" not in headers
+    if method == "GET":
+        assert int(headers["content-length"]) == len(body)
+
+
+def test_minimum_size_setting():
+    """minimum_size を超える小さいレスポンスのみ圧縮しないこと"""
+    _, headers, _ = call("/json", "gzip", settings=CompressionSettings(minimum_size=10 ** 7))
+    assert "content-encoding" not in headers
+
+
+def test_classification_list_compressed_over_http():
+    """APIサーバーの機器分類一覧が圧縮して返り、展開後の内容が変わらないこと"""
+    url = f"{BASE_URL}/equipment-classifications/5?limit=1000"
+    plain = requests.get(url, headers={**TEST_HEADERS, "Accept-Encoding": "identity"})
+    assert plain.status_code == 200
+    assert "Content-Encoding" not in plain.headers
+
+    compressed = requests.get(url, headers={**TEST_HEADERS, "Accept-Encoding": "gzip"}, stream=True)
+    raw = compressed.raw.read(decode_content=False)
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert len(raw) < len(plain.content)
+    assert json.loads(gzip.decompress(raw)) == plain.json()
+    assert compressed.headers["ETag"] == plain.headers["ETag"]